@@ -3,6 +3,8 @@ __license__ = "GNU GPLv2"
 
 import unittest
 
+from beancount.core.number import D
+from beancount.core import amount
 from beancount.core import data
 from beancount.core import compare
 from beancount import loader
@@ -123,3 +125,44 @@ class TestCompare(unittest.TestCase):
         excludes, extra = compare.excludes_entries(entries1[0:4], entries2[4:])
         self.assertTrue(excludes)
         self.assertFalse(extra)
+
+    def test_hash_entry(self):
+        # The digests of hash_entry() are persistent identifiers; make sure they
+        # do not change.
+        entries, _, __ = loader.load_string(TEST_INPUT)
+        self.assertEqual('9ea493e59c5216f25465adc81aee3408',
+                         compare.hash_entry(entries[0]))
+
+    def test_hash_entry_memo(self):
+        entries, _, __ = loader.load_string(TEST_INPUT)
+        memo = {}
+        self.assertEqual([compare.hash_entry(entry) for entry in entries],
+                         [compare.hash_entry(entry, memo) for entry in entries])
+        self.assertTrue(memo)
+
+        # The metadata is ignored, and the order of the sets is irrelevant.
+        entry = entries[6]
+        self.assertEqual(
+            compare.hash_entry(entry),
+            compare.hash_entry(entry._replace(meta={},
+                                              tags=set(reversed(sorted(entry.tags))))))
+
+    def test_amount_string(self):
+        for number in ['100', '100.00', '-0', '1E+3', '1.0E+2', '1E-10',
+                       '123456789.123', None]:
+            amount_ = amount.Amount(D(number) if number else None, 'USD')
+            self.assertEqual(str(amount_), compare._amount_string(amount_))
+
+    def test_find_duplicate_entries(self):
+        entries, _, __ = loader.load_string(TEST_INPUT)
+        self.assertEqual([], compare.find_duplicate_entries(entries))
+
+        # A duplicate is found, and entries with the same scalar fields but
+        # different postings are not duplicates.
+        transaction = entries[6]
+        other = transaction._replace(postings=transaction.postings[::-1][:1])
+        errors = compare.find_duplicate_entries(entries + [transaction, other])
+        self.assertEqual(1, len(errors))
+        self.assertIs(transaction, errors[0].entry)
+        self.assertEqual(compare.hash_entries(entries + [transaction, other])[1],
+                         errors)
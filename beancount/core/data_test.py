@@ -3,6 +3,7 @@ __license__ = "GNU GPLv2"
 
 from datetime import date
 import unittest
+from unittest import mock
 import pickle
 import datetime
 
@@ -132,6 +133,41 @@ class TestData(unittest.TestCase):
         sorted_entries = data.sorted(entries)
         self.check_sorted(sorted_entries)
 
+    def test_sort_key_cache(self):
+        entries = self.create_sort_data()
+        expected = data.sorted(entries)
+        cache = data.SortKeyCache()
+        self.assertFalse(cache.sort(entries))
+        self.assertEqual([id(entry) for entry in expected],
+                         [id(entry) for entry in entries])
+        self.check_sorted(entries)
+        self.assertTrue(cache.sort(entries))
+        self.assertEqual([data.entry_sortkey(entry) for entry in entries],
+                         cache.get_keys(entries))
+
+    def test_sort_key_cache_computes_keys_once(self):
+        entries = self.create_sort_data()
+        cache = data.SortKeyCache()
+        with mock.patch.object(data, 'entry_sortkey',
+                               wraps=data.entry_sortkey) as entry_sortkey:
+            cache.sort(entries)
+            self.assertEqual(len(entries), entry_sortkey.call_count)
+
+            # Sorting the same entries again, in any order, computes no key.
+            entries.reverse()
+            cache.sort(entries)
+            cache.sort(entries)
+            self.assertEqual(len(entries), entry_sortkey.call_count)
+            self.check_sorted(entries)
+
+            # Only the keys of new entries are computed.
+            new_entry = data.Note(data.new_metadata(".", 1500),
+                                  date(2014, 2, 1), 'Assets:Cash', 'Note')
+            entries.append(new_entry)
+            cache.sort(entries)
+            self.assertEqual(len(entries), entry_sortkey.call_count)
+            self.assertEqual(len(entries), len(cache.entries))
+
     def test_posting_sortkey(self):
         entries = self.create_sort_data()
         txn_postings = [(data.TxnPosting(entry, entry.postings[0])
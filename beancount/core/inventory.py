@@ -75,8 +75,7 @@ class Inventory(dict):
             dict.__init__(self)
             if positions:
                 assert isinstance(positions, Iterable)
-                for position in positions:
-                    self.add_position(position)
+                self.add_positions(positions)
 
     def __iter__(self):
         """Iterate over the positions. Note that there is no guaranteed order."""
@@ -416,6 +415,43 @@ class Inventory(dict):
             "Invalid type for cost: {}".format(position.cost))
         return self.add_amount(position.units, position.cost)
 
+    def add_positions(self, positions):
+        """Add a sequence of positions (with strict lot matching).
+
+        This is equivalent to calling add_position() on each of them, but the
+        numbers of units are summed per lot first, and the final Position
+        instances are only created once at the end.
+
+        Args:
+          positions: An iterable of Posting or Position instances.
+        """
+        numbers = {key: pos.units.number for key, pos in self.items()}
+        for position in positions:
+            units = position.units
+            key = (units.currency, position.cost)
+            number = numbers.get(key, None)
+            if number is None:
+                if units.number != ZERO:
+                    numbers[key] = units.number
+            else:
+                number += units.number
+                if number == ZERO:
+                    # If empty, delete the position. It is recreated at the end
+                    # if reopened, as add_position() does.
+                    del numbers[key]
+                else:
+                    numbers[key] = number
+
+        # Keep the positions whose number has not changed.
+        new_positions = {}
+        for key, number in numbers.items():
+            pos = self.get(key, None)
+            if pos is None or pos.units.number is not number:
+                pos = Position(Amount(number, key[0]), key[1])
+            new_positions[key] = pos
+        self.clear()
+        self.update(new_positions)
+
     def add_inventory(self, other):
         """Add all the positions of another Inventory instance to this one.
 
@@ -424,8 +460,7 @@ class Inventory(dict):
         Returns:
           This inventory, modified.
         """
-        for position in other.get_positions():
-            self.add_position(position)
+        self.add_positions(other.get_positions())
         return self
 
     def __add__(self, other):
@@ -465,6 +465,26 @@ class TestInventory(unittest.TestCase):
             inv.add_position(pos)
         self.assertEqual(Inventory(self.POSITIONS_ALL_KINDS), inv)
 
+    def test_add_positions(self):
+        positions = [P('10 USD'), P('5 HOOL {500.00 USD}'), P('0 CAD'),
+                     P('-10 USD'), P('2 HOOL {500.00 USD}'), P('3 USD'),
+                     P('-7 HOOL {500.00 USD}'), P('1 HOOL {510.00 USD}')]
+        expected = Inventory()
+        for pos in positions:
+            expected.add_position(pos)
+
+        inv = Inventory()
+        inv.add_positions(positions)
+        self.assertEqual(expected, inv)
+        # The order of the positions is the same as when adding them one by one.
+        self.assertEqual(list(expected.keys()), list(inv.keys()))
+
+        # Positions which are not modified are kept as they are.
+        hool = inv[('HOOL', Cost(D('510.00'), 'USD', None, None))]
+        inv.add_positions([P('4 USD'), P('-3 USD')])
+        self.assertIs(hool, inv[('HOOL', Cost(D('510.00'), 'USD', None, None))])
+        self.assertEqual(I('4 USD, 1 HOOL {510.00 USD}'), inv)
+
     def test_op_add(self):
         inv1 = I('17.00 USD')
         orig_inv1 = I('17.00 USD')
@@ -273,6 +273,54 @@ def realize(entries, min_accounts=None, compute_balance=True):
     return real_root
 
 
+def extend(real_account, entries, compute_balance=True):
+    """Realize entries following those of an existing realization.
+
+    This produces the same tree as realizing the concatenation of the entries
+    that produced 'real_account' and 'entries', but only the new entries are
+    processed; the balances of the accounts they refer to are updated from their
+    existing values rather than summed from scratch.
+
+    The input tree is not modified. Its nodes are copied, and the accounts
+    without new postings share their lists of postings and balances with it.
+
+    Args:
+      real_account: An instance of RealAccount, the realization of the entries
+        preceding 'entries'.
+      entries: A list of directives, to follow those realized in 'real_account'.
+      compute_balance: A boolean, true if we should compute the final
+        balance on the realization.
+    Returns:
+      A new root RealAccount instance.
+    """
+    assert isinstance(real_account, RealAccount)
+
+    # Clone the tree structure.
+    real_root = RealAccount(real_account.account)
+    stack = [(real_account, real_root)]
+    while stack:
+        real_node, real_copy = stack.pop()
+        real_copy.txn_postings = real_node.txn_postings
+        real_copy.balance = real_node.balance
+        for child_name, real_child in real_node.items():
+            real_child_copy = RealAccount(real_child.account)
+            real_copy[child_name] = real_child_copy
+            stack.append((real_child, real_child_copy))
+
+    # Append the new postings, copying the lists and balances we update.
+    for account_name, txn_postings in postings_by_account(entries).items():
+        real_child = get_or_create(real_root, account_name)
+        real_child.txn_postings = real_child.txn_postings + txn_postings
+        if compute_balance:
+            balance = copy.copy(real_child.balance)
+            for txn_posting in txn_postings:
+                if isinstance(txn_posting, TxnPosting):
+                    balance.add_position(txn_posting.posting)
+            real_child.balance = balance
+
+    return real_root
+
+
 def postings_by_account(entries):
     """Create lists of postings and balances by account.
 
@@ -678,9 +726,8 @@ def compute_postings_balance(txn_postings):
       An Inventory.
     """
     final_balance = inventory.Inventory()
-    for txn_posting in txn_postings:
-        if isinstance(txn_posting, Posting):
-            final_balance.add_position(txn_posting)
-        elif isinstance(txn_posting, TxnPosting):
-            final_balance.add_position(txn_posting.posting)
+    final_balance.add_positions(
+        txn_posting if isinstance(txn_posting, Posting) else txn_posting.posting
+        for txn_posting in txn_postings
+        if isinstance(txn_posting, (Posting, TxnPosting)))
     return final_balance
@@ -323,6 +323,34 @@ class TestRealization(unittest.TestCase):
         self.assertEqual(expected_balance, ra0_movie.balance)
 
 
+    def test_extend(self):
+        entries, _, _ = loader.load_string("""
+        2012-01-01 open Expenses:Restaurant
+        2012-01-01 open Assets:Cash
+        2012-01-01 open Liabilities:CreditCard
+
+        2012-03-01 * "Food"
+          Expenses:Restaurant     100 CAD
+          Assets:Cash
+
+        2012-03-10 * "Food again"
+          Expenses:Restaurant     80 CAD
+          Liabilities:CreditCard
+
+        2012-03-15 * "Food once more"
+          Expenses:Restaurant     10 CAD
+          Liabilities:CreditCard
+
+        2013-04-01 balance Liabilities:CreditCard   -90 CAD
+        """)
+        for index in range(len(entries) + 1):
+            real_head = realization.realize(entries[:index])
+            real_head_copy = copy.deepcopy(real_head)
+            real_account = realization.extend(real_head, entries[index:])
+            self.assertEqual(realization.realize(entries), real_account)
+            self.assertEqual(real_head_copy, real_head)
+
+
 class TestRealFilter(unittest.TestCase):
 
     def test_filter_to_empty(self):
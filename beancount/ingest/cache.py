@@ -3,11 +3,23 @@
 This object is used in lieu of a file in order to allow the various importers to
 reuse each others' conversion results. Converting file contents, e.g. PDF to
 text, can be expensive.
+
+Optionally, conversion results can also be stored in a persistent cache on
+disk, keyed by a hash of the file contents and the identity of the converter,
+so that they can be reused across runs of the ingestion tools. Set the
+BEANCOUNT_INGEST_CACHE_DIR environment variable to a directory to enable it, or
+call install_persistent_cache().
 """
 __copyright__ = "Copyright (C) 2016  Martin Blais"
 __license__ = "GNU GPLv2"
 
 from os import path
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import types
 
 import chardet
 
@@ -21,6 +33,12 @@ from beancount.utils import defdict
 # Maximum number of bytes to read in order to detect the encoding of a file.
 HEAD_DETECT_MAX_BYTES = 128 * 1024
 
+# Default maximum size of the persistent conversion cache, in bytes.
+PERSISTENT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Filename extension of the persistent conversion cache entries.
+PERSISTENT_CACHE_SUFFIX = '.convcache'
+
 
 class _FileMemo:
     """A file memoizer which acts as a cache for on-demand evaluation of conversions.
@@ -32,9 +50,14 @@ class _FileMemo:
     def __init__(self, filename):
         self.name = filename
 
-        # A cache of converter function to saved conversion value.
+        # A cache of converter function (or converter key) to saved conversion
+        # value.
         self._cache = {}
 
+        # A hash of the contents of the file, computed on first use by the
+        # persistent cache.
+        self._contents_hash = None
+
     def __str__(self):
         return '<FileWrapper filename="{}">'.format(self.name)
 
@@ -49,11 +72,42 @@ class _FileMemo:
         try:
             result = self._cache[converter_func]
         except KeyError:
-            # FIXME: Implement timing of conversions here. Store it for
-            # reporting later.
-            result = self._cache[converter_func] = converter_func(self.name)
+            # Converters which can be identified across processes are also
+            # stored in the persistent cache, if it is enabled.
+            key = None
+            if _PERSISTENT_CACHE is not None:
+                key = converter_key(converter_func)
+            if key is not None:
+                result = self._persistent_convert(key, converter_func)
+            else:
+                # FIXME: Implement timing of conversions here. Store it for
+                # reporting later.
+                result = converter_func(self.name)
+            self._cache[converter_func] = result
         return result
 
+    def _persistent_convert(self, key, converter_func):
+        """Convert the file contents through the persistent cache.
+
+        Args:
+          key: A string, the key of the converter, from converter_key().
+          converter_func: A callable, as for convert().
+        Returns:
+          The converted value.
+        """
+        if self._contents_hash is None:
+            self._contents_hash = hash_file(self.name)
+        md5 = hashlib.md5()
+        md5.update(self._contents_hash.encode('ascii'))
+        md5.update(key.encode('utf8'))
+        cache_key = md5.hexdigest()
+        try:
+            return _PERSISTENT_CACHE.get(cache_key)
+        except KeyError:
+            result = converter_func(self.name)
+            _PERSISTENT_CACHE.put(cache_key, result)
+            return result
+
     def mimetype(self):
         """Computes the MIME type of the file."""
         return self.convert(mimetype)
@@ -115,6 +169,238 @@ def contents(filename):
         return file.read()
 
 
+def hash_file(filename):
+    """Compute a hash of the contents of a file.
+
+    Args:
+      filename: A string, the name of the file.
+    Returns:
+      A string, the hexadecimal digest of the contents.
+    """
+    md5 = hashlib.md5()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def converter_key(converter_func):
+    """Compute a string identifying a converter function across processes.
+
+    The key includes the qualified name of the function, a hash of its code
+    (bytecode, constants and the names it references, including those of the
+    nested functions), and the values of its default arguments and closure, so
+    that, e.g., head(128) and head(256) get distinct keys. Lambdas and defaults
+    or closures over values without a stable representation cannot be
+    identified and are only cached in memory. The values of the global variables
+    and the helper functions the converter references are not part of its code;
+    instead, the key includes a hash of the source file of its module, so that
+    editing that module invalidates its conversions. Note that changes to the
+    other modules it calls into, e.g. an upgraded library, are not detected;
+    clear the cache directory after making those.
+
+    Args:
+      converter_func: A callable, as for _FileMemo.convert().
+    Returns:
+      A string, or None if the converter cannot be identified.
+    """
+    if not isinstance(converter_func, types.FunctionType):
+        return None
+    if '<lambda>' in converter_func.__qualname__:
+        return None
+    try:
+        cells = repr(tuple(cell.cell_contents
+                           for cell in converter_func.__closure__ or ()))
+    except ValueError:
+        # The closure has an empty cell.
+        return None
+    defaults = repr((converter_func.__defaults__, converter_func.__kwdefaults__))
+    if ' at 0x' in cells or ' at 0x' in defaults:
+        # The closure or the defaults have values whose representation is their
+        # address.
+        return None
+    module_hash = _module_hash(converter_func.__module__)
+    if module_hash is None:
+        return None
+    md5 = hashlib.md5()
+    _hash_code(md5, converter_func.__code__)
+    md5.update(defaults.encode())
+    md5.update(module_hash.encode('ascii'))
+    return '{}.{}:{}:{}'.format(converter_func.__module__,
+                                converter_func.__qualname__,
+                                md5.hexdigest(),
+                                cells)
+
+
+def _hash_code(md5, code):
+    """Update a hash with a code object and the code objects nested in it.
+
+    Args:
+      md5: A hashlib object to update.
+      code: A code object.
+    """
+    md5.update(code.co_code)
+    md5.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _hash_code(md5, const)
+        elif isinstance(const, frozenset):
+            # Note: The order of a set of strings changes across processes.
+            md5.update(repr(sorted(map(repr, const))).encode())
+        else:
+            md5.update(repr(const).encode())
+
+
+def _module_hash(module_name):
+    """Compute a hash of the source file of a module, once per process.
+
+    Args:
+      module_name: A string, the name of an imported module.
+    Returns:
+      A string, or None if the module has no source file.
+    """
+    try:
+        return _MODULE_HASHES[module_name]
+    except KeyError:
+        filename = getattr(sys.modules.get(module_name), '__file__', None)
+        try:
+            module_hash = hash_file(filename) if filename else None
+        except OSError:
+            module_hash = None
+        _MODULE_HASHES[module_name] = module_hash
+        return module_hash
+
+# A mapping of module name to the hash of its source file, or None.
+_MODULE_HASHES = {}
+
+
+class PersistentCache:
+    """A size-bounded cache of pickled values in a directory.
+
+    Each value is stored in its own file, named after its key. The modification
+    time of the files is updated when they are read, and the least recently used
+    files are removed when the total size of the cache exceeds its maximum.
+
+    Attributes:
+      directory: A string, the name of the directory containing the cache files.
+      max_bytes: An integer, the maximum total size of the cache files.
+    """
+
+    def __init__(self, directory, max_bytes=PERSISTENT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        # The total size of the cache files, computed on the first write.
+        self._total_bytes = None
+
+    def _filename(self, key):
+        return path.join(self.directory, key + PERSISTENT_CACHE_SUFFIX)
+
+    def get(self, key):
+        """Fetch a value from the cache.
+
+        Args:
+          key: A string, the key of the value.
+        Returns:
+          The cached value.
+        Raises:
+          KeyError: If the value is not in the cache or could not be read.
+        """
+        filename = self._filename(key)
+        try:
+            with open(filename, 'rb') as file:
+                value = pickle.load(file)
+        except FileNotFoundError:
+            raise KeyError(key)
+        except Exception as exc:
+            # Note: See loader.pickle_cache_function() for why we catch all
+            # exceptions here.
+            logging.error("Conversion cache file %s is corrupted: %s; recomputing.",
+                          filename, exc)
+            raise KeyError(key)
+        try:
+            os.utime(filename)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        """Store a value in the cache, evicting the least recently used ones.
+
+        Args:
+          key: A string, the key of the value.
+          value: A picklable object.
+        """
+        filename = self._filename(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temporary file first, so that concurrent readers never
+            # see a partial value.
+            tmp_filename = '{}.{}.tmp'.format(filename, os.getpid())
+            with open(tmp_filename, 'wb') as file:
+                pickle.dump(value, file)
+            size = path.getsize(tmp_filename)
+            os.replace(tmp_filename, filename)
+        except Exception as exc:
+            logging.warning("Could not write to conversion cache file %s: %s",
+                            filename, exc)
+            return
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._list())
+        else:
+            self._total_bytes += size
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def _list(self):
+        """List the cache files.
+
+        Returns:
+          A list of (modification time, size, filename) tuples.
+        """
+        files = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(PERSISTENT_CACHE_SUFFIX):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            pass
+        return files
+
+    def evict(self):
+        """Remove the least recently used files until the cache fits its maximum size."""
+        files = sorted(self._list())
+        total_bytes = sum(size for _, size, _ in files)
+        for _, size, filename in files:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                continue
+            total_bytes -= size
+        self._total_bytes = total_bytes
+
+
+def install_persistent_cache(directory, max_bytes=PERSISTENT_CACHE_MAX_BYTES):
+    """Enable or disable the persistent conversion cache.
+
+    Args:
+      directory: A string, the name of the directory to store the converted
+        values in, or None, to disable the persistent cache.
+      max_bytes: An integer, the maximum total size of the cache files.
+    """
+    global _PERSISTENT_CACHE  # pylint: disable=global-statement
+    _PERSISTENT_CACHE = (PersistentCache(directory, max_bytes)
+                         if directory is not None else None)
+
+
 def get_file(filename):
     """Create or reuse a globally registered instance of a FileMemo.
 
@@ -133,3 +419,8 @@ def get_file(filename):
     return _CACHE[filename]
 
 _CACHE = defdict.DefaultDictWithKey(_FileMemo)
+
+# The global persistent cache, or None, if disabled.
+_PERSISTENT_CACHE = None
+
+install_persistent_cache(os.getenv('BEANCOUNT_INGEST_CACHE_DIR'))
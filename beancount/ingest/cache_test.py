@@ -1,6 +1,10 @@
 __copyright__ = "Copyright (C) 2016  Martin Blais"
 __license__ = "GNU GPLv2"
 
+from os import path
+import builtins
+import os
+import sys
 import tempfile
 import shutil
 import unittest
@@ -46,3 +50,148 @@ class TestFileMemo(unittest.TestCase):
 
             mimetype = wrap.convert(cache.mimetype)
             self.assertRegex(mimetype, r'text/x-(python|c\+\+)')
+
+
+def upper_contents(filename):
+    with open(filename) as file:
+        return file.read().upper()
+
+
+class TestConverterKey(unittest.TestCase):
+
+    def test_converter_key(self):
+        self.assertEqual(cache.converter_key(cache.head(128)),
+                         cache.converter_key(cache.head(128)))
+        self.assertNotEqual(cache.converter_key(cache.head(128)),
+                            cache.converter_key(cache.head(256)))
+        self.assertNotEqual(cache.converter_key(cache.contents),
+                            cache.converter_key(cache.mimetype))
+        self.assertIsNone(cache.converter_key(lambda filename: filename))
+        self.assertIsNone(cache.converter_key(mock.MagicMock()))
+
+    def test_converter_key_constants(self):
+        def head_100(filename):
+            with open(filename) as file:
+                return file.read(100)
+        def head_200(filename):
+            with open(filename) as file:
+                return file.read(200)
+        head_200.__qualname__ = head_100.__qualname__
+        self.assertEqual(head_100.__code__.co_code, head_200.__code__.co_code)
+        self.assertNotEqual(cache.converter_key(head_100),
+                            cache.converter_key(head_200))
+
+    def test_converter_key_defaults(self):
+        def convert(filename, flags=('-layout',)):
+            return flags
+        key = cache.converter_key(convert)
+        convert.__defaults__ = (('-raw',),)
+        self.assertNotEqual(key, cache.converter_key(convert))
+        convert.__defaults__ = (object(),)
+        self.assertIsNone(cache.converter_key(convert))
+
+    def test_converter_key_nested(self):
+        def outer_a(filename):
+            def inner():
+                return 'a'
+            return inner()
+        def outer_b(filename):
+            def inner():
+                return 'b'
+            return inner()
+        outer_b.__qualname__ = outer_a.__qualname__
+        self.assertNotEqual(cache.converter_key(outer_a),
+                            cache.converter_key(outer_b))
+
+    def test_converter_key_module_source(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            filename = path.join(tempdir, 'converters.py')
+            with open(filename, 'w') as file:
+                file.write('def convert(filename):\n    return helper()\n'
+                           'def helper():\n    return 1\n')
+            module = mock.Mock(__file__=filename)
+            with mock.patch.dict(sys.modules, {'converters': module}), \
+                 mock.patch.dict(cache._MODULE_HASHES, clear=True):
+                namespace = {'__name__': 'converters'}
+                exec(compile(open(filename).read(), filename, 'exec'), namespace)
+                key = cache.converter_key(namespace['convert'])
+                self.assertIsNotNone(key)
+
+                # Modifying the helper function changes the key.
+                with open(filename, 'a') as file:
+                    file.write('def helper():\n    return 2\n')
+                cache._MODULE_HASHES.clear()
+                self.assertNotEqual(key, cache.converter_key(namespace['convert']))
+
+                # Converters from modules without a source file are unidentified.
+                del module.__file__
+                cache._MODULE_HASHES.clear()
+                self.assertIsNone(cache.converter_key(namespace['convert']))
+
+    def test_converter_key_not_computed(self):
+        with tempfile.NamedTemporaryFile() as tmpfile, \
+             mock.patch.object(cache, 'converter_key') as mock_converter_key:
+            self.assertEqual('', cache._FileMemo(tmpfile.name).convert(upper_contents))
+            mock_converter_key.assert_not_called()
+
+
+class TestPersistentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filename = path.join(self.tempdir, 'input.txt')
+        with open(self.filename, 'w') as file:
+            file.write('abc')
+        self.cachedir = path.join(self.tempdir, 'cache')
+        cache.install_persistent_cache(self.cachedir)
+
+    def tearDown(self):
+        cache.install_persistent_cache(None)
+        shutil.rmtree(self.tempdir)
+
+    def test_reuse_across_memos(self):
+        self.assertEqual('ABC', cache._FileMemo(self.filename).convert(upper_contents))
+        self.assertEqual(1, len(os.listdir(self.cachedir)))
+
+        with mock.patch.object(builtins, 'open', wraps=open) as mock_open:
+            self.assertEqual('ABC',
+                             cache._FileMemo(self.filename).convert(upper_contents))
+        opened = [call[0][0] for call in mock_open.call_args_list]
+        self.assertNotIn(self.filename, opened[1:])
+
+        # Modified contents are converted again.
+        with open(self.filename, 'w') as file:
+            file.write('def')
+        self.assertEqual('DEF', cache._FileMemo(self.filename).convert(upper_contents))
+        self.assertEqual(2, len(os.listdir(self.cachedir)))
+
+    def test_unidentified_converter(self):
+        converter = mock.MagicMock(return_value='abc')
+        self.assertEqual('abc', cache._FileMemo(self.filename).convert(converter))
+        self.assertFalse(path.exists(self.cachedir))
+
+    def test_corrupted(self):
+        cache._FileMemo(self.filename).convert(upper_contents)
+        for filename in os.listdir(self.cachedir):
+            with open(path.join(self.cachedir, filename), 'wb') as file:
+                file.write(b'garbage')
+        with self.assertLogs(level='ERROR'):
+            self.assertEqual('ABC',
+                             cache._FileMemo(self.filename).convert(upper_contents))
+
+    def test_eviction(self):
+        persistent = cache.PersistentCache(self.cachedir, max_bytes=2500)
+        for index, key in enumerate('01'):
+            persistent.put(key, b'x' * 1000)
+            mtime = 1000000 + index
+            os.utime(path.join(self.cachedir, key + cache.PERSISTENT_CACHE_SUFFIX),
+                     (mtime, mtime))
+
+        # Reading a value makes it the most recently used.
+        self.assertEqual(b'x' * 1000, persistent.get('0'))
+        persistent.put('2', b'x' * 1000)
+
+        self.assertEqual(b'x' * 1000, persistent.get('0'))
+        self.assertEqual(b'x' * 1000, persistent.get('2'))
+        with self.assertRaises(KeyError):
+            persistent.get('1')
@@ -85,6 +85,40 @@ def extract_from_file(filename, importer,
     return new_entries
 
 
+def extract_file(filename, importer_config, existing_entries, min_date,
+                 allow_none_for_tags_and_links):
+    """Identify a file and import entries from it with all the matching importers.
+
+    Errors from the importers are logged and the importers that raised them are
+    skipped. See extract_from_file() for the arguments.
+
+    Args:
+      filename: The name of the file to import.
+      importer_config: A list of importer instances.
+    Returns:
+      A list of lists of new imported entries, one for each of the matching
+      importers which succeeded.
+    """
+    new_entries_list = []
+    for index in identify.identify_file(filename, importer_config):
+        importer = importer_config[index]
+        # Import and process the file.
+        try:
+            new_entries = extract_from_file(
+                filename,
+                importer,
+                existing_entries=existing_entries,
+                min_date=min_date,
+                allow_none_for_tags_and_links=allow_none_for_tags_and_links)
+            new_entries_list.append(new_entries)
+        except Exception as exc:
+            logging.error("Importer %s.extract() raised an unexpected error: %s",
+                          importer.name(), exc)
+            logging.error("Traceback: %s", traceback.format_exc())
+            continue
+    return new_entries_list
+
+
 def find_duplicate_entries(new_entries_list, existing_entries):
     """Flag potentially duplicate entries.
 
@@ -98,10 +132,16 @@ def find_duplicate_entries(new_entries_list, existing_entries):
       A list of lists of modified new entries (like new_entries_list),
       potentially with modified metadata to indicate those which are duplicated.
     """
+    # Index the existing entries once, for all the files.
+    index = (similar.SimilarityIndex(existing_entries)
+             if existing_entries is not None
+             else None)
+
     mod_entries_list = []
     for key, new_entries in new_entries_list:
         # Find similar entries against the existing ledger only.
-        duplicate_pairs = similar.find_similar_entries(new_entries, existing_entries)
+        duplicate_pairs = similar.find_similar_entries(new_entries, existing_entries,
+                                                       index=index)
 
         # Add a metadata marker to the extracted entries for duplicates.
         duplicate_set = set(id(entry) for entry, _ in duplicate_pairs)
@@ -150,7 +190,8 @@ def extract(importer_config,
             options_map=None,
             mindate=None,
             ascending=True,
-            detect_duplicates_func=None):
+            detect_duplicates_func=None,
+            jobs=1):
     """Given an importer configuration, search for files that can be imported in the
     list of files or directories, run the signature checks on them, and if it
     succeeds, run the importer on the file.
@@ -172,29 +213,19 @@ def extract(importer_config,
         lists of imported entries and a list of entries already existing in
         the user's ledger. See function find_duplicate_entries(), which is the
         default implementation for this.
+      jobs: An integer, the number of worker processes to identify and extract
+        the files with. See identify.map_files().
     """
     allow_none_for_tags_and_links = (
         options_map and options_map["allow_deprecated_none_for_tags_and_links"])
 
     # Run all the importers and gather their result sets.
     new_entries_list = []
-    for filename, importers in identify.find_imports(importer_config,
-                                                     files_or_directories):
-        for importer in importers:
-            # Import and process the file.
-            try:
-                new_entries = extract_from_file(
-                    filename,
-                    importer,
-                    existing_entries=entries,
-                    min_date=mindate,
-                    allow_none_for_tags_and_links=allow_none_for_tags_and_links)
-                new_entries_list.append((filename, new_entries))
-            except Exception as exc:
-                logging.error("Importer %s.extract() raised an unexpected error: %s",
-                              importer.name(), exc)
-                logging.error("Traceback: %s", traceback.format_exc())
-                continue
+    for filename, file_entries_list in identify.map_files(
+            extract_file, importer_config, files_or_directories, jobs=jobs,
+            args=(entries, mindate, allow_none_for_tags_and_links)):
+        for new_entries in file_entries_list:
+            new_entries_list.append((filename, new_entries))
 
     # Find potential duplicate entries in the result sets, either against the
     # list of existing ones, or against each other. A single call to this
@@ -249,7 +280,8 @@ def run(args, _, importers_list, files_or_directories, detect_duplicates_func=No
             options_map=options_map,
             mindate=None,
             ascending=args.ascending,
-            detect_duplicates_func=detect_duplicates_func)
+            detect_duplicates_func=detect_duplicates_func,
+            jobs=getattr(args, 'jobs', 1))
     return 0
 
 
@@ -300,6 +300,17 @@ class TestScriptExtract(test_utils.TestTempdirMixin, unittest.TestCase):
         self.assertRegex(output, r'Expenses:Books +87.30 USD')
         self.assertRegex(output, r'Expenses:Clothing +87.30 USD')
 
+    def test_extract_jobs(self):
+        outputs = []
+        for args in [[], ['--jobs', '2']]:
+            with test_utils.capture('stdout', 'stderr') as (stdout, _):
+                test_utils.run_with_args(extract.main,
+                                         args + [self.config_filename,
+                                                 path.join(self.tempdir, 'Downloads')])
+            outputs.append(stdout.getvalue())
+        self.assertRegex(outputs[1], r'Expenses:Clothing +87.30 USD')
+        self.assertEqual(outputs[0], outputs[1])
+
     @mock.patch.object(extract, 'find_duplicate_entries',
                  wraps=extract.find_duplicate_entries)
     def test_extract_find_dups_once_only_with_many_files(self, mock):
@@ -39,6 +39,74 @@ def file_one_file(filename, importers, destination, idify=False, logfile=None):
     Returns:
       The full new destination filename on success, and None if there was an error.
     """
+    filing = compute_filing(filename, importers, destination, idify)
+    return log_filing(filing, logfile)
+
+
+def identify_and_compute_filing(filename, importer_config, destination, idify):
+    """Identify a file and compute its destination with its matching importers.
+
+    This runs in the worker processes of identify.map_files(), so that the
+    conversions of the file computed to identify it are reused to file it.
+
+    Args:
+      filename: A string, the absolute name of the file.
+      importer_config: A list of importer instances that define the config.
+      destination: See file_one_file().
+      idify: See file_one_file().
+    Returns:
+      A Filing instance, or None if no importer matched the file or if there was
+      an error.
+    """
+    importers = [importer_config[index]
+                 for index in identify.identify_file(filename, importer_config)]
+    if not importers:
+        return None
+    return compute_filing(filename, importers, destination, idify)
+
+
+# The details of where to move a file.
+#
+# Attributes:
+#   importer_name: A string, the name of the importer used to file it.
+#   account: A string, the account the file is filed under.
+#   date: A datetime.date instance, the date of the file.
+#   date_source: A string, 'contents' or 'mtime', where the date comes from.
+#   new_fullname: A string, the full new destination filename.
+Filing = collections.namedtuple('Filing',
+                                'importer_name account date date_source new_fullname')
+
+
+def log_filing(filing, logfile):
+    """Write the details of the filing of a file to a log.
+
+    Args:
+      filing: A Filing instance, or None.
+      logfile: A file object to write log entries to, or None, in which case no log is
+        written out.
+    Returns:
+      The full new destination filename, or None if 'filing' is None.
+    """
+    if filing is None:
+        return None
+    if logfile is not None:
+        logfile.write('Importer:    {}\n'.format(filing.importer_name))
+        logfile.write('Account:     {}\n'.format(filing.account))
+        logfile.write('Date:        {} (from {})\n'.format(filing.date,
+                                                           filing.date_source))
+        logfile.write('Destination: {}\n'.format(filing.new_fullname))
+        logfile.write('\n')
+    return filing.new_fullname
+
+
+def compute_filing(filename, importers, destination, idify=False):
+    """Compute where to move a single filename using its matched importers.
+
+    See file_one_file() for the arguments.
+
+    Returns:
+      A Filing instance on success, and None if there was an error.
+    """
     # Create an object to cache all the conversions between the importers
     # and phases and what-not.
     file = cache.get_file(filename)
@@ -131,15 +199,8 @@ def file_one_file(filename, importers, destination, idify=False, logfile=None):
                                            file_account.replace(account.sep, os.sep),
                                            new_filename))
 
-    # Print the filename and which modules matched.
-    if logfile is not None:
-        logfile.write('Importer:    {}\n'.format(importer.name() if importer else '-'))
-        logfile.write('Account:     {}\n'.format(file_account))
-        logfile.write('Date:        {} (from {})\n'.format(date, date_source))
-        logfile.write('Destination: {}\n'.format(new_fullname))
-        logfile.write('\n')
-
-    return new_fullname
+    return Filing(importer.name() if importer else '-',
+                  file_account, date, date_source, new_fullname)
 
 
 def file(importer_config,
@@ -149,7 +210,8 @@ def file(importer_config,
          mkdirs=False,
          overwrite=False,
          idify=False,
-         logfile=None):
+         logfile=None,
+         jobs=1):
     """File importable files under a destination directory.
 
     Given an importer configuration object, search for files that can be
@@ -176,20 +238,18 @@ def file(importer_config,
         filename.
       logfile: A file object to write log entries to, or None, in which case no log is
         written out.
+      jobs: An integer, the number of worker processes to identify the files and
+        compute their destinations with. See identify.map_files().
     """
-    jobs = []
+    moves = []
     has_errors = False
-    for filename, importers in identify.find_imports(importer_config,
-                                                     files_or_directories,
-                                                     logfile):
-        # If we're debugging, print out the match text.
-        # This option is useful when we're building our importer configuration,
-        # to figure out which patterns to create as unique signatures.
-        if not importers:
-            continue
-
+    for filename, filing in identify.map_files(identify_and_compute_filing,
+                                               importer_config,
+                                               files_or_directories,
+                                               logfile, jobs,
+                                               args=(destination, idify)):
         # Process a single file.
-        new_fullname = file_one_file(filename, importers, destination, idify, logfile)
+        new_fullname = log_filing(filing, logfile)
         if new_fullname is None:
             continue
 
@@ -207,12 +267,12 @@ def file(importer_config,
             has_errors = True
             continue
 
-        jobs.append((filename, new_fullname))
+        moves.append((filename, new_fullname))
 
     # Check if any two imported files would be colliding in their destination
     # name, before we move anything.
     destmap = collections.defaultdict(list)
-    for src, dest in jobs:
+    for src, dest in moves:
         destmap[dest].append(src)
     for dest, sources in destmap.items():
         if len(sources) != 1:
@@ -226,10 +286,10 @@ def file(importer_config,
         return
 
     # Actually carry out the moving job.
-    for old_filename, new_filename in jobs:
+    for old_filename, new_filename in moves:
         move_xdev_file(old_filename, new_filename, mkdirs)
 
-    return jobs
+    return moves
 
 
 def move_xdev_file(src_filename, dst_filename, mkdirs=False):
@@ -296,7 +356,8 @@ def run(args, parser, importers_list, files_or_directories, detect_duplicates_fu
          mkdirs=True,
          overwrite=args.overwrite,
          idify=True,
-         logfile=sys.stdout)
+         logfile=sys.stdout,
+         jobs=getattr(args, 'jobs', 1))
     return 0
 
 
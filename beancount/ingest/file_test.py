@@ -11,6 +11,7 @@ import shutil
 
 from beancount.utils import test_utils
 from beancount.utils import file_utils
+from beancount.ingest import cache
 from beancount.ingest import file
 from beancount.ingest import scripts_utils
 
@@ -337,6 +338,22 @@ class TestScriptFile(scripts_utils.TestScriptsBase, test_utils.TestCase):
         for regexp in expected_res:
             self.assertTrue(any(re.match(regexp, filename) for filename in moved_files))
 
+    def test_file_jobs(self):
+        outputs = []
+        for args in [[], ['--jobs', '2']]:
+            cache._CACHE.clear()
+            with test_utils.capture('stdout', 'stderr') as (stdout, _):
+                test_utils.run_with_args(file.main, args + [
+                    '--dry-run', '--output', self.documents,
+                    path.join(self.tempdir, 'test.import'),
+                    path.join(self.tempdir, 'Downloads')])
+            outputs.append(stdout.getvalue())
+        self.assertRegex(outputs[1], r'Destination: .*ofxdownload\.ofx')
+        self.assertEqual(outputs[0], outputs[1])
+
+        # The files were converted in the workers only.
+        self.assertFalse(cache._CACHE)
+
     def test_file_examples(self):
         config_filename = path.join(test_utils.find_repository_root(__file__),
                                     'examples', 'ingest', 'office', 'example.import')
@@ -7,9 +7,10 @@ be associated with.
 __copyright__ = "Copyright (C) 2016  Martin Blais"
 __license__ = "GNU GPLv2"
 
+from concurrent import futures
+from os import path
 import logging
 import sys
-from os import path
 
 from beancount.utils import file_utils
 from beancount.ingest import scripts_utils
@@ -26,7 +27,7 @@ SECTION = '**** {}'
 FILE_TOO_LARGE_THRESHOLD = 8*1024*1024
 
 
-def find_imports(importer_config, files_or_directories, logfile=None):
+def find_imports(importer_config, files_or_directories, logfile=None, jobs=1):
     """Given an importer configuration, search for files that can be imported in the
     list of files or directories, run the signature checks on them and return a list
     of (filename, importers), where 'importers' is a list of importers that matched
@@ -38,53 +39,193 @@ def find_imports(importer_config, files_or_directories, logfile=None):
                             hunt for files to import.
       logfile: A file object to write log entries to, or None, in which case no log is
         written out.
+      jobs: An integer, the number of worker processes to identify the files
+        with. See map_files().
     Yields:
       Triples of filename found, textified contents of the file, and list of
       importers matching this file.
     """
-    # Iterate over all files found; accumulate the entries by identification.
-    for filename in file_utils.find_files(files_or_directories):
-        if logfile is not None:
-            logfile.write(SECTION.format(filename))
-            logfile.write('\n')
+    for filename, indexes in map_files(identify_file, importer_config,
+                                       files_or_directories, logfile, jobs):
+        yield (filename, [importer_config[index] for index in indexes])
+
+
+def identify_file(filename, importer_config):
+    """Run the signature checks of all the importers on a single file.
+
+    Args:
+      filename: A string, the absolute name of the file.
+      importer_config: a list of importer instances that define the config.
+    Returns:
+      A list of the indexes of the importers in 'importer_config' that matched
+      the file. Indexes are returned rather than importers, so that this can run
+      in a worker process.
+    """
+    # For each of the sources the user has declared, identify which
+    # match the text.
+    file = cache.get_file(filename)
+    matching_indexes = []
+    for index, importer in enumerate(importer_config):
+        try:
+            matched = importer.identify(file)
+            if matched:
+                matching_indexes.append(index)
+        except Exception as exc:
+            logging.error("Importer %s.identify() raised an unexpected error: %s",
+                          importer.name(), exc)
+    return matching_indexes
+
+
+def identify_file_accounts(filename, importer_config):
+    """Identify a file and compute its account with each of the matching importers.
+
+    This runs in the worker processes of map_files(), so that the conversions of
+    the file computed to identify it are reused to compute the accounts.
+
+    Args:
+      filename: A string, the absolute name of the file.
+      importer_config: a list of importer instances that define the config.
+    Returns:
+      A list of pairs of the index of a matching importer in 'importer_config'
+      and the account it returned for the file.
+    """
+    file = cache.get_file(filename)
+    return [(index, importer_config[index].file_account(file))
+            for index in identify_file(filename, importer_config)]
+
+
+def map_files(function, importer_config, files_or_directories, logfile=None,
+              jobs=1, args=()):
+    """Find the files to import and apply a function to each of them.
+
+    If 'jobs' is greater than one, the function is applied in a pool of worker
+    processes. The importers and the extra arguments are handed over to the
+    workers when they start, so on platforms which fork, they don't need to be
+    picklable; the results of the function do. The messages logged from the
+    workers are emitted from this process, as each file's result is produced, and
+    the results are produced in the same order as when run serially.
+
+    Args:
+      function: A module-level function called as function(filename,
+        importer_config, *args) on each file.
+      importer_config: a list of importer instances that define the config.
+      files_or_directories: a list of files of directories to walk recursively and
+        hunt for files to import.
+      logfile: A file object to write log entries to, or None, in which case no log is
+        written out.
+      jobs: An integer, the number of worker processes to use. A value of 0 or 1
+        processes the files serially in the current process.
+      args: A tuple of extra arguments to the function.
+    Yields:
+      Pairs of filename and the result of the function on it. Files which are too
+      large are skipped.
+    """
+    filenames = file_utils.find_files(files_or_directories)
+    if jobs > 1:
+        # Submit all the files ahead of time, except those which will be skipped.
+        executor = futures.ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_initialize_worker,
+            initargs=(function, importer_config, args))
+        filenames = [(filename,
+                      (executor.submit(_run_worker, filename)
+                       if path.getsize(filename) <= FILE_TOO_LARGE_THRESHOLD
+                       else None))
+                     for filename in filenames]
+    else:
+        executor = None
+        filenames = ((filename, None) for filename in filenames)
+
+    try:
+        # Iterate over all files found; accumulate the entries by identification.
+        for filename, future in filenames:
+            if logfile is not None:
+                logfile.write(SECTION.format(filename))
+                logfile.write('\n')
+
+            # Skip files that are simply too large.
+            size = path.getsize(filename)
+            if size > FILE_TOO_LARGE_THRESHOLD:
+                logging.warning("File too large: '{}' ({} bytes); skipping.".format(
+                    filename, size))
+                continue
+
+            if future is None:
+                result = function(filename, importer_config, *args)
+            else:
+                result, records = future.result()
+                for record in records:
+                    logging.getLogger(record.name).handle(record)
+
+            yield (filename, result)
+    finally:
+        if executor is not None:
+            # Don't run the remaining files if the caller stopped early.
+            for _, future in filenames:
+                if future is not None:
+                    future.cancel()
+            executor.shutdown()
+
+
+class _RecordsHandler(logging.Handler):
+    """A logging handler which accumulates the records of a worker process."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        # Render the message and the traceback, so that the record can be
+        # pickled back to the parent process.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
+
+
+# The state of a worker process: the function, the importers and extra arguments
+# of map_files(), and a handler capturing the logged records.
+_WORKER = None
+
+
+def _initialize_worker(function, importer_config, args):
+    """Initialize a worker process of map_files()."""
+    global _WORKER  # pylint: disable=global-statement
+    handler = _RecordsHandler()
+    logging.getLogger().handlers = [handler]
+    _WORKER = (function, importer_config, args, handler)
+
+
+def _run_worker(filename):
+    """Apply the function of map_files() to a file, from within a worker process.
+
+    Returns:
+      A pair of the result of the function and the list of records logged while
+      computing it.
+    """
+    function, importer_config, args, handler = _WORKER
+    handler.records = []
+    result = function(filename, importer_config, *args)
+    return result, handler.records
+
 
-        # Skip files that are simply too large.
-        size = path.getsize(filename)
-        if size > FILE_TOO_LARGE_THRESHOLD:
-            logging.warning("File too large: '{}' ({} bytes); skipping.".format(
-                filename, size))
-            continue
-
-        # For each of the sources the user has declared, identify which
-        # match the text.
-        file = cache.get_file(filename)
-        matching_importers = []
-        for importer in importer_config:
-            try:
-                matched = importer.identify(file)
-                if matched:
-                    matching_importers.append(importer)
-            except Exception as exc:
-                logging.error("Importer %s.identify() raised an unexpected error: %s",
-                              importer.name(), exc)
-
-        yield (filename, matching_importers)
-
-
-def identify(importers_list, files_or_directories):
+def identify(importers_list, files_or_directories, jobs=1):
     """Run the identification loop.
 
     Args:
       importers_list: A list of importer instances.
       files_or_directories: A list of strings, files or directories.
+      jobs: An integer, the number of worker processes to identify the files with.
     """
     logfile = sys.stdout
-    for filename, importers in find_imports(importers_list, files_or_directories,
-                                            logfile=logfile):
-        file = cache.get_file(filename)
-        for importer in importers:
+    for _, accounts in map_files(identify_file_accounts, importers_list,
+                                 files_or_directories, logfile, jobs):
+        for index, account in accounts:
+            importer = importers_list[index]
             logfile.write('Importer:    {}\n'.format(importer.name() if importer else '-'))
-            logfile.write('Account:     {}\n'.format(importer.file_account(file)))
+            logfile.write('Account:     {}\n'.format(account))
             logfile.write('\n')
 
 
@@ -95,9 +236,10 @@ def add_arguments(parser):
     """Add arguments for the identify command."""
 
 
-def run(_, __, importers_list, files_or_directories, detect_duplicates_func=None):
+def run(args, __, importers_list, files_or_directories, detect_duplicates_func=None):
     """Run the subcommand."""
-    return identify(importers_list, files_or_directories)
+    return identify(importers_list, files_or_directories,
+                    jobs=getattr(args, 'jobs', 1))
 
 
 def main():
@@ -12,6 +12,7 @@ import unittest
 
 from beancount.utils import test_utils
 from beancount.ingest.importer import ImporterProtocol
+from beancount.ingest import cache
 from beancount.ingest import identify
 from beancount.ingest import scripts_utils
 
@@ -25,6 +26,12 @@ class _TestImporter(ImporterProtocol):
         return file.name == self.filename
 
 
+class _RaisingImporter(ImporterProtocol):
+
+    def identify(self, file):
+        raise ValueError("Unexpected error in {}".format(path.basename(file.name)))
+
+
 class TestScriptIdentifyFunctions(test_utils.TestTempdirMixin, unittest.TestCase):
 
     def test_find_imports(self):
@@ -69,6 +76,28 @@ class TestScriptIdentifyFunctions(test_utils.TestTempdirMixin, unittest.TestCase
         imports = list(identify.find_imports([imp], self.tempdir))
         self.assertEqual([(file1, [])], imports)
 
+    def test_find_imports__jobs(self):
+        filenames = [path.join(self.tempdir, 'file{}.test'.format(index))
+                     for index in range(6)]
+        for filename in filenames:
+            open(filename, 'w')
+        config = [_RaisingImporter(),
+                  _TestImporter(filenames[1]),
+                  _TestImporter(filenames[4])]
+
+        with self.assertLogs(level='ERROR') as serial_logs:
+            serial = list(identify.find_imports(config, self.tempdir))
+        with self.assertLogs(level='ERROR') as parallel_logs:
+            parallel = list(identify.find_imports(config, self.tempdir, jobs=3))
+
+        self.assertEqual(serial, parallel)
+        self.assertEqual([(filenames[1], [config[1]]), (filenames[4], [config[2]])],
+                         [(filename, importers)
+                          for filename, importers in parallel if importers])
+        # The errors from the workers are logged in the same order.
+        self.assertEqual(6, len(parallel_logs.output))
+        self.assertEqual(serial_logs.output, parallel_logs.output)
+
 
 class TestScriptIdentify(scripts_utils.TestScriptsBase):
 
@@ -104,6 +133,17 @@ class TestScriptIdentify(scripts_utils.TestScriptsBase):
         output = stdout.getvalue().strip()
         self.assertTrue(re.match(regexp, output))
 
+        # Invoke with worker processes; the accounts are computed in the workers.
+        cache._CACHE.clear()
+        with test_utils.capture('stdout', 'stderr') as (stdout, stderr):
+            test_utils.run_with_args(identify.main,
+                                     ['--jobs', '2',
+                                      path.join(self.tempdir, 'test.import'),
+                                      path.join(self.tempdir, 'Downloads')])
+        output = stdout.getvalue().strip()
+        self.assertTrue(re.match(regexp, output))
+        self.assertFalse(cache._CACHE)
+
         # Invoke with new-style imports script via tool (with an ingest() call).
         with test_utils.capture('stdout', 'stderr') as (stdout, stderr):
             test_utils.run_with_args(identify.main,
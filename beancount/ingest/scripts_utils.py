@@ -91,6 +91,8 @@ def ingest(importers_list, detect_duplicates_func=None):
                             action='append', default=[],
                             help='Filenames or directories to search for files to import')
 
+        add_jobs_argument(parser)
+
         for cmdname, module in [('identify', identify),
                                 ('extract', extract),
                                 ('file', file)]:
@@ -147,11 +149,26 @@ def create_legacy_arguments_parser(description: str, run_func: callable):
                         default=[],
                         help='Filenames or directories to search for files to import')
 
+    add_jobs_argument(parser)
+
     parser.set_defaults(command=run_func)
 
     return parser
 
 
+def add_jobs_argument(parser):
+    """Add the argument for the number of worker processes to a parser.
+
+    Args:
+      parser: An argparse.ArgumentParser instance.
+    """
+    parser.add_argument('--jobs', '-j', metavar='N', action='store', type=int,
+                        default=1,
+                        help=('Number of worker processes to identify and extract '
+                              'the files with. Output is produced in the same order '
+                              'as with a single process.'))
+
+
 def trampoline_to_ingest(module):
     """Parse arguments for bean tool, import config script and ingest.
 
@@ -7,6 +7,7 @@ __license__ = "GNU GPLv2"
 
 import datetime
 import collections
+import math
 
 from beancount.core.number import D
 from beancount.core.number import ZERO
@@ -14,9 +15,11 @@ from beancount.core.number import ONE
 from beancount.core import data
 from beancount.core import amount
 from beancount.core import interpolate
+from beancount.utils import bisect_key
 
 
-def find_similar_entries(entries, source_entries, comparator=None, window_days=2):
+def find_similar_entries(entries, source_entries, comparator=None, window_days=2,
+                         index=None):
     """Find which entries from a list are potential duplicates of a set.
 
     Note: If there are multiple entries from 'source_entries' matching an entry
@@ -32,6 +35,10 @@ def find_similar_entries(entries, source_entries, comparator=None, window_days=2
       comparator: A functor used to establish the similarity of two entries.
       window_days: The number of days (inclusive) before or after to scan the
         entries to classify against.
+      index: An optional instance of SimilarityIndex over 'source_entries', used
+        to select the candidates to compare against. If not provided, one is
+        built when using the default comparator. Custom comparators otherwise
+        scan all the entries within the window.
     Returns:
       A list of pairs of entries (entry, source_entry) where entry is from
       'entries' and is deemed to be a duplicate of source_entry, from
@@ -42,21 +49,126 @@ def find_similar_entries(entries, source_entries, comparator=None, window_days=2
 
     if comparator is None:
         comparator = SimilarityComparator()
+        if index is None and source_entries is not None:
+            index = SimilarityIndex(source_entries)
 
     # For each of the new entries, look at existing entries at a nearby date.
     duplicates = []
     if source_entries is not None:
         for entry in data.filter_txns(entries):
-            for source_entry in data.filter_txns(
+            if index is not None:
+                candidates = index.candidates(entry, window_days)
+            else:
+                candidates = data.filter_txns(
                     data.iter_entry_dates(source_entries,
                                           entry.date - window_head,
-                                          entry.date + window_tail)):
+                                          entry.date + window_tail))
+            for source_entry in candidates:
                 if comparator(entry, source_entry):
                     duplicates.append((entry, source_entry))
                     break
     return duplicates
 
 
+class SimilarityIndex:
+    """An index of transactions by date, account, currency and rounded amount.
+
+    This is used to look up the few transactions which a SimilarityComparator
+    could find similar to a given one, instead of comparing it against all the
+    transactions in a window of dates. The comparator requires at least one
+    common account and currency whose amounts are within a fraction EPSILON of
+    each other, or both zero, so the absolute amounts are rounded to buckets on
+    a logarithmic scale whose width is that fraction, and neighbouring buckets
+    are looked up as well. The candidates still have to be confirmed with the
+    comparator.
+
+    The transactions of a date are only indexed the first time that date is
+    looked up, so the cost of the index is proportional to the range of dates of
+    the imported entries, not to the size of the ledger.
+    """
+
+    def __init__(self, source_entries, epsilon=None):
+        """Create the index.
+
+        Args:
+          source_entries: A date-sorted list of directives to index. Only the
+            transactions are indexed.
+          epsilon: A Decimal, the fraction of variation allowed between amounts.
+            Defaults to that of SimilarityComparator.
+        """
+        if epsilon is None:
+            epsilon = SimilarityComparator.EPSILON
+        self.log_width = math.log1p(float(epsilon))
+        self.source_entries = source_entries
+
+        # A mapping of (date, account, currency, bucket) to a list of
+        # (position, transaction) pairs, in the order of 'source_entries', and
+        # the set of dates which have been indexed.
+        self.buckets = collections.defaultdict(list)
+        self.indexed_dates = set()
+
+    def index_date(self, date):
+        """Index the transactions of a date, if not already done.
+
+        Args:
+          date: A datetime.date instance.
+        """
+        if date in self.indexed_dates:
+            return
+        self.indexed_dates.add(date)
+        entries = self.source_entries
+        position = bisect_key.bisect_left_with_key(entries, date,
+                                                   key=lambda entry: entry.date)
+        while position < len(entries) and entries[position].date == date:
+            entry = entries[position]
+            if isinstance(entry, data.Transaction):
+                for (account, currency), number in amounts_map(entry).items():
+                    key = (date, account, currency, self.bucket(number))
+                    self.buckets[key].append((position, entry))
+            position += 1
+
+    def bucket(self, number):
+        """Round an amount to its bucket.
+
+        Args:
+          number: A Decimal instance.
+        Returns:
+          An integer, or None for zero.
+        """
+        if number == ZERO:
+            return None
+        return math.floor(math.log(abs(float(number))) / self.log_width)
+
+    def candidates(self, entry, window_days):
+        """Find the indexed transactions that might be similar to a transaction.
+
+        Args:
+          entry: A Transaction instance.
+          window_days: The number of days (inclusive) before or after the date of
+            'entry' to look at.
+        Returns:
+          A list of the indexed transactions sharing an account and currency with
+          'entry' with a close amount, in their original order.
+        """
+        dates = [entry.date + datetime.timedelta(days=days)
+                 for days in range(-window_days, window_days + 1)]
+        for date in dates:
+            self.index_date(date)
+        found = {}
+        for (account, currency), number in amounts_map(entry).items():
+            bucket = self.bucket(number)
+            # Look up two buckets on each side, to be robust to rounding of the
+            # floating-point logarithm at their boundaries.
+            buckets = ((None,) if bucket is None
+                       else range(bucket - 2, bucket + 3))
+            for date in dates:
+                for bucket in buckets:
+                    for position, source_entry in self.buckets.get(
+                            (date, account, currency, bucket), ()):
+                        found[position] = source_entry
+        return [found[position] for position in sorted(found)]
+
+
 class SimilarityComparator:
     """Similarity comparator of transactions.
 
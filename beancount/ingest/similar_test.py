@@ -2,6 +2,7 @@ __copyright__ = "Copyright (C) 2016  Martin Blais"
 __license__ = "GNU GPLv2"
 
 import datetime
+import random
 
 from beancount.core.number import D
 from beancount.core import data
@@ -125,6 +126,83 @@ class TestDups(cmptest.TestCase):
         self.assertEqual({('Expenses:Tips', 'USD'): D('2.03')}, amap)
 
 
+class TestSimilarityIndex(cmptest.TestCase):
+
+    @loader.load_doc()
+    def test_candidates(self, entries, _, __):
+        """
+            plugin "beancount.plugins.auto_accounts"
+
+            2016-03-01 * "Within the window"
+              Expenses:Coffee       4.00 USD
+              Assets:Cash
+
+            2016-03-02 * "Different currency"
+              Expenses:Coffee       4.00 CAD
+              Assets:Cash
+
+            2016-03-03 * "Close amount"
+              Expenses:Coffee       4.15 USD
+              Assets:Cash
+
+            2016-03-03 * "Distant amount"
+              Expenses:Coffee       5.00 USD
+              Assets:Cash
+
+            2016-03-03 * "Zero amount"
+              Expenses:Coffee       0.00 USD
+              Assets:Cash
+
+            2016-03-06 * "Outside the window"
+              Expenses:Coffee       4.00 USD
+              Assets:Cash
+        """
+        new_entries, _, __ = loader.load_string("""
+            plugin "beancount.plugins.auto_accounts"
+
+            2016-03-03 *
+              Expenses:Coffee       4.00 USD
+              Liabilities:CreditCard
+        """)
+        new_entries = list(data.filter_txns(new_entries))
+        index = similar.SimilarityIndex(entries)
+        self.assertEqual(['Within the window', 'Close amount'],
+                         [entry.narration
+                          for entry in index.candidates(new_entries[0], 2)])
+
+    def test_same_as_pairwise(self):
+        rnd = random.Random(1)
+        accounts = ['Expenses:Food', 'Expenses:Rent', 'Assets:Cash', 'Assets:Bank']
+        start = datetime.date(2016, 1, 1)
+        def make_entries(num):
+            entries = []
+            for _ in range(num):
+                number = D(rnd.choice(['10.00', '10.30', '10.60', '11.00', '0']))
+                sign = rnd.choice([1, -1])
+                account1, account2 = rnd.sample(accounts, 2)
+                entries.append(data.Transaction(
+                    data.new_metadata('<test>', 0),
+                    start + datetime.timedelta(days=rnd.randint(0, 60)),
+                    '*', None, '', data.EMPTY_SET, data.EMPTY_SET, [
+                        data.Posting(account1, data.Amount(sign * number, 'USD'),
+                                     None, None, None, None),
+                        data.Posting(account2, data.Amount(-sign * number, 'USD'),
+                                     None, None, None, None)]))
+            entries.sort(key=data.entry_sortkey)
+            return entries
+        source_entries = make_entries(500)
+        new_entries = make_entries(100)
+
+        pairwise = similar.find_similar_entries(new_entries, source_entries,
+                                                similar.SimilarityComparator())
+        indexed = similar.find_similar_entries(new_entries, source_entries)
+        self.assertGreater(len(pairwise), 10)
+        self.assertEqual([(id(entry), id(source_entry))
+                          for entry, source_entry in pairwise],
+                         [(id(entry), id(source_entry))
+                          for entry, source_entry in indexed])
+
+
 class TestSimilarityComparator(cmptest.TestCase):
 
     def setUp(self):
@@ -4,6 +4,7 @@ __copyright__ = "Copyright (C) 2013-2016  Martin Blais"
 __license__ = "GNU GPLv2"
 
 from os import path
+from concurrent import futures
 import collections
 import functools
 import glob
@@ -19,6 +20,7 @@ import textwrap
 import time
 import warnings
 
+from beancount.utils import bisect_key
 from beancount.utils import misc_utils
 from beancount.core import data
 from beancount.parser import parser
@@ -28,6 +30,7 @@ from beancount.parser import printer
 from beancount.ops import validation
 from beancount.utils import encryption
 from beancount.utils import file_utils
+from beancount.utils import profiler
 
 
 LoadError = collections.namedtuple('LoadError', 'source message entry')
@@ -46,6 +49,25 @@ DEFAULT_PLUGINS_POST = [
 # A mapping of modules to warn about, to their renamed names.
 RENAMED_MODULES = {}
 
+# The values a plugin module may set its '__plugins_order__' attribute to, to
+# declare how its functions order the entries they return, given sorted entries.
+# This spares the loader from sorting the entries after running it. The entries
+# returned by plugins which do not declare it are sorted, unless they already
+# are; the sort keys of the entries are computed once and reused across plugins.
+#
+# PLUGIN_ORDER_SORTED: The entries are returned sorted, e.g. because they are
+#   returned as given, filtered, or with new entries inserted next to entries
+#   with the same sort key.
+# PLUGIN_ORDER_APPENDED: The entries given are returned in the same order,
+#   followed by new entries in any order, which the loader merges in.
+PLUGIN_ORDER_SORTED = 'sorted'
+PLUGIN_ORDER_APPENDED = 'appended'
+
+# A plugin module may set its '__plugins_validation__' attribute to True to
+# declare that its functions only validate the entries: they return the entries
+# they are given unchanged, along with errors. Consecutive validation plugins
+# see the same entries and may run in parallel; see PLUGIN_PROCESSES.
+
 
 # Filename pattern for the pickle-cache.
 PICKLE_CACHE_FILENAME = '.{filename}.picklecache'
@@ -53,6 +75,31 @@ PICKLE_CACHE_FILENAME = '.{filename}.picklecache'
 # The threshold below which we don't bother creating a cache file, in seconds.
 PICKLE_CACHE_THRESHOLD = 1.0
 
+# Filename pattern for the per-file parser output cache. This is created next to
+# each of the parsed input files.
+PARSE_CACHE_FILENAME = '.{filename}.parsecache'
+
+# The threshold of the total time spent parsing the files of a load below which
+# we don't bother creating the per-file parse caches, in seconds. This is of the
+# same order as PICKLE_CACHE_THRESHOLD, so that small ledgers don't get cache
+# files next to them, but large ledgers split in many small files do.
+PARSE_CACHE_THRESHOLD = 0.5
+
+# Filename pattern for the booking checkpoints file.
+BOOKING_CACHE_FILENAME = '.{filename}.bookingcache'
+
+# The number of entries below which we don't bother checkpointing booking.
+BOOKING_CACHE_MIN_ENTRIES = 20000
+
+# The number of worker processes used to parse included files in parallel. A
+# value of 0 or 1 parses all the files serially in the current process.
+PARSE_PROCESSES = 0
+
+# The number of worker processes used to run consecutive validation plugins in
+# parallel. A value of 0 or 1 runs all the plugins serially in the current
+# process.
+PLUGIN_PROCESSES = 0
+
 
 def load_file(filename, log_timings=None, log_errors=None, extra_validations=None,
               encoding=None):
@@ -160,9 +207,10 @@ def pickle_cache_function(pattern, time_threshold, function):
             pattern.format(filename=path.basename(toplevel_filename)))
 
         # Read the cache if it exists in order to get the list of files whose
-        # timestamps to check.
+        # timestamps to check. When profiling, ignore it so that all the stages
+        # get run.
         exists = path.exists(cache_filename)
-        if exists:
+        if exists and not profiler.is_active():
             with open(cache_filename, 'rb') as file:
                 try:
                     result = pickle.load(file)
@@ -217,6 +265,155 @@ def _load_file(filename, *args, **kw):
 _uncached_load_file = _load_file  # pylint: disable=invalid-name
 
 
+def parse_cache_function(pattern, time_threshold, function):
+    """Decorate a parser function to make it load its result from a per-file cache.
+
+    This considers the first argument as the absolute filename of a single input
+    file and assumes the function returns the parser's (entries, errors,
+    options_map) triple for that file only, without following its includes. The
+    cache file is stored next to the input file and is keyed by a hash of the
+    contents of the file (see compute_parse_key()), so that when a single file
+    of a large ledger is modified, only that file needs to be parsed again.
+
+    The cache files are not written as the files are parsed but by the
+    'save_cache' function attribute of the decorated function, called at the end
+    of a load, and only if the total time it took to parse the files of the load
+    justifies it, so that a large ledger split in many small files is cached but
+    a small ledger is not. Once some of the files of a load are found in the
+    cache, the files which were parsed again are always cached. The
+    'pop_parsed' function attribute returns the state accumulated since the
+    last save, to be transferred across processes with 'save_cache'.
+
+    Args:
+      pattern: A string, the filename pattern for the pickled cache file.
+        A {filename} in it gets replaced by the basename of the input filename.
+      time_threshold: A float, the total number of seconds of parsing in a load
+        below which we don't bother caching.
+      function: A function object to decorate for caching.
+    Returns:
+      A decorated function which will pull its result from a cache file if
+      it is available.
+    """
+    # The files parsed since the last save, as a list of (cache filename, parse
+    # key, result, parse time) tuples, and the number of cache hits since then.
+    parsed = []
+    num_hits = [0]
+
+    @functools.wraps(function)
+    def wrapped(filename, *args, **kw):
+        cache_filename = path.join(
+            path.dirname(filename),
+            pattern.format(filename=path.basename(filename)))
+
+        try:
+            with open(filename, 'rb') as file:
+                contents = file.read()
+        except OSError:
+            # Let the parser report the problem.
+            return function(filename, *args, **kw)
+        parse_key = compute_parse_key(filename, contents, kw.get('encoding', None))
+
+        # The cache file contains two consecutive pickles: the key, and the
+        # result. This allows us to skip unpickling a stale result.
+        if path.exists(cache_filename):
+            with open(cache_filename, 'rb') as file:
+                try:
+                    if pickle.load(file) == parse_key:
+                        # Contents unchanged; cache hit.
+                        result = pickle.load(file)
+                        num_hits[0] += 1
+                        return result
+                except Exception as exc:
+                    # Note: See pickle_cache_function() for why we catch all
+                    # exceptions here.
+                    logging.error("Parse cache file is corrupted: %s; recomputing.", exc)
+
+        time_before = time.time()
+        result = function(filename, *args, **kw)
+        parsed.append((cache_filename, parse_key, result, time.time() - time_before))
+        return result
+
+    def pop_parsed():
+        """Return and clear the state accumulated since the last save.
+
+        Returns:
+          A pair of the list of parsed files and the number of cache hits.
+        """
+        state = (list(parsed), num_hits[0])
+        parsed.clear()
+        num_hits[0] = 0
+        return state
+
+    def save_cache(other_parsed=(), other_num_hits=0):
+        """Write the cache files of the files parsed since the last save.
+
+        Args:
+          other_parsed: A list of files parsed in other processes, from pop_parsed().
+          other_num_hits: The number of cache hits in other processes.
+        """
+        all_parsed, all_num_hits = pop_parsed()
+        all_parsed.extend(other_parsed)
+        all_num_hits += other_num_hits
+        if not all_num_hits and sum(item[3] for item in all_parsed) <= time_threshold:
+            return
+        for cache_filename, parse_key, result, _ in all_parsed:
+            try:
+                with open(cache_filename, 'wb') as file:
+                    pickle.dump(parse_key, file)
+                    pickle.dump(result, file)
+            except Exception as exc:
+                logging.warning("Could not write to parse cache file %s: %s",
+                                cache_filename, exc)
+
+    wrapped.pop_parsed = pop_parsed
+    wrapped.save_cache = save_cache
+    return wrapped
+
+
+def _parse_file(filename, encoding=None):
+    """Delegate to the parser. Note: This gets conditionally advised by caching below."""
+    return parser.parse_file(filename, encoding=encoding)
+_uncached_parse_file = _parse_file  # pylint: disable=invalid-name
+
+
+def _parse_file_in_subprocess(filename, encoding):
+    """Parse a single file from within a worker process. See _parse_recursive().
+
+    Args:
+      filename: A string, the absolute filename to be parsed.
+      encoding: A string or None, the encoding to decode the input filename with.
+    Returns:
+      A pair of the (entries, errors, options_map) triple from the parser, and
+      the state of the parse cache to save in the parent process, from
+      pop_parsed(), or None if the parse cache is disabled.
+    """
+    result = _parse_file(filename, encoding=encoding)
+    pop_parsed = getattr(_parse_file, 'pop_parsed', None)
+    return result, (pop_parsed() if pop_parsed is not None else None)
+
+
+def compute_parse_key(filename, contents, encoding):
+    """Compute a key identifying the parser output for a single input file.
+
+    The filename is included because it gets stored in the metadata of the
+    parsed directives. The parser's source hash is included in order to
+    invalidate the caches when the parser itself changes.
+
+    Args:
+      filename: A string, the absolute filename of the parsed file.
+      contents: A bytes object, the contents of the file.
+      encoding: A string or None, the encoding used to decode the file.
+    Returns:
+      A string, the hexadecimal digest of the key.
+    """
+    md5 = hashlib.md5()
+    md5.update(getattr(parser._parser, 'SOURCE_HASH', '').encode('utf8'))
+    md5.update(filename.encode('utf8'))
+    md5.update((encoding or '').encode('utf8'))
+    md5.update(contents)
+    return md5.hexdigest()
+
+
 def needs_refresh(options_map):
     """Predicate that returns true if at least one of the input files may have changed.
 
@@ -309,99 +506,147 @@ def _parse_recursive(sources, log_timings, encoding=None):
     # detect and avoid duplicates (cycles).
     filenames_seen = set()
 
+    # If enabled, a pool of processes used to parse the included files ahead of
+    # time, and a mapping of absolute filename to the future of its parser
+    # output. The results are still consumed in the same order as the serial
+    # version, so the output remains deterministic.
+    executor = (futures.ProcessPoolExecutor(max_workers=PARSE_PROCESSES)
+                if PARSE_PROCESSES > 1
+                else None)
+    parse_futures = {}
+
+    # The state of the parse cache returned by the worker processes, the files
+    # they parsed and their number of cache hits, to save it at the end.
+    subprocess_parsed = []
+    subprocess_num_hits = 0
+
     with misc_utils.log_time('beancount.parser.parser', log_timings, indent=1):
-        while source_stack:
-            source, is_file = source_stack.pop(0)
-            is_top_level = options_map is None
-
-            # If the file is encrypted, read it in and process it as a string.
-            if is_file:
-                cwd = path.dirname(source)
-                source_filename = source
-                if encryption.is_encrypted_file(source):
-                    source = encryption.read_encrypted_file(source)
-                    is_file = False
-            else:
-                # If we're parsing a string, the CWD is the current process
-                # working directory.
-                cwd = os.getcwd()
-                source_filename = None
-
-            if is_file:
-                # All filenames here must be absolute.
-                assert path.isabs(source)
-                filename = path.normpath(source)
-
-                # Check for file previously parsed... detect duplicates.
-                if filename in filenames_seen:
-                    parse_errors.append(
-                        LoadError(data.new_metadata("<load>", 0),
-                                  'Duplicate filename parsed: "{}"'.format(filename),
-                                  None))
-                    continue
-
-                # Check for a file that does not exist.
-                if not path.exists(filename):
-                    parse_errors.append(
-                        LoadError(data.new_metadata("<load>", 0),
-                                  'File "{}" does not exist'.format(filename), None))
-                    continue
-
-                # Parse a file from disk directly.
-                filenames_seen.add(filename)
-                with misc_utils.log_time('beancount.parser.parser.parse_file',
-                                         log_timings, indent=2):
-                    (src_entries,
-                     src_errors,
-                     src_options_map) = parser.parse_file(filename, encoding=encoding)
-
-                cwd = path.dirname(filename)
-            else:
-                # Encode the contents if necessary.
-                if encoding:
-                    if isinstance(source, bytes):
-                        source = source.decode(encoding)
-                    source = source.encode('ascii', 'replace')
-
-                # Parse a string buffer from memory.
-                with misc_utils.log_time('beancount.parser.parser.parse_string',
-                                         log_timings, indent=2):
-                    (src_entries,
-                     src_errors,
-                     src_options_map) = parser.parse_string(source, source_filename)
-
-            # Merge the entries resulting from the parsed file.
-            entries.extend(src_entries)
-            parse_errors.extend(src_errors)
-
-            # We need the options from the very top file only (the very
-            # first file being processed). No merging of options should
-            # occur.
-            if is_top_level:
-                options_map = src_options_map
-            else:
-                aggregate_options_map(options_map, src_options_map)
-
-            # Add includes to the list of sources to process. chdir() for glob,
-            # which uses it indirectly.
-            include_expanded = []
-            with file_utils.chdir(cwd):
-                for include_filename in src_options_map['include']:
-                    matched_filenames = glob.glob(include_filename, recursive=True)
-                    if matched_filenames:
-                        include_expanded.extend(matched_filenames)
-                    else:
+        try:
+            while source_stack:
+                source, is_file = source_stack.pop(0)
+                is_top_level = options_map is None
+
+                # If the file is encrypted, read it in and process it as a string.
+                if is_file:
+                    cwd = path.dirname(source)
+                    source_filename = source
+                    if encryption.is_encrypted_file(source):
+                        source = encryption.read_encrypted_file(source)
+                        is_file = False
+                else:
+                    # If we're parsing a string, the CWD is the current process
+                    # working directory.
+                    cwd = os.getcwd()
+                    source_filename = None
+
+                if is_file:
+                    # All filenames here must be absolute.
+                    assert path.isabs(source)
+                    filename = path.normpath(source)
+
+                    # Check for file previously parsed... detect duplicates.
+                    if filename in filenames_seen:
                         parse_errors.append(
                             LoadError(data.new_metadata("<load>", 0),
-                                      'File glob "{}" does not match any files'.format(
-                                          include_filename), None))
-            for include_filename in include_expanded:
-                if not path.isabs(include_filename):
-                    include_filename = path.join(cwd, include_filename)
-                include_filename = path.normpath(include_filename)
+                                      'Duplicate filename parsed: "{}"'.format(filename),
+                                      None))
+                        continue
 
-                # Add the include filenames to be processed later.
-                source_stack.append((include_filename, True))
+                    # Check for a file that does not exist.
+                    if not path.exists(filename):
+                        parse_errors.append(
+                            LoadError(data.new_metadata("<load>", 0),
+                                      'File "{}" does not exist'.format(filename), None))
+                        continue
+
+                    # Parse a file from disk directly.
+                    filenames_seen.add(filename)
+                    with misc_utils.log_time('beancount.parser.parser.parse_file',
+                                             log_timings, indent=2), \
+                         profiler.stage('beancount.parser.parser.parse_file', 'file',
+                                        filename=filename) as counts:
+                        future = parse_futures.pop(filename, None)
+                        if future is not None:
+                            ((src_entries,
+                              src_errors,
+                              src_options_map),
+                             cache_state) = future.result()
+                            if cache_state is not None:
+                                subprocess_parsed.extend(cache_state[0])
+                                subprocess_num_hits += cache_state[1]
+                        else:
+                            (src_entries,
+                             src_errors,
+                             src_options_map) = _parse_file(filename, encoding=encoding)
+                        counts.entries_out = len(src_entries)
+
+                    cwd = path.dirname(filename)
+                else:
+                    # Encode the contents if necessary.
+                    if encoding:
+                        if isinstance(source, bytes):
+                            source = source.decode(encoding)
+                        source = source.encode('ascii', 'replace')
+
+                    # Parse a string buffer from memory.
+                    with misc_utils.log_time('beancount.parser.parser.parse_string',
+                                             log_timings, indent=2), \
+                         profiler.stage('beancount.parser.parser.parse_string', 'file',
+                                        filename=source_filename) as counts:
+                        (src_entries,
+                         src_errors,
+                         src_options_map) = parser.parse_string(source, source_filename)
+                        counts.entries_out = len(src_entries)
+
+                # Merge the entries resulting from the parsed file.
+                entries.extend(src_entries)
+                parse_errors.extend(src_errors)
+
+                # We need the options from the very top file only (the very
+                # first file being processed). No merging of options should
+                # occur.
+                if is_top_level:
+                    options_map = src_options_map
+                else:
+                    aggregate_options_map(options_map, src_options_map)
+
+                # Add includes to the list of sources to process. chdir() for glob,
+                # which uses it indirectly.
+                include_expanded = []
+                with file_utils.chdir(cwd):
+                    for include_filename in src_options_map['include']:
+                        matched_filenames = glob.glob(include_filename, recursive=True)
+                        if matched_filenames:
+                            include_expanded.extend(matched_filenames)
+                        else:
+                            parse_errors.append(
+                                LoadError(data.new_metadata("<load>", 0),
+                                          'File glob "{}" does not match any files'.format(
+                                              include_filename), None))
+                for include_filename in include_expanded:
+                    if not path.isabs(include_filename):
+                        include_filename = path.join(cwd, include_filename)
+                    include_filename = path.normpath(include_filename)
+
+                    # Add the include filenames to be processed later.
+                    source_stack.append((include_filename, True))
+
+                    # Start parsing the included file in a worker process.
+                    if (executor is not None and
+                            include_filename not in filenames_seen and
+                            include_filename not in parse_futures and
+                            path.exists(include_filename) and
+                            not encryption.is_encrypted_file(include_filename)):
+                        parse_futures[include_filename] = executor.submit(
+                            _parse_file_in_subprocess, include_filename, encoding)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    # Write the parse cache files, if the time spent parsing justifies it.
+    save_cache = getattr(_parse_file, 'save_cache', None)
+    if save_cache is not None:
+        save_cache(subprocess_parsed, subprocess_num_hits)
 
     # Make sure we have at least a dict of valid options.
     if options_map is None:
@@ -461,23 +706,32 @@ def _load(sources, log_timings, extra_validations, encoding):
 
     # Parse all the files recursively. Ensure that the entries are sorted before
     # running any processes on them.
-    with misc_utils.log_time('parse', log_timings, indent=1):
+    with misc_utils.log_time('parse', log_timings, indent=1), \
+         profiler.stage('parse', 'phase', cprofile=False) as counts:
         entries, parse_errors, options_map = _parse_recursive(
             sources, log_timings, encoding)
         entries.sort(key=data.entry_sortkey)
+        counts.entries_out = len(entries)
 
     # Run interpolation on incomplete entries.
-    with misc_utils.log_time('booking', log_timings, indent=1):
-        entries, balance_errors = booking.book(entries, options_map)
+    with misc_utils.log_time('booking', log_timings, indent=1), \
+         profiler.stage('booking', 'phase', entries) as counts:
+        checkpoint_filename = get_booking_cache_filename(sources, entries, options_map)
+        entries, balance_errors = booking.book(entries, options_map, checkpoint_filename)
         parse_errors.extend(balance_errors)
+        counts.entries_out = len(entries)
 
     # Transform the entries.
-    with misc_utils.log_time('run_transformations', log_timings, indent=1):
+    with misc_utils.log_time('run_transformations', log_timings, indent=1), \
+         profiler.stage('run_transformations', 'phase', entries,
+                        cprofile=False) as counts:
         entries, errors = run_transformations(entries, parse_errors, options_map,
                                               log_timings)
+        counts.entries_out = len(entries)
 
     # Validate the list of entries.
-    with misc_utils.log_time('beancount.ops.validate', log_timings, indent=1):
+    with misc_utils.log_time('beancount.ops.validate', log_timings, indent=1), \
+         profiler.stage('beancount.ops.validate', 'phase', entries, cprofile=False):
         valid_errors = validation.validate(entries, options_map, log_timings,
                                            extra_validations)
         errors.extend(valid_errors)
@@ -492,6 +746,34 @@ def _load(sources, log_timings, extra_validations, encoding):
     return entries, errors, options_map
 
 
+def get_booking_cache_filename(sources, entries, options_map):
+    """Get the name of the file holding the booking checkpoints, if enabled.
+
+    Checkpoints are only used for large ledgers loaded from a single top-level
+    file, and never when some of the input files are encrypted, so as to avoid
+    storing their contents in the clear.
+
+    Args:
+      sources: A list of (filename-or-string, is-filename) pairs, as per _load().
+      entries: A list of parsed directives.
+      options_map: An options dict as read from the parser.
+    Returns:
+      A string, the name of the checkpoints file, or None, if booking
+      should not be checkpointed.
+    """
+    if (BOOKING_CACHE_FILENAME is None or
+            len(entries) < BOOKING_CACHE_MIN_ENTRIES or
+            len(sources) != 1 or
+            not sources[0][1]):
+        return None
+    if any(encryption.is_encrypted_file(filename)
+           for filename in options_map['include']):
+        return None
+    filename = sources[0][0]
+    return path.join(path.dirname(filename),
+                     BOOKING_CACHE_FILENAME.format(filename=path.basename(filename)))
+
+
 def run_transformations(entries, parse_errors, options_map, log_timings):
     """Run the various transformations on the entries.
 
@@ -509,6 +791,13 @@ def run_transformations(entries, parse_errors, options_map, log_timings):
     # A list of errors to extend (make a copy to avoid modifying the input).
     errors = list(parse_errors)
 
+    # The sort keys of the entries, computed once for all the plugins.
+    sort_keys = data.SortKeyCache()
+
+    # If enabled, the consecutive validation plugins whose run is deferred, to
+    # run them together in parallel, as a list of (name, config) pairs.
+    validation_plugins = []
+
     # Process the plugins.
     if options_map['plugin_processing_mode'] == 'raw':
         plugins_iter = options_map["plugin"]
@@ -536,37 +825,203 @@ def run_transformations(entries, parse_errors, options_map, log_timings):
             if not hasattr(module, '__plugins__'):
                 continue
 
-            with misc_utils.log_time(plugin_name, log_timings, indent=2):
-
-                # Run each transformer function in the plugin.
-                for function_name in module.__plugins__:
-                    if isinstance(function_name, str):
-                        # Support plugin functions provided by name.
-                        callback = getattr(module, function_name)
-                    else:
-                        # Support function types directly, not just names.
-                        callback = function_name
-
-                    if plugin_config is not None:
-                        entries, plugin_errors = callback(entries, options_map,
-                                                          plugin_config)
-                    else:
-                        entries, plugin_errors = callback(entries, options_map)
-                    errors.extend(plugin_errors)
+            # Defer the validation plugins, to run them in parallel with the
+            # following ones.
+            if PLUGIN_PROCESSES > 1 and getattr(module, '__plugins_validation__', False):
+                validation_plugins.append((plugin_name, plugin_config))
+                continue
+            if validation_plugins:
+                errors.extend(run_validation_plugins(validation_plugins, entries,
+                                                     options_map, log_timings))
+                validation_plugins = []
+
+            num_entries_in = len(entries)
+            with misc_utils.log_time(plugin_name, log_timings, indent=2), \
+                 profiler.stage(plugin_name, 'plugin', entries) as counts:
+                entries, plugin_errors = run_plugin(module, entries, options_map,
+                                                    plugin_config)
+                errors.extend(plugin_errors)
+                counts.entries_out = len(entries)
 
             # Ensure that the entries are sorted. Don't trust the plugins
-            # themselves.
-            entries.sort(key=data.entry_sortkey)
+            # themselves, unless they declare how they order their entries.
+            plugin_order = getattr(module, '__plugins_order__', None)
+            if plugin_order == PLUGIN_ORDER_SORTED:
+                pass
+            elif (plugin_order == PLUGIN_ORDER_APPENDED and
+                  len(entries) >= num_entries_in):
+                entries = merge_appended_entries(entries, num_entries_in)
+            else:
+                sort_keys.sort(entries)
 
         except (ImportError, TypeError) as exc:
-            # Upon failure, just issue an error.
-            errors.append(LoadError(data.new_metadata("<load>", 0),
-                                    'Error importing "{}": {}'.format(
-                                        plugin_name, str(exc)), None))
+            # Upon failure, just issue an error, after those of the plugins
+            # before it.
+            if validation_plugins:
+                errors.extend(run_validation_plugins(validation_plugins, entries,
+                                                     options_map, log_timings))
+                validation_plugins = []
+            errors.append(plugin_import_error(plugin_name, exc))
+
+    if validation_plugins:
+        errors.extend(run_validation_plugins(validation_plugins, entries,
+                                             options_map, log_timings))
+
+    return entries, errors
+
+
+def run_plugin(module, entries, options_map, plugin_config):
+    """Run the functions of a plugin module on the entries.
+
+    Args:
+      module: A plugin module, with a '__plugins__' attribute.
+      entries: A list of directives.
+      options_map: An options dict as read from the parser.
+      plugin_config: The configuration string of the plugin, or None.
+    Returns:
+      The list of entries returned by the last function of the plugin, and a
+      list of the errors of all its functions.
+    """
+    errors = []
+    for function_name in module.__plugins__:
+        if isinstance(function_name, str):
+            # Support plugin functions provided by name.
+            callback = getattr(module, function_name)
+        else:
+            # Support function types directly, not just names.
+            callback = function_name
 
+        if plugin_config is not None:
+            entries, plugin_errors = callback(entries, options_map, plugin_config)
+        else:
+            entries, plugin_errors = callback(entries, options_map)
+        errors.extend(plugin_errors)
     return entries, errors
 
 
+def run_validation_plugins(plugins, entries, options_map, log_timings):
+    """Run validation plugins on the same entries in a pool of processes.
+
+    Each worker process is given a copy of the entries and options once, when
+    it starts, and returns the errors of the plugins it runs. The errors are
+    returned in the order of the plugins, as if they had been run serially. A
+    single plugin is run in the current process.
+
+    Args:
+      plugins: A list of (name, config) pairs of validation plugins.
+      entries: A list of directives.
+      options_map: An options dict as read from the parser.
+      log_timings: A function to write timing log entries to, or None, if it
+        should be quiet.
+    Returns:
+      A list of errors.
+    """
+    errors = []
+    if len(plugins) == 1:
+        (plugin_name, plugin_config), = plugins
+        with misc_utils.log_time(plugin_name, log_timings, indent=2), \
+             profiler.stage(plugin_name, 'plugin', entries) as counts:
+            try:
+                _, plugin_errors = run_plugin(importlib.import_module(plugin_name),
+                                              entries, options_map, plugin_config)
+                errors.extend(plugin_errors)
+            except (ImportError, TypeError) as exc:
+                errors.append(plugin_import_error(plugin_name, exc))
+            counts.entries_out = len(entries)
+        return errors
+
+    with misc_utils.log_time('beancount.loader.run_validation_plugins',
+                             log_timings, indent=2), \
+         profiler.stage('beancount.loader.run_validation_plugins', 'plugin', entries,
+                        cprofile=False) as counts, \
+         futures.ProcessPoolExecutor(max_workers=min(PLUGIN_PROCESSES, len(plugins)),
+                                     initializer=_set_validation_snapshot,
+                                     initargs=(entries, options_map)) as executor:
+        plugin_futures = [executor.submit(_run_validation_plugin, plugin_name,
+                                          plugin_config)
+                          for plugin_name, plugin_config in plugins]
+        for (plugin_name, _), future in zip(plugins, plugin_futures):
+            try:
+                errors.extend(future.result())
+            except (ImportError, TypeError) as exc:
+                errors.append(plugin_import_error(plugin_name, exc))
+        counts.entries_out = len(entries)
+    return errors
+
+
+def plugin_import_error(plugin_name, exc):
+    """Create the error of a plugin which failed to import or run.
+
+    Args:
+      plugin_name: A string, the name of the plugin module.
+      exc: The exception raised.
+    Returns:
+      An instance of LoadError.
+    """
+    return LoadError(data.new_metadata("<load>", 0),
+                     'Error importing "{}": {}'.format(plugin_name, str(exc)), None)
+
+
+# The entries and options map the validation plugins are run on, in a worker
+# process of run_validation_plugins().
+_VALIDATION_SNAPSHOT = None
+
+
+def _set_validation_snapshot(entries, options_map):
+    """Set the entries and options to run validation plugins on in this process.
+
+    Args:
+      entries: A list of directives.
+      options_map: An options dict as read from the parser.
+    """
+    global _VALIDATION_SNAPSHOT  # pylint: disable=global-statement
+    _VALIDATION_SNAPSHOT = (entries, options_map)
+
+
+def _run_validation_plugin(plugin_name, plugin_config):
+    """Run a validation plugin on the entries of this worker process.
+
+    Args:
+      plugin_name: A string, the name of the plugin module.
+      plugin_config: The configuration string of the plugin, or None.
+    Returns:
+      A list of errors.
+    """
+    entries, options_map = _VALIDATION_SNAPSHOT
+    module = importlib.import_module(plugin_name)
+    _, errors = run_plugin(module, entries, options_map, plugin_config)
+    return errors
+
+
+def merge_appended_entries(entries, num_sorted):
+    """Merge entries appended to a sorted list of entries into it.
+
+    This produces the same list as a stable sort of all the entries, but only
+    computes the sort keys of the appended entries and of those of the sorted
+    entries compared with them.
+
+    Args:
+      entries: A list of directives, the first 'num_sorted' of which are sorted.
+      num_sorted: An integer, the number of sorted entries.
+    Returns:
+      A sorted list of directives.
+    """
+    if len(entries) == num_sorted:
+        return entries
+    merged_entries = []
+    index = 0
+    for entry in sorted(entries[num_sorted:], key=data.entry_sortkey):
+        # Insert after the sorted entries with the same key, as a stable sort
+        # would.
+        next_index = bisect_key.bisect_right_with_key(
+            entries, data.entry_sortkey(entry), data.entry_sortkey, index, num_sorted)
+        merged_entries.extend(entries[index:next_index])
+        merged_entries.append(entry)
+        index = next_index
+    merged_entries.extend(entries[index:num_sorted])
+    return merged_entries
+
+
 def combine_plugins(*plugin_modules):
     """Combine the plugins from the given plugin modules.
 
@@ -638,11 +1093,36 @@ def initialize():
     # Unless an environment variable disables it, use the pickle load cache
     # automatically.
     # pylint: disable=invalid-name
-    global _load_file
+    global _load_file, _parse_file, PARSE_PROCESSES, PLUGIN_PROCESSES
+    global BOOKING_CACHE_FILENAME
     if os.getenv('BEANCOUNT_DISABLE_LOAD_CACHE') is None:
         _load_file = pickle_cache_function(
             os.getenv('BEANCOUNT_LOAD_CACHE_FILENAME') or PICKLE_CACHE_FILENAME,
             PICKLE_CACHE_THRESHOLD,
             _uncached_load_file)
 
+    # Unless an environment variable disables it, cache the parser output of
+    # each of the input files as well. This is used when the load cache above
+    # misses, so that only the modified files have to be parsed again.
+    if os.getenv('BEANCOUNT_DISABLE_PARSE_CACHE') is None:
+        _parse_file = parse_cache_function(
+            os.getenv('BEANCOUNT_PARSE_CACHE_FILENAME') or PARSE_CACHE_FILENAME,
+            PARSE_CACHE_THRESHOLD,
+            _uncached_parse_file)
+
+    # Unless an environment variable disables it, checkpoint the balances during
+    # booking of large ledgers, in order to resume from there on the next load.
+    if os.getenv('BEANCOUNT_DISABLE_BOOKING_CACHE') is not None:
+        BOOKING_CACHE_FILENAME = None
+
+    # Parse the included files in parallel if an environment variable requests
+    # it, with the given number of worker processes.
+    if os.getenv('BEANCOUNT_PARSE_PROCESSES'):
+        PARSE_PROCESSES = int(os.getenv('BEANCOUNT_PARSE_PROCESSES'))
+
+    # Run the validation plugins in parallel if an environment variable requests
+    # it, with the given number of worker processes.
+    if os.getenv('BEANCOUNT_PLUGIN_PROCESSES'):
+        PLUGIN_PROCESSES = int(os.getenv('BEANCOUNT_PLUGIN_PROCESSES'))
+
 initialize()
@@ -6,10 +6,14 @@ import unittest
 import tempfile
 import textwrap
 import os
+import sys
+import time
+import types
 from unittest import mock
 from os import path
 
 from beancount import loader
+from beancount.core import data
 from beancount.parser import parser
 from beancount.utils import test_utils
 from beancount.utils import encryption_test
@@ -46,6 +50,99 @@ class TestLoader(unittest.TestCase):
             entries, errors, options_map, None)
         self.assertEqual(1, len(trans_errors))
 
+    def test_run_transformations_plugins_order(self):
+        # A plugin which reverses the entries and appends a copy of the first.
+        def reverse_and_append(entries, unused_options_map):
+            return entries[::-1] + [entries[0]._replace(meta=dict(entries[0].meta))], []
+
+        entries, errors, options_map = parser.parse_string(
+            'plugin "beancount_test_plugin"\n\n' + TEST_INPUT)
+        expected_entries = data.sorted(entries + [entries[0]])
+        for plugins_order, sorted_ in [(None, True),
+                                       (loader.PLUGIN_ORDER_SORTED, False),
+                                       (loader.PLUGIN_ORDER_APPENDED, False)]:
+            module = types.ModuleType('beancount_test_plugin')
+            module.__plugins__ = (reverse_and_append,)
+            if plugins_order:
+                module.__plugins_order__ = plugins_order
+            options_map['plugin_processing_mode'] = 'raw'
+            with mock.patch.dict(sys.modules, {'beancount_test_plugin': module}):
+                trans_entries, trans_errors = loader.run_transformations(
+                    list(entries), errors, options_map, None)
+            self.assertFalse(trans_errors)
+            # The loader trusts the plugins which declare that their entries are
+            # sorted, and the prefix of the entries appended to is left reversed.
+            self.assertEqual(sorted_, trans_entries == expected_entries)
+
+        # Appended entries are merged.
+        def append(entries, unused_options_map):
+            return entries + [entry._replace(meta=dict(entry.meta))
+                              for entry in entries[::-1]], []
+        module = types.ModuleType('beancount_test_plugin')
+        module.__plugins__ = (append,)
+        module.__plugins_order__ = loader.PLUGIN_ORDER_APPENDED
+        with mock.patch.dict(sys.modules, {'beancount_test_plugin': module}):
+            trans_entries, trans_errors = loader.run_transformations(
+                list(entries), errors, options_map, None)
+        self.assertEqual(data.sorted(entries + entries[::-1]), trans_entries)
+
+    def test_run_transformations_validation_plugins(self):
+        input_string = textwrap.dedent("""
+          plugin "beancount.plugins.leafonly"
+          plugin "beancount.plugins.nounused"
+          plugin "beancount.plugins.does_not_exist"
+          plugin "beancount.plugins.onecommodity"
+          plugin "beancount.plugins.auto_accounts"
+          plugin "beancount.plugins.noduplicates"
+          plugin "beancount.plugins.coherent_cost"
+
+          2014-01-01 open Assets:Cash
+          2014-01-01 open Assets:Unused
+          2014-01-01 open Expenses:Food
+          2014-01-01 open Expenses:Food:Restaurant
+
+          2014-02-01 * "Leaf only"
+            Expenses:Food    10 USD
+            Assets:Cash
+
+          2014-02-02 * "Duplicate"
+            Expenses:Food:Restaurant    20 CAD
+            Assets:Cash
+
+          2014-02-02 * "Duplicate"
+            Expenses:Food:Restaurant    20 CAD
+            Assets:Cash
+
+          2014-02-03 * "Incoherent cost"
+            Assets:Stock     1 HOOL {10 USD}
+            Assets:Cash
+            Assets:Other     1 HOOL
+        """)
+        entries, errors, _ = loader.load_string(input_string)
+        self.assertEqual(6, len(errors))
+
+        with mock.patch.object(loader, 'PLUGIN_PROCESSES', 3), \
+             mock.patch.object(loader, 'run_validation_plugins',
+                               wraps=loader.run_validation_plugins) as run_validation:
+            p_entries, p_errors, _ = loader.load_string(input_string)
+        self.assertEqual(3, run_validation.call_count)
+        self.assertEqual(entries, p_entries)
+        self.assertEqual([(type(error).__name__, error.message) for error in errors],
+                         [(type(error).__name__, error.message) for error in p_errors])
+
+    def test_merge_appended_entries(self):
+        entries, _, __ = parser.parse_string(TEST_INPUT)
+        self.assertIs(entries, loader.merge_appended_entries(entries, len(entries)))
+        for num_sorted in range(len(entries) + 1):
+            all_entries = entries[:num_sorted] + [entry._replace(meta=dict(entry.meta))
+                                                  for entry in entries[::-1]]
+            merged_entries = loader.merge_appended_entries(all_entries, num_sorted)
+            self.assertEqual(len(all_entries), len(merged_entries))
+            self.assertEqual(data.sorted(all_entries), merged_entries)
+            # The order of entries with equal keys is that of a stable sort.
+            self.assertEqual([id(entry) for entry in data.sorted(all_entries)],
+                             [id(entry) for entry in merged_entries])
+
     def test_load(self):
         with test_utils.capture():
             with tempfile.NamedTemporaryFile('w') as tmpfile:
@@ -310,6 +407,52 @@ class TestLoadIncludes(unittest.TestCase):
                          list(map(path.basename, options_map['include'])))
 
 
+class TestLoadIncludesParallel(unittest.TestCase):
+
+    def _create_ledger(self, tmp):
+        test_utils.create_temporary_files(tmp, {
+            'apples.beancount': """
+              option "operating_currency" "USD"
+              include "fruits/*.beancount"
+              include "fruits/oranges.beancount"
+              2014-01-01 open Assets:Apples
+            """,
+            'fruits/oranges.beancount': """
+              option "operating_currency" "CAD"
+              include "../bananas.beancount"
+              2014-01-02 open Assets:Oranges
+            """,
+            'fruits/lemons.beancount': """
+              option "operating_currency" "EUR"
+              2014-01-03 open Assets:Lemons
+            """,
+            'bananas.beancount': """
+              option "operating_currency" "JPY"
+              2014-01-04 open Assets:Bananas
+            """})
+        return path.join(tmp, 'apples.beancount')
+
+    def test_load_file_parallel(self):
+        with test_utils.tempdir() as tmp:
+            top_filename = self._create_ledger(tmp)
+            with mock.patch('beancount.loader._load_file', loader._uncached_load_file):
+                entries, errors, options_map = loader.load_file(top_filename)
+                with mock.patch('beancount.loader.PARSE_PROCESSES', 3):
+                    p_entries, p_errors, p_options_map = loader.load_file(top_filename)
+
+        self.assertEqual(4, len(p_entries))
+        self.assertEqual(entries, p_entries)
+        self.assertEqual(1, len(p_errors))
+        self.assertRegex(p_errors[0].message, 'Duplicate filename')
+        self.assertEqual([error.message for error in errors],
+                         [error.message for error in p_errors])
+        self.assertEqual({'USD', 'EUR', 'CAD', 'JPY'},
+                         set(p_options_map['operating_currency']))
+        self.assertEqual(options_map['operating_currency'],
+                         p_options_map['operating_currency'])
+        self.assertEqual(options_map['include'], p_options_map['include'])
+
+
 class TestLoadIncludesEncrypted(encryption_test.TestEncryptedBase):
 
     def test_include_encrypted(self):
@@ -473,6 +616,176 @@ class TestLoadCache(unittest.TestCase):
                 os.environ['BEANCOUNT_LOAD_CACHE_FILENAME'] = prev_env
 
 
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.parsed_filenames = []
+        mock.patch('beancount.loader._parse_file',
+                   loader.parse_cache_function(loader.PARSE_CACHE_FILENAME,
+                                               0,  # No time threshold.
+                                               self._parse_file)).start()
+        # Disable the top-level cache in order to exercise the parser.
+        mock.patch('beancount.loader._load_file', loader._uncached_load_file).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def _parse_file(self, filename, *args, **kw):
+        self.parsed_filenames.append(path.basename(filename))
+        return parser.parse_file(filename, *args, **kw)
+
+    def test_parse_cache(self):
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  include "oranges.beancount"
+                  include "bananas.beancount"
+                  2014-01-01 open Assets:Apples
+                """,
+                'oranges.beancount': """
+                  2014-01-02 open Assets:Oranges
+                """,
+                'bananas.beancount': """
+                  2014-01-02 open Assets:Bananas
+                """})
+            top_filename = path.join(tmp, 'apples.beancount')
+            entries, errors, options_map = loader.load_file(top_filename)
+            self.assertFalse(errors)
+            self.assertEqual(3, len(entries))
+            self.assertEqual(['apples.beancount', 'oranges.beancount',
+                              'bananas.beancount'], self.parsed_filenames)
+
+            # Make sure the caches were created.
+            for filename in 'apples', 'oranges', 'bananas':
+                self.assertTrue(path.exists(
+                    path.join(tmp, '.{}.beancount.parsecache'.format(filename))))
+
+            # Load again, make sure the caches are being hit.
+            entries2, errors, options_map = loader.load_file(top_filename)
+            self.assertEqual(3, len(self.parsed_filenames))
+            self.assertEqual(entries, entries2)
+
+            # Modify a single included file and ensure only that one gets parsed.
+            with open(path.join(tmp, 'oranges.beancount'), 'a') as file:
+                file.write('2014-01-03 open Assets:Lemons\n')
+            entries, errors, options_map = loader.load_file(top_filename)
+            self.assertFalse(errors)
+            self.assertEqual(4, len(entries))
+            self.assertEqual(4, len(self.parsed_filenames))
+            self.assertEqual('oranges.beancount', self.parsed_filenames[-1])
+
+    def test_parse_cache_corrupted(self):
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  2014-01-01 open Assets:Apples
+                """})
+            filename = path.join(tmp, 'apples.beancount')
+            with open(path.join(tmp, '.apples.beancount.parsecache'), 'w') as file:
+                file.write('garbage')
+            with self.assertLogs(level='ERROR'):
+                entries, errors, options_map = loader.load_file(filename)
+            self.assertFalse(errors)
+            self.assertEqual(1, len(entries))
+            self.assertEqual(1, len(self.parsed_filenames))
+
+            # The cache file has been rewritten.
+            entries, errors, options_map = loader.load_file(filename)
+            self.assertEqual(1, len(self.parsed_filenames))
+
+
+class TestParseCacheThreshold(unittest.TestCase):
+
+    def setUp(self):
+        self.parsed_filenames = []
+        # Each file takes 10ms to parse, and the caches are written if the files
+        # of a load take more than 100ms in total.
+        mock.patch('beancount.loader._parse_file',
+                   loader.parse_cache_function(loader.PARSE_CACHE_FILENAME,
+                                               0.1,
+                                               self._parse_file)).start()
+        mock.patch('beancount.loader._load_file', loader._uncached_load_file).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def _parse_file(self, filename, *args, **kw):
+        self.parsed_filenames.append(path.basename(filename))
+        time.sleep(0.01)
+        return parser.parse_file(filename, *args, **kw)
+
+    def create_ledger(self, tmp, num_includes):
+        files = {'top.beancount': ''.join('include "{}.beancount"\n'.format(index)
+                                          for index in range(num_includes))}
+        for index in range(num_includes):
+            files['{}.beancount'.format(index)] = (
+                '2014-01-01 open Assets:Account{}\n'.format(index))
+        test_utils.create_temporary_files(tmp, files)
+        return path.join(tmp, 'top.beancount')
+
+    def get_cache_files(self, tmp):
+        return [filename for filename in os.listdir(tmp)
+                if filename.endswith('.parsecache')]
+
+    def test_many_small_includes(self):
+        with test_utils.tempdir() as tmp:
+            top_filename = self.create_ledger(tmp, 30)
+            entries, errors, _ = loader.load_file(top_filename)
+            self.assertFalse(errors)
+            self.assertEqual(31, len(self.parsed_filenames))
+            self.assertEqual(31, len(self.get_cache_files(tmp)))
+
+            # All the files are found in the cache on the second load.
+            entries2, errors, _ = loader.load_file(top_filename)
+            self.assertEqual(31, len(self.parsed_filenames))
+            self.assertEqual(entries, entries2)
+
+            # A modified file is parsed and cached again, even if it is quick.
+            with open(path.join(tmp, '3.beancount'), 'a') as file:
+                file.write('2014-01-02 open Assets:Other\n')
+            loader.load_file(top_filename)
+            self.assertEqual(['3.beancount'], self.parsed_filenames[31:])
+            loader.load_file(top_filename)
+            self.assertEqual(32, len(self.parsed_filenames))
+
+    def test_many_small_includes_in_subprocesses(self):
+        # The files parsed by the worker processes are cached by the parent.
+        with test_utils.tempdir() as tmp:
+            top_filename = self.create_ledger(tmp, 30)
+            with mock.patch('beancount.loader.PARSE_PROCESSES', 3):
+                loader.load_file(top_filename)
+            self.assertEqual(31, len(self.get_cache_files(tmp)))
+
+    def test_small_ledger(self):
+        with test_utils.tempdir() as tmp:
+            top_filename = self.create_ledger(tmp, 3)
+            loader.load_file(top_filename)
+            self.assertEqual([], self.get_cache_files(tmp))
+
+
+class TestBookingCache(unittest.TestCase):
+
+    @mock.patch('beancount.loader.BOOKING_CACHE_MIN_ENTRIES', 0)
+    @mock.patch('beancount.loader._load_file', loader._uncached_load_file)
+    def test_booking_cache(self):
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': TEST_INPUT})
+            filename = path.join(tmp, 'apples.beancount')
+            entries, errors, options_map = loader.load_file(filename)
+            self.assertFalse(errors)
+            self.assertTrue(path.exists(path.join(tmp, '.apples.beancount.bookingcache')))
+
+            entries2, errors, options_map = loader.load_file(filename)
+            self.assertFalse(errors)
+            self.assertEqual(entries, entries2)
+
+    @mock.patch('beancount.loader.BOOKING_CACHE_MIN_ENTRIES', 0)
+    def test_booking_cache_string(self):
+        self.assertIsNone(loader.get_booking_cache_filename(
+            [(TEST_INPUT, False)], [], {'include': []}))
+
+
 class TestEncoding(unittest.TestCase):
 
     def test_string_unicode(self):
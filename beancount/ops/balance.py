@@ -16,6 +16,7 @@ from beancount.core import realization
 from beancount.core import getters
 
 __plugins__ = ('check',)
+__plugins_order__ = 'sorted'
 
 
 BalanceError = collections.namedtuple('BalanceError', 'source message entry')
@@ -11,14 +11,19 @@ from collections import defaultdict
 from beancount.core import data
 
 
-def filter_tag(tag, entries):
+def filter_tag(tag, entries, index=None):
     """Yield all the entries which have the given tag.
 
     Args:
       tag: A string, the tag we are interested in.
+      index: An optional EntryIndex instance. If it was built from 'entries',
+        it is used instead of scanning them.
     Yields:
       Every entry in 'entries' that tags to 'tag.
     """
+    if index is not None and index.covers(entries):
+        yield from index.get_tag_entries(tag)
+        return
     for entry in entries:
         # pylint: disable=bad-continuation
         if (isinstance(entry, data.Transaction) and
@@ -27,14 +32,19 @@ def filter_tag(tag, entries):
             yield entry
 
 
-def filter_link(link, entries):
+def filter_link(link, entries, index=None):
     """Yield all the entries which have the given link.
 
     Args:
       link: A string, the link we are interested in.
+      index: An optional EntryIndex instance. If it was built from 'entries',
+        it is used instead of scanning them.
     Yields:
       Every entry in 'entries' that links to 'link.
     """
+    if index is not None and index.covers(entries):
+        yield from index.get_link_entries(link)
+        return
     for entry in entries:
         # pylint: disable=bad-continuation
         if (isinstance(entry, data.Transaction) and
@@ -13,6 +13,7 @@ from beancount.core import data
 from beancount.core import getters
 
 __plugins__ = ('process_documents', 'verify_document_files_exist')
+__plugins_order__ = 'sorted'
 
 
 # An error from trying to find the documents.
@@ -48,8 +49,9 @@ def process_documents(entries, options_map):
             autodoc_errors.extend(new_errors)
 
     # Merge the two lists of entries and errors. Keep the entries sorted.
-    entries.extend(autodoc_entries)
-    entries.sort(key=data.entry_sortkey)
+    if autodoc_entries:
+        entries.extend(autodoc_entries)
+        entries.sort(key=data.entry_sortkey)
 
     return (entries, autodoc_errors)
 
@@ -16,6 +16,7 @@ from beancount.utils import misc_utils
 from beancount.ops import balance
 
 __plugins__ = ('pad',)
+__plugins_order__ = 'sorted'
 
 
 PadError = collections.namedtuple('PadError', 'source message entry')
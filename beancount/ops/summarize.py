@@ -592,26 +592,27 @@ def balance_by_account(entries, date=None):
       where the date was encountered. If all entries are located before the
       cutoff date, an index one beyond the last entry is returned.
     """
-    balances = collections.defaultdict(inventory.Inventory)
+    postings_map = collections.defaultdict(list)
     for index, entry in enumerate(entries):
         if date and entry.date >= date:
             break
 
         if isinstance(entry, Transaction):
             for posting in entry.postings:
-                account_balance = balances[posting.account]
-
-                # Note: We must allow negative lots at cost, because this may be
-                # used to reduce a filtered list of entries which may not
-                # include the entries necessary to keep units at cost always
-                # above zero. The only summation that is guaranteed to be above
-                # zero is if all the entries are being summed together, no
-                # entries are filtered, at least for a particular account's
-                # postings.
-                account_balance.add_position(posting)
+                postings_map[posting.account].append(posting)
     else:
         index = len(entries)
 
+    balances = collections.defaultdict(inventory.Inventory)
+    for account_name, postings in postings_map.items():
+        # Note: We must allow negative lots at cost, because this may be used to
+        # reduce a filtered list of entries which may not include the entries
+        # necessary to keep units at cost always above zero. The only summation
+        # that is guaranteed to be above zero is if all the entries are being
+        # summed together, no entries are filtered, at least for a particular
+        # account's postings.
+        balances[account_name].add_positions(postings)
+
     return balances, index
 
 
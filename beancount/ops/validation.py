@@ -18,10 +18,14 @@ from beancount.core.data import Close
 from beancount.core.data import Transaction
 from beancount.core.data import Document
 from beancount.core.data import Note
+from beancount.core.number import Decimal
+from beancount.core.number import ZERO
+from beancount.core import convert
 from beancount.core import data
 from beancount.core import getters
 from beancount.core import interpolate
 from beancount.utils import misc_utils
+from beancount.utils import profiler
 
 
 # An error from one of the checks.
@@ -352,6 +356,255 @@ def validate_check_transaction_balances(entries, options_map):
     return errors
 
 
+def _transaction_is_balanced(entry, tolerances):
+    """Check that the residual of a transaction is small.
+
+    This is equivalent to calling is_small() on the result of
+    interpolate.compute_residual() but sums the weights of the postings in a
+    dict instead of an inventory, which is much faster.
+
+    Args:
+      entry: An instance of Transaction.
+      tolerances: A dict of currency to tolerance, as from
+        interpolate.infer_tolerances().
+    Returns:
+      A boolean, true if the transaction balances.
+    """
+    residual = {}
+    for posting in entry.postings:
+        # Skip auto-postings inserted to absorb the residual (rounding error).
+        if posting.meta and posting.meta.get(interpolate.AUTOMATIC_RESIDUAL, False):
+            continue
+        weight = convert.get_weight(posting)
+        number = weight.number
+        if not isinstance(number, Decimal):
+            # Let the inventory deal with incomplete postings.
+            return interpolate.compute_residual(entry.postings).is_small(tolerances)
+        try:
+            residual[weight.currency] += number
+        except KeyError:
+            residual[weight.currency] = number
+    for currency, number in residual.items():
+        if number and abs(number) > tolerances.get(currency, ZERO):
+            return False
+    return True
+
+
+def validate_single_pass(entries, options_map, validation_functions):
+    """Run some of the validation functions of this module in a single pass.
+
+    This walks the list of entries once, dispatching each directive to the
+    checks of the given functions which apply to its type, and produces the
+    same errors as calling each of the functions in turn. Only the functions in
+    SINGLE_PASS_VALIDATIONS are supported.
+
+    Args:
+      entries: A list of directives.
+      options_map: An options map.
+      validation_functions: A collection of validation functions from
+        SINGLE_PASS_VALIDATIONS.
+    Returns:
+      A dict of each of the validation functions to its list of errors.
+    """
+    assert SINGLE_PASS_VALIDATIONS.issuperset(validation_functions), (
+        "Unsupported validation functions for a single pass")
+    check_open_close = validate_open_close in validation_functions
+    check_active_accounts = validate_active_accounts in validation_functions
+    check_currencies = validate_currency_constraints in validation_functions
+    check_balances = validate_duplicate_balances in validation_functions
+    check_commodities = validate_duplicate_commodities in validation_functions
+    check_documents = validate_documents_paths in validation_functions
+    check_data_types = validate_data_types in validation_functions
+    check_transactions = validate_check_transaction_balances in validation_functions
+    allow_none_for_tags_and_links = options_map["allow_deprecated_none_for_tags_and_links"]
+
+    open_close_errors = []
+    open_map = {}
+    close_map = {}
+
+    active_error_pairs = []
+    active_set = set()
+    opened_accounts = set()
+
+    # Note: The currency constraints are those of the last Open directive of
+    # each account, which may come after the transactions posting to it, so the
+    # transactions are checked after the pass.
+    currencies_open_map = {}
+    transactions = []
+
+    balance_errors = []
+    balance_entries = {}
+
+    commodity_errors = []
+    commodity_entries = {}
+
+    document_errors = []
+    data_type_errors = []
+    transaction_errors = []
+
+    for entry in entries:
+        entry_type = type(entry)
+
+        if check_data_types:
+            try:
+                data.sanity_check_types(entry, allow_none_for_tags_and_links)
+            except AssertionError as exc:
+                data_type_errors.append(
+                    ValidationError(entry.meta,
+                                    "Invalid data types: {}".format(exc),
+                                    entry))
+
+        if entry_type is Transaction:
+            if check_active_accounts:
+                for account in {posting.account for posting in entry.postings}:
+                    if account not in active_set:
+                        active_error_pairs.append((account, entry))
+
+            if check_currencies:
+                transactions.append(entry)
+
+            if check_transactions:
+                # IMPORTANT: This check cannot be skipped. See
+                # validate_check_transaction_balances().
+                tolerances = interpolate.infer_tolerances(entry.postings, options_map)
+                if not _transaction_is_balanced(entry, tolerances):
+                    residual = interpolate.compute_residual(entry.postings)
+                    transaction_errors.append(
+                        ValidationError(entry.meta,
+                                        "Transaction does not balance: {}".format(
+                                            residual),
+                                        entry))
+            continue
+
+        if entry_type is Open:
+            if check_open_close:
+                if entry.account in open_map:
+                    open_close_errors.append(
+                        ValidationError(
+                            entry.meta,
+                            "Duplicate open directive for {}".format(entry.account),
+                            entry))
+                else:
+                    open_map[entry.account] = entry
+
+            if check_active_accounts:
+                active_set.add(entry.account)
+                opened_accounts.add(entry.account)
+
+            if check_currencies and entry.currencies:
+                currencies_open_map[entry.account] = entry
+
+        elif entry_type is Close:
+            if check_open_close:
+                if entry.account in close_map:
+                    open_close_errors.append(
+                        ValidationError(
+                            entry.meta,
+                            "Duplicate close directive for {}".format(entry.account),
+                            entry))
+                else:
+                    try:
+                        open_entry = open_map[entry.account]
+                        if entry.date <= open_entry.date:
+                            open_close_errors.append(
+                                ValidationError(
+                                    entry.meta,
+                                    "Internal error: closing date for {} "
+                                    "appears before opening date".format(entry.account),
+                                    entry))
+                    except KeyError:
+                        open_close_errors.append(
+                            ValidationError(
+                                entry.meta,
+                                "Unopened account {} is being closed".format(
+                                    entry.account),
+                                entry))
+
+                    close_map[entry.account] = entry
+
+            if check_active_accounts:
+                active_set.discard(entry.account)
+
+        else:
+            if check_active_accounts:
+                for account in getters.get_entry_accounts(entry):
+                    if account not in active_set:
+                        if (isinstance(entry, ALLOW_AFTER_CLOSE) and
+                            account in opened_accounts):
+                            continue
+                        active_error_pairs.append((account, entry))
+
+            if entry_type is data.Balance:
+                if check_balances:
+                    key = (entry.account, entry.amount.currency, entry.date)
+                    try:
+                        previous_entry = balance_entries[key]
+                        if entry.amount != previous_entry.amount:
+                            balance_errors.append(
+                                ValidationError(
+                                    entry.meta,
+                                    "Duplicate balance assertion with different amounts",
+                                    entry))
+                    except KeyError:
+                        balance_entries[key] = entry
+
+            elif entry_type is data.Commodity:
+                if check_commodities:
+                    key = entry.currency
+                    try:
+                        previous_entry = commodity_entries[key]
+                        if previous_entry:
+                            commodity_errors.append(
+                                ValidationError(
+                                    entry.meta,
+                                    "Duplicate commodity directives for '{}'".format(key),
+                                    entry))
+                    except KeyError:
+                        commodity_entries[key] = entry
+
+            elif entry_type is Document:
+                if check_documents and not path.isabs(entry.filename):
+                    document_errors.append(
+                        ValidationError(entry.meta, "Invalid relative path for entry",
+                                        entry))
+
+    active_errors = []
+    for account, entry in active_error_pairs:
+        if account in opened_accounts:
+            message = "Invalid reference to inactive account '{}'".format(account)
+        else:
+            message = "Invalid reference to unknown account '{}'".format(account)
+        active_errors.append(ValidationError(entry.meta, message, entry))
+
+    currency_errors = []
+    if currencies_open_map:
+        for entry in transactions:
+            for posting in entry.postings:
+                try:
+                    valid_currencies = currencies_open_map[posting.account].currencies
+                except KeyError:
+                    continue
+                if posting.units.currency not in valid_currencies:
+                    currency_errors.append(
+                        ValidationError(
+                            entry.meta,
+                            "Invalid currency {} for account '{}'".format(
+                                posting.units.currency, posting.account),
+                            entry))
+
+    all_errors = {
+        validate_open_close: open_close_errors,
+        validate_active_accounts: active_errors,
+        validate_currency_constraints: currency_errors,
+        validate_duplicate_balances: balance_errors,
+        validate_duplicate_commodities: commodity_errors,
+        validate_documents_paths: document_errors,
+        validate_data_types: data_type_errors,
+        validate_check_transaction_balances: transaction_errors,
+    }
+    return {function: all_errors[function] for function in validation_functions}
+
+
 # A list of reasonably fast validations to always run by default.
 BASIC_VALIDATIONS = [validate_open_close,
                      validate_active_accounts,
@@ -361,39 +614,67 @@ BASIC_VALIDATIONS = [validate_open_close,
                      validate_documents_paths,
                      validate_check_transaction_balances]
 
-# These are slow, and thus only turned on in the check() routine.
-# We're hoping to optimize these and make them decently fast, so
-# we're not providing an option at this moment, this can be enabled
-# by modifying the 'VALIDATIONS' attribute below.
+# These used to be slow, and thus only turned on in the check() routine. Run in
+# a single pass with the basic validations, they are cheap and are now run by
+# default too.
 HARDCORE_VALIDATIONS = [validate_data_types]
 
 # The list of validations to run.
-VALIDATIONS = BASIC_VALIDATIONS
+VALIDATIONS = BASIC_VALIDATIONS + HARDCORE_VALIDATIONS
+
+# The validations which validate_single_pass() can run.
+SINGLE_PASS_VALIDATIONS = frozenset(BASIC_VALIDATIONS + HARDCORE_VALIDATIONS)
 
 
 def validate(entries, options_map, log_timings=None, extra_validations=None):
     """Perform all the standard checks on parsed contents.
 
+    The validations which support it are run together in a single pass over the
+    entries; see validate_single_pass(). The errors are the same, and in the
+    same order, as if each validation function had been run in turn.
+
     Args:
       entries: A list of directives.
       unused_options_map: An options map.
       log_timings: An optional function to use for logging the time of individual
         operations.
       extra_validations: A list of extra validation functions to run after loading
-        this list of entries.
+        this list of entries. Those which are already run by default are
+        ignored.
     Returns:
       A list of new errors, if any were found.
     """
-    validation_tests = VALIDATIONS
+    validation_tests = list(VALIDATIONS)
     if extra_validations:
-        validation_tests += extra_validations
-
-    # Run various validation routines define above.
+        validation_tests.extend(validation_function
+                                for validation_function in extra_validations
+                                if validation_function not in validation_tests)
+
+    # Run the validations defined above in a single pass.
+    single_pass_tests = [validation_function
+                         for validation_function in validation_tests
+                         if validation_function in SINGLE_PASS_VALIDATIONS]
+    single_pass_errors = {}
+    if single_pass_tests:
+        with misc_utils.log_time('function: validate_single_pass', log_timings,
+                                 indent=2), \
+             profiler.stage('{}.validate_single_pass'.format(__name__),
+                            'validation', entries):
+            single_pass_errors = validate_single_pass(entries, options_map,
+                                                      single_pass_tests)
+
+    # Run the other validation routines.
     errors = []
     for validation_function in validation_tests:
-        with misc_utils.log_time('function: {}'.format(validation_function.__name__),
-                                 log_timings, indent=2):
-            new_errors = validation_function(entries, options_map)
+        if validation_function in single_pass_errors:
+            new_errors = single_pass_errors[validation_function]
+        else:
+            with misc_utils.log_time('function: {}'.format(validation_function.__name__),
+                                     log_timings, indent=2), \
+                 profiler.stage('{}.{}'.format(validation_function.__module__,
+                                               validation_function.__name__),
+                                'validation', entries):
+                new_errors = validation_function(entries, options_map)
         errors.extend(new_errors)
 
     return errors
@@ -298,6 +298,69 @@ class TestValidateCheckTransactionBalances(cmptest.TestCase):
         self.assertEqual([validation.ValidationError], list(map(type, valid_errors)))
 
 
+class TestValidateSinglePass(cmptest.TestCase):
+
+    @loader.load_doc(expect_errors=True)
+    def test_validate_single_pass(self, entries, _, options_map):
+        """
+        2014-01-01 open Assets:Investments:Cash
+        2014-01-01 open Assets:Investments:Stock   AAPL
+        2014-01-01 open Assets:Investments:Stock   AAPL
+        2014-01-01 open Expenses:Food
+        2014-01-01 commodity AAPL
+        2014-01-01 commodity AAPL
+
+        2014-06-23 * "Use invalid currency"
+          Assets:Investments:Stock    1 HOOG {500 USD}
+          Assets:Investments:Cash  -500 USD
+
+        2014-06-24 * "Does not balance"
+          Assets:Investments:Cash   1 USD
+          Expenses:Food             1 USD
+
+        2014-06-25 * "Unknown account"
+          Assets:Investments:Cash   -1 USD
+          Expenses:Restaurant        1 USD
+
+        2014-06-30 balance Assets:Investments:Cash  10 USD
+        2014-06-30 balance Assets:Investments:Cash  20 USD
+
+        2014-07-01 close Expenses:Food
+        2014-07-01 close Expenses:Food
+        2014-07-01 close Expenses:Unopened
+
+        2014-07-02 * "Inactive account"
+          Assets:Investments:Cash   -1 USD
+          Expenses:Food              1 USD
+
+        2014-07-03 open Assets:Investments:Other   EUR
+        """
+        entries = entries + [
+            entries[-1]._replace(date=datetime.date(2014, 7, 4), currencies=None),
+            data.Document(data.new_metadata('<validation_test>', 0),
+                          datetime.date(2014, 7, 5), 'Assets:Investments:Cash',
+                          "relative/something.pdf", data.EMPTY_SET, data.EMPTY_SET)]
+        entries[6] = entries[6]._replace(narration={"INVALID_SET_TYPE"})
+
+        functions = validation.BASIC_VALIDATIONS + validation.HARDCORE_VALIDATIONS
+        errors_map = validation.validate_single_pass(entries, options_map, functions)
+        self.assertEqual(set(functions), set(errors_map))
+        for function in functions:
+            errors = function(entries, options_map)
+            self.assertTrue(errors, function.__name__)
+            self.assertEqual(errors, errors_map[function])
+
+        errors_map = validation.validate_single_pass(
+            entries, options_map, [validation.validate_open_close])
+        self.assertEqual([validation.validate_open_close], list(errors_map))
+
+        self.assertEqual([error
+                          for function in functions
+                          for error in function(entries, options_map)],
+                         validation.validate(entries, options_map,
+                                             extra_validations=functions))
+
+
 class TestValidate(cmptest.TestCase):
 
     @loader.load_doc(expect_errors=True)
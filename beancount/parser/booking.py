@@ -4,24 +4,37 @@ matching lot when reducing the content of an inventory.
 __copyright__ = "Copyright (C) 2015-2016  Martin Blais"
 __license__ = "GNU GPLv2"
 
+from os import path
 import collections
+import hashlib
+import logging
+import pickle
 
 from beancount.core.number import MISSING
 from beancount.parser import booking_full
 from beancount.core import data
 from beancount.core import inventory
+from beancount import __version__
 
 
 BookingError = collections.namedtuple('BookingError', 'source message entry')
 
 
-def book(incomplete_entries, options_map):
+# The number of entries booked between two consecutive checkpoints.
+CHECKPOINT_INTERVAL = 5000
+
+
+def book(incomplete_entries, options_map, checkpoint_filename=None):
     """Book inventory lots and complete all positions with incomplete numbers.
 
     Args:
       incomplete_entries: A list of directives, with some postings possibly left
         with incomplete amounts as produced by the parser.
       options_map: An options dict as produced by the parser.
+      checkpoint_filename: An optional string, the name of a file in which to
+        store checkpoints of the booked balances. If provided, booking resumes
+        from the latest checkpoint whose preceding entries are unchanged. See
+        book_with_checkpoints().
     Returns:
       A pair of
         entries: A list of completed entries with all their postings completed.
@@ -34,8 +47,13 @@ def book(incomplete_entries, options_map):
             booking_methods[entry.account] = entry.booking
 
     # Do the booking here!
-    entries, booking_errors = booking_full.book(incomplete_entries, options_map,
-                                                booking_methods)
+    if checkpoint_filename is None:
+        entries, booking_errors = booking_full.book(incomplete_entries, options_map,
+                                                    booking_methods)
+    else:
+        entries, booking_errors = book_with_checkpoints(incomplete_entries, options_map,
+                                                        booking_methods,
+                                                        checkpoint_filename)
 
     # Check for MISSING elements remaining.
     missing_errors = validate_missing_eliminated(entries, options_map)
@@ -43,6 +61,167 @@ def book(incomplete_entries, options_map):
     return entries, (booking_errors + missing_errors)
 
 
+def book_with_checkpoints(incomplete_entries, options_map, methods, checkpoint_filename):
+    """Book the entries, resuming from checkpointed balances where possible.
+
+    The sorted list of entries is booked in chunks of CHECKPOINT_INTERVAL
+    entries. After each chunk, a record is appended to the checkpoint file with
+    a digest of all the incomplete entries booked so far, the booked entries and
+    errors from that chunk, and the balances of the accounts the chunk modified.
+    On the next call, the records whose digest still matches the new incomplete
+    entries are reused as they are, the running balances are rebuilt from their
+    modified balances, and booking resumes from there. Appending entries at the
+    end of a ledger thus only books the final chunk and the new entries. The
+    output is identical to that of booking_full.book().
+
+    Storing only the modified balances keeps the size of the file proportional
+    to that of the ledger, rather than to its number of chunks times its number
+    of accounts.
+
+    The file consists of a sequence of pickles: the key from
+    compute_checkpoint_key(), followed by, for each chunk, a header tuple of
+    (number of entries, digest, size of chunk data, size of balances data), and
+    the raw pickled bytes of the (entries, errors) chunk and of the dict of the
+    balances modified by the chunk.
+
+    Args:
+      incomplete_entries: A list of sorted directives as produced by the parser.
+      options_map: An options dict as produced by the parser.
+      methods: A mapping of account name to their corresponding booking
+        method.
+      checkpoint_filename: A string, the name of the checkpoint file.
+    Returns:
+      A pair of entries and errors, as per booking_full.book().
+    """
+    key = compute_checkpoint_key(options_map, methods)
+    entries, errors = [], []
+    balances = collections.defaultdict(inventory.Inventory)
+    md5 = hashlib.md5()
+    num_entries = 0
+
+    # Read the matching records from a previous run, if there is one, and the
+    # offset at which the records become stale.
+    truncate_offset = None
+    if path.exists(checkpoint_filename):
+        try:
+            with open(checkpoint_filename, 'rb') as file:
+                if pickle.load(file) == key:
+                    truncate_offset = file.tell()
+                    while True:
+                        try:
+                            header = pickle.load(file)
+                        except EOFError:
+                            break
+                        (chunk_num_entries, chunk_digest,
+                         chunk_size, balances_size) = header
+                        if chunk_num_entries > len(incomplete_entries):
+                            break
+                        chunk_md5 = md5.copy()
+                        update_digest(chunk_md5,
+                                      incomplete_entries[num_entries:chunk_num_entries])
+                        if chunk_md5.hexdigest() != chunk_digest:
+                            break
+
+                        # The entries prior to this checkpoint are unchanged.
+                        chunk_entries, chunk_errors = pickle.loads(file.read(chunk_size))
+                        entries.extend(chunk_entries)
+                        errors.extend(chunk_errors)
+                        balances.update(pickle.loads(file.read(balances_size)))
+                        truncate_offset = file.tell()
+                        md5 = chunk_md5
+                        num_entries = chunk_num_entries
+        except Exception as exc:
+            # Note: Unpickling of an old or corrupted file manifests as a
+            # variety of different exception types; recompute from scratch.
+            logging.error("Booking checkpoint file is corrupted: %s; recomputing.", exc)
+            entries, errors = [], []
+            balances = collections.defaultdict(inventory.Inventory)
+            md5 = hashlib.md5()
+            num_entries = 0
+            truncate_offset = None
+
+    # Book the remaining entries, appending a record after each chunk.
+    try:
+        if truncate_offset is None:
+            file = open(checkpoint_filename, 'wb')
+            pickle.dump(key, file)
+        else:
+            file = open(checkpoint_filename, 'r+b')
+            file.truncate(truncate_offset)
+            file.seek(truncate_offset)
+    except OSError as exc:
+        logging.warning("Could not write to booking checkpoint file %s: %s",
+                        checkpoint_filename, exc)
+        file = None
+    try:
+        while num_entries < len(incomplete_entries):
+            # Note: Compute the digest before booking, which may modify the
+            # metadata of the incomplete postings in-place.
+            chunk = incomplete_entries[num_entries:num_entries + CHECKPOINT_INTERVAL]
+            update_digest(md5, chunk)
+            accounts_before = set(balances)
+            chunk_entries, chunk_errors, balances = booking_full._book(
+                chunk, options_map, methods, balances)
+            entries.extend(chunk_entries)
+            errors.extend(chunk_errors)
+            num_entries += len(chunk)
+
+            if file is not None:
+                # Only the balances of the accounts of the booked postings
+                # are updated, and empty ones may have been inserted.
+                accounts = set(balances).difference(accounts_before)
+                for entry in data.filter_txns(chunk_entries):
+                    accounts.update(posting.account for posting in entry.postings)
+                chunk_data = pickle.dumps((chunk_entries, chunk_errors))
+                balances_data = pickle.dumps({account: balances[account]
+                                              for account in accounts})
+                pickle.dump((num_entries, md5.hexdigest(),
+                             len(chunk_data), len(balances_data)), file)
+                file.write(chunk_data)
+                file.write(balances_data)
+    finally:
+        if file is not None:
+            file.close()
+
+    return entries, errors
+
+
+def compute_checkpoint_key(options_map, methods):
+    """Compute a key for the inputs of booking other than the entries themselves.
+
+    Args:
+      options_map: An options dict as produced by the parser.
+      methods: A mapping of account name to their corresponding booking
+        method.
+    Returns:
+      A string, the hexadecimal digest of the key.
+    """
+    md5 = hashlib.md5()
+    md5.update(__version__.encode('utf8'))
+    for option in ('booking_method',
+                   'inferred_tolerance_default',
+                   'inferred_tolerance_multiplier',
+                   'infer_tolerance_from_cost'):
+        md5.update(repr(options_map[option]).encode('utf8'))
+    md5.update(repr(sorted(methods.items())).encode('utf8'))
+    return md5.hexdigest()
+
+
+def update_digest(md5, entries):
+    """Update a running digest with the contents of the given entries.
+
+    Args:
+      md5: A hashlib object, updated in-place.
+      entries: A list of directives.
+    """
+    for entry in entries:
+        # Sets are not rendered in a stable order across processes; sort them.
+        if (isinstance(entry, data.Transaction) and
+                (len(entry.tags) > 1 or len(entry.links) > 1)):
+            entry = entry._replace(tags=sorted(entry.tags), links=sorted(entry.links))
+        md5.update(repr(entry).encode('utf8'))
+
+
 def validate_missing_eliminated(entries, unused_options_map):
     """Validate that all the missing bits of postings have been eliminated.
 
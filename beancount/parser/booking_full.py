@@ -106,7 +106,7 @@ def book(entries, options_map, methods):
     return entries, errors
 
 
-def _book(entries, options_map, methods):
+def _book(entries, options_map, methods, balances=None):
     """Interpolate missing data from the entries using the full historical algorithm.
 
     Args:
@@ -115,6 +115,10 @@ def _book(entries, options_map, methods):
       options_map: An options dict as produced by the parser.
       methods: A mapping of account name to their corresponding booking
         method.
+      balances: An optional defaultdict of account name to Inventory, the
+        balances prior to the given entries. This is used to resume booking
+        from a checkpoint and is updated in-place. If not provided, booking
+        starts from empty balances.
     Returns:
       A triple of
         entries: A list of interpolated entries with all their postings completed.
@@ -123,7 +127,8 @@ def _book(entries, options_map, methods):
     """
     new_entries = []
     errors = []
-    balances = collections.defaultdict(inventory.Inventory)
+    if balances is None:
+        balances = collections.defaultdict(inventory.Inventory)
     for entry in entries:
         if isinstance(entry, Transaction):
             # Group postings by currency.
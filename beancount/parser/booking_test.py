@@ -1,7 +1,11 @@
 __copyright__ = "Copyright (C) 2015-2016  Martin Blais"
 __license__ = "GNU GPLv2"
 
+from os import path
+from unittest import mock
 import collections
+import os
+import pickle
 import re
 import textwrap
 
@@ -10,10 +14,13 @@ from beancount.core.number import ZERO
 from beancount.core.amount import Amount
 from beancount.core.data import Booking
 from beancount.core.data import Transaction
+from beancount.core import data
 from beancount.core.position import Cost
 from beancount.parser import parser
 from beancount.parser import cmptest
 from beancount.parser import booking
+from beancount.parser import booking_full
+from beancount.utils import test_utils
 
 
 BookingTestError = collections.namedtuple('BookingTestError', 'source message entry')
@@ -265,3 +272,143 @@ class TestBookingValidation(cmptest.TestCase):
         """
         validation_errors = self.convert_and_validate(entries, options_map)
         self.assertEqual([booking.BookingError], list(map(type, validation_errors)))
+
+
+class TestBookWithCheckpoints(cmptest.TestCase):
+
+    INPUT = """
+      option "booking_method" "FIFO"
+
+      2013-01-01 open Assets:Investing
+      2013-01-01 open Assets:Cash
+      2013-01-01 open Income:Gains
+
+      2013-01-02 *
+        Assets:Investing            10 HOOL {100 USD}
+        Assets:Cash
+
+      2013-01-03 *
+        Assets:Investing            10 HOOL {110 USD}
+        Assets:Cash
+
+      2013-01-04 *
+        Assets:Investing            10 HOOL {120 USD}
+        Assets:Cash
+
+      2013-02-01 * #a #b #c
+        Assets:Investing           -15 HOOL {}
+        Assets:Cash               2000 USD
+        Income:Gains
+
+      2013-02-02 *
+        Assets:Investing            -5 HOOL {}
+        Assets:Cash                700 USD
+        Income:Gains
+
+      2013-02-03 *
+        Assets:Investing           -30 HOOL {}
+        Assets:Cash               3000 USD
+    """
+
+    APPENDED = """
+      2013-03-01 *
+        Assets:Investing            -5 HOOL {}
+        Assets:Cash                700 USD
+        Income:Gains
+    """
+
+    def setUp(self):
+        self.num_booked = 0
+        original_book = booking_full._book
+        def _book(entries, *args):
+            self.num_booked += len(entries)
+            return original_book(entries, *args)
+        mock.patch('beancount.parser.booking_full._book', _book).start()
+        mock.patch('beancount.parser.booking.CHECKPOINT_INTERVAL', 3).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def book_and_compare(self, string, checkpoint_filename):
+        entries, _, options_map = parser.parse_string(string, dedent=True)
+        entries.sort(key=data.entry_sortkey)
+        expected_entries, expected_errors = booking.book(entries, options_map)
+
+        # Note: Booking modifies some of the metadata of its input; parse again.
+        entries, _, options_map = parser.parse_string(string, dedent=True)
+        entries.sort(key=data.entry_sortkey)
+        self.num_booked = 0
+        booked_entries, booked_errors = booking.book(entries, options_map,
+                                                     checkpoint_filename)
+        self.assertEqual(expected_entries, booked_entries)
+        self.assertEqual(expected_errors, booked_errors)
+        return booked_entries, booked_errors
+
+    def test_book_with_checkpoints(self):
+        with test_utils.tempdir() as tmp:
+            filename = path.join(tmp, 'checkpoints')
+
+            # Book from scratch, creating the checkpoints.
+            entries, errors = self.book_and_compare(self.INPUT, filename)
+            self.assertEqual(9, len(entries))
+            self.assertEqual(1, len(errors))
+            self.assertEqual(9, self.num_booked)
+            self.assertTrue(path.exists(filename))
+
+            # Book again; nothing needs to be booked.
+            self.book_and_compare(self.INPUT, filename)
+            self.assertEqual(0, self.num_booked)
+
+            # Append a transaction; only the new entry needs to be booked.
+            entries, errors = self.book_and_compare(self.INPUT + self.APPENDED,
+                                                    filename)
+            self.assertEqual(10, len(entries))
+            self.assertEqual(1, self.num_booked)
+
+            # Remove it again.
+            self.book_and_compare(self.INPUT, filename)
+            self.assertEqual(0, self.num_booked)
+
+            # Modify an entry in the middle; only the following chunks are rebooked.
+            self.book_and_compare(self.INPUT.replace('110 USD', '111 USD'), filename)
+            self.assertEqual(6, self.num_booked)
+
+    def test_book_with_checkpoints_options_changed(self):
+        with test_utils.tempdir() as tmp:
+            filename = path.join(tmp, 'checkpoints')
+            self.book_and_compare(self.INPUT, filename)
+            self.book_and_compare(self.INPUT.replace('FIFO', 'LIFO'), filename)
+            self.assertEqual(9, self.num_booked)
+
+    def test_book_with_checkpoints_corrupted(self):
+        with test_utils.tempdir() as tmp:
+            filename = path.join(tmp, 'checkpoints')
+            self.book_and_compare(self.INPUT, filename)
+            with open(filename, 'r+b') as file:
+                file.seek(-10, 2)
+                file.write(b'corrupted!')
+            with self.assertLogs(level='ERROR'):
+                self.book_and_compare(self.INPUT, filename)
+            self.assertEqual(9, self.num_booked)
+
+    def test_book_with_checkpoints_size(self):
+        # Each chunk only touches two of many accounts; the file must not
+        # contain a copy of all the balances for each chunk.
+        lines = ['2013-01-01 open Assets:Account{:03d}'.format(index)
+                 for index in range(100)]
+        for index in range(300):
+            lines.extend(['2013-01-02 *',
+                          '  Assets:Account{:03d}  1 USD'.format(index % 100),
+                          '  Assets:Account{:03d}'.format((index + 1) % 100)])
+        string = '\n'.join(lines)
+        with test_utils.tempdir() as tmp:
+            filename = path.join(tmp, 'checkpoints')
+            entries, errors = self.book_and_compare(string, filename)
+            self.assertLess(os.stat(filename).st_size,
+                            2 * len(pickle.dumps((entries, errors))))
+
+            # The balances are rebuilt correctly from the checkpoints.
+            entries, errors = self.book_and_compare(
+                string + '\n2013-01-03 *\n  Assets:Account000  1 USD\n'
+                '  Assets:Account050\n', filename)
+            self.assertEqual(1, self.num_booked)
@@ -229,6 +229,12 @@ OUTPUT_OPTION_GROUPS = [
       is provided, it is provided as an extra argument to the plugin function.
       Errors should not be printed out the output, they will be converted to
       strings by the loader and displayed as dictated by the output medium.
+      The module may also set a '__plugins_order__' attribute to 'sorted' or
+      'appended' to declare that its functions return sorted entries, or the
+      entries they were given followed by new ones, so that the loader need not
+      sort them; see beancount.loader. A module whose functions only return
+      errors and the entries they were given may set '__plugins_validation__' to
+      True, so that the loader may run it in parallel with other such plugins.
     """, [Opt("plugin", [], "beancount.plugins.module_name",
               converter=options_validate_plugin)]),
     ]
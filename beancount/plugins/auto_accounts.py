@@ -10,6 +10,7 @@ from beancount.core import data
 from beancount.core import getters
 
 __plugins__ = ('auto_insert_open',)
+__plugins_order__ = 'sorted'
 
 
 def auto_insert_open(entries, unused_options_map):
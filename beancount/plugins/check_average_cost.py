@@ -22,6 +22,8 @@ from beancount.core import getters
 from beancount.core import inventory
 
 __plugins__ = ('validate_average_cost',)
+__plugins_order__ = 'sorted'
+__plugins_validation__ = True
 
 
 MatchBasisError = collections.namedtuple('MatchBasisError', 'source message entry')
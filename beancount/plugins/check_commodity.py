@@ -13,6 +13,8 @@ from beancount.core import data
 from beancount.core import getters
 
 __plugins__ = ('validate_commodity_directives',)
+__plugins_order__ = 'sorted'
+__plugins_validation__ = True
 
 
 CheckCommodityError = collections.namedtuple('CheckCommodityError', 'source message entry')
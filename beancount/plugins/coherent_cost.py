@@ -11,6 +11,8 @@ import collections
 from beancount.core import data
 
 __plugins__ = ('validate_coherent_cost',)
+__plugins_order__ = 'sorted'
+__plugins_validation__ = True
 
 
 CoherentCostError = collections.namedtuple('CoherentCostError', 'source message entry')
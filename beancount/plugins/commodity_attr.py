@@ -23,6 +23,8 @@ import collections
 from beancount.core import data
 
 __plugins__ = ('validate_commodity_attr',)
+__plugins_order__ = 'sorted'
+__plugins_validation__ = True
 
 ConfigError = collections.namedtuple('ConfigError', 'source message entry')
 CommodityError = collections.namedtuple('CommodityError', 'source message entry')
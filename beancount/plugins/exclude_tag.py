@@ -12,6 +12,7 @@ https://groups.google.com/d/msg/ledger-cli/N8Slh2t45K0/aAz0i3Be4LYJ
 __copyright__ = "Copyright (C) 2014, 2016-2017  Martin Blais"
 __license__ = "GNU GPLv2"
 __plugins__ = ('exclude_tag',)
+__plugins_order__ = 'sorted'
 
 from beancount.core import data
 
@@ -16,6 +16,8 @@ from beancount.core import data
 from beancount.core import realization
 
 __plugins__ = ('validate_leaf_only',)
+__plugins_order__ = 'sorted'
+__plugins_validation__ = True
 
 
 LeafOnlyError = collections.namedtuple('LeafOnlyError', 'source message entry')
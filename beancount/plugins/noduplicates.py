@@ -6,6 +6,8 @@ __license__ = "GNU GPLv2"
 from beancount.core import compare
 
 __plugins__ = ('validate_no_duplicates',)
+__plugins_order__ = 'sorted'
+__plugins_validation__ = True
 
 
 def validate_no_duplicates(entries, unused_options_map):
@@ -17,5 +19,4 @@ def validate_no_duplicates(entries, unused_options_map):
     Returns:
       A list of new errors, if any were found.
     """
-    unused_hashes, errors = compare.hash_entries(entries)
-    return entries, errors
+    return entries, compare.find_duplicate_entries(entries)
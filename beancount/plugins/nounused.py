@@ -9,6 +9,8 @@ from beancount.core import data
 from beancount.core import getters
 
 __plugins__ = ('validate_unused_accounts',)
+__plugins_order__ = 'sorted'
+__plugins_validation__ = True
 
 
 UnusedAccountError = collections.namedtuple('UnusedAccountError', 'source message entry')
@@ -8,6 +8,8 @@ import collections
 from beancount.core import data
 
 __plugins__ = ('validate_one_commodity',)
+__plugins_order__ = 'sorted'
+__plugins_validation__ = True
 
 
 OneCommodityError = collections.namedtuple('OneCommodityError', 'source message entry')
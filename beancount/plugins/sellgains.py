@@ -71,6 +71,8 @@ from beancount.core import interpolate
 from beancount.parser import options
 
 __plugins__ = ('validate_sell_gains',)
+__plugins_order__ = 'sorted'
+__plugins_validation__ = True
 
 
 SellGainsError = collections.namedtuple('SellGainsError', 'source message entry')
@@ -27,6 +27,7 @@ from beancount.parser import options
 
 
 __plugins__ = ('add_unrealized_gains',)
+__plugins_order__ = 'appended'
 
 
 UnrealizedError = collections.namedtuple('UnrealizedError', 'source message entry')
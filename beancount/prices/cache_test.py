@@ -0,0 +1,111 @@
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import datetime
+import tempfile
+import unittest
+from os import path
+
+from dateutil import tz
+
+from beancount.core.number import D
+from beancount.prices.source import SourcePrice
+from beancount.prices import cache
+
+
+EXPIRATION = datetime.timedelta(minutes=30)
+
+
+class TestPriceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = path.join(self.tmpdir.name, 'prices.db')
+        self.cache = cache.PriceCache(self.filename, EXPIRATION)
+        self.now = int(datetime.datetime(2018, 3, 10, 12, 0, 0,
+                                         tzinfo=tz.tzlocal()).timestamp())
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def price(self, day, number):
+        return SourcePrice(D(number),
+                           datetime.datetime(2018, 3, day, 16, 0, 0, tzinfo=tz.tzutc()),
+                           'USD')
+
+    def test_get_put(self):
+        with self.assertRaises(KeyError):
+            self.cache.get('yahoo', 'HOOL', None, self.now)
+        srcprice = self.price(10, '12.34')
+        self.cache.put('yahoo', 'HOOL', None, srcprice, self.now)
+        self.assertEqual(srcprice, self.cache.get('yahoo', 'HOOL', None, self.now))
+        self.assertEqual(1, len(self.cache))
+
+        # Prices are keyed by source, symbol and date.
+        for key in [('oanda', 'HOOL', None),
+                    ('yahoo', 'GOOG', None),
+                    ('yahoo', 'HOOL', datetime.date(2018, 3, 10))]:
+            with self.assertRaises(KeyError):
+                self.cache.get(*key, self.now)
+
+        # Missing prices are cached as well.
+        self.cache.put('yahoo', 'GOOG', None, None, self.now)
+        self.assertIsNone(self.cache.get('yahoo', 'GOOG', None, self.now))
+
+    def test_expiration(self):
+        past = datetime.date(2018, 3, 9)
+        today = datetime.date(2018, 3, 10)
+        self.cache.put('yahoo', 'HOOL', None, self.price(10, '1'), self.now)
+        self.cache.put('yahoo', 'HOOL', today, self.price(10, '2'), self.now)
+        self.cache.put('yahoo', 'HOOL', past, self.price(9, '3'), self.now)
+        self.cache.put('yahoo', 'GOOG', past, None, self.now)
+
+        later = self.now + int(EXPIRATION.total_seconds()) * 2
+        for date in None, today:
+            with self.assertRaises(KeyError):
+                self.cache.get('yahoo', 'HOOL', date, later)
+        with self.assertRaises(KeyError):
+            self.cache.get('yahoo', 'GOOG', past, later)
+        self.assertEqual(self.price(9, '3'), self.cache.get('yahoo', 'HOOL', past, later))
+
+        self.assertEqual(3, self.cache.compact(later))
+        self.assertEqual(1, len(self.cache))
+
+    def test_get_range(self):
+        prices = [(datetime.date(2018, 3, day), self.price(day, str(day)))
+                  for day in (1, 2, 5, 6)]
+        self.cache.put_many('yahoo', 'HOOL', prices, self.now)
+        self.cache.put('yahoo', 'HOOL', None, self.price(10, '10'), self.now)
+        self.cache.put('yahoo', 'GOOG', datetime.date(2018, 3, 2),
+                       self.price(2, '20'), self.now)
+        self.assertEqual(dict(prices[1:3]),
+                         self.cache.get_range('yahoo', 'HOOL',
+                                              datetime.date(2018, 3, 2),
+                                              datetime.date(2018, 3, 5), self.now))
+
+    def test_shared(self):
+        other = cache.PriceCache(self.filename, EXPIRATION)
+        try:
+            (mode,), = other.connection.execute('PRAGMA journal_mode')
+            self.assertEqual('wal', mode)
+            self.cache.put('yahoo', 'HOOL', None, self.price(10, '1'), self.now)
+            self.assertEqual(self.price(10, '1'),
+                             other.get('yahoo', 'HOOL', None, self.now))
+        finally:
+            other.close()
+
+    def test_invalid_file(self):
+        filename = path.join(self.tmpdir.name, 'shelve.db')
+        with open(filename, 'wb') as file:
+            file.write(b'\x00' * 4096)
+        with self.assertLogs(level='WARNING'):
+            other = cache.PriceCache(filename, EXPIRATION)
+        try:
+            self.assertEqual(0, len(other))
+        finally:
+            other.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
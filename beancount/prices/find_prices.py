@@ -4,12 +4,15 @@ __copyright__ = "Copyright (C) 2015-2016  Martin Blais"
 __license__ = "GNU GPLv2"
 
 import collections
+import datetime
 import logging
 import re
 import sys
 
 from beancount.core import data
 from beancount.core import amount
+from beancount.core import prices
+from beancount.ops import lifetimes
 from beancount.ops import summarize
 
 
@@ -27,6 +30,18 @@ from beancount.ops import summarize
 DatedPrice = collections.namedtuple('DatedPrice', 'base quote date sources')
 
 
+# A group of dated price jobs for the same commodities and sources, which can be
+# fetched together.
+#
+# Attributes:
+#   base: A commodity string, as for DatedPrice.
+#   quote: A commodity string, as for DatedPrice.
+#   dates: A sorted list of datetime.date objects to be fetched, or a list of a
+#     single None, with the meaning of fetching the latest price.
+#   sources: A list of PriceSource instances, as for DatedPrice.
+DatedPriceRange = collections.namedtuple('DatedPriceRange', 'base quote dates sources')
+
+
 # A price source.
 #
 #   module: A Python module, the module to be called to create a price source.
@@ -58,6 +73,28 @@ def format_dated_price_str(dprice):
         ','.join(psstrs))
 
 
+def group_price_jobs(jobs):
+    """Group price jobs for the same commodities and sources over multiple dates.
+
+    Args:
+      jobs: A list of DatedPrice instances.
+    Returns:
+      A sorted list of DatedPriceRange instances. Jobs for the latest price are
+      never grouped with dated ones.
+    """
+    groups = collections.defaultdict(set)
+    for dprice in jobs:
+        key = (dprice.base, dprice.quote, dprice.date is None,
+               tuple(dprice.sources) if dprice.sources is not None else None)
+        groups[key].add(dprice.date)
+    return sorted(
+        (DatedPriceRange(base, quote, sorted(dates) if not latest else [None],
+                         list(sources) if sources is not None else None)
+         for (base, quote, latest, sources), dates in groups.items()),
+        key=lambda drange: (drange.base or '', drange.quote or '',
+                            drange.dates[0] or datetime.date.min))
+
+
 def parse_source_map(source_map_spec):
     """Parse a source map specification string.
 
@@ -392,3 +429,57 @@ def get_price_jobs_at_date(entries, date=None, inactive=False, undeclared_source
 
         jobs.append(DatedPrice(base, quote, date, psources))
     return sorted(jobs)
+
+
+def get_price_jobs_backfill(entries, date_last=None, undeclared_source=None,
+                            compress_days=None):
+    """Get the list of weekly prices missing over the lifetimes of the commodities.
+
+    For each commodity held at cost, the Fridays of the weeks it was held are
+    computed with ops.lifetimes, and those weeks which already have a price in
+    the entries are removed.
+
+    Args:
+      entries: A list of directives.
+      date_last: A datetime.date instance, the last date to consider for the
+        commodities still held. Defaults to today.
+      undeclared_source: A string, the name of the default source module to use to
+        pull prices for commodities without a price source metadata on their
+        Commodity directive declaration. If not provided, these commodities are
+        skipped.
+      compress_days: An optional integer, the number of unused days below which
+        two lifetimes of a commodity are merged.
+    Returns:
+      A list of DatedPrice instances.
+    """
+    if date_last is None:
+        date_last = datetime.date.today()
+
+    # Find the sources for each (base, quote) pair.
+    currency_map = {(base, quote): psources
+                    for base, quote, psources in find_currencies_declared(entries)}
+    default_source = import_source(undeclared_source) if undeclared_source else None
+
+    lifetimes_map = lifetimes.get_commodity_lifetimes(entries)
+    if compress_days:
+        lifetimes_map = lifetimes.compress_lifetimes_days(lifetimes_map, compress_days)
+
+    # Remove the weeks which already have a price.
+    price_map = prices.build_price_map(entries)
+    one_week = datetime.timedelta(days=7)
+    jobs = []
+    for date, base, quote in lifetimes.required_weekly_prices(lifetimes_map, date_last):
+        price_date, _ = prices.get_price(price_map, (base, quote), date)
+        if price_date is not None and price_date > date - one_week:
+            continue
+
+        psources = currency_map.get((base, quote), None)
+        if not psources:
+            if default_source is None:
+                continue
+            psources = [PriceSource(default_source, base, False)]
+        jobs.append(DatedPrice(base, quote, date, psources))
+
+    log_currency_list("Currencies to backfill",
+                      sorted(set((job.base, job.quote) for job in jobs)))
+    return jobs
@@ -328,3 +328,65 @@ class TestFilters(unittest.TestCase):
         jobs = find_prices.get_price_jobs_at_date(entries, None, False, 'yahoo')
         self.assertEqual(1, len(jobs[0].sources))
         self.assertIsInstance(jobs[0].sources[0], find_prices.PriceSource)
+
+
+class TestBackfill(unittest.TestCase):
+
+    @loader.load_doc()
+    def test_get_price_jobs_backfill(self, entries, _, __):
+        """
+        2000-01-10 open Assets:US:Invest:QQQ
+        2000-01-10 open Assets:US:Invest:VEA
+        2000-01-10 open Assets:US:Invest:Margin
+
+        2014-01-01 commodity QQQ
+          price: "USD:yahoo/NASDAQ:QQQ"
+
+        2014-02-06 *
+          Assets:US:Invest:QQQ             100 QQQ {86.23 USD}
+          Assets:US:Invest:VEA             200 VEA {43.22 USD}
+          Assets:US:Invest:Margin
+
+        2014-02-13 price QQQ  88.00 USD
+
+        2014-03-04 *
+          Assets:US:Invest:QQQ            -100 QQQ {86.23 USD} @ 91.23 USD
+          Assets:US:Invest:Margin
+        """
+        jobs = find_prices.get_price_jobs_backfill(entries, datetime.date(2014, 3, 20))
+        self.assertEqual([('QQQ', 'USD', datetime.date(2014, 2, 7)),
+                          ('QQQ', 'USD', datetime.date(2014, 2, 21)),
+                          ('QQQ', 'USD', datetime.date(2014, 2, 28))],
+                         [(job.base, job.quote, job.date) for job in jobs])
+        self.assertEqual([PS(yahoo, 'NASDAQ:QQQ', False)], jobs[0].sources)
+
+        # Commodities without a declared source use the default one.
+        jobs = find_prices.get_price_jobs_backfill(entries, datetime.date(2014, 3, 20),
+                                                   'yahoo')
+        self.assertEqual(
+            [datetime.date(2014, 2, 7), datetime.date(2014, 2, 14),
+             datetime.date(2014, 2, 21), datetime.date(2014, 2, 28),
+             datetime.date(2014, 3, 7), datetime.date(2014, 3, 14)],
+            [job.date for job in jobs if job.base == 'VEA'])
+        self.assertEqual([PS(yahoo, 'VEA', False)],
+                         next(job for job in jobs if job.base == 'VEA').sources)
+
+
+class TestGroupPriceJobs(unittest.TestCase):
+
+    def test_group_price_jobs(self):
+        date1, date2, date3 = (datetime.date(2018, 1, day) for day in (1, 2, 3))
+        sources = [PS(yahoo, 'HOOL', False)]
+        other_sources = [PS(yahoo, 'HOOL.TO', False)]
+        jobs = [find_prices.DatedPrice('HOOL', 'USD', date3, sources),
+                find_prices.DatedPrice('HOOL', 'USD', date1, sources),
+                find_prices.DatedPrice('HOOL', 'USD', date1, sources),
+                find_prices.DatedPrice('HOOL', 'USD', None, sources),
+                find_prices.DatedPrice('HOOL', 'CAD', date2, other_sources),
+                find_prices.DatedPrice('AAPL', 'USD', date2, sources)]
+        self.assertEqual([
+            find_prices.DatedPriceRange('AAPL', 'USD', [date2], sources),
+            find_prices.DatedPriceRange('HOOL', 'CAD', [date2], other_sources),
+            find_prices.DatedPriceRange('HOOL', 'USD', [None], sources),
+            find_prices.DatedPriceRange('HOOL', 'USD', [date1, date3], sources),
+        ], find_prices.group_price_jobs(jobs))
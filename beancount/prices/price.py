@@ -3,15 +3,18 @@
 __copyright__ = "Copyright (C) 2015-2017  Martin Blais"
 __license__ = "GNU GPLv2"
 
+import argparse
+import bisect
 import datetime
 import functools
+import itertools
 from os import path
-import shelve
 import tempfile
-import hashlib
 import os
 import sys
 import logging
+import threading
+import time
 from concurrent import futures
 
 from dateutil import tz
@@ -22,6 +25,7 @@ from beancount import loader
 from beancount.core import data
 from beancount.core import amount
 from beancount.parser import printer
+from beancount.prices import cache
 from beancount.prices import find_prices
 from beancount.utils import date_utils
 from beancount.utils import version
@@ -31,19 +35,135 @@ from beancount.utils import version
 UNKNOWN_CURRENCY = '?'
 
 
-# A cache for the prices.
+# A cache for the prices, an instance of cache.PriceCache.
 _CACHE = None
 
 # Expiration for latest prices in the cache.
 DEFAULT_EXPIRATION = datetime.timedelta(seconds=30*60)  # 30 mins.
 
+# The default number of threads fetching prices.
+DEFAULT_WORKERS = 3
+
+# The default maximum number of concurrent calls to a single price source.
+DEFAULT_SOURCE_CONCURRENCY = 3
+
 
 def now():
     "Indirection in order to be able to mock it out in the tests."
     return datetime.datetime.now(datetime.timezone.utc)
 
 
-def fetch_cached_price(source, symbol, date):
+class FetchScheduler:
+    """A limiter of the concurrency and rate of the calls made to price sources.
+
+    Limits are configured by source module name, either the full name, e.g.
+    'beancount.prices.sources.yahoo', or its last component, e.g. 'yahoo'. This
+    object is shared between the threads fetching prices.
+    """
+
+    def __init__(self, concurrency=None, rates=None,
+                 default_concurrency=DEFAULT_SOURCE_CONCURRENCY, default_rate=None):
+        """Create a scheduler.
+
+        Args:
+          concurrency: A dict of source module name to the maximum number of
+            concurrent calls made to it.
+          rates: A dict of source module name to the maximum number of calls
+            made to it per second, as a float.
+          default_concurrency: An integer, the maximum number of concurrent calls
+            to a source which is not present in 'concurrency'.
+          default_rate: A float, the maximum number of calls per second to a
+            source which is not present in 'rates', or None, for no limit.
+        """
+        self.concurrency = concurrency or {}
+        self.rates = rates or {}
+        self.default_concurrency = default_concurrency
+        self.default_rate = default_rate
+        self.lock = threading.Lock()
+        self.semaphores = {}
+        self.next_times = {}
+
+    def _get_limit(self, limits, module_name, default):
+        """Look up the limit for a source module, by full name or last component."""
+        for name in module_name, module_name.split('.')[-1]:
+            if name in limits:
+                return limits[name]
+        return default
+
+    def call(self, source, function, *args):
+        """Call a method of a price source, within the limits of its module.
+
+        Args:
+          source: A Source instance.
+          function: A callable, a method of 'source'.
+          *args: The arguments to call it with.
+        Returns:
+          The return value of the function.
+        """
+        module_name = type(source).__module__
+        with self.lock:
+            try:
+                semaphore = self.semaphores[module_name]
+            except KeyError:
+                semaphore = self.semaphores[module_name] = threading.BoundedSemaphore(
+                    self._get_limit(self.concurrency, module_name,
+                                    self.default_concurrency))
+        with semaphore:
+            rate = self._get_limit(self.rates, module_name, self.default_rate)
+            if rate:
+                # Reserve the next slot for this source and wait for it.
+                with self.lock:
+                    time_now = time.monotonic()
+                    time_call = max(time_now, self.next_times.get(module_name, time_now))
+                    self.next_times[module_name] = time_call + 1.0 / rate
+                if time_call > time_now:
+                    time.sleep(time_call - time_now)
+            return function(*args)
+
+
+def _call_source(scheduler, source, function, *args):
+    """Call a method of a price source, through the scheduler if there is one."""
+    if scheduler is None:
+        return function(*args)
+    return scheduler.call(source, function, *args)
+
+
+def _query_time(date):
+    """Compute the timestamp at which to query the price for a date.
+
+    Args:
+      date: A datetime.date instance.
+    Returns:
+      An aware datetime.datetime instance, in UTC.
+    """
+    # We query as for 4pm for the given date of the current timezone, if
+    # specified.
+    query_time = datetime.time(16, 0, 0)
+    time_local = datetime.datetime.combine(date, query_time, tzinfo=tz.tzlocal())
+    return time_local.astimezone(tz.tzutc())
+
+
+def _cache_get(source, symbol, date):
+    """Fetch a price from the cache.
+
+    Args:
+      source: A Source instance.
+      symbol: A string, the ticker.
+      date: A datetime.date instance, or None for the latest price.
+    Returns:
+      A SourcePrice instance, or None.
+    Raises:
+      KeyError: If the price is absent from the cache, or expired.
+    """
+    return _CACHE.get(type(source).__module__, symbol, date, int(now().timestamp()))
+
+
+def _cache_put(source, symbol, date, result):
+    """Store a price in the cache. See _cache_get()."""
+    _CACHE.put(type(source).__module__, symbol, date, result, int(now().timestamp()))
+
+
+def fetch_cached_price(source, symbol, date, scheduler=None):
     """Call Source to fetch a price, but look and/or update the cache first.
 
     This function entirely deals with caching and correct expiration. It keeps
@@ -54,82 +174,113 @@ def fetch_cached_price(source, symbol, date):
       source: A Python module object.
       symbol: A string, the ticker to fetch.
       date: A datetime.date instance, None if we're to fetch the latest date.
+      scheduler: An optional FetchScheduler instance to make the call through.
     Returns:
       A SourcePrice instance.
     """
     # Compute a suitable timestamp from the date, if specified.
-    if date is not None:
-        # We query as for 4pm for the given date of the current timezone, if
-        # specified.
-        query_time = datetime.time(16, 0, 0)
-        time_local = datetime.datetime.combine(date, query_time, tzinfo=tz.tzlocal())
-        time = time_local.astimezone(tz.tzutc())
-    else:
-        time = None
-
-    if _CACHE is None:
-        # The cache is disabled; just call and return.
-        result = (source.get_latest_price(symbol)
-                  if time is None else
-                  source.get_historical_price(symbol, time))
+    query_time = _query_time(date) if date is not None else None
 
-    else:
+    if _CACHE is not None:
         # The cache is enabled and we have to compute the current/latest price.
         # Try to fetch from the cache but miss if the price is too old.
-        md5 = hashlib.md5()
-        md5.update(str((type(source).__module__, symbol, date)).encode('utf-8'))
-        key = md5.hexdigest()
-        timestamp_now = int(now().timestamp())
         try:
-            timestamp_created, result_naive = _CACHE[key]
-
-            # Convert naive timezone to UTC, which is what the cache is always
-            # assumed to store. (The reason for this is that timezones from
-            # aware datetime objects cannot be serialized properly due to bug.)
-            if result_naive.time is not None:
-                result = result_naive._replace(
-                    time=result_naive.time.replace(tzinfo=tz.tzutc()))
-            else:
-                result = result_naive
-
-            if (timestamp_now - timestamp_created) > _CACHE.expiration.total_seconds():
-                raise KeyError
+            return _cache_get(source, symbol, date)
         except KeyError:
-            logging.info("Fetching: %s (time: %s)", symbol, time)
-            result = (source.get_latest_price(symbol)
-                      if time is None else
-                      source.get_historical_price(symbol, time))
-
-            # Make sure the timezone is UTC and make naive before serialization.
-            if result and result.time is not None:
-                time_utc = result.time.astimezone(tz.tzutc())
-                time_naive = time_utc.replace(tzinfo=None)
-                result_naive = result._replace(time=time_naive)
-            else:
-                result_naive = result
+            logging.info("Fetching: %s (time: %s)", symbol, query_time)
+
+    result = (_call_source(scheduler, source, source.get_latest_price, symbol)
+              if query_time is None else
+              _call_source(scheduler, source, source.get_historical_price,
+                           symbol, query_time))
 
-            _CACHE[key] = (timestamp_now, result_naive)
+    if _CACHE is not None:
+        _cache_put(source, symbol, date, result)
     return result
 
 
-def setup_cache(cache_filename, clear_cache):
+def fetch_cached_prices(source, symbol, dates, scheduler=None):
+    """Fetch the prices of a symbol at multiple dates, through the cache.
+
+    The prices missing from the cache are fetched with a single call to the
+    source's get_historical_prices(), if it defines it and the call does not
+    return None, and each requested date gets the latest price at or before it.
+    The remaining ones are fetched one at a time with get_historical_price().
+
+    Args:
+      source: A Source instance.
+      symbol: A string, the ticker to fetch.
+      dates: A sorted list of datetime.date instances.
+      scheduler: An optional FetchScheduler instance to make the calls through.
+    Returns:
+      A dict of date to SourcePrice instance, or None if it could not be
+      fetched.
+    """
+    if _CACHE is not None:
+        results = _CACHE.get_range(type(source).__module__, symbol, dates[0], dates[-1],
+                                   int(now().timestamp()))
+        results = {date: results[date] for date in dates if date in results}
+    else:
+        results = {}
+    missing = [date for date in dates if date not in results]
+
+    # Note: Sources written before get_historical_prices() was added to the
+    # interface may not define it.
+    get_historical_prices = getattr(source, 'get_historical_prices', None)
+    if len(missing) > 1 and get_historical_prices is not None:
+        time_begin, time_end = _query_time(missing[0]), _query_time(missing[-1])
+        logging.info("Fetching: %s (times: %s to %s)", symbol, time_begin, time_end)
+        series = _call_source(scheduler, source, get_historical_prices,
+                              symbol, time_begin, time_end)
+        if series is not None:
+            series = sorted(filter(None, series), key=lambda srcprice: srcprice.time)
+            series_dates = [srcprice.time.astimezone(tz.tzlocal()).date()
+                            for srcprice in series]
+            remaining = []
+            fetched = []
+            for date in missing:
+                index = bisect.bisect_right(series_dates, date)
+                if index == 0:
+                    # The price before the range has to be fetched on its own.
+                    remaining.append(date)
+                    continue
+                results[date] = series[index - 1]
+                fetched.append((date, results[date]))
+            if _CACHE is not None:
+                _CACHE.put_many(type(source).__module__, symbol, fetched,
+                                int(now().timestamp()))
+            missing = remaining
+
+    for date in missing:
+        results[date] = fetch_cached_price(source, symbol, date, scheduler)
+    return results
+
+
+def setup_cache(cache_filename, clear_cache, compact_cache=False):
     """Setup the results cache.
 
     Args:
       cache_filename: A string or None, the filename for the cache.
       clear_cache: A boolean, if true, delete the cache before beginning.
+      compact_cache: A boolean, if true, remove the expired prices from the
+        cache and reclaim their space before beginning.
     """
-    if clear_cache and cache_filename and path.exists(cache_filename):
-        logging.info("Clearing cache %s", cache_filename)
-        os.remove(cache_filename)
+    if clear_cache and cache_filename:
+        for filename in cache_filename, cache_filename + '-wal', cache_filename + '-shm':
+            if path.exists(filename):
+                logging.info("Clearing cache %s", filename)
+                os.remove(filename)
 
     if cache_filename:
         logging.info('Using price cache at "%s" (with indefinite expiration)',
                      cache_filename)
 
         global _CACHE
-        _CACHE = shelve.open(cache_filename, 'c')
-        _CACHE.expiration = DEFAULT_EXPIRATION
+        _CACHE = cache.PriceCache(cache_filename, DEFAULT_EXPIRATION)
+
+        if compact_cache:
+            num_removed = _CACHE.compact(int(now().timestamp()))
+            logging.info("Removed %d expired prices from the cache", num_removed)
 
 
 def reset_cache():
@@ -140,13 +291,14 @@ def reset_cache():
     _CACHE = None
 
 
-def fetch_price(dprice, swap_inverted=False):
+def fetch_price(dprice, swap_inverted=False, scheduler=None):
     """Fetch a price for the DatePrice job.
 
     Args:
       dprice: A DatedPrice instances.
       swap_inverted: A boolean, true if we should invert currencies instead of
         rate for an inverted price source.
+      scheduler: An optional FetchScheduler instance to make the calls through.
     Returns:
       A Price entry corresponding to the output of the jobs processed.
 
@@ -156,7 +308,7 @@ def fetch_price(dprice, swap_inverted=False):
             source = psource.module.Source()
         except AttributeError:
             continue
-        srcprice = fetch_cached_price(source, psource.symbol, dprice.date)
+        srcprice = fetch_cached_price(source, psource.symbol, dprice.date, scheduler)
         if srcprice is not None:
             break
     else:
@@ -164,8 +316,78 @@ def fetch_price(dprice, swap_inverted=False):
             logging.error("Could not fetch for job: %s", dprice)
         return None
 
-    base = dprice.base
-    quote = dprice.quote or srcprice.quote_currency
+    return make_price_entry(dprice.base, dprice.quote, psource, srcprice, swap_inverted)
+
+
+def fetch_price_range(drange, swap_inverted=False, scheduler=None):
+    """Fetch the prices for a group of DatedPrice jobs at multiple dates.
+
+    The dates which a source fails to provide are fetched from the following
+    sources.
+
+    Args:
+      drange: A DatedPriceRange instance.
+      swap_inverted: A boolean, true if we should invert currencies instead of
+        rate for an inverted price source.
+      scheduler: An optional FetchScheduler instance to make the calls through.
+    Returns:
+      A list of Price entries, without duplicates. Multiple dates may yield the
+      same price, e.g. if the market was closed on some of them.
+    """
+    if len(drange.dates) == 1:
+        entry = fetch_price(find_prices.DatedPrice(drange.base, drange.quote,
+                                                   drange.dates[0], drange.sources),
+                            swap_inverted, scheduler)
+        return [entry] if entry is not None else []
+
+    remaining = drange.dates
+    srcprices = {}
+    for psource in drange.sources:
+        try:
+            source = psource.module.Source()
+        except AttributeError:
+            continue
+        fetched = fetch_cached_prices(source, psource.symbol, remaining, scheduler)
+        for date, srcprice in fetched.items():
+            if srcprice is not None:
+                srcprices[date] = (psource, srcprice)
+        remaining = [date for date in remaining if date not in srcprices]
+        if not remaining:
+            break
+    if drange.sources:
+        for date in remaining:
+            logging.error("Could not fetch for job: %s",
+                          find_prices.DatedPrice(drange.base, drange.quote,
+                                                 date, drange.sources))
+
+    price_entries = []
+    seen = set()
+    for date in drange.dates:
+        if date not in srcprices:
+            continue
+        entry = make_price_entry(drange.base, drange.quote, *srcprices[date],
+                                 swap_inverted=swap_inverted)
+        key = (entry.date, entry.currency, entry.amount)
+        if key not in seen:
+            seen.add(key)
+            price_entries.append(entry)
+    return price_entries
+
+
+def make_price_entry(base, quote, psource, srcprice, swap_inverted=False):
+    """Create a Price entry from the price fetched from a source.
+
+    Args:
+      base: A commodity string, the base of the job.
+      quote: A commodity string, the quote currency of the job, or None.
+      psource: The PriceSource instance the price was fetched from.
+      srcprice: The SourcePrice instance returned by the source.
+      swap_inverted: A boolean, true if we should invert currencies instead of
+        rate for an inverted price source.
+    Returns:
+      A Price entry.
+    """
+    quote = quote or srcprice.quote_currency
     price = srcprice.price
 
     # Invert the rate if requested.
@@ -232,6 +454,30 @@ def filter_redundant_prices(price_entries, existing_entries, diffs=False):
     return filtered_prices, ignored_prices
 
 
+def parse_source_limit(string, type_):
+    """Parse a per-source limit from the command-line.
+
+    Args:
+      string: A string of the form 'MODULE=VALUE'.
+      type_: A callable to convert the value with.
+    Returns:
+      A pair of the module name string and the converted value.
+    Raises:
+      argparse.ArgumentTypeError: If the string is invalid.
+    """
+    module_name, sep, value = string.partition('=')
+    try:
+        if not (module_name and sep):
+            raise ValueError
+        value = type_(value)
+        if value <= 0:
+            raise ValueError
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'Invalid source limit "{}"; expected MODULE=VALUE'.format(string))
+    return module_name, value
+
+
 def process_args():
     """Process the arguments. This also initializes the logging module.
 
@@ -279,9 +525,32 @@ def process_args():
         "results in 1.25, by default we would output \"price CAD  0.8000 USD\". "
         "Using this option we would instead output \" price USD   1.2500 CAD\"."))
 
+    parser.add_argument('-b', '--backfill', action='store_true', help=(
+        "Fetch the weekly prices missing over the time each commodity held at cost "
+        "was held, instead of the prices at a single date. The --date option sets "
+        "the last date for the commodities still held."))
+
     parser.add_argument('-n', '--dry-run', action='store_true', help=(
         "Don't actually fetch the prices, just print the list of the ones to be fetched."))
 
+    # Scheduling options.
+    sched_group = parser.add_argument_group('scheduling')
+    sched_group.add_argument('-w', '--workers', action='store', type=int,
+                             default=DEFAULT_WORKERS, help=(
+        "The number of threads fetching prices concurrently."))
+
+    sched_group.add_argument('--source-concurrency', action='append', metavar='MODULE=N',
+                             type=functools.partial(parse_source_limit, type_=int),
+                             default=[], help=(
+        "The maximum number of concurrent calls to a source module, e.g. 'yahoo=2'. "
+        "The default is {}. May be repeated.".format(DEFAULT_SOURCE_CONCURRENCY)))
+
+    sched_group.add_argument('--source-rate', action='append', metavar='MODULE=RATE',
+                             type=functools.partial(parse_source_limit, type_=float),
+                             default=[], help=(
+        "The maximum number of calls per second to a source module, e.g. "
+        "'yahoo=0.5'. There is no limit by default. May be repeated."))
+
     # Caching options.
     cache_group = parser.add_argument_group('cache')
     cache_filename = path.join(tempfile.gettempdir(),
@@ -296,6 +565,10 @@ def process_args():
     cache_group.add_argument('--clear-cache', action='store_true',
                              help="Clear the cache prior to startup")
 
+    cache_group.add_argument('--compact-cache', action='store_true',
+                             help=("Remove the expired prices from the cache and "
+                                   "reclaim their space prior to startup"))
+
     args = parser.parse_args()
 
     verbose_levels = {None: logging.WARN,
@@ -308,8 +581,11 @@ def process_args():
     if args.all:
         args.inactive = args.undeclared = args.clobber = True
 
+    if args.backfill and args.expressions:
+        parser.error("Backfilling requires input files, not source expressions.")
+
     # Setup for processing.
-    setup_cache(args.cache_filename, args.clear_cache)
+    setup_cache(args.cache_filename, args.clear_cache, args.compact_cache)
 
     # Get the list of DatedPrice jobs to get from the arguments.
     logging.info("Processing at date: %s", args.date or datetime.date.today())
@@ -342,9 +618,14 @@ def process_args():
             entries, errors, options_map = loader.load_file(filename, log_errors=sys.stderr)
             if dcontext is None:
                 dcontext = options_map['dcontext']
-            jobs.extend(
-                find_prices.get_price_jobs_at_date(
-                    entries, args.date, args.inactive, args.undeclared))
+            if args.backfill:
+                jobs.extend(
+                    find_prices.get_price_jobs_backfill(
+                        entries, args.date, args.undeclared))
+            else:
+                jobs.extend(
+                    find_prices.get_price_jobs_at_date(
+                        entries, args.date, args.inactive, args.undeclared))
             all_entries.extend(entries)
 
     return args, jobs, data.sorted(all_entries), dcontext
@@ -359,10 +640,15 @@ def main():
             print(find_prices.format_dated_price_str(dprice))
         return
 
-    # Fetch all the required prices, processing all the jobs.
-    executor = futures.ThreadPoolExecutor(max_workers=3)
-    price_entries = filter(None, executor.map(
-        functools.partial(fetch_price, swap_inverted=args.swap_inverted), jobs))
+    # Fetch all the required prices, processing all the jobs. Jobs for the same
+    # commodity at multiple dates are fetched together.
+    scheduler = FetchScheduler(dict(args.source_concurrency), dict(args.source_rate))
+    executor = futures.ThreadPoolExecutor(max_workers=args.workers)
+    price_entries = itertools.chain.from_iterable(executor.map(
+        functools.partial(fetch_price_range,
+                          swap_inverted=args.swap_inverted,
+                          scheduler=scheduler),
+        find_prices.group_price_jobs(jobs)))
 
     # Sort them by currency, regardless of date (the dates should be close
     # anyhow, and we tend to put them in chunks in the input files anyhow).
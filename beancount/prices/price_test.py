@@ -3,7 +3,11 @@
 __copyright__ = "Copyright (C) 2015-2017  Martin Blais"
 __license__ = "GNU GPLv2"
 
+import argparse
 import datetime
+import threading
+import time
+import types
 import unittest
 import shutil
 import tempfile
@@ -14,6 +18,7 @@ from unittest import mock
 from dateutil import tz
 
 from beancount.prices.source import SourcePrice
+from beancount.prices import source
 from beancount.prices import price
 from beancount.prices import find_prices
 from beancount.prices.sources import yahoo
@@ -193,6 +198,36 @@ class TestProcessArguments(unittest.TestCase):
                     'AAPL', 'USD', None,
                     [find_prices.PriceSource(yahoo, 'AAPL', False)])], jobs)
 
+    def test_backfill_expressions(self):
+        with test_utils.capture('stderr'):
+            with self.assertRaises(SystemExit):
+                test_utils.run_with_args(
+                    price.process_args, ['--no-cache', '--backfill', '-e',
+                                         'USD:yahoo/AAPL'])
+
+    @test_utils.docfile
+    def test_backfill(self, filename):
+        """
+        2000-01-10 open Assets:US:Invest:QQQ
+        2000-01-10 open Assets:US:Invest:Margin
+
+        2014-01-01 commodity QQQ
+          price: "USD:yahoo/NASDAQ:QQQ"
+
+        2014-02-06 *
+          Assets:US:Invest:QQQ             100 QQQ {86.23 USD}
+          Assets:US:Invest:Margin
+
+        2014-02-20 *
+          Assets:US:Invest:QQQ            -100 QQQ {86.23 USD} @ 91.23 USD
+          Assets:US:Invest:Margin
+        """
+        with test_utils.capture('stderr'):
+            args, jobs, _, __ = test_utils.run_with_args(
+                price.process_args, ['--no-cache', '--backfill', filename])
+        self.assertEqual([datetime.date(2014, 2, 7), datetime.date(2014, 2, 14)],
+                         [job.date for job in jobs])
+
 
 class TestClobber(cmptest.TestCase):
 
@@ -289,3 +324,173 @@ class TestInverted(unittest.TestCase):
             find_prices.PriceSource(yahoo, 'USDJPY', True)]), True)
         self.assertEqual(('USD', 'JPY'), (entry.currency, entry.amount.currency))
         self.assertEqual(D('125.00'), entry.amount.number)
+
+
+class FakeSource(source.Source):
+    """A local source with prices on weekdays, which records its calls."""
+
+    def __init__(self):
+        self.calls = FAKE_CALLS
+
+    def _price(self, date):
+        time_ = datetime.datetime.combine(date, datetime.time(16, 0, 0),
+                                          tzinfo=tz.tzlocal())
+        return SourcePrice(D(date.day), time_, 'USD')
+
+    def get_latest_price(self, ticker):
+        self.calls.append(('latest', ticker))
+        return self._price(datetime.date.today())
+
+    def get_historical_price(self, ticker, time_):
+        date = time_.astimezone(tz.tzlocal()).date()
+        self.calls.append(('historical', ticker, date))
+        while date.weekday() >= 5:
+            date -= datetime.timedelta(days=1)
+        return self._price(date)
+
+    def get_historical_prices(self, ticker, time_begin, time_end):
+        date_begin = time_begin.astimezone(tz.tzlocal()).date()
+        date_end = time_end.astimezone(tz.tzlocal()).date()
+        self.calls.append(('range', ticker, date_begin, date_end))
+        return [self._price(date_begin + datetime.timedelta(days=days))
+                for days in range((date_end - date_begin).days + 1)
+                if (date_begin + datetime.timedelta(days=days)).weekday() < 5]
+
+
+class FakeSingleSource(FakeSource):
+    """A local source which does not support fetching ranges."""
+
+    def get_historical_prices(self, ticker, time_begin, time_end):
+        return None
+
+
+
+class FakeLegacySource:
+    """A local source which predates the get_historical_prices() method."""
+
+    def __init__(self):
+        self.source = FakeSource()
+
+    def get_latest_price(self, ticker):
+        return self.source.get_latest_price(ticker)
+
+    def get_historical_price(self, ticker, time_):
+        return self.source.get_historical_price(ticker, time_)
+# The calls made to the fake sources.
+FAKE_CALLS = []
+
+# Modules for the fake sources.
+fake_module = types.ModuleType('fake_source')
+fake_module.Source = FakeSource
+fake_single_module = types.ModuleType('fake_single_source')
+fake_single_module.Source = FakeSingleSource
+fake_legacy_module = types.ModuleType('fake_legacy_source')
+fake_legacy_module.Source = FakeLegacySource
+
+
+class TestFetchPriceRange(unittest.TestCase):
+
+    def setUp(self):
+        del FAKE_CALLS[:]
+        # Friday to Tuesday.
+        self.dates = [datetime.date(2018, 3, day) for day in range(2, 7)]
+
+    def get_range(self, module, dates=None):
+        return find_prices.DatedPriceRange(
+            'HOOL', 'USD', dates or self.dates,
+            [find_prices.PriceSource(module, 'HOOL', False)])
+
+    def test_batched(self):
+        entries = price.fetch_price_range(self.get_range(fake_module))
+        self.assertEqual([('range', 'HOOL', self.dates[0], self.dates[-1])], FAKE_CALLS)
+        # The weekend yields Friday's price, only once.
+        self.assertEqual([(datetime.date(2018, 3, day), D(day)) for day in (2, 5, 6)],
+                         [(entry.date, entry.amount.number) for entry in entries])
+
+    def test_single(self):
+        entries = price.fetch_price_range(self.get_range(fake_single_module))
+        self.assertEqual(len(self.dates), len(FAKE_CALLS))
+        self.assertEqual(['historical'] * len(self.dates),
+                         [call[0] for call in FAKE_CALLS])
+        self.assertEqual([(datetime.date(2018, 3, day), D(day)) for day in (2, 5, 6)],
+                         [(entry.date, entry.amount.number) for entry in entries])
+
+    def test_legacy(self):
+        entries = price.fetch_price_range(self.get_range(fake_legacy_module))
+        self.assertEqual(['historical'] * len(self.dates),
+                         [call[0] for call in FAKE_CALLS])
+        self.assertEqual([(datetime.date(2018, 3, day), D(day)) for day in (2, 5, 6)],
+                         [(entry.date, entry.amount.number) for entry in entries])
+
+    def test_before_range(self):
+        # Sunday and Monday: the price for Sunday comes before the range.
+        dates = [datetime.date(2018, 3, 4), datetime.date(2018, 3, 5)]
+        entries = price.fetch_price_range(self.get_range(fake_module, dates))
+        self.assertEqual([('range', 'HOOL', dates[0], dates[1]),
+                          ('historical', 'HOOL', dates[0])], FAKE_CALLS)
+        self.assertEqual([datetime.date(2018, 3, 2), datetime.date(2018, 3, 5)],
+                         [entry.date for entry in entries])
+
+    def test_cached(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            price.setup_cache(path.join(tmpdir, 'prices.cache'), False)
+            try:
+                entries = price.fetch_price_range(self.get_range(fake_module))
+                self.assertEqual(1, len(FAKE_CALLS))
+
+                # All the dates are now served from the cache.
+                self.assertEqual(entries, price.fetch_price_range(
+                    self.get_range(fake_module)))
+                self.assertEqual(1, len(FAKE_CALLS))
+
+                # Only the missing dates are requested.
+                dates = self.dates + [datetime.date(2018, 3, 7),
+                                      datetime.date(2018, 3, 8)]
+                price.fetch_price_range(self.get_range(fake_module, dates))
+                self.assertEqual(('range', 'HOOL', dates[-2], dates[-1]),
+                                 FAKE_CALLS[-1])
+            finally:
+                price.reset_cache()
+
+    def test_single_date(self):
+        entries = price.fetch_price_range(self.get_range(fake_module, [None]))
+        self.assertEqual([('latest', 'HOOL')], FAKE_CALLS)
+        self.assertEqual(1, len(entries))
+
+
+class TestFetchScheduler(unittest.TestCase):
+
+    def test_concurrency(self):
+        scheduler = price.FetchScheduler({'price_test': 2}, default_concurrency=10)
+        lock = threading.Lock()
+        active = [0]
+        maximum = [0]
+        def function():
+            with lock:
+                active[0] += 1
+                maximum[0] = max(maximum[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+        threads = [threading.Thread(target=scheduler.call,
+                                    args=(FakeSource(), function))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(2, maximum[0])
+
+    def test_rate(self):
+        scheduler = price.FetchScheduler(rates={
+            'beancount.prices.price_test': 50.0})
+        times = []
+        for _ in range(4):
+            scheduler.call(FakeSource(), lambda: times.append(time.monotonic()))
+        self.assertGreaterEqual(times[-1] - times[0], 3 / 50.0 * 0.9)
+
+    def test_parse_source_limit(self):
+        self.assertEqual(('yahoo', 2), price.parse_source_limit('yahoo=2', int))
+        for string in 'yahoo', '=2', 'yahoo=0', 'yahoo=abc':
+            with self.assertRaises(argparse.ArgumentTypeError):
+                price.parse_source_limit(string, int)
@@ -72,3 +72,26 @@ class Source:
           code must be able to handle this. Also note that the price's returned
           time must be timezone-aware.
         """
+
+    def get_historical_prices(self, ticker, time_begin, time_end):
+        """Return the daily historical prices for the symbol over a range of dates.
+
+        This is optional. Sources which can fetch a series of prices in a single
+        request should implement it, as it is used in preference to calling
+        get_historical_price() for each of the dates when many dates are
+        required for the same symbol.
+
+        Args:
+          ticker: A string, the ticker to be fetched by the source. See
+            get_historical_price().
+          time_begin: The timestamp of the first day to fetch a price for. See
+            the 'time' argument of get_historical_price().
+          time_end: The timestamp of the last day to fetch a price for,
+            inclusive.
+        Returns:
+          A list of SourcePrice instances, one for each day a price is
+          available, sorted by time. Days without a price, e.g., market holidays,
+          may be omitted. If the source does not support fetching a range of
+          prices, None is returned; this is the default implementation.
+        """
+        return None
@@ -18,11 +18,12 @@ __copyright__ = "Copyright (C) 2015-2018  Martin Blais"
 __license__ = "GNU GPLv2"
 
 import datetime
-from typing import Dict, Any
+from typing import Any, Dict, List, Tuple
 
 import requests
 
 from beancount.core.number import D
+from beancount.core.number import Decimal
 from beancount.prices import source
 
 
@@ -102,28 +103,9 @@ class Source(source.Source):
 
     def get_historical_price(self, ticker, time):
         """See contract in beancount.prices.source.Source."""
-        if requests is None:
-            raise YahooError("You must install the 'requests' library.")
-        url = "https://query1.finance.yahoo.com/v8/finance/chart/{}".format(ticker)
-        dt_start = time - datetime.timedelta(days=5)
-        dt_end = time
-        payload = {
-            'period1': int(dt_start.timestamp()),
-            'period2': int(dt_end.timestamp()),
-            'interval': '1d',
-        }
-        payload.update(_DEFAULT_PARAMS)
-        response = requests.get(url, params=payload)
-        result = parse_response(response)
-
-        meta = result['meta']
-        timezone = datetime.timezone(datetime.timedelta(hours=meta['gmtoffset'] / 3600),
-                                     meta['exchangeTimezoneName'])
-
-        timestamp_array = result['timestamp']
-        close_array = result['indicators']['quote'][0]['close']
-        series = [(datetime.datetime.fromtimestamp(timestamp, tz=timezone), D(price))
-                  for timestamp, price in zip(timestamp_array, close_array)]
+        series, currency = get_price_series(ticker,
+                                            time - datetime.timedelta(days=5),
+                                            time)
 
         # Get the latest data returned.
         latest = None
@@ -134,5 +116,60 @@ class Source(source.Source):
         if latest is None:
             raise YahooError("Could not find price before {} in {}".format(time, series))
 
-        currency = result['meta']['currency']
         return source.SourcePrice(price, data_dt, currency)
+
+    def get_historical_prices(self, ticker, time_begin, time_end):
+        """See contract in beancount.prices.source.Source.
+
+        The daily closing prices of the five days before 'time_begin' are
+        included too, so that the first dates of the range, e.g. on a weekend,
+        get the price of the previous trading day.
+        """
+        series, currency = get_price_series(ticker,
+                                            time_begin - datetime.timedelta(days=5),
+                                            time_end)
+        return [source.SourcePrice(price, data_dt, currency)
+                for data_dt, price in sorted(series)
+                if data_dt < time_end]
+
+
+def get_price_series(ticker: str,
+                     time_begin: datetime.datetime,
+                     time_end: datetime.datetime) -> Tuple[List[Tuple[datetime.datetime,
+                                                                      Decimal]],
+                                                           str]:
+    """Fetch the daily closing prices of a ticker over a range of times.
+
+    Args:
+      ticker: A string, the ticker to fetch.
+      time_begin: A timezone-aware datetime, the beginning of the range.
+      time_end: A timezone-aware datetime, the end of the range.
+    Returns:
+      A pair of a list of (datetime, price) pairs, with the prices as Decimal
+      instances, and the quote currency. The days without a closing price are
+      omitted.
+    Raises:
+      YahooError: If there is an error in the response.
+    """
+    if requests is None:
+        raise YahooError("You must install the 'requests' library.")
+    url = "https://query1.finance.yahoo.com/v8/finance/chart/{}".format(ticker)
+    payload = {
+        'period1': int(time_begin.timestamp()),
+        'period2': int(time_end.timestamp()),
+        'interval': '1d',
+    }
+    payload.update(_DEFAULT_PARAMS)
+    response = requests.get(url, params=payload)
+    result = parse_response(response)
+
+    meta = result['meta']
+    timezone = datetime.timezone(datetime.timedelta(hours=meta['gmtoffset'] / 3600),
+                                 meta['exchangeTimezoneName'])
+
+    timestamp_array = result['timestamp']
+    close_array = result['indicators']['quote'][0]['close']
+    series = [(datetime.datetime.fromtimestamp(timestamp, tz=timezone), D(price))
+              for timestamp, price in zip(timestamp_array, close_array)
+              if price is not None]
+    return series, meta['currency']
@@ -133,6 +133,46 @@ class YahooFinancePriceFetcher(unittest.TestCase):
             with date_utils.intimezone(tzname):
                 self._test_get_historical_price()
 
+    def _test_get_historical_prices(self):
+        response = MockResponse(
+            {'chart':
+             {'error': None,
+              'result': [{'indicators': {'quote': [{'close': [29.479999542236328,
+                                                              29.40999984741211,
+                                                              None,
+                                                              29.469999313354492]}]},
+                          'meta': {'currency': 'CAD',
+                                   'exchangeTimezoneName': 'America/Toronto',
+                                   'gmtoffset': -14400,
+                                   'symbol': 'XSP.TO'},
+                          'timestamp': [1509111000,
+                                        1509370200,
+                                        1509456600,
+                                        1509543000]}]}})
+        time_begin = datetime.datetime(2017, 10, 30, 16, 0, 0, tzinfo=tz.tzutc())
+        time_end = datetime.datetime(2017, 11, 1, 16, 0, 0, tzinfo=tz.tzutc())
+        with mock.patch('requests.get', return_value=response) as mock_get:
+            srcprices = yahoo.Source().get_historical_prices('XSP.TO',
+                                                             time_begin, time_end)
+        mock_get.assert_called_once()
+        self.assertEqual(int((time_begin - datetime.timedelta(days=5)).timestamp()),
+                         mock_get.call_args[1]['params']['period1'])
+
+        # The day without a closing price is omitted.
+        timezone = datetime.timezone(datetime.timedelta(hours=-4), 'America/Toronto')
+        self.assertEqual([datetime.datetime(2017, 10, 27, 9, 30, tzinfo=timezone),
+                          datetime.datetime(2017, 10, 30, 9, 30, tzinfo=timezone),
+                          datetime.datetime(2017, 11, 1, 9, 30, tzinfo=timezone)],
+                         [srcprice.time for srcprice in srcprices])
+        self.assertEqual([D('29.48'), D('29.41'), D('29.47')],
+                         [round(srcprice.price, 2) for srcprice in srcprices])
+        self.assertEqual({'CAD'}, {srcprice.quote_currency for srcprice in srcprices})
+
+    def test_get_historical_prices(self):
+        for tzname in "America/New_York", "Europe/Berlin", "Asia/Tokyo":
+            with date_utils.intimezone(tzname):
+                self._test_get_historical_prices()
+
     def test_parse_response_error_status_code(self):
         response = MockResponse(
             {'quoteResponse': {'error': 'Not supported', 'result': [{}]}},
@@ -7,13 +7,17 @@ The purpose of this script is
 - Produce a table of per-account attributes
 - Produce a table of per-commodity attributes
 - Join these tables
-- Output them to a CSV file.
+- Output them to a CSV file, or to a Parquet file.
 
 The purpose of this script is to then invoke upload-to-sheets to replace the
 contents of an existing sheet inside a Google Sheets doc from which various
 reports to track one's portfolio can be produced, and updated with live market
 data using the =GOOGLEFINANCE() function.
 
+The Parquet format preserves the types of the columns: numbers are stored as
+fixed-point decimals, accounts and currencies are dictionary-encoded and dates
+are stored as dates. This requires the 'pyarrow' package.
+
 (In theory, this script eventually be replaceable with an SQL shell query; in
 practice, the shell is not quite there yet, so we maintain this script.)
 """
@@ -41,6 +45,14 @@ from beancount.core import prices
 from beancount.parser import options
 from beancount import loader
 
+# Try to import pyarrow. This is only required to write tables in the Parquet
+# format.
+try:
+    import pyarrow
+    from pyarrow import parquet
+except ImportError:
+    pyarrow = None
+
 
 def validate_entries(entries: data.Entries):
     """Check for problematic entries resulting from some plugins."""
@@ -258,12 +270,95 @@ def reorder_columns(table: Table, new_headers: List[str]) -> Table:
     return Table(new_headers, rows)
 
 
-def write_table(table: Table, outfile: str):
-    """Write a table to a CSV file."""
+def write_table(table: Table, outfile: str, fmt: str = 'csv'):
+    """Write a table to a CSV or Parquet file."""
     with outfile:
-        writer = csv.writer(outfile)
-        writer.writerow(table.header)
-        writer.writerows(table.rows)
+        if fmt == 'parquet':
+            outfile.flush()
+            write_table_parquet(table, outfile.buffer)
+        else:
+            writer = csv.writer(outfile)
+            writer.writerow(table.header)
+            writer.writerows(table.rows)
+
+
+# The number of rows converted and written at once to a Parquet file.
+ROW_GROUP_SIZE = 65536
+
+
+def get_column_type(values: List[Any]):
+    """Infer the Arrow type to store a column of values with.
+
+    Decimal numbers are stored as fixed-point decimals with the smallest precision
+    and scale which represent all of the values exactly. Strings are
+    dictionary-encoded, since accounts and currencies repeat a lot. Columns of
+    mixed types are stored as strings.
+
+    Args:
+      values: A list of the values of a column, which may include None.
+    Returns:
+      A pyarrow.DataType instance.
+    """
+    types = {type(value) for value in values if value is not None}
+    if types == {Decimal}:
+        int_digits = scale = 0
+        for value in values:
+            if value is None:
+                continue
+            _, digits, exponent = value.as_tuple()
+            int_digits = max(int_digits, len(digits) + exponent)
+            scale = max(scale, -exponent)
+        precision = max(int_digits + scale, 1)
+        return (pyarrow.decimal128(precision, scale)
+                if precision <= 38
+                else pyarrow.decimal256(precision, scale))
+    elif types == {datetime.date}:
+        return pyarrow.date32()
+    elif types == {bool}:
+        return pyarrow.bool_()
+    elif types == {int}:
+        return pyarrow.int64()
+    return pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+
+
+def write_table_parquet(table: Table, outfile, row_group_size: int = ROW_GROUP_SIZE):
+    """Write a table to a Parquet file.
+
+    The rows are converted and written in groups of 'row_group_size', so that
+    only one group at a time is held in columnar form.
+
+    Args:
+      table: The Table instance to write.
+      outfile: A filename or a binary file object.
+      row_group_size: An integer, the number of rows to write at once.
+    Raises:
+      ImportError: If pyarrow is not installed.
+    """
+    if pyarrow is None:
+        raise ImportError("The 'pyarrow' package is required to write Parquet files.")
+    types = [get_column_type([row[index] for row in table.rows])
+             for index in range(len(table.header))]
+    schema = pyarrow.schema(list(zip(table.header, types)))
+
+    # Columns of mixed types are stored as strings.
+    converters = [(lambda value: value if value is None else str(value))
+                  if pyarrow.types.is_dictionary(type_)
+                  else None
+                  for type_ in types]
+
+    writer = parquet.ParquetWriter(outfile, schema)
+    try:
+        for start in range(0, len(table.rows), row_group_size):
+            rows = table.rows[start:start + row_group_size]
+            arrays = []
+            for index, (type_, converter) in enumerate(zip(types, converters)):
+                values = [row[index] for row in rows]
+                if converter is not None:
+                    values = [converter(value) for value in values]
+                arrays.append(pyarrow.array(values, type=type_))
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+    finally:
+        writer.close()
 
 
 def main():
@@ -277,6 +372,11 @@ def main():
 
     parser.add_argument('-n', '--dry-run', action='store_true')
 
+    parser.add_argument('-f', '--format', action='store', default='csv',
+                        choices=['csv', 'parquet'],
+                        help=("Format of the output files. Parquet files preserve "
+                              "the types of the columns and require 'pyarrow'."))
+
     for shortname, longname in [('-c', 'commodities'),
                                 ('-a', 'accounts'),
                                 ('-p', 'prices'),
@@ -285,13 +385,15 @@ def main():
         parser.add_argument(
             shortname, '--output_{}'.format(longname),
             type=argparse.FileType('w'),
-            help="CSV filename to write out the {} table to.".format(longname))
+            help="Filename to write out the {} table to.".format(longname))
 
     parser.add_argument('-o', '--output',
                         type=argparse.FileType('w'),
-                        help="CSV filename to write out the final joined table to.")
+                        help="Filename to write out the final joined table to.")
 
     args = parser.parse_args()
+    if args.format == 'parquet' and pyarrow is None:
+        parser.error("The 'pyarrow' package is required to write Parquet files.")
 
     # Load the file contents.
     entries, errors, options_map = loader.load_file(args.filename)
@@ -305,30 +407,30 @@ def main():
     commodities_table = get_commodities_table(
         entries, ['export', 'assetcls', 'strategy', 'issuer'])
     if args.output_commodities is not None:
-        write_table(commodities_table, args.output_commodities)
+        write_table(commodities_table, args.output_commodities, args.format)
 
     # Get the map of accounts to their meta tags.
     accounts_table, accounts_map = get_accounts_table(
         entries, ['tax', 'liquid'])
     if args.output_accounts is not None:
-        write_table(accounts_table, args.output_accounts)
+        write_table(accounts_table, args.output_accounts, args.format)
 
     # Enumerate the list of assets.
     postings_table = get_postings_table(entries, options_map, accounts_map)
     if args.output_postings is not None:
-        write_table(postings_table, args.output_postings)
+        write_table(postings_table, args.output_postings, args.format)
 
     # Get the list of prices.
     prices_table = get_prices_table(entries, main_currency)
     if args.output_prices is not None:
-        write_table(prices_table, args.output_prices)
+        write_table(prices_table, args.output_prices, args.format)
 
     # Get the list of exchange rates.
     index = postings_table.header.index('cost_currency')
     currencies = set(row[index] for row in postings_table.rows)
     rates_table = get_rates_table(entries, currencies, main_currency)
     if args.output_rates is not None:
-        write_table(rates_table, args.output_rates)
+        write_table(rates_table, args.output_rates, args.format)
 
     # Join all the tables.
     joined_table = join(postings_table,
@@ -349,8 +451,11 @@ def main():
     table = Table(final_table.header, rows)
 
     if args.output is not None:
-        table[0][0] += ' ({:%Y-%m-%d %H:%M})'.format(datetime.datetime.now())
-        write_table(table, args.output)
+        # Stamp the time in the header of the spreadsheet; typed formats keep
+        # the column names stable.
+        if args.format == 'csv':
+            table[0][0] += ' ({:%Y-%m-%d %H:%M})'.format(datetime.datetime.now())
+        write_table(table, args.output, args.format)
 
     return 0
 
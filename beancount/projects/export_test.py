@@ -1,8 +1,12 @@
 __copyright__ = "Copyright (C) 2014, 2016  Martin Blais"
 __license__ = "GNU GPLv2"
 
+import datetime
+import tempfile
+import unittest
 from os import path
 
+from beancount.core.number import D
 from beancount.utils import test_utils
 from beancount.projects import export
 
@@ -16,3 +20,49 @@ class TestExport(test_utils.TestCase):
             result = test_utils.run_with_args(export.main,
                                               [example_beancount, '-o-'])
             self.assertEqual(0, result)
+
+    @unittest.skipIf(export.pyarrow is None, 'pyarrow is not installed')
+    def test_export_parquet(self):
+        rootdir = test_utils.find_repository_root(__file__)
+        example_beancount = path.join(rootdir, 'examples', 'example.beancount')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            postings_filename = path.join(tmpdir, 'postings.parquet')
+            output_filename = path.join(tmpdir, 'output.parquet')
+            with test_utils.capture('stdout', 'stderr'):
+                result = test_utils.run_with_args(
+                    export.main, [example_beancount, '--format=parquet',
+                                  '-m', postings_filename, '-o', output_filename])
+            self.assertEqual(0, result)
+
+            schema = export.parquet.read_schema(postings_filename)
+            self.assertTrue(export.pyarrow.types.is_dictionary(
+                schema.field('account').type))
+            self.assertTrue(export.pyarrow.types.is_decimal(
+                schema.field('number').type))
+            self.assertEqual(export.pyarrow.date32(), schema.field('cost_date').type)
+            self.assertEqual('account', export.parquet.read_schema(output_filename)[0].name)
+
+
+@unittest.skipIf(export.pyarrow is None, 'pyarrow is not installed')
+class TestWriteParquet(unittest.TestCase):
+
+    def test_write_table_parquet(self):
+        table = export.Table(
+            ['account', 'number', 'date', 'mixed'],
+            [['Assets:Cash', D('1.5'), datetime.date(2018, 1, 1), 'TAXABLE'],
+             ['Assets:Invest', D('-100.123'), None, D('2')],
+             ['Assets:Cash', None, datetime.date(2018, 1, 2), True]])
+        with tempfile.NamedTemporaryFile(suffix='.parquet') as outfile:
+            export.write_table_parquet(table, outfile.name, row_group_size=2)
+            pfile = export.parquet.ParquetFile(outfile.name)
+            self.assertEqual(2, pfile.num_row_groups)
+            self.assertEqual(export.pyarrow.decimal128(6, 3),
+                             pfile.schema_arrow.field('number').type)
+            self.assertEqual(
+                [{'account': 'Assets:Cash', 'number': D('1.500'),
+                  'date': datetime.date(2018, 1, 1), 'mixed': 'TAXABLE'},
+                 {'account': 'Assets:Invest', 'number': D('-100.123'),
+                  'date': None, 'mixed': '2'},
+                 {'account': 'Assets:Cash', 'number': None,
+                  'date': datetime.date(2018, 1, 2), 'mixed': 'True'}],
+                pfile.read().to_pylist())
@@ -0,0 +1,205 @@
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import datetime
+import unittest
+from unittest import mock
+
+from beancount.query import query_parser
+from beancount.query import query_compile as qc
+from beancount.query import query_env as qe
+from beancount.query import query_execute as qx
+from beancount.query import query_columnar as qcol
+from beancount import loader
+
+
+INPUT = """
+
+2010-01-01 open Assets:Bank:Checking
+2010-01-01 open Assets:Investing
+2010-01-01 open Expenses:Restaurant
+2010-01-01 open Income:Salary
+
+2010-01-15 * "Employer" "Salary" #work
+  Assets:Bank:Checking       1000.00 USD
+  Income:Salary             -1000.00 USD
+
+2010-02-03 * "Cafe" "Dinner with Cero"
+  Assets:Bank:Checking       -100.00 USD
+  Expenses:Restaurant         100.00 USD
+
+2011-01-05 * "Cafe" "Dinner with Uno" ^trip
+  Assets:Bank:Checking       -101.00 USD
+  Expenses:Restaurant         101.00 USD
+
+2011-03-01 * "Buy"
+  Assets:Investing              10 HOOL {50.00 USD}
+  Assets:Bank:Checking       -500.00 USD
+
+2011-06-01 * "Buy"
+  Assets:Investing              5 HOOL {60.00 USD}
+  Assets:Bank:Checking       -300.00 USD
+
+2012-02-02 * "Sell"
+  Assets:Investing             -10 HOOL {50.00 USD}
+  Assets:Bank:Checking        550.00 USD
+  Income:Salary               -50.00 USD
+
+2012-02-02 ! "Employer" "Bonus" #work
+  Assets:Bank:Checking        200.00 USD
+  Income:Salary              -200.00 USD
+
+"""
+
+
+class TestColumnarAggregation(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.entries, _, cls.options_map = loader.load_string(INPUT)
+
+    def setUp(self):
+        self.table = qcol.PostingsTable(self.entries)
+
+    def compile(self, bql_string):
+        return qc.compile_select(query_parser.Parser().parse(bql_string),
+                                 qe.TargetsEnvironment(),
+                                 qe.FilterPostingsEnvironment(),
+                                 qe.FilterEntriesEnvironment())
+
+    def check_equivalent(self, bql_string, columnar=True):
+        """Check that both evaluators produce the same results.
+
+        Args:
+          bql_string: A query string.
+          columnar: True if the columnar evaluator is expected to support the query.
+        """
+        expected = qx.execute_query(self.compile(bql_string),
+                                    self.entries, self.options_map)
+        with mock.patch.object(qcol, 'aggregate', wraps=qcol.aggregate) as aggregate:
+            actual = qx.execute_query(self.compile(bql_string),
+                                      self.entries, self.options_map, self.table)
+            self.assertTrue(aggregate.called)
+        self.assertEqual(expected, actual)
+
+        # Check whether the columnar evaluator did the work.
+        query = self.compile(bql_string)
+        c_exprs = [c_target.c_expr for c_target in query.c_targets]
+        c_aggregates = []
+        for index, c_expr in enumerate(c_exprs):
+            if index not in query.group_indexes:
+                c_aggregates.extend(qc.get_columns_and_aggregates(c_expr)[1])
+        allocator = qx.Allocator()
+        for c_expr in c_aggregates:
+            c_expr.allocate(allocator)
+        c_nonaggregates = [c_expr for index, c_expr in enumerate(c_exprs)
+                           if index in query.group_indexes]
+        context = qx.create_row_context(self.entries, self.options_map)
+        if columnar:
+            qcol.aggregate(query.c_where, c_nonaggregates, c_aggregates, allocator,
+                           self.table, context)
+        else:
+            with self.assertRaises(qcol.Unsupported):
+                qcol.aggregate(query.c_where, c_nonaggregates, c_aggregates,
+                               allocator, self.table, context)
+        return actual
+
+    def test_table(self):
+        self.assertEqual(15, len(self.table))
+        codes, rows = self.table.get_encoding('account')
+        self.assertEqual(15, len(codes))
+        self.assertEqual(4, len(rows))
+        codes, rows = self.table.get_encoding('entry')
+        self.assertEqual([0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 5, 6, 6], codes)
+        self.assertEqual([0, 2, 4, 6, 8, 10, 13], rows)
+        with self.assertRaises(ValueError):
+            self.table.get_encoding('invalid')
+
+    def test_sum_position_by_account(self):
+        _, rows = self.check_equivalent(
+            "SELECT account, sum(position) GROUP BY account ORDER BY account")
+        self.assertEqual(4, len(rows))
+
+    def test_sum_position_reduced_to_zero(self):
+        _, rows = self.check_equivalent(
+            "SELECT sum(position) WHERE account = 'Assets:Investing'")
+        self.assertEqual(1, len(rows))
+
+    def test_sum_number_by_year_month(self):
+        self.check_equivalent(
+            "SELECT year, month, sum(number), count(number) "
+            "GROUP BY year, month ORDER BY year, month")
+
+    def test_functions_of_encoded_columns(self):
+        self.check_equivalent(
+            "SELECT root(account, 1) as r, first(narration), last(payee), "
+            "min(number), max(number) "
+            "WHERE year >= 2011 AND NOT ('trip' IN links) GROUP BY r")
+
+    def test_where_across_columns(self):
+        self.check_equivalent(
+            "SELECT account, currency, sum(number) "
+            "WHERE (account ~ 'Assets' AND year = 2011) OR number > 150 "
+            "GROUP BY account, currency")
+
+    def test_where_number_only(self):
+        self.check_equivalent(
+            "SELECT payee, count(account) WHERE number < 0 GROUP BY payee")
+
+    def test_from_clause(self):
+        self.check_equivalent(
+            "SELECT account, sum(position) FROM year = 2011 GROUP BY account")
+
+    def test_where_constant(self):
+        self.check_equivalent("SELECT count(date) WHERE 1 = 2")
+
+    def test_tags(self):
+        self.check_equivalent(
+            "SELECT flag, sum(number) WHERE 'work' IN tags GROUP BY flag")
+
+    def test_where_guards_row_values(self):
+        # The operands depending on each row are only evaluated on the rows
+        # matching the WHERE clause, like the row interpreter does.
+        entries, _, options_map = loader.load_string(INPUT + """
+          2012-03-01 * "Zero"
+            Assets:Bank:Checking          0.00 USD
+            Income:Salary                 0.00 USD
+        """, dedent=True)
+        query = ("SELECT account, sum(1 / number) WHERE number != 0 "
+                 "GROUP BY account ORDER BY account")
+        expected = qx.execute_query(self.compile(query), entries, options_map)
+        with mock.patch.object(qcol, 'aggregate', wraps=qcol.aggregate) as aggregate:
+            actual = qx.execute_query(self.compile(query), entries, options_map,
+                                      qcol.PostingsTable(entries))
+            self.assertTrue(aggregate.called)
+        self.assertEqual(expected, actual)
+        self.assertEqual(4, len(actual[1]))
+
+    def test_date_range_table(self):
+        # The table is rebuilt from the entries within the date range of the
+        # WHERE clause.
+        with mock.patch.object(qcol, 'PostingsTable',
+                               wraps=qcol.PostingsTable) as postings_table:
+            self.check_equivalent(
+                "SELECT account, sum(number) WHERE date >= 2011-06-01 "
+                "GROUP BY account")
+            entries = postings_table.call_args[0][0]
+            self.assertEqual([datetime.date(2011, 6, 1)] + [datetime.date(2012, 2, 2)] * 2,
+                             [entry.date for entry in entries])
+
+    def test_unsupported_function(self):
+        self.check_equivalent(
+            "SELECT account, sum(cost(position)) GROUP BY account", False)
+
+    def test_unsupported_column(self):
+        self.check_equivalent(
+            "SELECT account, sum(number) WHERE cost_label = '' GROUP BY account", False)
+
+    def test_unsupported_balance(self):
+        qx.execute_query(
+            self.compile("SELECT last(balance)"), self.entries, self.options_map,
+            self.table)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -793,6 +793,192 @@ def compile_from(from_clause, environ):
     return c_from
 
 
+def get_conjuncts(c_expr):
+    """Split an expression into the list of its top-level conjuncts.
+
+    Args:
+      c_expr: A compiled expression tree (an EvalNode root node).
+    Returns:
+      A list of EvalNode instances, all of which must evaluate to true for
+      'c_expr' to be true.
+    """
+    if isinstance(c_expr, EvalAnd):
+        return get_conjuncts(c_expr.left) + get_conjuncts(c_expr.right)
+    return [c_expr]
+
+
+# The comparison nodes recognized by the date range planner, and the equivalent
+# comparison with its operands swapped.
+_SWAPPED_COMPARISONS = {
+    EvalEqual: EvalEqual,
+    EvalLess: EvalGreater,
+    EvalLessEq: EvalGreaterEq,
+    EvalGreater: EvalLess,
+    EvalGreaterEq: EvalLessEq,
+}
+
+# The column attributes recognized by the date range planner.
+_DATE_ATTRIBUTES = {'entry.date', 'entry.date.year', 'entry.date.month'}
+
+
+def _get_date_comparison(c_expr):
+    """Match a comparison between a date column of the entry and a constant.
+
+    Args:
+      c_expr: A compiled expression tree (an EvalNode root node).
+    Returns:
+      A triple of the column's attribute (from _DATE_ATTRIBUTES), the comparison
+      node type with the column on the left, and the constant value; or None if
+      the expression does not match.
+    """
+    node_type = type(c_expr)
+    if node_type not in _SWAPPED_COMPARISONS:
+        return None
+    column, constant = c_expr.left, c_expr.right
+    if isinstance(column, EvalConstant):
+        column, constant = constant, column
+        node_type = _SWAPPED_COMPARISONS[node_type]
+    if not isinstance(constant, EvalConstant):
+        return None
+    attribute = getattr(column, '__equivalent__', None)
+    if attribute not in _DATE_ATTRIBUTES:
+        return None
+    return attribute, node_type, constant.value
+
+
+def get_date_range(c_expr):
+    """Compute a range of dates outside of which an expression is always false.
+
+    This is a simple query planner: it recognizes comparisons of the 'date' and
+    'year' columns of the entry with constants, and equality of the 'month'
+    column along with the 'year', in the top-level conjuncts of the expression.
+    Entries being sorted by date, the range can be used to bisect the list of
+    entries instead of evaluating the expression on all of them.
+
+    Args:
+      c_expr: A compiled expression tree (an EvalNode root node), or None.
+    Returns:
+      A pair of (begin, end) dates, a half-open interval, where each of the
+      dates may be None if unbounded.
+    """
+    begin, end = None, None
+    if c_expr is None:
+        return begin, end
+
+    one_day = datetime.timedelta(days=1)
+    year, month = None, None
+    for c_conjunct in get_conjuncts(c_expr):
+        comparison = _get_date_comparison(c_conjunct)
+        if comparison is None:
+            continue
+        attribute, node_type, value = comparison
+        lower, upper = None, None
+
+        if attribute == 'entry.date':
+            if (not isinstance(value, datetime.date) or
+                    isinstance(value, datetime.datetime) or
+                    value == datetime.date.max):
+                continue
+            if node_type is EvalEqual:
+                lower, upper = value, value + one_day
+            elif node_type is EvalGreater:
+                lower = value + one_day
+            elif node_type is EvalGreaterEq:
+                lower = value
+            elif node_type is EvalLess:
+                upper = value
+            elif node_type is EvalLessEq:
+                upper = value + one_day
+
+        else:
+            if (not isinstance(value, int) or isinstance(value, bool) or
+                    not datetime.MINYEAR <= value < datetime.MAXYEAR):
+                continue
+            if attribute == 'entry.date.month':
+                if node_type is EvalEqual and 1 <= value <= 12:
+                    month = value
+                continue
+            if node_type is EvalEqual:
+                year = value
+                lower, upper = datetime.date(value, 1, 1), datetime.date(value + 1, 1, 1)
+            elif node_type is EvalGreater:
+                lower = datetime.date(value + 1, 1, 1)
+            elif node_type is EvalGreaterEq:
+                lower = datetime.date(value, 1, 1)
+            elif node_type is EvalLess:
+                upper = datetime.date(value, 1, 1)
+            elif node_type is EvalLessEq:
+                upper = datetime.date(value + 1, 1, 1)
+
+        if lower is not None and (begin is None or lower > begin):
+            begin = lower
+        if upper is not None and (end is None or upper < end):
+            end = upper
+
+    # Narrow down to a single month of a single year.
+    if year is not None and month is not None:
+        lower = datetime.date(year, month, 1)
+        upper = (datetime.date(year, month + 1, 1)
+                 if month < 12
+                 else datetime.date(year + 1, 1, 1))
+        if begin is None or lower > begin:
+            begin = lower
+        if end is None or upper < end:
+            end = upper
+
+    return begin, end
+
+
+# The column attributes whose equality with a constant can be looked up in an
+# EntryIndex, and the name of the lookup.
+_INDEX_EQUAL_ATTRIBUTES = {
+    'posting.account': 'account',
+    'entry.payee': 'payee',
+}
+
+# The column attributes whose containment of a constant can be looked up in an
+# EntryIndex, and the name of the lookup.
+_INDEX_CONTAINS_ATTRIBUTES = {
+    'entry.tags': 'tag',
+    'entry.links': 'link',
+}
+
+
+def get_index_constraints(c_expr):
+    """Find the conditions of a postings filter which can be looked up in an index.
+
+    This recognizes equality of the account or payee with a string, and the
+    presence of a tag or link, in the top-level conjuncts of the expression.
+
+    Args:
+      c_expr: A compiled expression tree (an EvalNode root node), or None.
+    Returns:
+      A list of (name, value) pairs, where name is one of 'account', 'payee',
+      'tag' or 'link', and value is a string. The expression is always false for
+      the postings of transactions not matching all of these.
+    """
+    constraints = []
+    if c_expr is None:
+        return constraints
+    for c_conjunct in get_conjuncts(c_expr):
+        if isinstance(c_conjunct, EvalEqual):
+            column, constant = c_conjunct.left, c_conjunct.right
+            if isinstance(column, EvalConstant):
+                column, constant = constant, column
+            name = _INDEX_EQUAL_ATTRIBUTES.get(getattr(column, '__equivalent__', None))
+        elif isinstance(c_conjunct, EvalContains):
+            constant, column = c_conjunct.left, c_conjunct.right
+            name = _INDEX_CONTAINS_ATTRIBUTES.get(getattr(column, '__equivalent__', None))
+        else:
+            continue
+        if (name is not None and
+                isinstance(constant, EvalConstant) and
+                isinstance(constant.value, str) and
+                constant.value):
+            constraints.append((name, constant.value))
+    return constraints
+
+
 # A compiled query, ready for execution.
 #
 # Attributes:
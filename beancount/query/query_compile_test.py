@@ -753,3 +753,52 @@ class TestCompilePrint(CompileSelectBase):
             qc.EvalFrom(qc.EvalEqual(qe.YearEntryColumn(), qc.EvalConstant(2014)),
                         None, None, None)
             ), "PRINT FROM year = 2014;")
+
+
+class TestDateRange(CompileSelectBase):
+
+    def get_range(self, where):
+        query = self.compile("SELECT account WHERE {};".format(where))
+        return qc.get_date_range(query.c_where)
+
+    def test_no_constraint(self):
+        self.assertEqual((None, None), qc.get_date_range(None))
+        self.assertEqual((None, None), self.get_range("account ~ 'Assets'"))
+        self.assertEqual((None, None), self.get_range("date > 2014-01-01 OR year = 2012"))
+        self.assertEqual((None, None), self.get_range("NOT date > 2014-01-01"))
+        self.assertEqual((None, None), self.get_range("month = 3"))
+        self.assertEqual((None, None), self.get_range("date > cost_date"))
+
+    def test_date(self):
+        date = datetime.date
+        self.assertEqual((date(2014, 1, 1), None), self.get_range("date >= 2014-01-01"))
+        self.assertEqual((date(2014, 1, 2), None), self.get_range("date > 2014-01-01"))
+        self.assertEqual((None, date(2014, 1, 1)), self.get_range("date < 2014-01-01"))
+        self.assertEqual((None, date(2014, 1, 2)), self.get_range("date <= 2014-01-01"))
+        self.assertEqual((date(2014, 1, 1), date(2014, 1, 2)),
+                         self.get_range("date = 2014-01-01"))
+        self.assertEqual((date(2014, 1, 2), None), self.get_range("2014-01-01 < date"))
+
+    def test_year_month(self):
+        date = datetime.date
+        self.assertEqual((date(2014, 1, 1), date(2015, 1, 1)),
+                         self.get_range("year = 2014"))
+        self.assertEqual((date(2015, 1, 1), None), self.get_range("year > 2014"))
+        self.assertEqual((None, date(2015, 1, 1)), self.get_range("year <= 2014"))
+        self.assertEqual((date(2014, 12, 1), date(2015, 1, 1)),
+                         self.get_range("year = 2014 AND month = 12"))
+        self.assertEqual((date(2014, 3, 1), date(2014, 4, 1)),
+                         self.get_range("month = 3 AND account ~ 'Assets' AND year = 2014"))
+
+    def test_conjuncts(self):
+        date = datetime.date
+        self.assertEqual((date(2014, 3, 1), date(2014, 6, 1)),
+                         self.get_range("date >= 2014-03-01 AND account ~ 'Assets' AND "
+                                        "date < 2014-06-01 AND year = 2014"))
+        begin, end = self.get_range("year = 2014 AND year = 2012")
+        self.assertGreaterEqual(begin, end)
+
+    def test_from(self):
+        query = self.compile("SELECT account FROM year >= 2014 AND flag = '*';")
+        self.assertEqual((datetime.date(2014, 1, 1), None),
+                         qc.get_date_range(query.c_from.c_expr))
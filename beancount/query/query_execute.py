@@ -6,22 +6,83 @@ __license__ = "GNU GPLv2"
 import copy
 import collections
 import datetime
+import heapq
 import itertools
 import operator
 
 from beancount.query import query_compile
 from beancount.query import query_env
+from beancount.query import query_columnar
 from beancount.core import number
 from beancount.core import data
 from beancount.core import position
 from beancount.core import inventory
 from beancount.core import getters
+from beancount.core import entry_index
 from beancount.core import display_context
 from beancount.parser import printer
 from beancount.parser import options
 from beancount.ops import summarize
 from beancount.core import prices
 from beancount.utils import misc_utils
+from beancount.utils import bisect_key
+
+
+def slice_date_range(entries, c_expr):
+    """Restrict a list of entries to those whose dates an expression may be true for.
+
+    The range of dates is computed by query_compile.get_date_range() and looked up
+    by bisection, so this takes logarithmic time.
+
+    Args:
+      entries: A list of directives, sorted by date.
+      c_expr: A compiled expression evaluated on the entries or their postings,
+        or None.
+    Returns:
+      A list of directives, a contiguous subset of 'entries'. All the entries
+      outside of it would not have matched 'c_expr'.
+    """
+    begin, end = query_compile.get_date_range(c_expr)
+    if begin is None and end is None:
+        return entries
+    get_date = lambda entry: entry.date
+    lo = (bisect_key.bisect_left_with_key(entries, begin, key=get_date)
+          if begin is not None
+          else 0)
+    hi = (bisect_key.bisect_left_with_key(entries, end, key=get_date)
+          if end is not None
+          else len(entries))
+    return entries[lo:hi] if lo < hi else []
+
+
+# Functions looking up the constraints from query_compile.get_index_constraints()
+# in an EntryIndex instance.
+_INDEX_LOOKUPS = {
+    'account': entry_index.EntryIndex.get_account_entries,
+    'payee': entry_index.EntryIndex.get_payee_entries,
+    'tag': entry_index.EntryIndex.get_tag_entries,
+    'link': entry_index.EntryIndex.get_link_entries,
+}
+
+def lookup_index(entries, c_where, index):
+    """Restrict a list of entries to the transactions a postings filter may match.
+
+    Args:
+      entries: A list of directives.
+      c_where: A compiled expression evaluated on the postings, or None.
+      index: An EntryIndex instance, or None.
+    Returns:
+      A list of directives, a subset of 'entries' in the same order. If the index
+      was not built from 'entries' or the filter has no constraints the index
+      can look up, 'entries' itself.
+    """
+    if index is None or not index.covers(entries):
+        return entries
+    constraints = query_compile.get_index_constraints(c_where)
+    if not constraints:
+        return entries
+    return min((_INDEX_LOOKUPS[name](index, value) for name, value in constraints),
+               key=len)
 
 
 def filter_entries(c_from, entries, options_map, context):
@@ -64,6 +125,12 @@ def filter_entries(c_from, entries, options_map, context):
     # Filter the entries with the FROM clause's expression.
     c_expr = c_from.c_expr
     if c_expr is not None:
+        # Only consider the entries within the range of dates the expression
+        # constrains. The summarization above may have inserted new entries,
+        # so only do this on the original sorted list.
+        if c_from.open is None and c_from.close is None and c_from.clear is None:
+            entries = slice_date_range(entries, c_expr)
+
         # A simple function receives a context; how come close_date() is
         # accepted in the context of a FROM clause? It shouldn't be.
         new_entries = []
@@ -76,7 +143,7 @@ def filter_entries(c_from, entries, options_map, context):
     return entries
 
 
-def execute_print(c_print, entries, options_map, file):
+def execute_print(c_print, entries, options_map, file, context=None):
     """Print entries from a print statement specification.
 
     Args:
@@ -84,9 +151,12 @@ def execute_print(c_print, entries, options_map, file):
       entries: A list of directives.
       options_map: A parser's option_map.
       file: The output file to print to.
+      context: An optional RowContext instance for 'entries', as created by
+        create_row_context(). If not provided, one is created.
     """
     if c_print and c_print.c_from is not None:
-        context = create_row_context(entries, options_map)
+        if context is None:
+            context = create_row_context(entries, options_map)
         entries = filter_entries(c_print.c_from, entries, options_map, context)
 
     # Create a context that renders all numbers with their natural
@@ -208,19 +278,60 @@ def create_row_context(entries, options_map):
     return context
 
 
-def execute_query(query, entries, options_map):
+def execute_query(query, entries, options_map, table=None, context=None, index=None):
     """Given a compiled select statement, execute the query.
 
+    This is a convenience wrapper around execute_query_iter() which returns all
+    the result rows in a list.
+
     Args:
       query: An instance of a query_compile.Query
       entries: A list of directives.
       options_map: A parser's option_map.
+      table: See execute_query_iter().
+      context: See execute_query_iter().
+      index: See execute_query_iter().
     Returns:
       A pair of:
         result_types: A list of (name, data-type) item pairs.
         result_rows: A list of ResultRow tuples of length and types described by
           'result_types'.
     """
+    result_types, result_rows = execute_query_iter(query, entries, options_map,
+                                                   table, context, index)
+    return result_types, list(result_rows)
+
+
+def execute_query_iter(query, entries, options_map, table=None, context=None,
+                       index=None):
+    """Given a compiled select statement, execute the query, producing rows lazily.
+
+    Non-aggregated queries without an ORDER BY clause produce their rows as the
+    postings are being evaluated, and stop evaluating when the LIMIT is reached.
+    Queries with both ORDER BY and LIMIT clauses only keep the top rows in a
+    bounded heap instead of sorting all of them.
+
+    Args:
+      query: An instance of a query_compile.Query
+      entries: A list of directives.
+      options_map: A parser's option_map.
+      table: An optional query_columnar.PostingsTable instance of the postings of
+        'entries'. If provided, aggregate queries are evaluated by the columnar
+        evaluator where it supports them. If the FROM clause, the index or the
+        date range of the WHERE clause restrict the entries, a table of the
+        postings of the remaining entries is built instead.
+      context: An optional RowContext instance for 'entries', as created by
+        create_row_context(). This allows callers running many queries on the
+        same entries to build it only once. If not provided, one is created.
+      index: An optional EntryIndex instance built from 'entries'. If provided,
+        it is used to only evaluate the transactions matching the account, payee,
+        tag and link equality constraints of the WHERE clause.
+    Returns:
+      A pair of:
+        result_types: A list of (name, data-type) item pairs.
+        result_rows: An iterator of ResultRow tuples of length and types described
+          by 'result_types'. Evaluation errors may be raised while iterating.
+    """
     # Figure out the result types that describe what we return.
     result_types = [(target.name, target.c_expr.dtype)
                     for target in query.c_targets
@@ -239,8 +350,8 @@ def execute_query(query, entries, options_map):
                      else query.group_indexes)
 
     # Indexes of the columns for result rows and order rows.
-    result_indexes = [index
-                      for index, c_target in enumerate(query.c_targets)
+    result_indexes = [target_index
+                      for target_index, c_target in enumerate(query.c_targets)
                       if c_target.name]
     order_indexes = query.order_indexes
 
@@ -250,7 +361,11 @@ def execute_query(query, entries, options_map):
                                [c_target.c_expr for c_target in query.c_targets],
                                [query.c_where] if query.c_where else []))
 
-    context = create_row_context(entries, options_map)
+    if context is None:
+        context = create_row_context(entries, options_map)
+    else:
+        # Reset the running balance left over from a previous query.
+        context.balance = inventory.Inventory()
 
     # Filter the entries using the FROM clause.
     filt_entries = (filter_entries(query.c_from, entries, options_map, context)
@@ -259,7 +374,18 @@ def execute_query(query, entries, options_map):
 
     # Dispatch between the non-aggregated queries and aggregated queries.
     c_where = query.c_where
-    schwartz_rows = []
+
+    # Only consider the transactions the WHERE clause may match, from the index.
+    c_from = query.c_from
+    if c_where is not None and c_from is None:
+        filt_entries = lookup_index(filt_entries, c_where, index)
+
+    # Only consider the entries within the range of dates the WHERE clause
+    # constrains.
+    if c_where is not None and (c_from is None or (c_from.open is None and
+                                                   c_from.close is None and
+                                                   c_from.clear is None)):
+        filt_entries = slice_date_range(filt_entries, c_where)
 
     # Precompute a list of expressions to be evaluated.
     c_target_exprs = [c_target.c_expr for c_target in query.c_targets]
@@ -268,23 +394,25 @@ def execute_query(query, entries, options_map):
         # This is a non-aggregated query.
 
         # Iterate over all the postings once and produce schwartzian rows.
-        for entry in misc_utils.filter_type(filt_entries, data.Transaction):
-            context.entry = entry
-            for posting in entry.postings:
-                context.posting = posting
-                if c_where is None or c_where(context):
-                    # Compute the balance.
-                    if uses_balance:
-                        context.balance.add_position(posting)
-
-                    # Evaluate all the values.
-                    values = [c_expr(context) for c_expr in c_target_exprs]
-
-                    # Compute result and sort-key objects.
-                    result = ResultRow._make(values[index]
-                                             for index in result_indexes)
-                    sortkey = row_sortkey(order_indexes, values, c_target_exprs)
-                    schwartz_rows.append((sortkey, result))
+        def iter_schwartz_rows():
+            for entry in misc_utils.filter_type(filt_entries, data.Transaction):
+                context.entry = entry
+                for posting in entry.postings:
+                    context.posting = posting
+                    if c_where is None or c_where(context):
+                        # Compute the balance.
+                        if uses_balance:
+                            context.balance.add_position(posting)
+
+                        # Evaluate all the values.
+                        values = [c_expr(context) for c_expr in c_target_exprs]
+
+                        # Compute result and sort-key objects.
+                        result = ResultRow._make(values[target_index]
+                                                 for target_index in result_indexes)
+                        sortkey = row_sortkey(order_indexes, values, c_target_exprs)
+                        yield (sortkey, result)
+        schwartz_rows = iter_schwartz_rows()
     else:
         # This is an aggregated query.
 
@@ -293,8 +421,8 @@ def execute_query(query, entries, options_map):
         # sub-expressions to evaluate, to avoid recursion during iteration.
         c_nonaggregate_exprs = []
         c_aggregate_exprs = []
-        for index, c_expr in enumerate(c_target_exprs):
-            if index in group_indexes:
+        for target_index, c_expr in enumerate(c_target_exprs):
+            if target_index in group_indexes:
                 c_nonaggregate_exprs.append(c_expr)
             else:
                 _, aggregate_exprs = query_compile.get_columns_and_aggregates(c_expr)
@@ -307,36 +435,50 @@ def execute_query(query, entries, options_map):
         for c_expr in c_aggregate_exprs:
             c_expr.allocate(allocator)
 
+        # Try the columnar evaluator first, if a table was provided.
+        agg_store = None
+        if table is not None and not uses_balance:
+            if filt_entries is not entries:
+                table = query_columnar.PostingsTable(filt_entries)
+            try:
+                agg_store = query_columnar.aggregate(c_where, c_nonaggregate_exprs,
+                                                     c_aggregate_exprs, allocator,
+                                                     table, context)
+            except query_columnar.Unsupported:
+                pass
+
         # Iterate over all the postings to evaluate the aggregates.
-        agg_store = {}
-        for entry in misc_utils.filter_type(filt_entries, data.Transaction):
-            context.entry = entry
-            for posting in entry.postings:
-                context.posting = posting
-                if c_where is None or c_where(context):
-                    # Compute the balance.
-                    if uses_balance:
-                        context.balance.add_position(posting)
-
-                    # Compute the non-aggregate expressions.
-                    row_key = tuple(c_expr(context)
-                                    for c_expr in c_nonaggregate_exprs)
-
-                    # Get an appropriate store for the unique key of this row.
-                    try:
-                        store = agg_store[row_key]
-                    except KeyError:
-                        # This is a row; create a new store.
-                        store = allocator.create_store()
+        if agg_store is None:
+            agg_store = {}
+            for entry in misc_utils.filter_type(filt_entries, data.Transaction):
+                context.entry = entry
+                for posting in entry.postings:
+                    context.posting = posting
+                    if c_where is None or c_where(context):
+                        # Compute the balance.
+                        if uses_balance:
+                            context.balance.add_position(posting)
+
+                        # Compute the non-aggregate expressions.
+                        row_key = tuple(c_expr(context)
+                                        for c_expr in c_nonaggregate_exprs)
+
+                        # Get an appropriate store for the unique key of this row.
+                        try:
+                            store = agg_store[row_key]
+                        except KeyError:
+                            # This is a row; create a new store.
+                            store = allocator.create_store()
+                            for c_expr in c_aggregate_exprs:
+                                c_expr.initialize(store)
+                            agg_store[row_key] = store
+
+                        # Update the aggregate expressions.
                         for c_expr in c_aggregate_exprs:
-                            c_expr.initialize(store)
-                        agg_store[row_key] = store
-
-                    # Update the aggregate expressions.
-                    for c_expr in c_aggregate_exprs:
-                        c_expr.update(store, context)
+                            c_expr.update(store, context)
 
         # Iterate over all the aggregations to produce the schwartzian rows.
+        schwartz_rows = []
         for key, store in agg_store.items():
             key_iter = iter(key)
             values = []
@@ -346,38 +488,44 @@ def execute_query(query, entries, options_map):
                 c_expr.finalize(store)
             context.store = store
 
-            for index, c_expr in enumerate(c_target_exprs):
-                if index in group_indexes:
+            for target_index, c_expr in enumerate(c_target_exprs):
+                if target_index in group_indexes:
                     value = next(key_iter)
                 else:
                     value = c_expr(context)
                 values.append(value)
 
             # Compute result and sort-key objects.
-            result = ResultRow._make(values[index]
-                                     for index in result_indexes)
+            result = ResultRow._make(values[target_index]
+                                     for target_index in result_indexes)
             sortkey = row_sortkey(order_indexes, values, c_target_exprs)
             schwartz_rows.append((sortkey, result))
 
     # Order results if requested.
     if order_indexes is not None:
-        schwartz_rows.sort(key=operator.itemgetter(0),
-                           reverse=(query.ordering == 'DESC'))
+        sortkey = operator.itemgetter(0)
+        reverse = (query.ordering == 'DESC')
+        if query.limit is not None and not query.distinct:
+            # Only keep the top rows. Note that these are stable, like sorting.
+            select_top = heapq.nlargest if reverse else heapq.nsmallest
+            schwartz_rows = select_top(query.limit, schwartz_rows, key=sortkey)
+        else:
+            schwartz_rows = sorted(schwartz_rows, key=sortkey, reverse=reverse)
 
     # Extract final results, in sorted order at this point.
-    result_rows = [x[1] for x in schwartz_rows]
+    result_rows = (x[1] for x in schwartz_rows)
 
     # Apply distinct.
     if query.distinct:
-        result_rows = list(misc_utils.uniquify(result_rows))
+        result_rows = misc_utils.uniquify(result_rows)
 
     # Apply limit.
     if query.limit is not None:
-        result_rows = result_rows[:query.limit]
+        result_rows = itertools.islice(result_rows, query.limit)
 
     # Flatten inventories if requested.
     if query.flatten:
-        result_types, result_rows = flatten_results(result_types, result_rows)
+        result_types, result_rows = iter_flatten_results(result_types, result_rows)
 
     return (result_types, result_rows)
 
@@ -399,28 +547,45 @@ def flatten_results(result_types, result_rows):
           'result_types'. All inventories from the input should have been converted
           to Position types.
     """
+    output_types, output_rows = iter_flatten_results(result_types, result_rows)
+    return output_types, list(output_rows)
+
+
+def iter_flatten_results(result_types, result_rows):
+    """Convert inventories in result types to have a row for each, lazily.
+
+    This is the same as flatten_results(), but produces the output rows as the
+    input rows are consumed.
+
+    Args:
+        result_types: A list of (name, data-type) item pairs.
+        result_rows: An iterable of ResultRow tuples of length and types described
+          by 'result_types'.
+    Returns:
+        result_types: A list of (name, data-type) item pairs. There should be no
+          Inventory types anymore.
+        result_rows: An iterator of ResultRow tuples of length and types described
+          by 'result_types'.
+    """
     indexes = set(index
                   for index, (name, result_type) in enumerate(result_types)
                   if result_type is inventory.Inventory)
     if not indexes:
-        return (result_types, result_rows)
-
-    # pylint: disable=invalid-name
-    ResultRow = type(result_rows[0])
-
-    # We have to make at least some conversions.
-    num_columns = len(result_types)
-    output_rows = []
-    for result_row in result_rows:
-        max_rows = max(len(result_row[icol]) for icol in indexes)
-        for irow in range(max_rows):
-            output_row = []
-            for icol in range(num_columns):
-                value = result_row[icol]
-                if icol in indexes:
-                    value = value[irow] if irow < len(value) else None
-                output_row.append(value)
-            output_rows.append(ResultRow._make(output_row))
+        return (result_types, iter(result_rows))
+
+    def iter_output_rows():
+        # We have to make at least some conversions.
+        num_columns = len(result_types)
+        for result_row in result_rows:
+            max_rows = max(len(result_row[icol]) for icol in indexes)
+            for irow in range(max_rows):
+                output_row = []
+                for icol in range(num_columns):
+                    value = result_row[icol]
+                    if icol in indexes:
+                        value = value[irow] if irow < len(value) else None
+                    output_row.append(value)
+                yield type(result_row)._make(output_row)
 
     # Convert the types.
     output_types = [(name, (position.Position
@@ -428,4 +593,4 @@ def flatten_results(result_types, result_rows):
                             else result_type))
                     for name, result_type in result_types]
 
-    return output_types, output_rows
+    return output_types, iter_output_rows()
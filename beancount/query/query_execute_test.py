@@ -6,10 +6,13 @@ import decimal
 import io
 import unittest
 import textwrap
+from unittest import mock
 
 from beancount.core.number import D
 from beancount.core.number import Decimal
 from beancount.core import inventory
+from beancount.core import data
+from beancount.core import entry_index
 from beancount.query import query_parser
 from beancount.query import query_compile as qc
 from beancount.query import query_env as qe
@@ -261,6 +264,93 @@ class TestFilterEntries(CommonInputBase, QueryBase):
         """), filtered_entries)
 
 
+class TestSliceDateRange(CommonInputBase, QueryBase):
+
+    def test_slice_date_range(self):
+        for where in ["year = 2012",
+                      "year >= 2013 AND account ~ 'Checking'",
+                      "date < 2011-06-01",
+                      "date > 2014-04-04",
+                      "year = 2013 AND month = 10",
+                      "year = 2010 AND date > 2010-01-01",
+                      "account ~ 'Restaurant'"]:
+            c_where = self.compile("SELECT account WHERE {};".format(where)).c_where
+            entries = qx.slice_date_range(self.entries, c_where)
+            self.assertEqual(
+                [entry for entry in self.entries
+                 if isinstance(entry, data.Transaction) and
+                 any(c_where(self.context_for(entry, posting))
+                     for posting in entry.postings)],
+                [entry for entry in entries
+                 if isinstance(entry, data.Transaction) and
+                 any(c_where(self.context_for(entry, posting))
+                     for posting in entry.postings)])
+            if 'date' in where or 'year' in where:
+                self.assertLess(len(entries), len(self.entries))
+
+    def context_for(self, entry, posting):
+        self.context.entry = entry
+        self.context.posting = posting
+        return self.context
+
+    def test_execute_query(self):
+        with mock.patch.object(qx, 'slice_date_range',
+                               wraps=qx.slice_date_range) as slice_date_range:
+            self.check_query(self.INPUT, """
+              SELECT date, account, number WHERE year >= 2013 AND number > 0;
+            """, [('date', datetime.date), ('account', str), ('number', Decimal)], [
+                (datetime.date(2013, 3, 3), 'Assets:Bank:Checking', D('103.00')),
+                (datetime.date(2014, 4, 4), 'Assets:Bank:Checking', D('104.00')),
+            ])
+            self.assertEqual(1, slice_date_range.call_count)
+
+    def test_filter_entries(self):
+        query = self.compile("SELECT account FROM year = 2011;")
+        entries = qx.filter_entries(query.c_from, self.entries, self.options_map,
+                                    self.context)
+        self.assertEqual([datetime.date(2011, 1, 1)],
+                         [entry.date for entry in entries])
+
+
+class TestLookupIndex(CommonInputBase, QueryBase):
+
+    def test_index_constraints(self):
+        for where, expected in [
+                ("account ~ 'Checking'", []),
+                ("account = 'Assets:Bank:Checking' AND year > 2012",
+                 [('account', 'Assets:Bank:Checking')]),
+                ("'Expenses:Restaurant' = account OR payee = 'X'", []),
+                ("payee = 'X' AND 'trip' IN tags AND 'l' IN links",
+                 [('payee', 'X'), ('tag', 'trip'), ('link', 'l')]),
+                ("payee = ''", [])]:
+            c_where = self.compile("SELECT account WHERE {};".format(where)).c_where
+            self.assertEqual(expected, qc.get_index_constraints(c_where))
+
+    def test_execute_query(self):
+        index = entry_index.EntryIndex(self.entries)
+        for where in ["account = 'Expenses:Restaurant'",
+                      "account = 'Assets:ForeignBank:Checking' AND number < 0",
+                      "account = 'Assets:Other'",
+                      "narration = 'International Transfer'"]:
+            query = self.compile(
+                "SELECT date, account, last(balance) WHERE {} GROUP BY 1, 2;".format(
+                    where))
+            expected = qx.execute_query(query, self.entries, self.options_map)
+            with mock.patch.object(qx, 'lookup_index',
+                                   wraps=qx.lookup_index) as lookup_index:
+                actual = qx.execute_query(query, self.entries, self.options_map,
+                                          index=index)
+                self.assertEqual(1, lookup_index.call_count)
+            self.assertEqual(expected, actual)
+
+        entries = qx.lookup_index(self.entries, self.compile(
+            "SELECT account WHERE account = 'Assets:ForeignBank:Checking';").c_where, index)
+        self.assertEqual(1, len(entries))
+        self.assertIs(self.entries, qx.lookup_index(self.entries, None, index))
+        self.assertIs(self.entries, qx.lookup_index(self.entries, self.compile(
+            "SELECT account WHERE account = 'Assets:Bank:Checking';").c_where, None))
+
+
 class TestExecutePrint(CommonInputBase, QueryBase):
 
     def test_print_with_filter(self):
@@ -843,6 +933,33 @@ class TestExecuteOptions(QueryBase):
                 ('Assets:AssetD', D('2.00')),
                 ])
 
+    def test_limit_stops_early(self):
+        entries, _, options_map = loader.load_string(self.INPUT)
+        query = self.compile("SELECT account, number LIMIT 2;")
+        with mock.patch.object(qe.AccountColumn, '__call__',
+                               side_effect=lambda _, context: context.posting.account,
+                               autospec=True) as account:
+            result_types, result_rows = qx.execute_query_iter(
+                query, entries, options_map)
+            self.assertEqual([('account', str), ('number', Decimal)], result_types)
+            self.assertEqual([('Assets:AssetA', D('5.00')),
+                              ('Assets:AssetD', D('2.00'))], list(result_rows))
+            self.assertEqual(2, account.call_count)
+
+    def test_order_by_limit_ties(self):
+        # The top rows selected with a limit are the same as when sorting all of
+        # them, including the order of rows with equal sort keys.
+        entries, _, options_map = loader.load_string(self.INPUT)
+        for ordering in 'ASC', 'DESC':
+            for limit in range(8):
+                query = self.compile(
+                    "SELECT account, number, number > 2 as big "
+                    "ORDER BY big {} LIMIT {};".format(ordering, limit))
+                _, result_rows = qx.execute_query(query, entries, options_map)
+                _, all_rows = qx.execute_query(query._replace(limit=None),
+                                               entries, options_map)
+                self.assertEqual(all_rows[:limit], result_rows)
+
 
 class TestArithmeticFunctions(QueryBase):
 
@@ -6,6 +6,7 @@ __license__ = "GNU GPLv2"
 import collections
 import csv
 import datetime
+import itertools
 import math
 from itertools import zip_longest
 
@@ -491,6 +492,21 @@ def render_rows(result_types, result_rows, dcontext,
     # Create column renderers.
     renderers = get_renderers(result_types, result_rows, dcontext)
 
+    return format_rows(result_rows, renderers, expand, spaced), renderers
+
+
+def format_rows(result_rows, renderers, expand=False, spaced=False):
+    """Render rows to strings using prepared renderers.
+
+    Args:
+      result_rows: A list of ResultRow instances.
+      renderers: A list of ColumnRenderer instances, prepared with the values of
+        'result_rows'.
+      expand: A boolean, if true, expand columns that render to lists on multiple rows.
+      spaced: If true, leave an empty line between each of the rows.
+    Returns:
+      A list of rendered rows, each a list of strings, one per column.
+    """
     # Precompute a spacing row.
     if spaced:
         spacing_row = [''] * len(renderers)
@@ -543,7 +559,7 @@ def render_rows(result_types, result_rows, dcontext,
         if spaced:
             str_rows.append(spacing_row)
 
-    return str_rows, renderers
+    return str_rows
 
 
 def render_text(result_types, result_rows, dcontext, file,
@@ -564,6 +580,94 @@ def render_text(result_types, result_rows, dcontext, file,
     str_rows, renderers = render_rows(result_types, result_rows, dcontext,
                                       expand=expand, spaced=spaced)
 
+    line_formatter, top_line, header_line, middle_line, bottom_line = (
+        get_text_formats(result_types, renderers, boxed))
+
+    # Render each string row to a single line.
+    if top_line:
+        file.write(top_line)
+    file.write(header_line)
+    file.write(middle_line)
+    for str_row in str_rows:
+        line = line_formatter.format(*str_row)
+        file.write(line)
+    if bottom_line:
+        file.write(bottom_line)
+
+
+# The number of rows rendered together by render_text_stream().
+STREAM_BATCH_SIZE = 1000
+
+
+def render_text_stream(result_types, result_rows, dcontext, file,
+                       expand=False, boxed=False, spaced=False,
+                       batch_size=STREAM_BATCH_SIZE):
+    """Render the result of executing a query in text format, as rows arrive.
+
+    Rows are consumed and written out in batches, so output starts before all
+    the rows have been produced. The widths of the columns are computed from the
+    rows seen so far, so unlike render_text(), the columns of later batches may
+    be wider than the header.
+
+    Args:
+      result_types: A list of items describing the names and data types of the items in
+        each column.
+      result_rows: An iterable of ResultRow instances.
+      dcontext: A DisplayContext object prepared for rendering numbers.
+      file: A file object to render the results to.
+      expand: A boolean, if true, expand columns that render to lists on multiple rows.
+      boxed: A boolean, true if we should render the results in a fancy-looking ASCII box.
+      spaced: If true, leave an empty line between each of the rows. This is useful if the
+        results have a lot of rows that render over multiple lines.
+      batch_size: The number of rows to render together.
+    """
+    renderers = [RENDERERS[dtype](dcontext)
+                 for _, dtype in result_types]
+    result_rows = iter(result_rows)
+    first = True
+    while True:
+        batch = list(itertools.islice(result_rows, batch_size))
+        if not batch and not first:
+            break
+
+        # Update the renderers with the new rows.
+        for row in batch:
+            for value, renderer in zip(row, renderers):
+                renderer.update(value)
+        for renderer in renderers:
+            renderer.prepare()
+        str_rows = format_rows(batch, renderers, expand, spaced)
+
+        line_formatter, top_line, header_line, middle_line, bottom_line = (
+            get_text_formats(result_types, renderers, boxed))
+        if first:
+            if top_line:
+                file.write(top_line)
+            file.write(header_line)
+            file.write(middle_line)
+            first = False
+        for str_row in str_rows:
+            file.write(line_formatter.format(*str_row))
+        file.flush()
+        if len(batch) < batch_size:
+            break
+
+    if bottom_line:
+        file.write(bottom_line)
+
+
+def get_text_formats(result_types, renderers, boxed):
+    """Compute the format strings and lines of the text rendering of results.
+
+    Args:
+      result_types: A list of items describing the names and data types of the items in
+        each column.
+      renderers: A list of prepared ColumnRenderer instances.
+      boxed: A boolean, true if we should render the results in a fancy-looking ASCII box.
+    Returns:
+      A tuple of a format string for each line, and strings for the top, header,
+      middle and bottom lines. The top and bottom lines may be None.
+    """
     # Compute a final format strings.
     formats = ['{{:{}}}'.format(max(renderer.width(), 1))
                for renderer in renderers]
@@ -590,16 +694,7 @@ def render_text(result_types, result_rows, dcontext, file,
         header_formatter = ' '.join(header_formats) + '\n'
         header_line = header_formatter.format(*[name for name, _ in result_types])
 
-    # Render each string row to a single line.
-    if top_line:
-        file.write(top_line)
-    file.write(header_line)
-    file.write(middle_line)
-    for str_row in str_rows:
-        line = line_formatter.format(*str_row)
-        file.write(line)
-    if bottom_line:
-        file.write(bottom_line)
+    return line_formatter, top_line, header_line, middle_line, bottom_line
 
 
 def render_csv(result_types, result_rows, dcontext, file, expand=False):
@@ -244,6 +244,40 @@ class TestQueryRender(unittest.TestCase):
         # with box():
         #     print(oss.getvalue())
 
+    def test_render_text_stream(self):
+        types = [('account', str), ('number', Decimal)]
+        Row = collections.namedtuple('TestRow', [name for name, type in types])
+        rows = [
+            Row('Assets:US:Babble:Vacation', D('123.1')),
+            Row('Expenses:Vacation', D('234.12')),
+            Row('Income:US:Babble:Vacation', D('345.123')),
+        ]
+        for boxed in False, True:
+            # A single batch renders like render_text().
+            expected = io.StringIO()
+            query_render.render_text(types, rows, self.dcontext, expected, boxed=boxed)
+            oss = io.StringIO()
+            query_render.render_text_stream(types, iter(rows), self.dcontext, oss,
+                                            boxed=boxed)
+            self.assertEqual(expected.getvalue(), oss.getvalue())
+
+            # Many batches render all the rows.
+            oss = io.StringIO()
+            query_render.render_text_stream(types, iter(rows), self.dcontext, oss,
+                                            boxed=boxed, batch_size=2)
+            self.assertEqual([line.split() for line in expected.getvalue().splitlines()
+                              if 'Vacation' in line],
+                             [line.split() for line in oss.getvalue().splitlines()
+                              if 'Vacation' in line])
+
+    def test_render_text_stream_empty(self):
+        types = [('account', str)]
+        expected = io.StringIO()
+        query_render.render_text(types, [], self.dcontext, expected)
+        oss = io.StringIO()
+        query_render.render_text_stream(types, iter([]), self.dcontext, oss)
+        self.assertEqual(expected.getvalue(), oss.getvalue())
+
     def test_render_Decimal(self):
         types = [('number', Decimal)]
         Row = collections.namedtuple('TestRow', [name for name, type in types])
@@ -7,12 +7,14 @@ import atexit
 import cmd
 import codecs
 import io
+import itertools
 import logging
 import os
 import re
 import sys
 import shlex
 import textwrap
+import time
 import traceback
 from os import path
 
@@ -25,10 +27,12 @@ from beancount.query import query_parser
 from beancount.query import query_compile
 from beancount.query import query_env
 from beancount.query import query_execute
+from beancount.query import query_columnar
 from beancount.query import query_render
 from beancount.query import numberify
 from beancount.parser import printer
 from beancount.core import data
+from beancount.core import entry_index
 from beancount.utils import misc_utils
 from beancount.utils import pager
 from beancount.utils import version
@@ -126,6 +130,8 @@ class DispatchingShell(cmd.Cmd):
             'spaced': convert_bool,
             'expand': convert_bool,
             'numberify': convert_bool,
+            'columnar': convert_bool,
+            'stream': convert_bool,
             }
         self.vars = {
             'pager': os.environ.get('PAGER', None),
@@ -134,6 +140,8 @@ class DispatchingShell(cmd.Cmd):
             'spaced': False,
             'expand': False,
             'numberify': do_numberify,
+            'columnar': False,
+            'stream': False,
             }
 
     def add_help(self):
@@ -302,6 +310,10 @@ class BQLShell(DispatchingShell):
         self.entries = None
         self.errors = None
         self.options_map = None
+        self.postings_table = None
+        self.row_context = None
+        self.row_context_time = None
+        self.entry_index = None
 
         self.env_targets = query_env.TargetsEnvironment()
         self.env_entries = query_env.FilterEntriesEnvironment()
@@ -312,9 +324,44 @@ class BQLShell(DispatchingShell):
         Reload the input file without restarting the shell.
         """
         self.entries, self.errors, self.options_map = self.loadfun()
+        self.postings_table = None
+        self.row_context = None
+        self.entry_index = None
         if self.is_interactive:
             print_statistics(self.entries, self.options_map, self.outfile)
 
+    def get_row_context(self):
+        """Get the row context of the loaded entries, creating it once per load.
+
+        Creating the context builds indexes over all the entries (open/close
+        dates, commodities and prices), which would otherwise be done again on
+        every query.
+
+        Returns:
+          A RowContext instance.
+        """
+        if self.row_context is None:
+            time1 = time.time()
+            self.row_context = query_execute.create_row_context(self.entries,
+                                                                self.options_map)
+            self.row_context_time = time.time() - time1
+            logging.info("Row context created in %.0f ms",
+                         self.row_context_time * 1000)
+        else:
+            logging.info("Row context reused, saved %.0f ms",
+                         self.row_context_time * 1000)
+        return self.row_context
+
+    def get_entry_index(self):
+        """Get the index of the loaded entries, creating it once per load.
+
+        Returns:
+          An EntryIndex instance.
+        """
+        if self.entry_index is None:
+            self.entry_index = entry_index.EntryIndex(self.entries)
+        return self.entry_index
+
     def on_Errors(self, errors_statement):
         """
         Print the errors that occurred during parsing.
@@ -351,12 +398,14 @@ class BQLShell(DispatchingShell):
             print('ERROR: {}.'.format(str(exc).rstrip('.')), file=self.outfile)
             return
 
+        context = self.get_row_context() if c_print.c_from is not None else None
         if self.outfile is sys.stdout:
             query_execute.execute_print(c_print, self.entries, self.options_map,
-                                        file=self.outfile)
+                                        file=self.outfile, context=context)
         else:
             with self.get_pager() as file:
-                query_execute.execute_print(c_print, self.entries, self.options_map, file)
+                query_execute.execute_print(c_print, self.entries, self.options_map,
+                                            file, context)
 
     def on_Select(self, statement):
         """
@@ -412,31 +461,48 @@ class BQLShell(DispatchingShell):
             print('ERROR: {}.'.format(str(exc).rstrip('.')), file=self.outfile)
             return
 
+        # Flatten the postings for the columnar evaluator, once per load.
+        table = None
+        if self.vars['columnar']:
+            if self.postings_table is None:
+                self.postings_table = query_columnar.PostingsTable(self.entries)
+            table = self.postings_table
+
         # Execute it to obtain the result rows.
-        rtypes, rrows = query_execute.execute_query(c_query,
-                                                    self.entries,
-                                                    self.options_map)
+        rtypes, rrows = query_execute.execute_query_iter(c_query,
+                                                         self.entries,
+                                                         self.options_map,
+                                                         table,
+                                                         self.get_row_context(),
+                                                         self.get_entry_index())
+        output_format = self.vars['format']
+        stream = self.vars['stream'] and output_format == 'text'
+        if stream:
+            # Peek at the first row to find out if there are any.
+            first_row = next(rrows, None)
+            rrows = (itertools.chain([first_row], rrows)
+                     if first_row is not None
+                     else [])
+        else:
+            rrows = list(rrows)
 
         # Output the resulting rows.
         if not rrows:
             print("(empty)", file=self.outfile)
         else:
-            output_format = self.vars['format']
             if output_format == 'text':
                 kwds = dict(boxed=self.vars['boxed'],
                             spaced=self.vars['spaced'],
                             expand=self.vars['expand'])
+                render = (query_render.render_text_stream
+                          if stream
+                          else query_render.render_text)
                 if self.outfile is sys.stdout:
                     with self.get_pager() as file:
-                        query_render.render_text(rtypes, rrows,
-                                                 self.options_map['dcontext'],
-                                                 file,
-                                                 **kwds)
+                        render(rtypes, rrows, self.options_map['dcontext'], file, **kwds)
                 else:
-                    query_render.render_text(rtypes, rrows,
-                                             self.options_map['dcontext'],
-                                             self.outfile,
-                                             **kwds)
+                    render(rtypes, rrows, self.options_map['dcontext'], self.outfile,
+                           **kwds)
 
             elif output_format == 'csv':
                 # Numberify CSV output if requested.
@@ -786,6 +852,9 @@ def main():
     parser.add_argument('-q', '--no-errors', action='store_true',
                         help='Do not report errors')
 
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='Print timings.')
+
     parser.add_argument('filename', metavar='FILENAME.beancount',
                         help='The Beancount input filename to load')
 
@@ -794,6 +863,10 @@ def main():
 
     args = parser.parse_args()
 
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO,
+                            format='%(levelname)-8s: %(message)s')
+
     # Parse the input file.
     def load():
         errors_file = None if args.no_errors else sys.stderr
@@ -4,10 +4,12 @@ __license__ = "GNU GPLv2"
 import re
 import sys
 import unittest
+from unittest import mock
 from os import path
 
 from beancount.utils import test_utils
 from beancount.query import shell
+from beancount.query import query_execute
 from beancount import loader
 
 
@@ -201,6 +203,31 @@ class TestRun(unittest.TestCase):
         self.assertRegex(output, 'Expenses:Home:Rent')
 
 
+class TestRowContext(unittest.TestCase):
+
+    def test_reuse_and_reload(self):
+        def loadfun():
+            return entries, errors, options_map
+        with test_utils.capture('stdout') as stdout:
+            shell_obj = shell.BQLShell(False, loadfun, sys.stdout)
+            shell_obj.on_Reload()
+            with mock.patch.object(query_execute, 'create_row_context',
+                                   wraps=query_execute.create_row_context) as create:
+                shell_obj.onecmd("SELECT account, sum(position) GROUP BY account;")
+                shell_obj.onecmd("SELECT last(balance) WHERE account ~ 'Checking';")
+                shell_obj.onecmd("PRINT FROM narration ~ 'alone';")
+                self.assertEqual(1, create.call_count)
+
+                shell_obj.on_Reload()
+                shell_obj.onecmd("SELECT last(balance) WHERE account ~ 'Checking';")
+                self.assertEqual(2, create.call_count)
+
+        # The running balance must not carry over between queries.
+        outputs = re.findall(r'\n *(-?[0-9.,]+ USD)', stdout.getvalue())
+        self.assertEqual(2, len(outputs))
+        self.assertEqual(outputs[0], outputs[1])
+
+
 class TestShell(test_utils.TestCase):
 
     @test_utils.docfile
@@ -1,6 +1,9 @@
 __copyright__ = "Copyright (C) 2014, 2016  Martin Blais"
 __license__ = "GNU GPLv2"
 
+import json
+from os import path
+
 from beancount.utils import test_utils
 from beancount.scripts import check
 
@@ -39,3 +42,25 @@ class TestScriptCheck(test_utils.TestCase):
         self.assertEqual(1, result)
         self.assertRegex(stderr.getvalue(), "Balance failed")
         self.assertRegex(stderr.getvalue(), "Assets:Cash")
+
+    @test_utils.docfile
+    def test_profile(self, filename):
+        """
+        2013-01-01 open Expenses:Restaurant
+        2013-01-01 open Assets:Cash
+
+        2014-03-02 * "Something"
+          Expenses:Restaurant   50.02 USD
+          Assets:Cash
+        """
+        with test_utils.tempdir() as tmpdir:
+            profile_filename = path.join(tmpdir, 'profile.json')
+            with test_utils.capture('stdout', 'stderr'):
+                result = test_utils.run_with_args(
+                    check.main, ['--profile', profile_filename, filename])
+            self.assertEqual(0, result)
+            with open(profile_filename) as infile:
+                profile = json.load(infile)
+        self.assertEqual({'phase', 'file', 'plugin', 'validation'},
+                         {stage['kind'] for stage in profile['stages']})
+        self.assertTrue(profile['totals'])
@@ -1,9 +1,15 @@
 """Convert a Beancount ledger into an SQL database.
+
+The database is written in a single transaction, with the rows of each table
+inserted in bulk, and indexed on the dates, accounts and currencies once filled
+in. With the --incremental option, an existing database is updated with the
+entries from its last date onwards, instead of being rebuilt.
 """
 __copyright__ = "Copyright (C) 2014-2017  Martin Blais"
 __license__ = "GNU GPLv2"
 
 import sqlite3 as dbapi
+import datetime
 import logging
 import sys
 import os
@@ -17,99 +23,158 @@ from beancount.utils import misc_utils
 from beancount.utils import version
 
 
-def output_common(connection, unused_entries):
+# Settings for building the database fast.
+PRAGMAS = [
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -65536',
+]
+
+# Settings for building a new database fast, which give up on its durability. A
+# new database can be rebuilt from the ledger if it gets corrupted by a crash;
+# an updated one is left with SQLite's default settings, so that a crash during
+# an --incremental update does not corrupt its existing contents.
+NEW_DATABASE_PRAGMAS = [
+    'PRAGMA synchronous = OFF',
+    'PRAGMA journal_mode = MEMORY',
+]
+
+
+def create_index(connection, table, column):
+    """Create an index on a column of a table, if it does not exist already.
+
+    Args:
+      connection: A DBAPI-2.0 Connection object.
+      table: A string, the name of the table.
+      column: A string, the name of the column to index.
+    """
+    connection.execute("""
+      CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column});
+    """.format(table=table, column=column))
+
+
+def output_common(connection, unused_entries, unused_first_id=0):
     """Create a table of common data for all entries.
 
     Args:
       connection: A DBAPI-2.0 Connection object.
       entries: A list of directives.
+      first_id: An integer, the id of the first entry.
     """
-    with connection:
-        connection.execute("""
-          CREATE TABLE entry (
-            id 			INTEGER PRIMARY KEY,
-            date 		DATE,
-            type                CHARACTER(8),
-            source_filename	STRING,
-            source_lineno	INTEGER
-          );
-        """)
+    connection.execute("""
+      CREATE TABLE IF NOT EXISTS entry (
+        id 			INTEGER PRIMARY KEY,
+        date 		DATE,
+        type                CHARACTER(8),
+        source_filename	STRING,
+        source_lineno	INTEGER
+      );
+    """)
 
 
-def output_transactions(connection, entries):
-    """Create a table for transactions and fill in the data.
+def index_common(connection):
+    """Create the indexes of the table of common data.
 
     Args:
       connection: A DBAPI-2.0 Connection object.
-      entries: A list of directives.
     """
-    with connection:
-        connection.execute("""
-          CREATE TABLE transactions_detail (
-            id 			INTEGER PRIMARY KEY,
-            flag 		CHARACTER(1),
-            payee 		VARCHAR,
-            narration 		VARCHAR,
-            tags                VARCHAR, -- Comma-separated
-            links               VARCHAR  -- Comma-separated
-          );
-        """)
+    create_index(connection, 'entry', 'date')
+    create_index(connection, 'entry', 'type')
 
-        connection.execute("""
-          CREATE VIEW transactions AS
-            SELECT * FROM entry JOIN transactions_detail USING (id);
-        """)
 
-        connection.execute("""
-          CREATE TABLE postings (
-            posting_id		INTEGER PRIMARY KEY,
-            id 			INTEGER,
-            flag                CHARACTER(1),
-            account             VARCHAR,
-            number              DECIMAL(16, 6),
-            currency            CHARACTER(10),
-            cost_number         DECIMAL(16, 6),
-            cost_currency       CHARACTER(10),
-            cost_date           DATE,
-            cost_label          VARCHAR,
-            price_number        DECIMAL(16, 6),
-            price_currency      CHARACTER(10),
-            FOREIGN KEY(id) REFERENCES entries(id)
-          );
-        """)
+def output_transactions(connection, entries, first_id=0):
+    """Create a table for transactions and fill in the data.
 
-    postings_count = iter(itertools.count())
-    with connection:
-        for eid, entry in enumerate(entries):
-            if not isinstance(entry, data.Transaction):
-                continue
-            connection.execute("""
-              insert into entry values (?, ?, ?, ?, ?);
-            """, (eid, entry.date, 'txn', entry.meta["filename"], entry.meta["lineno"]))
-
-            connection.execute("""
-              insert into transactions_detail values (?, ?, ?, ?, ?, ?);
-            """, (eid, entry.flag, entry.payee, entry.narration,
-                  ','.join(entry.tags or ()), ','.join(entry.links or ())))
-
-            for posting in entry.postings:
-                pid = next(postings_count)
-                units = posting.units
-                cost = posting.cost
-                price = posting.price
-                connection.execute("""
-                  INSERT INTO postings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-                """, (pid, eid,
-                      posting.flag,
-                      posting.account,
-                      units.number,
-                      units.currency,
-                      cost.number if cost else None,
-                      cost.currency if cost else None,
-                      cost.date if cost else None,
-                      cost.label if cost else None,
-                      price.number if price else None,
-                      price.currency if price else None))
+    Args:
+      connection: A DBAPI-2.0 Connection object.
+      entries: A list of directives.
+      first_id: An integer, the id of the first entry.
+    """
+    connection.execute("""
+      CREATE TABLE IF NOT EXISTS transactions_detail (
+        id 			INTEGER PRIMARY KEY,
+        flag 		CHARACTER(1),
+        payee 		VARCHAR,
+        narration 		VARCHAR,
+        tags                VARCHAR, -- Comma-separated
+        links               VARCHAR  -- Comma-separated
+      );
+    """)
+
+    connection.execute("""
+      CREATE VIEW IF NOT EXISTS transactions AS
+        SELECT * FROM entry JOIN transactions_detail USING (id);
+    """)
+
+    connection.execute("""
+      CREATE TABLE IF NOT EXISTS postings (
+        posting_id		INTEGER PRIMARY KEY,
+        id 			INTEGER,
+        flag                CHARACTER(1),
+        account             VARCHAR,
+        number              DECIMAL(16, 6),
+        currency            CHARACTER(10),
+        cost_number         DECIMAL(16, 6),
+        cost_currency       CHARACTER(10),
+        cost_date           DATE,
+        cost_label          VARCHAR,
+        price_number        DECIMAL(16, 6),
+        price_currency      CHARACTER(10),
+        FOREIGN KEY(id) REFERENCES entries(id)
+      );
+    """)
+
+    # Continue the numbering of the postings already in the database.
+    (first_posting_id,), = connection.execute("""
+      SELECT COALESCE(MAX(posting_id) + 1, 0) FROM postings;
+    """)
+    postings_count = iter(itertools.count(first_posting_id))
+
+    entry_rows = []
+    detail_rows = []
+    posting_rows = []
+    for eid, entry in enumerate(entries, first_id):
+        if not isinstance(entry, data.Transaction):
+            continue
+        entry_rows.append((eid, entry.date, 'txn',
+                           entry.meta["filename"], entry.meta["lineno"]))
+        detail_rows.append((eid, entry.flag, entry.payee, entry.narration,
+                            ','.join(entry.tags or ()), ','.join(entry.links or ())))
+        for posting in entry.postings:
+            pid = next(postings_count)
+            units = posting.units
+            cost = posting.cost
+            price = posting.price
+            posting_rows.append((pid, eid,
+                                 posting.flag,
+                                 posting.account,
+                                 units.number,
+                                 units.currency,
+                                 cost.number if cost else None,
+                                 cost.currency if cost else None,
+                                 cost.date if cost else None,
+                                 cost.label if cost else None,
+                                 price.number if price else None,
+                                 price.currency if price else None))
+
+    connection.executemany("""
+      INSERT INTO entry VALUES (?, ?, ?, ?, ?);
+    """, entry_rows)
+    connection.executemany("""
+      INSERT INTO transactions_detail VALUES (?, ?, ?, ?, ?, ?);
+    """, detail_rows)
+    connection.executemany("""
+      INSERT INTO postings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+    """, posting_rows)
+
+
+def index_transactions(connection):
+    """Create the indexes of the tables for transactions.
+
+    Args:
+      connection: A DBAPI-2.0 Connection object.
+    """
+    for column in 'id', 'account', 'currency', 'cost_currency':
+        create_index(connection, 'postings', column)
 
 
 class DirectiveWriter:
@@ -123,50 +188,62 @@ class DirectiveWriter:
     # A string, the columns to create as a single multiline declaration.
     columns = None
 
+    # A tuple of the names of the columns to index.
+    indexes = ()
+
     def __init__(self):
         self.name = self.type.__name__.lower()
 
-    def __call__(self, connection, entries):
+    def __call__(self, connection, entries, first_id=0):
         """Create a table for a directives.
 
         Args:
           connection: A DBAPI-2.0 Connection object.
           entries: A list of directives.
+          first_id: An integer, the id of the first entry.
         """
-        with connection:
-            columns_text = ','.join(self.columns.strip().splitlines())
-            connection.execute("""
-              CREATE TABLE {name}_detail (
-                id 			INTEGER PRIMARY KEY,
-                {columns}
-              );
-            """.format(name=self.name,
-                       columns=columns_text))
-
-            connection.execute("""
-              CREATE VIEW {name} AS
-                SELECT * FROM entry JOIN {name}_detail USING (id);
-            """.format(name=self.name))
-
-        with connection:
-            for eid, entry in enumerate(entries):
-                if not isinstance(entry, self.type):
-                    continue
-
-                # Store common data.
-                connection.execute("""
-                  INSERT INTO entry VALUES (?, ?, ?, ?, ?);
-                """, (eid, entry.date, self.name,
-                      entry.meta["filename"], entry.meta["lineno"]))
-
-                # Store detail data.
-                detail_data = self.get_detail(entry)
-                row_data = (eid,) + detail_data
-                query = """
-                  INSERT INTO {name}_detail VALUES ({placeholder});
-                """.format(name=self.name,
-                           placeholder=','.join(['?'] * (1 + len(detail_data))))
-                connection.execute(query, row_data)
+        columns_text = ','.join(self.columns.strip().splitlines())
+        connection.execute("""
+          CREATE TABLE IF NOT EXISTS {name}_detail (
+            id 			INTEGER PRIMARY KEY,
+            {columns}
+          );
+        """.format(name=self.name,
+                   columns=columns_text))
+
+        connection.execute("""
+          CREATE VIEW IF NOT EXISTS {name} AS
+            SELECT * FROM entry JOIN {name}_detail USING (id);
+        """.format(name=self.name))
+
+        entry_rows = []
+        detail_rows = []
+        for eid, entry in enumerate(entries, first_id):
+            if not isinstance(entry, self.type):
+                continue
+            # Store common data.
+            entry_rows.append((eid, entry.date, self.name,
+                               entry.meta["filename"], entry.meta["lineno"]))
+            # Store detail data.
+            detail_rows.append((eid,) + self.get_detail(entry))
+
+        connection.executemany("""
+          INSERT INTO entry VALUES (?, ?, ?, ?, ?);
+        """, entry_rows)
+        query = """
+          INSERT INTO {name}_detail VALUES ({placeholder});
+        """.format(name=self.name,
+                   placeholder=','.join(['?'] * (1 + len(self.columns.strip().splitlines()))))
+        connection.executemany(query, detail_rows)
+
+    def index(self, connection):
+        """Create the indexes of the table of details.
+
+        Args:
+          connection: A DBAPI-2.0 Connection object.
+        """
+        for column in self.indexes:
+            create_index(connection, '{}_detail'.format(self.name), column)
 
     def get_detail(self, entry):
         """Provide data to store for details table.
@@ -188,6 +265,8 @@ class OpenWriter(DirectiveWriter):
       currencies          VARCHAR
     """
 
+    indexes = ('account',)
+
     def get_detail(self, entry):
         return (entry.account,
                 ','.join(entry.currencies or []))
@@ -200,6 +279,8 @@ class CloseWriter(DirectiveWriter):
       account             VARCHAR
     """
 
+    indexes = ('account',)
+
     def get_detail(self, entry):
         return (entry.account,)
 
@@ -212,6 +293,8 @@ class PadWriter(DirectiveWriter):
       source_account      VARCHAR
     """
 
+    indexes = ('account',)
+
     def get_detail(self, entry):
         return (entry.account, entry.source_account)
 
@@ -227,6 +310,8 @@ class BalanceWriter(DirectiveWriter):
       diff_currency       CHARACTER(10)
     """
 
+    indexes = ('account', 'amount_currency')
+
     def get_detail(self, entry):
         return (entry.account,
                 entry.amount.number,
@@ -243,6 +328,8 @@ class NoteWriter(DirectiveWriter):
       comment             VARCHAR
     """
 
+    indexes = ('account',)
+
     def get_detail(self, entry):
         return (entry.account,
                 entry.comment)
@@ -283,6 +370,8 @@ class PriceWriter(DirectiveWriter):
       amount_currency     CHARACTER(10)
     """
 
+    indexes = ('currency', 'amount_currency')
+
     def get_detail(self, entry):
         return (entry.currency,
                 entry.amount.number,
@@ -297,6 +386,8 @@ class DocumentWriter(DirectiveWriter):
       filenam             VARCHAR
     """
 
+    indexes = ('account',)
+
     def get_detail(self, entry):
         return (entry.account,
                 entry.filename)
@@ -332,12 +423,50 @@ def setup_decimal_support():
     dbapi.register_converter("decimal", convert_decimal)
 
 
+def get_last_date(connection):
+    """Get the date of the last entry in an existing database.
+
+    Args:
+      connection: A DBAPI-2.0 Connection object.
+    Returns:
+      A datetime.date instance, or None if the database has no entries.
+    """
+    try:
+        (date_last,), = connection.execute("SELECT MAX(date) FROM entry;")
+    except dbapi.OperationalError:
+        return None  # The tables have not been created.
+    if date_last is None:
+        return None
+    return datetime.datetime.strptime(date_last, '%Y-%m-%d').date()
+
+
+def delete_entries(connection, date, detail_tables):
+    """Delete the entries of an existing database from a date onwards.
+
+    Args:
+      connection: A DBAPI-2.0 Connection object.
+      date: A datetime.date instance, the first date to delete.
+      detail_tables: A list of strings, the names of the tables of details.
+    """
+    for table in detail_tables:
+        connection.execute("""
+          DELETE FROM {table} WHERE id IN (SELECT id FROM entry WHERE date >= ?);
+        """.format(table=table), (date,))
+    connection.execute("""
+      DELETE FROM entry WHERE date >= ?;
+    """, (date,))
+
+
 def main():
     parser = version.ArgumentParser(description=__doc__)
     parser.add_argument('filename',
                         help='Beancount input filename')
     parser.add_argument('database',
                         help='Filename of database file to create')
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        help=("Update an existing database with the entries from its "
+                              "last date onwards, instead of rebuilding it. Changes to "
+                              "the entries before that date are not reflected."))
     args = parser.parse_args()
     logging.basicConfig(level=logging.INFO, format='%(levelname)-8s: %(message)s')
 
@@ -346,26 +475,53 @@ def main():
                                                     log_errors=sys.stderr)
 
     # Delete previous database if it already exists.
-    if path.exists(args.database):
+    if not args.incremental and path.exists(args.database):
         os.remove(args.database)
 
     # The only supported DBAPI-2.0 backend for now is SQLite3.
+    new_database = not path.exists(args.database)
     connection = dbapi.connect(args.database)
+    for pragma in PRAGMAS + (NEW_DATABASE_PRAGMAS if new_database else []):
+        connection.execute(pragma)
 
     setup_decimal_support()
-    for function in [
-            output_common,
-            output_transactions,
-            OpenWriter(),
-            CloseWriter(),
-            PadWriter(),
-            BalanceWriter(),
-            NoteWriter(),
-            PriceWriter(),
-            DocumentWriter(),
-    ]:
-        step_name = getattr(function, '__name__', function.__class__.__name__)
-        with misc_utils.log_time(step_name, logging.info):
-            function(connection, entries)
-
+    writers = [
+        OpenWriter(),
+        CloseWriter(),
+        PadWriter(),
+        BalanceWriter(),
+        NoteWriter(),
+        PriceWriter(),
+        DocumentWriter(),
+    ]
+    with connection:
+        connection.execute('BEGIN')
+
+        # Replace the entries of the last date of the database, which may have
+        # been added to since, and append the new ones after the existing ids.
+        first_id = 0
+        date_last = get_last_date(connection) if args.incremental else None
+        if date_last is not None:
+            delete_entries(connection, date_last,
+                           ['transactions_detail', 'postings'] +
+                           ['{}_detail'.format(writer.name) for writer in writers])
+            (first_id,), = connection.execute("""
+              SELECT COALESCE(MAX(id) + 1, 0) FROM entry;
+            """)
+            entries = [entry for entry in entries if entry.date >= date_last]
+            logging.info("Appending %d entries from %s.", len(entries), date_last)
+
+        for function in [output_common, output_transactions] + writers:
+            step_name = getattr(function, '__name__', function.__class__.__name__)
+            with misc_utils.log_time(step_name, logging.info):
+                function(connection, entries, first_id)
+
+        # Create the indexes once the tables are filled in.
+        with misc_utils.log_time('index', logging.info):
+            index_common(connection)
+            index_transactions(connection)
+            for writer in writers:
+                writer.index(connection)
+
+    connection.close()
     return 0
@@ -1,8 +1,11 @@
 __copyright__ = "Copyright (C) 2014-2017  Martin Blais"
 __license__ = "GNU GPLv2"
 
+import sqlite3
 import tempfile
+import textwrap
 from os import path
+from unittest import mock
 
 from beancount.utils import test_utils
 from beancount.scripts import sql
@@ -65,3 +68,77 @@ class TestScriptSQL(test_utils.TestCase):
         root_dir = test_utils.find_repository_root(__file__)
         filename = path.join(root_dir, 'examples/example.beancount')
         self.convert_to_sql(filename)
+
+    def test_indexes(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.beancount') as infile:
+            infile.write(ONE_OF_EACH_TYPE)
+            infile.flush()
+            dbfile = self.convert_to_sql(infile.name)
+        connection = sqlite3.connect(dbfile.name)
+        indexes = {name for name, in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index';")}
+        connection.close()
+        self.assertLessEqual({'entry_date', 'postings_account', 'postings_currency',
+                              'open_detail_account', 'price_detail_currency'},
+                             indexes)
+
+    def test_incremental(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.beancount') as infile:
+            infile.write(ONE_OF_EACH_TYPE)
+            infile.flush()
+            dbfile = self.convert_to_sql(infile.name)
+
+            # Add an entry on the last date and one after it.
+            infile.write(textwrap.dedent("""
+              2014-01-01 * "Late dinner"
+                Expenses:Restaurant     30 CAD
+                Assets:Cash
+
+              2014-02-01 * "Movie"
+                Expenses:Movie     12 CAD
+                Assets:Cash
+            """))
+            infile.flush()
+            with test_utils.capture('stdout', 'stderr'):
+                result = test_utils.run_with_args(
+                    sql.main, ['--incremental', infile.name, dbfile.name])
+            self.assertEqual(0, result)
+
+            expected = self.convert_to_sql(infile.name)
+
+        def dump(filename):
+            connection = sqlite3.connect(filename)
+            rows = {
+                'entry': connection.execute(
+                    "SELECT date, type, source_lineno FROM entry "
+                    "ORDER BY date, source_lineno;").fetchall(),
+                'postings': connection.execute(
+                    "SELECT date, account, number FROM postings "
+                    "JOIN entry USING (id) ORDER BY posting_id;").fetchall(),
+                'close': connection.execute(
+                    "SELECT date, account FROM close;").fetchall(),
+            }
+            connection.close()
+            return rows
+
+        self.assertEqual(dump(expected.name), dump(dbfile.name))
+
+    def test_incremental_pragmas(self):
+        original_connect = sqlite3.connect
+        def connect(filename):
+            connection = original_connect(filename)
+            connection.set_trace_callback(statements.append)
+            return connection
+
+        with tempfile.NamedTemporaryFile('w', suffix='.beancount') as infile:
+            infile.write(ONE_OF_EACH_TYPE)
+            infile.flush()
+            dbfile = self.convert_to_sql(infile.name)
+            for args, expected in [([], True), (['--incremental'], False)]:
+                statements = []
+                with mock.patch.object(sql.dbapi, 'connect', connect), \
+                     test_utils.capture('stdout', 'stderr'):
+                    test_utils.run_with_args(sql.main,
+                                             args + [infile.name, dbfile.name])
+                self.assertEqual(expected, 'PRAGMA synchronous = OFF' in statements)
+                self.assertIn('PRAGMA cache_size = -65536', statements)
@@ -146,6 +146,11 @@ class ConditionalPager:
             #     self.file = self.pipe = None
             #     raise
 
+    def flush(self):
+        """Flush the output to the pager, if it has been created."""
+        if self.file is not None:
+            self.file.flush()
+
     def __exit__(self, type, value, unused_traceback):
         """Context manager exit. This flushes the output to our output file.
 
@@ -49,21 +49,22 @@ class View:
         # Title.
         self.title = title
 
-        # Realization of the filtered entries to display. These are computed in
-        # _initialize().
-        self.real_accounts = None
-        self.opening_real_accounts = None
-        self.closing_real_accounts = None
+        # Realization of the filtered entries to display. These are computed
+        # lazily on first access, as many pages only need one of them; see the
+        # properties below.
+        self._real_accounts = None
+        self._opening_real_accounts = None
+        self._closing_real_accounts = None
 
         # Monthly navigation style.
         self.monthly = MonthNavigation.NONE
 
-        # Realize now, we don't need to do this lazily because we create these
+        # Filter now, we don't need to do this lazily because we create these
         # view objects on-demand and cache them.
         self._initialize(options_map)
 
     def _initialize(self, options_map):
-        """Compute the list of filtered entries and realization trees."""
+        """Compute the list of filtered entries."""
 
         # Get the filtered list of entries.
         self.entries, self.begin_index, self.price_date = self.apply_filter(
@@ -80,22 +81,51 @@ class View:
         # the current period's net income, closing the period.
         self.closing_entries = summarize.cap_opt(self.entries, options_map)
 
-        # Realize the three sets of entries.
-        account_types = options.get_account_types(options_map)
-        with misc_utils.log_time('realize_opening', logging.info):
-            self.opening_real_accounts = realization.realize(self.opening_entries,
-                                                             account_types)
+        self.account_types = options.get_account_types(options_map)
 
-        with misc_utils.log_time('realize', logging.info):
-            self.real_accounts = realization.realize(self.entries,
-                                                     account_types)
+    @property
+    def opening_real_accounts(self):
+        """The realization of the opening balances entries."""
+        if self._opening_real_accounts is None:
+            with misc_utils.log_time('realize_opening', logging.info):
+                self._opening_real_accounts = realization.realize(self.opening_entries,
+                                                                  self.account_types)
+        return self._opening_real_accounts
 
-        with misc_utils.log_time('realize_closing', logging.info):
-            self.closing_real_accounts = realization.realize(self.closing_entries,
-                                                             account_types)
+    @property
+    def real_accounts(self):
+        """The realization of the filtered entries.
 
-        assert self.real_accounts is not None
-        assert self.closing_real_accounts is not None
+        This extends the opening balances realization with the entries of the
+        period, if there are opening balances.
+        """
+        if self._real_accounts is None:
+            if self.opening_entries:
+                opening_real_accounts = self.opening_real_accounts
+                with misc_utils.log_time('realize', logging.info):
+                    self._real_accounts = realization.extend(
+                        opening_real_accounts, self.entries[self.begin_index:])
+            else:
+                with misc_utils.log_time('realize', logging.info):
+                    self._real_accounts = realization.realize(self.entries,
+                                                              self.account_types)
+        return self._real_accounts
+
+    @property
+    def closing_real_accounts(self):
+        """The realization of the closing entries.
+
+        The closing entries are the filtered entries followed by the transfer and
+        conversion entries inserted by summarize.cap(), so this extends the
+        realization of the filtered entries with those.
+        """
+        if self._closing_real_accounts is None:
+            real_accounts = self.real_accounts
+            assert len(self.closing_entries) >= len(self.entries)
+            with misc_utils.log_time('realize_closing', logging.info):
+                self._closing_real_accounts = realization.extend(
+                    real_accounts, self.closing_entries[len(self.entries):])
+        return self._closing_real_accounts
 
     def apply_filter(self, entries):
         """Filter the list of entries.
@@ -212,7 +242,7 @@ class MonthView(View):
 class TagView(View):
     """A view that includes only entries some specific tags."""
 
-    def __init__(self, entries, options_map, title, tags):
+    def __init__(self, entries, options_map, title, tags, index=None):
         """Create a view with only entries tagged with the given tags.
 
         Note: this is the only view where the entries are summarized and
@@ -224,13 +254,17 @@ class TagView(View):
           title: A string, the title of this view.
           tags: A set of strings, the tags to include. Entries with at least
             one of these tags will be included in the output.
+          index: An optional EntryIndex instance built from 'entries'.
         """
         assert isinstance(tags, (set, frozenset, list, tuple))
         self.tags = tags
+        self.index = index
         View.__init__(self, entries, options_map, title)
 
     def apply_filter(self, entries, options_map):
         tags = self.tags
+        if self.index is not None and self.index.covers(entries):
+            return self.index.get_tag_entries(*tags), None, None
         tagged_entries = [
             entry
             for entry in entries
@@ -242,7 +276,7 @@ class TagView(View):
 class PayeeView(View):
     """A view that includes entries with some specific payee."""
 
-    def __init__(self, entries, options_map, title, payee):
+    def __init__(self, entries, options_map, title, payee, index=None):
         """Create a view clamped to one year.
 
         Note: this is the only view where the entries are summarized and
@@ -253,13 +287,17 @@ class PayeeView(View):
           options_map: A dict of options, as produced by the parser.
           title: A string, the title of this view.
           payee: A string, the payee whose transactions to include.
+          index: An optional EntryIndex instance built from 'entries'.
         """
         assert isinstance(payee, str)
         self.payee = payee
+        self.index = index
         View.__init__(self, entries, options_map, title)
 
     def apply_filter(self, entries, options_map):
         payee = self.payee
+        if self.index is not None and self.index.covers(entries):
+            return self.index.get_payee_entries(payee), None, None
         payee_entries = [entry
                          for entry in entries
                          if isinstance(entry, data.Transaction) and (entry.payee == payee)]
@@ -271,7 +309,7 @@ class ComponentView(View):
     """A view that includes transactions with at least one posting with an account
     that includes a given component."""
 
-    def __init__(self, entries, options_map, title, component):
+    def __init__(self, entries, options_map, title, component, index=None):
         """Create a view clamped to one year.
 
         Note: this is the only view where the entries are summarized and
@@ -282,13 +320,17 @@ class ComponentView(View):
           options_map: A dict of options, as produced by the parser.
           title: A string, the title of this view.
           compnent: A string, the name of an account component to include.
+          index: An optional EntryIndex instance built from 'entries'.
         """
         assert isinstance(component, str)
         self.component = component
+        self.index = index
         View.__init__(self, entries, options_map, title)
 
     def apply_filter(self, entries, options_map):
         component = self.component
+        if self.index is not None and self.index.covers(entries):
+            return self.index.get_component_entries(component), None, None
         component_entries = [entry
                              for entry in entries
                              if data.has_entry_account_component(entry, component)]
@@ -2,10 +2,12 @@ __copyright__ = "Copyright (C) 2014-2017  Martin Blais"
 __license__ = "GNU GPLv2"
 
 import unittest
+from unittest import mock
 
 from beancount import loader
 from beancount.parser import options
 from beancount.core import realization
+from beancount.core import entry_index
 from beancount.web import views
 
 
@@ -160,3 +162,34 @@ class TestViews(unittest.TestCase):
         self.assertNotEqual(self.empty_realization, view.real_accounts)
         self.assertEqual(self.empty_realization, view.opening_real_accounts)
         self.assertNotEqual(self.empty_realization, view.closing_real_accounts)
+
+    def test_index(self):
+        index = entry_index.EntryIndex(self.entries)
+        for view_class, args in [(views.TagView, ({'trip1'},)),
+                                 (views.TagView, ({'trip-non-existent'},)),
+                                 (views.PayeeView, ('Hardware Store',)),
+                                 (views.ComponentView, ('Savings',)),
+                                 (views.ComponentView, ('Assets',))]:
+            view = view_class(self.entries, self.options_map, 'Title', *args)
+            indexed_view = view_class(self.entries, self.options_map, 'Title', *args,
+                                      index=index)
+            self.assertEqual(view.entries, indexed_view.entries)
+
+    def test_realizations(self):
+        with mock.patch.object(realization, 'realize', wraps=realization.realize) as realize:
+            view = views.YearView(self.entries, self.options_map, 'Year', 2013)
+            self.assertFalse(realize.called)
+            view.closing_real_accounts
+            self.assertEqual(1, realize.call_count)
+            view.closing_real_accounts
+            view.real_accounts
+            view.opening_real_accounts
+            self.assertEqual(1, realize.call_count)
+
+        account_types = options.get_account_types(self.options_map)
+        self.assertEqual(realization.realize(view.opening_entries, account_types),
+                         view.opening_real_accounts)
+        self.assertEqual(realization.realize(view.entries, account_types),
+                         view.real_accounts)
+        self.assertEqual(realization.realize(view.closing_entries, account_types),
+                         view.closing_real_accounts)
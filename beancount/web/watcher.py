@@ -0,0 +1,167 @@
+"""Loading of the ledger served by the web interface, and reloading it in the background.
+
+A Ledger is a snapshot of everything the web server derives from the
+input file. The LedgerWatcher polls the input files from a background thread
+and, when they change, loads a new snapshot while requests keep being served
+from the previous one; the new snapshot replaces the old one in a single
+assignment once it is complete.
+"""
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import collections
+import logging
+import sys
+import threading
+
+from beancount.core import entry_index
+from beancount.core import getters
+from beancount.core import prices
+from beancount.parser import options
+from beancount.parser import printer
+from beancount import loader
+
+
+# A snapshot of a loaded ledger.
+#
+# Attributes:
+#   source: A string, the contents of the top-level input file.
+#   entries: A list of directives, as output from the loader.
+#   errors: A list of errors, as output from the loader.
+#   options: An options dict, as output from the loader.
+#   account_types: An instance of AccountTypes, from the options.
+#   price_map: A price map, as built by prices.build_price_map().
+#   active_years: A list of integers, the years with active accounts.
+#   entry_index: An instance of EntryIndex over 'entries'.
+#   views: A dict of view id to the View instances created from this ledger.
+Ledger = collections.namedtuple('Ledger', (
+    'source entries errors options account_types price_map active_years '
+    'entry_index views'))
+
+
+def load_ledger(filename):
+    """Load an input file and pre-compute the data the web server needs.
+
+    Args:
+      filename: A string, the name of the top-level input file.
+    Returns:
+      An instance of Ledger, with no views.
+    """
+    # Save the source for later, to render.
+    with open(filename, encoding='utf8') as f:
+        source = f.read()
+
+    # Parse the beancount file.
+    entries, errors, options_map = loader.load_file(filename)
+
+    # Print out the list of errors.
+    if errors:
+        print(',----------------------------------------------------------------')
+        printer.print_errors(errors, file=sys.stdout)
+        print('`----------------------------------------------------------------')
+
+    return Ledger(source,
+                  entries,
+                  errors,
+                  options_map,
+                  options.get_account_types(options_map),
+                  prices.build_price_map(entries),
+                  list(getters.get_active_years(entries)),
+                  entry_index.EntryIndex(entries),
+                  {})
+
+
+class LedgerWatcher:
+    """Keep a loaded ledger up-to-date with its input files.
+
+    The first ledger is loaded on the first call to get_ledger(). After that, a
+    background thread checks the input files every 'interval' seconds and loads
+    a new ledger when they have changed. get_ledger() returns the previous
+    ledger until the new one is complete. If the interval is zero, no thread is
+    run and get_ledger() reloads the changed files itself, blocking until done.
+    """
+
+    def __init__(self, filename, interval=1.0, prewarm=None):
+        """Create a watcher.
+
+        Args:
+          filename: A string, the name of the top-level input file.
+          interval: A float, the number of seconds between checks of the input
+            files, or zero to check them on every call to get_ledger().
+          prewarm: An optional function called with a newly loaded Ledger,
+            before it is returned by get_ledger(), e.g., to populate its views.
+        """
+        self.filename = filename
+        self.interval = interval
+        self.prewarm = prewarm
+        self.ledger = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Start the background thread, if enabled."""
+        if self.interval > 0 and self.thread is None:
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self.run, name='LedgerWatcher')
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self):
+        """Stop the background thread and wait for it to finish."""
+        if self.thread is not None:
+            self.stopped.set()
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        """Check the input files periodically until stopped."""
+        while not self.stopped.wait(self.interval):
+            ledger = self.ledger
+            if ledger is None or not loader.needs_refresh(ledger.options):
+                continue
+            try:
+                self.reload()
+            except Exception:  # pylint: disable=broad-except
+                logging.exception('Error reloading "%s"; keeping the previous ledger.',
+                                  self.filename)
+
+    def reload(self):
+        """Load the input file and replace the current ledger.
+
+        Returns:
+          The new instance of Ledger.
+        """
+        with self.lock:
+            return self._load()
+
+    def _load(self):
+        """Load the input file and replace the current ledger, with the lock held.
+
+        Returns:
+          The new instance of Ledger.
+        """
+        logging.info('Reloading...')
+        ledger = load_ledger(self.filename)
+        if self.prewarm is not None:
+            self.prewarm(ledger)
+        self.ledger = ledger
+        return ledger
+
+    def get_ledger(self):
+        """Get the most recent complete ledger.
+
+        This only blocks if no ledger has been loaded yet, or if there is no
+        background thread and the input files have changed.
+
+        Returns:
+          An instance of Ledger.
+        """
+        ledger = self.ledger
+        if ledger is None or (self.thread is None and
+                              loader.needs_refresh(ledger.options)):
+            with self.lock:
+                ledger = self.ledger
+                if ledger is None or loader.needs_refresh(ledger.options):
+                    ledger = self._load()
+        return ledger
@@ -0,0 +1,110 @@
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import os
+import tempfile
+import textwrap
+import threading
+import time
+import unittest
+from os import path
+from unittest import mock
+
+from beancount.web import watcher
+
+
+class TestLedgerWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = path.join(self.tmpdir.name, 'input.beancount')
+        self.write(1)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, num_transactions):
+        with open(self.filename, 'w') as outfile:
+            outfile.write(textwrap.dedent("""
+              option "plugin_processing_mode" "raw"
+              2010-01-01 open Assets:Cash
+              2010-01-01 open Income:Job
+            """))
+            for index in range(num_transactions):
+                outfile.write(textwrap.dedent("""
+                  2010-02-{:02d} *
+                    Assets:Cash    1 USD
+                    Income:Job
+                """.format(index + 1)))
+        # Make sure the modification is visible to the input hash.
+        mtime = time.time() + num_transactions
+        os.utime(self.filename, (mtime, mtime))
+
+    def test_load_ledger(self):
+        ledger = watcher.load_ledger(self.filename)
+        self.assertEqual(3, len(ledger.entries))
+        self.assertEqual([], ledger.errors)
+        self.assertEqual([2010], ledger.active_years)
+        self.assertTrue(ledger.entry_index.covers(ledger.entries))
+        self.assertIn('Assets:Cash', ledger.source)
+        self.assertEqual({}, ledger.views)
+
+    def test_synchronous(self):
+        ledger_watcher = watcher.LedgerWatcher(self.filename, 0)
+        ledger_watcher.start()
+        self.assertIsNone(ledger_watcher.thread)
+        ledger = ledger_watcher.get_ledger()
+        self.assertEqual(3, len(ledger.entries))
+        self.assertIs(ledger, ledger_watcher.get_ledger())
+
+        self.write(2)
+        new_ledger = ledger_watcher.get_ledger()
+        self.assertIsNot(ledger, new_ledger)
+        self.assertEqual(4, len(new_ledger.entries))
+
+    def test_background(self):
+        loaded = threading.Event()
+        def prewarm(ledger):
+            ledger.views['prewarmed'] = len(ledger.entries)
+            loaded.set()
+
+        ledger_watcher = watcher.LedgerWatcher(self.filename, 0.01, prewarm)
+        ledger_watcher.start()
+        try:
+            ledger = ledger_watcher.get_ledger()
+            self.assertEqual({'prewarmed': 3}, ledger.views)
+            loaded.clear()
+
+            # Hold the lock to simulate a long load; the previous ledger keeps
+            # being served until the new one is complete.
+            with ledger_watcher.lock:
+                self.write(2)
+                time.sleep(0.05)
+                self.assertIs(ledger, ledger_watcher.get_ledger())
+
+            self.assertTrue(loaded.wait(10))
+            new_ledger = ledger_watcher.get_ledger()
+            self.assertEqual(4, len(new_ledger.entries))
+            self.assertEqual({'prewarmed': 4}, new_ledger.views)
+        finally:
+            ledger_watcher.stop()
+        self.assertIsNone(ledger_watcher.thread)
+
+    def test_background_error(self):
+        ledger_watcher = watcher.LedgerWatcher(self.filename, 0.01)
+        ledger_watcher.start()
+        try:
+            ledger = ledger_watcher.get_ledger()
+            with mock.patch.object(watcher, 'load_ledger',
+                                   side_effect=ValueError) as load_ledger:
+                with self.assertLogs(level='ERROR'):
+                    self.write(2)
+                    while not load_ledger.called:
+                        time.sleep(0.01)
+            self.assertIs(ledger, ledger_watcher.ledger)
+        finally:
+            ledger_watcher.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
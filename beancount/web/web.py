@@ -8,7 +8,6 @@ from os import path
 import io
 import logging
 import re
-import sys
 import time
 import threading
 import datetime
@@ -25,15 +24,13 @@ from beancount.core import account_types
 from beancount.core import compare
 from beancount.core import convert
 from beancount.ops import basicops
-from beancount.core import prices
 from beancount.utils import misc_utils
 from beancount.utils import text_utils
 from beancount.utils import version
 from beancount.web import bottle_utils
-from beancount.parser import options
 from beancount.parser import printer
-from beancount import loader
 from beancount.web import views
+from beancount.web import watcher
 from beancount.web import scrape
 from beancount.reports import html_formatter
 from beancount.reports import balance_reports
@@ -367,7 +364,7 @@ def source():
 def link(link=None):
     "Serve journals for links."
 
-    linked_entries = basicops.filter_link(link, app.entries)
+    linked_entries = basicops.filter_link(link, app.entries, app.entry_index)
 
     oss = io.StringIO()
     formatter = HTMLFormatter(app.options['dcontext'],
@@ -875,9 +872,15 @@ def stats_postings():
 # Views.
 
 
-# A cache for views that have been created (on access).
+# A cache for views that have been created (on access). This is the 'views'
+# dict of the current ledger.
 app.views = {}
 
+# A list of (view id, factory, args, kwargs) tuples, for the most recently used
+# views, the most recent last. These views are created again from each newly
+# loaded ledger, before it is installed.
+app.recent_views = []
+
 
 def handle_view(path_depth):
     """A decorator for handlers which create views lazily.
@@ -894,12 +897,21 @@ def handle_view(path_depth):
         def wrapper(*args, **kwargs):
             components = request.path.split('/')
             viewid = '/'.join(components[:path_depth+1])
+            ledger = app.ledger
             try:
                 # Try fetching the view from the cache.
-                view = app.views[viewid]
+                view = ledger.views[viewid]
             except KeyError:
                 # We need to create the view.
-                view = app.views[viewid] = callback(*args, **kwargs)
+                view = ledger.views[viewid] = callback(ledger, *args, **kwargs)
+
+            # Record the view as the most recently used. The contents of the
+            # list are replaced at once, as it is read from the reloading thread.
+            recent_views = [recent for recent in app.recent_views
+                            if recent[0] != viewid]
+            recent_views.append((viewid, callback, args, kwargs))
+            app.recent_views[:] = recent_views[
+                max(0, len(recent_views) - app.args.prewarm_views):]
 
             # Save the view for the subrequest and redirect. populate_view()
             # picks this up and saves it in request.view.
@@ -961,105 +973,121 @@ def url_restrict_generator(url_prefix):
     return url_restrict_handler
 
 
-def get_all_view(app):
+def get_all_view(ledger):
     """Return a view of all transactions.
 
+    Args:
+      ledger: An instance of watcher.Ledger.
     Returns:
       An instance of AllView, that covers all transactions.
     """
-    return views.AllView(app.entries, app.options, 'All Transactions')
+    return views.AllView(ledger.entries, ledger.options, 'All Transactions')
 
 
 @app.route(r'/view/all/<path:re:.*>', name='all')
 @handle_view(2)
-def all(path=None):
-    return get_all_view(app)
+def all(ledger, path=None):
+    return get_all_view(ledger)
 
 @app.route(r'/view/year/<year:re:\d\d\d\d>/month/<month:re:\d\d>/<path:re:.*>',
            name='month')
 @handle_view(5)
-def month(year=None, month=None, path=None):
+def month(ledger, year=None, month=None, path=None):
     year = int(year)
     month = int(month)
     date = datetime.date(year, month, 1)
     text = date.strftime('%B %Y')
-    return views.MonthView(app.entries, app.options, text, year, month)
+    return views.MonthView(ledger.entries, ledger.options, text, year, month)
 
 @app.route(r'/view/year/<year:re:\d\d\d\d>/<path:re:.*>', name='year')
 @handle_view(3)
-def year(year=None, path=None):
+def year(ledger, year=None, path=None):
     year = int(year)
     first_month = app.args.first_month
-    return views.YearView(app.entries, app.options, 'Year {:4d}'.format(year),
+    return views.YearView(ledger.entries, ledger.options, 'Year {:4d}'.format(year),
                           year, first_month)
 
 @app.route(r'/view/tag/<tag:re:[^/]*>/<path:re:.*>', name='tag')
 @handle_view(3)
-def tag(tag=None, path=None):
-    return views.TagView(app.entries, app.options, 'Tag {}'.format(tag), set([tag]))
+def tag(ledger, tag=None, path=None):
+    return views.TagView(ledger.entries, ledger.options, 'Tag {}'.format(tag), set([tag]),
+                         ledger.entry_index)
 
 
 @app.route(r'/view/payee/<payee:re:[^/]*>/<path:re:.*>', name='payee')
 @handle_view(3)
-def payee(payee=None, path=None):
-    return views.PayeeView(app.entries, app.options, 'Payee {}'.format(payee), payee)
+def payee(ledger, payee=None, path=None):
+    return views.PayeeView(ledger.entries, ledger.options, 'Payee {}'.format(payee),
+                           payee, ledger.entry_index)
 
 @app.route(r'/view/component/<component:re:[^/]*>/<path:re:.*>', name='component')
 @handle_view(3)
-def component(component=None, path=None):
-    return views.ComponentView(app.entries, app.options,
-                               'Component: {}'.format(component), component)
+def component(ledger, component=None, path=None):
+    return views.ComponentView(ledger.entries, ledger.options,
+                               'Component: {}'.format(component), component,
+                               ledger.entry_index)
 
 
 #--------------------------------------------------------------------------------
 # Bootstrapping and main program.
 
 
-def auto_reload_input_file(callback):
-    """A plugin that automatically reloads the input file if it changed since the
-    last page was loaded."""
-    def wrapper(*posargs, **kwargs):
-        filename = app.args.filename
+def prewarm_views(ledger):
+    """Create the most recently used views from a newly loaded ledger.
 
-        if loader.needs_refresh(app.options):
-            logging.info('Reloading...')
+    This is called from the reloading thread, before the ledger is installed,
+    so that these views are ready when it is.
 
-            # Save the source for later, to render.
-            with open(filename, encoding='utf8') as f:
-                app.source = f.read()
+    Args:
+      ledger: An instance of watcher.Ledger.
+    """
+    for viewid, callback, args, kwargs in list(app.recent_views):
+        try:
+            view = callback(ledger, *args, **kwargs)
+            # Access the lazily computed attribute to force the realization.
+            _ = view.closing_real_accounts
+        except Exception:  # pylint: disable=broad-except
+            logging.exception('Error creating view "%s"', viewid)
+            continue
+        ledger.views[viewid] = view
 
-            # Parse the beancount file.
-            entries, errors, options_map = loader.load_file(filename)
 
-            # Print out the list of errors.
-            if errors:
-                # pylint: disable=unsupported-assignment-operation
-                request.params['render_overlay'] = True
-                print(',----------------------------------------------------------------')
-                printer.print_errors(errors, file=sys.stdout)
-                print('`----------------------------------------------------------------')
+def install_ledger(ledger):
+    """Make a loaded ledger the one being served.
 
-            # Save globals in the global app.
-            app.entries = entries
-            app.errors = errors
-            app.options = options_map
-            app.account_types = options.get_account_types(options_map)
+    Args:
+      ledger: An instance of watcher.Ledger.
+    """
+    app.ledger = ledger
+    app.source = ledger.source
+    app.entries = ledger.entries
+    app.errors = ledger.errors
+    app.options = ledger.options
+    app.account_types = ledger.account_types
+    app.price_map = ledger.price_map
+    app.active_years = ledger.active_years
+    app.entry_index = ledger.entry_index
+    app.views = ledger.views
 
-            # Pre-compute the price database.
-            app.price_map = prices.build_price_map(entries)
 
-            # Pre-compute the list of active years.
-            app.active_years = list(getters.get_active_years(entries))
+def auto_reload_input_file(callback):
+    """A plugin that installs the most recently loaded ledger before each request.
 
-            # Reset the view cache.
-            app.views.clear()
+    The input file is reloaded in a background thread when it changes, and
+    requests are served from the previous ledger until the new one is ready.
+    The server handles one request at a time, so a ledger never gets replaced
+    while a request is being served.
+    """
+    def wrapper(*posargs, **kwargs):
+        ledger = app.watcher.get_ledger()
+        if ledger is not app.ledger:
+            install_ledger(ledger)
 
-        else:
-            # For now, the overlay is a link to the errors page. Always render
-            # it on the right when there are errors.
-            if app.errors:
-                # pylint: disable=unsupported-assignment-operation
-                request.params['render_overlay'] = True
+        # For now, the overlay is a link to the errors page. Always render
+        # it on the right when there are errors.
+        if app.errors:
+            # pylint: disable=unsupported-assignment-operation
+            request.params['render_overlay'] = True
 
         return callback(*posargs, **kwargs)
     return wrapper
@@ -1112,6 +1140,14 @@ def run_app(args, quiet=None):
         app_installs.append(url_restrictor)
 
     app.options = None
+    app.entry_index = None
+    app.ledger = None
+    del app.recent_views[:]
+
+    # Load the input file on the first request, and then reload it in the
+    # background when it changes.
+    app.watcher = watcher.LedgerWatcher(args.filename, args.reload_interval,
+                                        prewarm_views)
 
     # Add an account transformer.
     app.account_xform = account.AccountTransformer('__' if args.no_colons else None)
@@ -1127,9 +1163,13 @@ def run_app(args, quiet=None):
     # Run the server.
     app.args = args
     bind_address = '0.0.0.0' if args.public else 'localhost'
-    app.run(host=bind_address, port=args.port,
-            debug=args.debug, reloader=False,
-            quiet=args.quiet if hasattr(args, 'quiet') else quiet)
+    app.watcher.start()
+    try:
+        app.run(host=bind_address, port=args.port,
+                debug=args.debug, reloader=False,
+                quiet=args.quiet if hasattr(args, 'quiet') else quiet)
+    finally:
+        app.watcher.stop()
 
     # Uninstall applications.
     for function in app_installs:
@@ -1204,6 +1244,15 @@ def add_web_arguments(argparser):
     group.add_argument('--first-month', action='store', type=int, default=1,
                        help="The first month of the calendar year.")
 
+    group.add_argument('--reload-interval', action='store', type=float, default=1.0,
+                       help=("The number of seconds between checks for changes of "
+                             "the input files, which are reloaded in the background. "
+                             "Use 0 to reload them while serving the next request."))
+
+    group.add_argument('--prewarm-views', action='store', type=int, default=4,
+                       help=("The number of most recently used views to create "
+                             "again when reloading, before serving the new ledger."))
+
     return group
 
 
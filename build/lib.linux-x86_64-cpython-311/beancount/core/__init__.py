@@ -0,0 +1,4 @@
+"""Core basic objects and data structures to represent a list of entries.
+"""
+__copyright__ = "Copyright (C) 2013-2014, 2016  Martin Blais"
+__license__ = "GNU GPLv2"
@@ -0,0 +1,287 @@
+"""Comparison helpers for data objects.
+"""
+__copyright__ = "Copyright (C) 2014-2017  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import collections
+import datetime
+import hashlib
+
+from beancount.core.amount import Amount
+from beancount.core.data import Price
+from beancount.core.number import Decimal
+from beancount.core.position import Cost
+from beancount.core.position import CostSpec
+from beancount.core import data
+
+
+CompareError = collections.namedtuple('CompareError', 'source message entry')
+
+# A list of field names that are being ignored for persistence.
+IGNORED_FIELD_NAMES = frozenset({'meta', 'diff_amount'})
+
+# A cache of the indexes of the fields to hash, per pair of namedtuple type and
+# set of ignored field names.
+_FIELD_INDEXES = {}
+
+# The types of the immutable sub-objects often shared between entries, whose
+# strings are memoized by object id.
+_MEMOIZED_TYPES = frozenset({Cost, CostSpec})
+
+
+def stable_hash_namedtuple(objtuple, ignore=frozenset(), memo=None):
+    """Hash the given namedtuple and its child fields.
+
+    This iterates over all the members of objtuple, skipping the attributes from
+    'ignore', and if the elements are lists or sets, sorts them for stability.
+
+    Args:
+      objtuple: A tuple object or other.
+      ignore: A set of strings, attribute names to be skipped in
+        computing a stable hash. For instance, circular references to objects
+        or irrelevant data.
+      memo: An optional dict of memoized strings, to be reused across calls:
+        those of the Cost instances, by object id, and those of dates, by value.
+        The objects must be kept alive for as long as the dict is in use, e.g.,
+        by hashing the entries of a list with the same dict.
+    Returns:
+      A hexadecimal digest string.
+    """
+    # Note: The digest is that of the concatenation of the strings of all the
+    # fields, so they are joined and hashed in a single call.
+    if not isinstance(ignore, frozenset):
+        ignore = frozenset(ignore)
+    if memo is None:
+        memo = {}
+    return hashlib.md5(''.join(_hash_strings(objtuple, ignore, memo)).encode()).hexdigest()
+
+
+def _hash_strings(objtuple, ignore, memo):
+    """Produce the strings to hash for a namedtuple. See stable_hash_namedtuple().
+
+    Args:
+      objtuple: A namedtuple instance.
+      ignore: A frozenset of strings, attribute names to be skipped.
+      memo: A dict of memoized strings.
+    Returns:
+      A list of strings.
+    """
+    key = (type(objtuple), ignore)
+    try:
+        indexes = _FIELD_INDEXES[key]
+    except KeyError:
+        indexes = _FIELD_INDEXES[key] = [index
+                                         for index, name in enumerate(objtuple._fields)
+                                         if name not in ignore]
+    strings = []
+    for index in indexes:
+        attr_value = objtuple[index]
+        attr_type = type(attr_value)
+        if attr_type is str:
+            strings.append(attr_value)
+        elif attr_type is Amount:
+            strings.append(_amount_string(attr_value))
+        elif attr_type in _MEMOIZED_TYPES:
+            try:
+                strings.append(memo[id(attr_value)])
+            except KeyError:
+                string = memo[id(attr_value)] = str(attr_value)
+                strings.append(string)
+        elif attr_type is datetime.date:
+            # Note: Converting a date to a string is surprisingly slow and dates
+            # repeat a lot, so they are memoized by value.
+            try:
+                strings.append(memo[attr_value])
+            except KeyError:
+                string = memo[attr_value] = str(attr_value)
+                strings.append(string)
+        elif isinstance(attr_value, (list, set, frozenset)):
+            subhashes = set()
+            for element in attr_value:
+                if isinstance(element, tuple):
+                    subhashes.add(hashlib.md5(
+                        ''.join(_hash_strings(element, ignore, memo)).encode()).hexdigest())
+                else:
+                    subhashes.add(hashlib.md5(str(element).encode()).hexdigest())
+            strings.extend(sorted(subhashes))
+        else:
+            strings.append(str(attr_value))
+    return strings
+
+
+def _amount_string(amount):
+    """Convert an Amount to the same string as str(), faster.
+
+    Args:
+      amount: An instance of Amount.
+    Returns:
+      The string of the amount with the default display formatter.
+    """
+    if isinstance(amount.number, Decimal):
+        return '{:f} {}'.format(amount.number, amount.currency)
+    return '{} {}'.format(amount.number, amount.currency)
+
+
+def hash_entry(entry, memo=None):
+    """Compute the stable hash of a single entry.
+
+    Args:
+      entry: A directive instance.
+      memo: An optional dict of memoized strings. See stable_hash_namedtuple().
+    Returns:
+      A stable hexadecimal hash of this entry.
+    """
+    return stable_hash_namedtuple(entry, IGNORED_FIELD_NAMES, memo)
+
+
+def hash_entries(entries):
+    """Compute unique hashes of each of the entries and return a map of them.
+
+    This is used for comparisons between sets of entries.
+
+    Args:
+      entries: A list of directives.
+    Returns:
+      A dict of hash-value to entry (for all entries) and a list of errors.
+      Errors are created when duplicate entries are found.
+    """
+    entry_hash_dict = {}
+    errors = []
+    num_legal_duplicates = 0
+    memo = {}
+    for entry in entries:
+        hash_ = hash_entry(entry, memo)
+
+        if hash_ in entry_hash_dict:
+            if isinstance(entry, Price):
+                # Note: Allow duplicate Price entries, they should be common
+                # because of the nature of stock markets (if they're closed, the
+                # data source is likely to return an entry for the previously
+                # available date, which may already have been fetched).
+                num_legal_duplicates += 1
+            else:
+                other_entry = entry_hash_dict[hash_]
+                errors.append(
+                    CompareError(entry.meta,
+                                 "Duplicate entry: {} == {}".format(entry, other_entry),
+                                 entry))
+        entry_hash_dict[hash_] = entry
+
+    if not errors:
+        assert len(entry_hash_dict) + num_legal_duplicates == len(entries), (
+            len(entry_hash_dict), len(entries), num_legal_duplicates)
+    return entry_hash_dict, errors
+
+
+# The types of the fields of an entry used to group candidate duplicates.
+_KEY_TYPES = frozenset({str, Decimal, int, bool, type(None), datetime.date})
+
+
+def find_duplicate_entries(entries):
+    """Find the duplicate entries in a list.
+
+    This produces the same errors as hash_entries() but only hashes the entries
+    which could be duplicates: they are first grouped by their type and the
+    values of their scalar fields -- their date, narration, account, etc. --
+    and only those sharing a group with another entry are hashed. In a typical
+    ledger this is a small fraction of the entries.
+
+    Args:
+      entries: A list of directives.
+    Returns:
+      A list of CompareError instances, one for each duplicate entry.
+    """
+    keys = [(type(entry),) + tuple([value
+                                    for value in entry
+                                    if type(value) in _KEY_TYPES])
+            for entry in entries]
+    counts = collections.Counter(keys)
+    candidates = [entry
+                  for entry, key in zip(entries, keys)
+                  if counts[key] > 1]
+    _, errors = hash_entries(candidates)
+    return errors
+
+
+def compare_entries(entries1, entries2):
+    """Compare two lists of entries. This is used for testing.
+
+    The entries are compared with disregard for their file location.
+
+    Args:
+      entries1: A list of directives of any type.
+      entries2: Another list of directives of any type.
+    Returns:
+      A tuple of (success, not_found1, not_found2), where the fields are:
+        success: A booelan, true if all the values are equal.
+        missing1: A list of directives from 'entries1' not found in
+          'entries2'.
+        missing2: A list of directives from 'entries2' not found in
+          'entries1'.
+    Raises:
+      ValueError: If a duplicate entry is found.
+    """
+    hashes1, errors1 = hash_entries(entries1)
+    hashes2, errors2 = hash_entries(entries2)
+    keys1 = set(hashes1.keys())
+    keys2 = set(hashes2.keys())
+
+    if errors1 or errors2:
+        error = (errors1 + errors2)[0]
+        raise ValueError(str(error))
+
+    same = keys1 == keys2
+    missing1 = data.sorted([hashes1[key] for key in keys1 - keys2])
+    missing2 = data.sorted([hashes2[key] for key in keys2 - keys1])
+    return (same, missing1, missing2)
+
+
+def includes_entries(subset_entries, entries):
+    """Check if a list of entries is included in another list.
+
+    Args:
+      subset_entries: The set of entries to look for in 'entries'.
+      entries: The larger list of entries that could include 'subset_entries'.
+    Returns:
+      A boolean and a list of missing entries.
+    Raises:
+      ValueError: If a duplicate entry is found.
+    """
+    subset_hashes, subset_errors = hash_entries(subset_entries)
+    subset_keys = set(subset_hashes.keys())
+    hashes, errors = hash_entries(entries)
+    keys = set(hashes.keys())
+
+    if subset_errors or errors:
+        error = (subset_errors + errors)[0]
+        raise ValueError(str(error))
+
+    includes = subset_keys.issubset(keys)
+    missing = data.sorted([subset_hashes[key] for key in subset_keys - keys])
+    return (includes, missing)
+
+
+def excludes_entries(subset_entries, entries):
+    """Check that a list of entries does not appear in another list.
+
+    Args:
+      subset_entries: The set of entries to look for in 'entries'.
+      entries: The larger list of entries that should not include 'subset_entries'.
+    Returns:
+      A boolean and a list of entries that are not supposed to appear.
+    Raises:
+      ValueError: If a duplicate entry is found.
+    """
+    subset_hashes, subset_errors = hash_entries(subset_entries)
+    subset_keys = set(subset_hashes.keys())
+    hashes, errors = hash_entries(entries)
+    keys = set(hashes.keys())
+
+    if subset_errors or errors:
+        error = (subset_errors + errors)[0]
+        raise ValueError(str(error))
+
+    intersection = keys.intersection(subset_keys)
+    excludes = not bool(intersection)
+    extra = data.sorted([subset_hashes[key] for key in intersection])
+    return (excludes, extra)
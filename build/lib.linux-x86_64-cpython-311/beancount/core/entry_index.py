@@ -0,0 +1,168 @@
+"""Secondary indexes over a list of entries.
+
+Many reports restrict the list of entries to those of an account, a tag, a link
+or a payee, which requires a full scan of the entries. An EntryIndex is built
+once after loading and maps each of these attributes to the matching
+transactions, so that these lookups are proportional to the size of their
+output.
+"""
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import collections
+
+from beancount.core import account
+from beancount.core import data
+
+
+class EntryIndex:
+    """Indexes of the transactions of a list of entries by their attributes.
+
+    The positions stored in the indexes are in increasing order, and all the
+    lists of entries returned preserve the order of the indexed list.
+
+    Attributes:
+      entries: The list of directives this index was built from.
+      account_postings: A dict of account name to a list of (entry index,
+        posting index) pairs, the positions of the postings to that account.
+      tag_indexes: A dict of tag to the list of the positions of the
+        transactions with that tag.
+      link_indexes: A dict of link to the list of the positions of the
+        transactions with that link.
+      payee_indexes: A dict of payee to the list of the positions of the
+        transactions with that payee.
+    """
+
+    def __init__(self, entries):
+        """Build the indexes.
+
+        Args:
+          entries: A list of directives.
+        """
+        self.entries = entries
+        account_postings = collections.defaultdict(list)
+        tag_indexes = collections.defaultdict(list)
+        link_indexes = collections.defaultdict(list)
+        payee_indexes = collections.defaultdict(list)
+        for entry_index, entry in enumerate(entries):
+            if not isinstance(entry, data.Transaction):
+                continue
+            for posting_index, posting in enumerate(entry.postings):
+                account_postings[posting.account].append((entry_index, posting_index))
+            if entry.tags:
+                for tag in entry.tags:
+                    tag_indexes[tag].append(entry_index)
+            if entry.links:
+                for link in entry.links:
+                    link_indexes[link].append(entry_index)
+            if entry.payee is not None:
+                payee_indexes[entry.payee].append(entry_index)
+        self.account_postings = dict(account_postings)
+        self.tag_indexes = dict(tag_indexes)
+        self.link_indexes = dict(link_indexes)
+        self.payee_indexes = dict(payee_indexes)
+
+    def covers(self, entries):
+        """Return true if this index was built from the given list of entries.
+
+        Args:
+          entries: A list of directives.
+        Returns:
+          A boolean.
+        """
+        return entries is self.entries
+
+    def _get_entries(self, index_lists):
+        """Get the entries at the union of lists of positions.
+
+        Args:
+          index_lists: A list of sorted lists of positions in 'entries'.
+        Returns:
+          A list of directives, in the order of 'entries'.
+        """
+        if len(index_lists) == 1:
+            indexes = index_lists[0]
+        else:
+            indexes = sorted(set().union(*index_lists))
+        entries = self.entries
+        return [entries[entry_index] for entry_index in indexes]
+
+    def get_tag_entries(self, *tags):
+        """Get the transactions with any of some tags.
+
+        Args:
+          *tags: Tag strings.
+        Returns:
+          A list of Transaction instances.
+        """
+        return self._get_entries([self.tag_indexes.get(tag, []) for tag in tags])
+
+    def get_link_entries(self, *links):
+        """Get the transactions with any of some links.
+
+        Args:
+          *links: Link strings.
+        Returns:
+          A list of Transaction instances.
+        """
+        return self._get_entries([self.link_indexes.get(link, []) for link in links])
+
+    def get_payee_entries(self, *payees):
+        """Get the transactions with any of some payees.
+
+        Args:
+          *payees: Payee strings.
+        Returns:
+          A list of Transaction instances.
+        """
+        return self._get_entries([self.payee_indexes.get(payee, [])
+                                  for payee in payees])
+
+    def get_account_postings(self, account_name):
+        """Get the postings to an account.
+
+        Args:
+          account_name: A string, the name of an account.
+        Returns:
+          A list of (entry, posting) pairs.
+        """
+        entries = self.entries
+        postings = []
+        for entry_index, posting_index in self.account_postings.get(account_name, []):
+            entry = entries[entry_index]
+            postings.append((entry, entry.postings[posting_index]))
+        return postings
+
+    def get_account_entries(self, *account_names):
+        """Get the transactions with at least one posting to any of some accounts.
+
+        Args:
+          *account_names: Account name strings.
+        Returns:
+          A list of Transaction instances.
+        """
+        index_lists = []
+        for account_name in account_names:
+            indexes = []
+            previous = None
+            for entry_index, _ in self.account_postings.get(account_name, []):
+                if entry_index != previous:
+                    indexes.append(entry_index)
+                    previous = entry_index
+            index_lists.append(indexes)
+        return self._get_entries(index_lists)
+
+    def get_component_entries(self, component):
+        """Get the transactions with a posting to an account with a component.
+
+        This is equivalent to filtering with data.has_entry_account_component().
+
+        Args:
+          component: A string, a component of an account name.
+        Returns:
+          A list of Transaction instances.
+        """
+        return self.get_account_entries(*[
+            account_name
+            for account_name in self.account_postings
+            if account.has_component(account_name, component)])
@@ -0,0 +1,93 @@
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import unittest
+
+from beancount.core import data
+from beancount.core import entry_index
+from beancount.ops import basicops
+from beancount import loader
+
+
+class TestEntryIndex(unittest.TestCase):
+
+    @loader.load_doc()
+    def setUp(self, entries, _, __):
+        """
+        2014-01-01 open Assets:Account1
+        2014-01-01 open Assets:Account2
+        2014-01-01 open Expenses:Food:Restaurant
+
+        2014-05-10 * "Store" "A" #apple
+          Assets:Account1    1 USD
+          Assets:Account2
+
+        2014-05-11 * "B" ^apple
+          Assets:Account1    1 USD
+          Assets:Account1    2 USD
+          Expenses:Food:Restaurant   -3 USD
+
+        2014-05-12 * "Store" "C" #banana ^banana
+          Assets:Account2    1 USD
+          Expenses:Food:Restaurant
+
+        2014-05-13 * "D" #apple #banana ^apple ^banana
+          Assets:Account1    1 USD
+          Assets:Account2
+
+        2014-06-01 note Assets:Account1 "Note"
+        """
+        self.entries = entries
+        self.index = entry_index.EntryIndex(entries)
+
+    def get_narrations(self, entries):
+        return [entry.narration for entry in entries]
+
+    def test_covers(self):
+        self.assertTrue(self.index.covers(self.entries))
+        self.assertFalse(self.index.covers(list(self.entries)))
+
+    def test_tags_links(self):
+        self.assertEqual(['A', 'D'], self.get_narrations(self.index.get_tag_entries('apple')))
+        self.assertEqual(['A', 'C', 'D'],
+                         self.get_narrations(self.index.get_tag_entries('banana', 'apple')))
+        self.assertEqual([], self.index.get_tag_entries('cherry'))
+        self.assertEqual(['B', 'D'], self.get_narrations(self.index.get_link_entries('apple')))
+        self.assertEqual(['B', 'C', 'D'],
+                         self.get_narrations(self.index.get_link_entries('apple',
+                                                                         'banana')))
+        for tag in 'apple', 'banana', 'cherry':
+            self.assertEqual(list(basicops.filter_tag(tag, list(self.entries))),
+                             list(basicops.filter_tag(tag, self.entries, self.index)))
+            self.assertEqual(list(basicops.filter_link(tag, list(self.entries))),
+                             list(basicops.filter_link(tag, self.entries, self.index)))
+
+    def test_payees(self):
+        self.assertEqual(['A', 'C'], self.get_narrations(self.index.get_payee_entries('Store')))
+        self.assertEqual([], self.index.get_payee_entries('Other'))
+
+    def test_accounts(self):
+        postings = self.index.get_account_postings('Assets:Account1')
+        self.assertEqual(['A', 'B', 'B', 'D'],
+                         [entry.narration for entry, _ in postings])
+        self.assertTrue(all(posting.account == 'Assets:Account1'
+                            for _, posting in postings))
+        self.assertEqual(['A', 'B', 'D'],
+                         self.get_narrations(
+                             self.index.get_account_entries('Assets:Account1')))
+        self.assertEqual(['A', 'B', 'C', 'D'],
+                         self.get_narrations(
+                             self.index.get_account_entries('Assets:Account1',
+                                                            'Assets:Account2')))
+        self.assertEqual([], self.index.get_account_entries('Assets:Other'))
+
+    def test_components(self):
+        for component in 'Food', 'Assets', 'Account2', 'Other', 'Acc':
+            self.assertEqual(
+                [entry for entry in self.entries
+                 if data.has_entry_account_component(entry, component)],
+                self.index.get_component_entries(component))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,1070 @@
+"""Loader code. This is the main entry point to load up a file.
+"""
+__copyright__ = "Copyright (C) 2013-2016  Martin Blais"
+__license__ = "GNU GPLv2"
+
+from os import path
+from concurrent import futures
+import collections
+import functools
+import glob
+import hashlib
+import importlib
+import io
+import itertools
+import logging
+import os
+import pickle
+import struct
+import textwrap
+import time
+import warnings
+
+from beancount.utils import bisect_key
+from beancount.utils import misc_utils
+from beancount.core import data
+from beancount.parser import parser
+from beancount.parser import booking
+from beancount.parser import options
+from beancount.parser import printer
+from beancount.ops import validation
+from beancount.utils import encryption
+from beancount.utils import file_utils
+from beancount.utils import profiler
+
+
+LoadError = collections.namedtuple('LoadError', 'source message entry')
+
+
+# List of default plugins to run.
+DEFAULT_PLUGINS_PRE = [
+    ("beancount.ops.pad", None),
+    ("beancount.ops.documents", None),
+    ]
+
+DEFAULT_PLUGINS_POST = [
+    ("beancount.ops.balance", None),
+    ]
+
+# A mapping of modules to warn about, to their renamed names.
+RENAMED_MODULES = {}
+
+# The values a plugin module may set its '__plugins_order__' attribute to, to
+# declare how its functions order the entries they return, given sorted entries.
+# This spares the loader from sorting the entries after running it. The entries
+# returned by plugins which do not declare it are sorted, unless they already
+# are; the sort keys of the entries are computed once and reused across plugins.
+#
+# PLUGIN_ORDER_SORTED: The entries are returned sorted, e.g. because they are
+#   returned as given, filtered, or with new entries inserted next to entries
+#   with the same sort key.
+# PLUGIN_ORDER_APPENDED: The entries given are returned in the same order,
+#   followed by new entries in any order, which the loader merges in.
+PLUGIN_ORDER_SORTED = 'sorted'
+PLUGIN_ORDER_APPENDED = 'appended'
+
+# A plugin module may set its '__plugins_validation__' attribute to True to
+# declare that its functions only validate the entries: they return the entries
+# they are given unchanged, along with errors. Consecutive validation plugins
+# see the same entries and may run in parallel; see PLUGIN_PROCESSES.
+
+
+# Filename pattern for the pickle-cache.
+PICKLE_CACHE_FILENAME = '.{filename}.picklecache'
+
+# The threshold below which we don't bother creating a cache file, in seconds.
+PICKLE_CACHE_THRESHOLD = 1.0
+
+# Filename pattern for the per-file parser output cache. This is created next to
+# each of the parsed input files.
+PARSE_CACHE_FILENAME = '.{filename}.parsecache'
+
+# The threshold below which we don't bother creating a per-file parse cache, in
+# seconds. This is of the same order as PICKLE_CACHE_THRESHOLD, so that only the
+# files which are long to parse get a cache file next to them.
+PARSE_CACHE_THRESHOLD = 0.5
+
+# Filename pattern for the booking checkpoints file.
+BOOKING_CACHE_FILENAME = '.{filename}.bookingcache'
+
+# The number of entries below which we don't bother checkpointing booking.
+BOOKING_CACHE_MIN_ENTRIES = 20000
+
+# The number of worker processes used to parse included files in parallel. A
+# value of 0 or 1 parses all the files serially in the current process.
+PARSE_PROCESSES = 0
+
+# The number of worker processes used to run consecutive validation plugins in
+# parallel. A value of 0 or 1 runs all the plugins serially in the current
+# process.
+PLUGIN_PROCESSES = 0
+
+
+def load_file(filename, log_timings=None, log_errors=None, extra_validations=None,
+              encoding=None):
+    """Open a Beancount input file, parse it, run transformations and validate.
+
+    Args:
+      filename: The name of the file to be parsed.
+      log_timings: A file object or function to write timings to,
+        or None, if it should remain quiet.
+      log_errors: A file object or function to write errors to,
+        or None, if it should remain quiet.
+      extra_validations: A list of extra validation functions to run after loading
+        this list of entries.
+      encoding: A string or None, the encoding to decode the input filename with.
+    Returns:
+      A triple of (entries, errors, option_map) where "entries" is a date-sorted
+      list of entries from the file, "errors" a list of error objects generated
+      while parsing and validating the file, and "options_map", a dict of the
+      options parsed from the file.
+    """
+    filename = path.expandvars(path.expanduser(filename))
+    if not path.isabs(filename):
+        filename = path.normpath(path.join(os.getcwd(), filename))
+
+    if encryption.is_encrypted_file(filename):
+        # Note: Caching is not supported for encrypted files.
+        entries, errors, options_map = load_encrypted_file(
+            filename,
+            log_timings, log_errors,
+            extra_validations, False, encoding)
+    else:
+        entries, errors, options_map = _load_file(
+            filename, log_timings,
+            extra_validations, encoding)
+        _log_errors(errors, log_errors)
+    return entries, errors, options_map
+
+
+def load_encrypted_file(filename, log_timings=None, log_errors=None, extra_validations=None,
+                        dedent=False, encoding=None):
+    """Load an encrypted Beancount input file.
+
+    Args:
+      filename: The name of an encrypted file to be parsed.
+      log_timings: See load_string().
+      log_errors: See load_string().
+      extra_validations: See load_string().
+      dedent: See load_string().
+      encoding: See load_string().
+    Returns:
+      A triple of (entries, errors, option_map) where "entries" is a date-sorted
+      list of entries from the file, "errors" a list of error objects generated
+      while parsing and validating the file, and "options_map", a dict of the
+      options parsed from the file.
+    """
+    contents = encryption.read_encrypted_file(filename)
+    return load_string(contents,
+                       log_timings=log_timings,
+                       log_errors=log_errors,
+                       extra_validations=extra_validations,
+                       encoding=encoding)
+
+
+def _log_errors(errors, log_errors):
+    """Log errors, if 'log_errors' is set.
+
+    Args:
+      log_errors: A file object or function to write errors to,
+        or None, if it should remain quiet.
+    """
+    if log_errors and errors:
+        if hasattr(log_errors, 'write'):
+            printer.print_errors(errors, file=log_errors)
+        else:
+            error_io = io.StringIO()
+            printer.print_errors(errors, file=error_io)
+            log_errors(error_io.getvalue())
+
+
+def pickle_cache_function(pattern, time_threshold, function):
+    """Decorate a loader function to make it loads its result from a pickle cache.
+
+    This considers the first argument as a top-level filename and assumes the
+    function to be cached returns an (entries, errors, options_map) triple. We
+    use the 'include' option value in order to check whether any of the included
+    files has changed. It's essentially a special case for an on-disk memoizer.
+    If any of the included files are more recent than the cache, the function is
+    recomputed and the cache refreshed.
+
+    Args:
+      pattern: A string, the filename pattern for the pickled cache file.
+        A {filename} in it gets replaced by the basename of the input filename.
+      time_threshold: A float, the number of seconds below which we don't bother
+        caching.
+      function: A function object to decorate for caching.
+    Returns:
+      A decorated function which will pull its result from a cache file if
+      it is available.
+    """
+    @functools.wraps(function)
+    def wrapped(toplevel_filename, *args, **kw):
+        abs_filename = path.abspath(toplevel_filename)
+        cache_filename = path.join(
+            path.dirname(abs_filename),
+            pattern.format(filename=path.basename(toplevel_filename)))
+
+        # Read the cache if it exists in order to get the list of files whose
+        # timestamps to check. When profiling, ignore it so that all the stages
+        # get run.
+        exists = path.exists(cache_filename)
+        if exists and not profiler.is_active():
+            with open(cache_filename, 'rb') as file:
+                try:
+                    result = pickle.load(file)
+                except Exception as exc:
+                    # Note: Not a big fan of doing this, but here we handle all
+                    # possible exceptions because unpickling of an old or
+                    # corrupted pickle file manifests as a variety of different
+                    # exception types.
+
+                    # The cache file is corrupted; ignore it and recompute.
+                    logging.error("Cache file is corrupted: %s; recomputing.", exc)
+                    result = None
+
+                else:
+                    # Check that the latest timestamp has not been written after the
+                    # cache file.
+                    entries, errors, options_map = result
+                    if not needs_refresh(options_map):
+                        # All timestamps are legit; cache hit.
+                        return result
+
+        # We failed; recompute the value.
+        if exists:
+            try:
+                os.remove(cache_filename)
+            except OSError as exc:
+                # Warn for errors on read-only filesystems.
+                logging.warning("Could not remove picklecache file %s: %s",
+                                cache_filename, exc)
+
+        time_before = time.time()
+        result = function(toplevel_filename, *args, **kw)
+        time_after = time.time()
+
+        # Overwrite the cache file if the time it takes to compute it
+        # justifies it.
+        if time_after - time_before > time_threshold:
+            try:
+                with open(cache_filename, 'wb') as file:
+                    pickle.dump(result, file)
+            except Exception as exc:
+                logging.warning("Could not write to picklecache file %s: %s",
+                                cache_filename, exc)
+
+        return result
+    return wrapped
+
+
+def _load_file(filename, *args, **kw):
+    """Delegate to _load. Note: This gets conditionally advised by caching below."""
+    return _load([(filename, True)], *args, **kw)
+_uncached_load_file = _load_file  # pylint: disable=invalid-name
+
+
+def parse_cache_function(pattern, time_threshold, function):
+    """Decorate a parser function to make it load its result from a per-file cache.
+
+    This considers the first argument as the absolute filename of a single input
+    file and assumes the function returns the parser's (entries, errors,
+    options_map) triple for that file only, without following its includes. The
+    cache file is stored next to the input file and is keyed by a hash of the
+    contents of the file (see compute_parse_key()), so that when a single file
+    of a large ledger is modified, only that file needs to be parsed again.
+
+    Args:
+      pattern: A string, the filename pattern for the pickled cache file.
+        A {filename} in it gets replaced by the basename of the input filename.
+      time_threshold: A float, the number of seconds below which we don't bother
+        caching.
+      function: A function object to decorate for caching.
+    Returns:
+      A decorated function which will pull its result from a cache file if
+      it is available.
+    """
+    @functools.wraps(function)
+    def wrapped(filename, *args, **kw):
+        cache_filename = path.join(
+            path.dirname(filename),
+            pattern.format(filename=path.basename(filename)))
+
+        try:
+            with open(filename, 'rb') as file:
+                contents = file.read()
+        except OSError:
+            # Let the parser report the problem.
+            return function(filename, *args, **kw)
+        parse_key = compute_parse_key(filename, contents, kw.get('encoding', None))
+
+        # The cache file contains two consecutive pickles: the key, and the
+        # result. This allows us to skip unpickling a stale result.
+        if path.exists(cache_filename):
+            with open(cache_filename, 'rb') as file:
+                try:
+                    if pickle.load(file) == parse_key:
+                        # Contents unchanged; cache hit.
+                        return pickle.load(file)
+                except Exception as exc:
+                    # Note: See pickle_cache_function() for why we catch all
+                    # exceptions here.
+                    logging.error("Parse cache file is corrupted: %s; recomputing.", exc)
+
+        time_before = time.time()
+        result = function(filename, *args, **kw)
+        time_after = time.time()
+
+        # Overwrite the cache file if the time it takes to compute it
+        # justifies it.
+        if time_after - time_before > time_threshold:
+            try:
+                with open(cache_filename, 'wb') as file:
+                    pickle.dump(parse_key, file)
+                    pickle.dump(result, file)
+            except Exception as exc:
+                logging.warning("Could not write to parse cache file %s: %s",
+                                cache_filename, exc)
+
+        return result
+    return wrapped
+
+
+def _parse_file(filename, encoding=None):
+    """Delegate to the parser. Note: This gets conditionally advised by caching below."""
+    return parser.parse_file(filename, encoding=encoding)
+_uncached_parse_file = _parse_file  # pylint: disable=invalid-name
+
+
+def _parse_file_in_subprocess(filename, encoding):
+    """Parse a single file from within a worker process. See _parse_recursive().
+
+    Args:
+      filename: A string, the absolute filename to be parsed.
+      encoding: A string or None, the encoding to decode the input filename with.
+    Returns:
+      The (entries, errors, options_map) triple from the parser.
+    """
+    return _parse_file(filename, encoding=encoding)
+
+
+def compute_parse_key(filename, contents, encoding):
+    """Compute a key identifying the parser output for a single input file.
+
+    The filename is included because it gets stored in the metadata of the
+    parsed directives. The parser's source hash is included in order to
+    invalidate the caches when the parser itself changes.
+
+    Args:
+      filename: A string, the absolute filename of the parsed file.
+      contents: A bytes object, the contents of the file.
+      encoding: A string or None, the encoding used to decode the file.
+    Returns:
+      A string, the hexadecimal digest of the key.
+    """
+    md5 = hashlib.md5()
+    md5.update(getattr(parser._parser, 'SOURCE_HASH', '').encode('utf8'))
+    md5.update(filename.encode('utf8'))
+    md5.update((encoding or '').encode('utf8'))
+    md5.update(contents)
+    return md5.hexdigest()
+
+
+def needs_refresh(options_map):
+    """Predicate that returns true if at least one of the input files may have changed.
+
+    Args:
+      options_map: An options dict as per the parser.
+      mtime: A modified time, to check if it covers the include files in the options_map.
+    Returns:
+      A boolean, true if the input is obsoleted by changes in the input files.
+    """
+    if options_map is None:
+        return True
+    input_hash = compute_input_hash(options_map['include'])
+    return 'input_hash' not in options_map or input_hash != options_map['input_hash']
+
+
+def compute_input_hash(filenames):
+    """Compute a hash of the input data.
+
+    Args:
+      filenames: A list of input files. Order is not relevant.
+    """
+    md5 = hashlib.md5()
+    for filename in sorted(filenames):
+        md5.update(filename.encode('utf8'))
+        if not path.exists(filename):
+            continue
+        stat = os.stat(filename)
+        md5.update(struct.pack('dd', stat.st_mtime_ns, stat.st_size))
+    return md5.hexdigest()
+
+
+def load_string(string, log_timings=None, log_errors=None, extra_validations=None,
+                dedent=False, encoding=None):
+
+    """Open a Beancount input string, parse it, run transformations and validate.
+
+    Args:
+      string: A Beancount input string.
+      log_timings: A file object or function to write timings to,
+        or None, if it should remain quiet.
+      log_errors: A file object or function to write errors to,
+        or None, if it should remain quiet.
+      extra_validations: A list of extra validation functions to run after loading
+        this list of entries.
+      dedent: A boolean, if set, remove the whitespace in front of the lines.
+      encoding: A string or None, the encoding to decode the input string with.
+    Returns:
+      A triple of (entries, errors, option_map) where "entries" is a date-sorted
+      list of entries from the string, "errors" a list of error objects
+      generated while parsing and validating the string, and "options_map", a
+      dict of the options parsed from the string.
+    """
+    if dedent:
+        string = textwrap.dedent(string)
+    entries, errors, options_map = _load([(string, False)], log_timings,
+                                         extra_validations, encoding)
+    _log_errors(errors, log_errors)
+    return entries, errors, options_map
+
+
+def _parse_recursive(sources, log_timings, encoding=None):
+    """Parse Beancount input, run its transformations and validate it.
+
+    Recursively parse a list of files or strings and their include files and
+    return an aggregate of parsed directives, errors, and the top-level
+    options-map. If the same file is being parsed twice, ignore it and issue an
+    error.
+
+    Args:
+      sources: A list of (filename-or-string, is-filename) where the first
+        element is a string, with either a filename or a string to be parsed directly,
+        and the second arugment is a boolean that is true if the first is a filename.
+        You may provide a list of such arguments to be parsed. Filenames must be absolute
+        paths.
+      log_timings: A function to write timings to, or None, if it should remain quiet.
+      encoding: A string or None, the encoding to decode the input filename with.
+    Returns:
+      A tuple of (entries, parse_errors, options_map).
+    """
+    assert isinstance(sources, list) and all(isinstance(el, tuple) for el in sources)
+
+    # Current parse state.
+    entries, parse_errors = [], []
+    options_map = None
+
+    # A stack of sources to be parsed.
+    source_stack = list(sources)
+
+    # A list of absolute filenames that have been parsed in the past, used to
+    # detect and avoid duplicates (cycles).
+    filenames_seen = set()
+
+    # If enabled, a pool of processes used to parse the included files ahead of
+    # time, and a mapping of absolute filename to the future of its parser
+    # output. The results are still consumed in the same order as the serial
+    # version, so the output remains deterministic.
+    executor = (futures.ProcessPoolExecutor(max_workers=PARSE_PROCESSES)
+                if PARSE_PROCESSES > 1
+                else None)
+    parse_futures = {}
+
+    with misc_utils.log_time('beancount.parser.parser', log_timings, indent=1):
+        try:
+            while source_stack:
+                source, is_file = source_stack.pop(0)
+                is_top_level = options_map is None
+
+                # If the file is encrypted, read it in and process it as a string.
+                if is_file:
+                    cwd = path.dirname(source)
+                    source_filename = source
+                    if encryption.is_encrypted_file(source):
+                        source = encryption.read_encrypted_file(source)
+                        is_file = False
+                else:
+                    # If we're parsing a string, the CWD is the current process
+                    # working directory.
+                    cwd = os.getcwd()
+                    source_filename = None
+
+                if is_file:
+                    # All filenames here must be absolute.
+                    assert path.isabs(source)
+                    filename = path.normpath(source)
+
+                    # Check for file previously parsed... detect duplicates.
+                    if filename in filenames_seen:
+                        parse_errors.append(
+                            LoadError(data.new_metadata("<load>", 0),
+                                      'Duplicate filename parsed: "{}"'.format(filename),
+                                      None))
+                        continue
+
+                    # Check for a file that does not exist.
+                    if not path.exists(filename):
+                        parse_errors.append(
+                            LoadError(data.new_metadata("<load>", 0),
+                                      'File "{}" does not exist'.format(filename), None))
+                        continue
+
+                    # Parse a file from disk directly.
+                    filenames_seen.add(filename)
+                    with misc_utils.log_time('beancount.parser.parser.parse_file',
+                                             log_timings, indent=2), \
+                         profiler.stage('beancount.parser.parser.parse_file', 'file',
+                                        filename=filename) as counts:
+                        future = parse_futures.pop(filename, None)
+                        if future is not None:
+                            (src_entries,
+                             src_errors,
+                             src_options_map) = future.result()
+                        else:
+                            (src_entries,
+                             src_errors,
+                             src_options_map) = _parse_file(filename, encoding=encoding)
+                        counts.entries_out = len(src_entries)
+
+                    cwd = path.dirname(filename)
+                else:
+                    # Encode the contents if necessary.
+                    if encoding:
+                        if isinstance(source, bytes):
+                            source = source.decode(encoding)
+                        source = source.encode('ascii', 'replace')
+
+                    # Parse a string buffer from memory.
+                    with misc_utils.log_time('beancount.parser.parser.parse_string',
+                                             log_timings, indent=2), \
+                         profiler.stage('beancount.parser.parser.parse_string', 'file',
+                                        filename=source_filename) as counts:
+                        (src_entries,
+                         src_errors,
+                         src_options_map) = parser.parse_string(source, source_filename)
+                        counts.entries_out = len(src_entries)
+
+                # Merge the entries resulting from the parsed file.
+                entries.extend(src_entries)
+                parse_errors.extend(src_errors)
+
+                # We need the options from the very top file only (the very
+                # first file being processed). No merging of options should
+                # occur.
+                if is_top_level:
+                    options_map = src_options_map
+                else:
+                    aggregate_options_map(options_map, src_options_map)
+
+                # Add includes to the list of sources to process. chdir() for glob,
+                # which uses it indirectly.
+                include_expanded = []
+                with file_utils.chdir(cwd):
+                    for include_filename in src_options_map['include']:
+                        matched_filenames = glob.glob(include_filename, recursive=True)
+                        if matched_filenames:
+                            include_expanded.extend(matched_filenames)
+                        else:
+                            parse_errors.append(
+                                LoadError(data.new_metadata("<load>", 0),
+                                          'File glob "{}" does not match any files'.format(
+                                              include_filename), None))
+                for include_filename in include_expanded:
+                    if not path.isabs(include_filename):
+                        include_filename = path.join(cwd, include_filename)
+                    include_filename = path.normpath(include_filename)
+
+                    # Add the include filenames to be processed later.
+                    source_stack.append((include_filename, True))
+
+                    # Start parsing the included file in a worker process.
+                    if (executor is not None and
+                            include_filename not in filenames_seen and
+                            include_filename not in parse_futures and
+                            path.exists(include_filename) and
+                            not encryption.is_encrypted_file(include_filename)):
+                        parse_futures[include_filename] = executor.submit(
+                            _parse_file_in_subprocess, include_filename, encoding)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    # Make sure we have at least a dict of valid options.
+    if options_map is None:
+        options_map = options.OPTIONS_DEFAULTS.copy()
+
+    # Save the set of parsed filenames in options_map.
+    options_map['include'] = sorted(filenames_seen)
+
+    return entries, parse_errors, options_map
+
+
+def aggregate_options_map(options_map, src_options_map):
+    """Aggregate some of the attributes of options map.
+
+    Args:
+      options_map: The target map in which we want to aggregate attributes.
+        Note: This value is mutated in-place.
+      src_options_map: A source map whose values we'd like to see aggregated.
+    """
+    op_currencies = options_map["operating_currency"]
+    for currency in src_options_map["operating_currency"]:
+        if currency not in op_currencies:
+            op_currencies.append(currency)
+
+    commodities = options_map["commodities"]
+    for currency in src_options_map["commodities"]:
+        commodities.add(currency)
+
+
+def _load(sources, log_timings, extra_validations, encoding):
+    """Parse Beancount input, run its transformations and validate it.
+
+    (This is an internal method.)
+    This routine does all that is necessary to obtain a list of entries ready
+    for realization and working with them. This is the principal call for of the
+    scripts that load a ledger. It returns a list of entries transformed and
+    ready for reporting, a list of errors, and parser's options dict.
+
+    Args:
+      sources: A list of (filename-or-string, is-filename) where the first
+        element is a string, with either a filename or a string to be parsed directly,
+        and the second arugment is a boolean that is true if the first is a filename.
+        You may provide a list of such arguments to be parsed. Filenames must be absolute
+        paths.
+      log_timings: A file object or function to write timings to,
+        or None, if it should remain quiet.
+      extra_validations: A list of extra validation functions to run after loading
+        this list of entries.
+      encoding: A string or None, the encoding to decode the input filename with.
+    Returns:
+      See load() or load_string().
+    """
+    assert isinstance(sources, list) and all(isinstance(el, tuple) for el in sources)
+
+    if hasattr(log_timings, 'write'):
+        log_timings = log_timings.write
+
+    # Parse all the files recursively. Ensure that the entries are sorted before
+    # running any processes on them.
+    with misc_utils.log_time('parse', log_timings, indent=1), \
+         profiler.stage('parse', 'phase', cprofile=False) as counts:
+        entries, parse_errors, options_map = _parse_recursive(
+            sources, log_timings, encoding)
+        entries.sort(key=data.entry_sortkey)
+        counts.entries_out = len(entries)
+
+    # Run interpolation on incomplete entries.
+    with misc_utils.log_time('booking', log_timings, indent=1), \
+         profiler.stage('booking', 'phase', entries) as counts:
+        checkpoint_filename = get_booking_cache_filename(sources, entries, options_map)
+        entries, balance_errors = booking.book(entries, options_map, checkpoint_filename)
+        parse_errors.extend(balance_errors)
+        counts.entries_out = len(entries)
+
+    # Transform the entries.
+    with misc_utils.log_time('run_transformations', log_timings, indent=1), \
+         profiler.stage('run_transformations', 'phase', entries,
+                        cprofile=False) as counts:
+        entries, errors = run_transformations(entries, parse_errors, options_map,
+                                              log_timings)
+        counts.entries_out = len(entries)
+
+    # Validate the list of entries.
+    with misc_utils.log_time('beancount.ops.validate', log_timings, indent=1), \
+         profiler.stage('beancount.ops.validate', 'phase', entries, cprofile=False):
+        valid_errors = validation.validate(entries, options_map, log_timings,
+                                           extra_validations)
+        errors.extend(valid_errors)
+
+        # Note: We could go hardcore here and further verify that the entries
+        # haven't been modified by user-provided validation routines, by
+        # comparing hashes before and after. Not needed for now.
+
+    # Compute the input hash.
+    options_map['input_hash'] = compute_input_hash(options_map['include'])
+
+    return entries, errors, options_map
+
+
+def get_booking_cache_filename(sources, entries, options_map):
+    """Get the name of the file holding the booking checkpoints, if enabled.
+
+    Checkpoints are only used for large ledgers loaded from a single top-level
+    file, and never when some of the input files are encrypted, so as to avoid
+    storing their contents in the clear.
+
+    Args:
+      sources: A list of (filename-or-string, is-filename) pairs, as per _load().
+      entries: A list of parsed directives.
+      options_map: An options dict as read from the parser.
+    Returns:
+      A string, the name of the checkpoints file, or None, if booking
+      should not be checkpointed.
+    """
+    if (BOOKING_CACHE_FILENAME is None or
+            len(entries) < BOOKING_CACHE_MIN_ENTRIES or
+            len(sources) != 1 or
+            not sources[0][1]):
+        return None
+    if any(encryption.is_encrypted_file(filename)
+           for filename in options_map['include']):
+        return None
+    filename = sources[0][0]
+    return path.join(path.dirname(filename),
+                     BOOKING_CACHE_FILENAME.format(filename=path.basename(filename)))
+
+
+def run_transformations(entries, parse_errors, options_map, log_timings):
+    """Run the various transformations on the entries.
+
+    This is where entries are being synthesized, checked, plugins are run, etc.
+
+    Args:
+      entries: A list of directives as read from the parser.
+      parse_errors: A list of errors so far.
+      options_map: An options dict as read from the parser.
+      log_timings: A function to write timing log entries to, or None, if it
+        should be quiet.
+    Returns:
+      A list of modified entries, and a list of errors, also possibly modified.
+    """
+    # A list of errors to extend (make a copy to avoid modifying the input).
+    errors = list(parse_errors)
+
+    # The sort keys of the entries, computed once for all the plugins.
+    sort_keys = data.SortKeyCache()
+
+    # If enabled, the consecutive validation plugins whose run is deferred, to
+    # run them together in parallel, as a list of (name, config) pairs.
+    validation_plugins = []
+
+    # Process the plugins.
+    if options_map['plugin_processing_mode'] == 'raw':
+        plugins_iter = options_map["plugin"]
+    elif options_map['plugin_processing_mode'] == 'default':
+        plugins_iter = itertools.chain(DEFAULT_PLUGINS_PRE,
+                                       options_map["plugin"],
+                                       DEFAULT_PLUGINS_POST)
+    else:
+        assert "Invalid value for plugin_processing_mode: {}".format(
+            options_map['plugin_processing_mode'])
+
+    for plugin_name, plugin_config in plugins_iter:
+
+        # Issue a warning on a renamed module.
+        renamed_name = RENAMED_MODULES.get(plugin_name, None)
+        if renamed_name:
+            warnings.warn("Deprecation notice: Module '{}' has been renamed to '{}'; "
+                          "please adjust your plugin directive.".format(
+                              plugin_name, renamed_name))
+            plugin_name = renamed_name
+
+        # Try to import the module.
+        try:
+            module = importlib.import_module(plugin_name)
+            if not hasattr(module, '__plugins__'):
+                continue
+
+            # Defer the validation plugins, to run them in parallel with the
+            # following ones.
+            if PLUGIN_PROCESSES > 1 and getattr(module, '__plugins_validation__', False):
+                validation_plugins.append((plugin_name, plugin_config))
+                continue
+            if validation_plugins:
+                errors.extend(run_validation_plugins(validation_plugins, entries,
+                                                     options_map, log_timings))
+                validation_plugins = []
+
+            num_entries_in = len(entries)
+            with misc_utils.log_time(plugin_name, log_timings, indent=2), \
+                 profiler.stage(plugin_name, 'plugin', entries) as counts:
+                entries, plugin_errors = run_plugin(module, entries, options_map,
+                                                    plugin_config)
+                errors.extend(plugin_errors)
+                counts.entries_out = len(entries)
+
+            # Ensure that the entries are sorted. Don't trust the plugins
+            # themselves, unless they declare how they order their entries.
+            plugin_order = getattr(module, '__plugins_order__', None)
+            if plugin_order == PLUGIN_ORDER_SORTED:
+                pass
+            elif (plugin_order == PLUGIN_ORDER_APPENDED and
+                  len(entries) >= num_entries_in):
+                entries = merge_appended_entries(entries, num_entries_in)
+            else:
+                sort_keys.sort(entries)
+
+        except (ImportError, TypeError) as exc:
+            # Upon failure, just issue an error, after those of the plugins
+            # before it.
+            if validation_plugins:
+                errors.extend(run_validation_plugins(validation_plugins, entries,
+                                                     options_map, log_timings))
+                validation_plugins = []
+            errors.append(plugin_import_error(plugin_name, exc))
+
+    if validation_plugins:
+        errors.extend(run_validation_plugins(validation_plugins, entries,
+                                             options_map, log_timings))
+
+    return entries, errors
+
+
+def run_plugin(module, entries, options_map, plugin_config):
+    """Run the functions of a plugin module on the entries.
+
+    Args:
+      module: A plugin module, with a '__plugins__' attribute.
+      entries: A list of directives.
+      options_map: An options dict as read from the parser.
+      plugin_config: The configuration string of the plugin, or None.
+    Returns:
+      The list of entries returned by the last function of the plugin, and a
+      list of the errors of all its functions.
+    """
+    errors = []
+    for function_name in module.__plugins__:
+        if isinstance(function_name, str):
+            # Support plugin functions provided by name.
+            callback = getattr(module, function_name)
+        else:
+            # Support function types directly, not just names.
+            callback = function_name
+
+        if plugin_config is not None:
+            entries, plugin_errors = callback(entries, options_map, plugin_config)
+        else:
+            entries, plugin_errors = callback(entries, options_map)
+        errors.extend(plugin_errors)
+    return entries, errors
+
+
+def run_validation_plugins(plugins, entries, options_map, log_timings):
+    """Run validation plugins on the same entries in a pool of processes.
+
+    Each worker process is given a copy of the entries and options once, when
+    it starts, and returns the errors of the plugins it runs. The errors are
+    returned in the order of the plugins, as if they had been run serially. A
+    single plugin is run in the current process.
+
+    Args:
+      plugins: A list of (name, config) pairs of validation plugins.
+      entries: A list of directives.
+      options_map: An options dict as read from the parser.
+      log_timings: A function to write timing log entries to, or None, if it
+        should be quiet.
+    Returns:
+      A list of errors.
+    """
+    errors = []
+    if len(plugins) == 1:
+        (plugin_name, plugin_config), = plugins
+        with misc_utils.log_time(plugin_name, log_timings, indent=2), \
+             profiler.stage(plugin_name, 'plugin', entries) as counts:
+            try:
+                _, plugin_errors = run_plugin(importlib.import_module(plugin_name),
+                                              entries, options_map, plugin_config)
+                errors.extend(plugin_errors)
+            except (ImportError, TypeError) as exc:
+                errors.append(plugin_import_error(plugin_name, exc))
+            counts.entries_out = len(entries)
+        return errors
+
+    with misc_utils.log_time('beancount.loader.run_validation_plugins',
+                             log_timings, indent=2), \
+         profiler.stage('beancount.loader.run_validation_plugins', 'plugin', entries,
+                        cprofile=False) as counts, \
+         futures.ProcessPoolExecutor(max_workers=min(PLUGIN_PROCESSES, len(plugins)),
+                                     initializer=_set_validation_snapshot,
+                                     initargs=(entries, options_map)) as executor:
+        plugin_futures = [executor.submit(_run_validation_plugin, plugin_name,
+                                          plugin_config)
+                          for plugin_name, plugin_config in plugins]
+        for (plugin_name, _), future in zip(plugins, plugin_futures):
+            try:
+                errors.extend(future.result())
+            except (ImportError, TypeError) as exc:
+                errors.append(plugin_import_error(plugin_name, exc))
+        counts.entries_out = len(entries)
+    return errors
+
+
+def plugin_import_error(plugin_name, exc):
+    """Create the error of a plugin which failed to import or run.
+
+    Args:
+      plugin_name: A string, the name of the plugin module.
+      exc: The exception raised.
+    Returns:
+      An instance of LoadError.
+    """
+    return LoadError(data.new_metadata("<load>", 0),
+                     'Error importing "{}": {}'.format(plugin_name, str(exc)), None)
+
+
+# The entries and options map the validation plugins are run on, in a worker
+# process of run_validation_plugins().
+_VALIDATION_SNAPSHOT = None
+
+
+def _set_validation_snapshot(entries, options_map):
+    """Set the entries and options to run validation plugins on in this process.
+
+    Args:
+      entries: A list of directives.
+      options_map: An options dict as read from the parser.
+    """
+    global _VALIDATION_SNAPSHOT  # pylint: disable=global-statement
+    _VALIDATION_SNAPSHOT = (entries, options_map)
+
+
+def _run_validation_plugin(plugin_name, plugin_config):
+    """Run a validation plugin on the entries of this worker process.
+
+    Args:
+      plugin_name: A string, the name of the plugin module.
+      plugin_config: The configuration string of the plugin, or None.
+    Returns:
+      A list of errors.
+    """
+    entries, options_map = _VALIDATION_SNAPSHOT
+    module = importlib.import_module(plugin_name)
+    _, errors = run_plugin(module, entries, options_map, plugin_config)
+    return errors
+
+
+def merge_appended_entries(entries, num_sorted):
+    """Merge entries appended to a sorted list of entries into it.
+
+    This produces the same list as a stable sort of all the entries, but only
+    computes the sort keys of the appended entries and of those of the sorted
+    entries compared with them.
+
+    Args:
+      entries: A list of directives, the first 'num_sorted' of which are sorted.
+      num_sorted: An integer, the number of sorted entries.
+    Returns:
+      A sorted list of directives.
+    """
+    if len(entries) == num_sorted:
+        return entries
+    merged_entries = []
+    index = 0
+    for entry in sorted(entries[num_sorted:], key=data.entry_sortkey):
+        # Insert after the sorted entries with the same key, as a stable sort
+        # would.
+        next_index = bisect_key.bisect_right_with_key(
+            entries, data.entry_sortkey(entry), data.entry_sortkey, index, num_sorted)
+        merged_entries.extend(entries[index:next_index])
+        merged_entries.append(entry)
+        index = next_index
+    merged_entries.extend(entries[index:num_sorted])
+    return merged_entries
+
+
+def combine_plugins(*plugin_modules):
+    """Combine the plugins from the given plugin modules.
+
+    This is used to create plugins of plugins.
+    Args:
+      *plugins_modules: A sequence of module objects.
+    Returns:
+      A list that can be assigned to the new module's __plugins__ attribute.
+    """
+    modules = []
+    for module in plugin_modules:
+        modules.extend([getattr(module, name)
+                        for name in module.__plugins__])
+    return modules
+
+
+def load_doc(expect_errors=False):
+    """A factory of decorators that loads the docstring and calls the function with entries.
+
+    This is an incredibly convenient tool to write lots of tests. Write a
+    unittest using the standard TestCase class and put the input entries in the
+    function's docstring.
+
+    Args:
+      expect_errors: A boolean or None, with the following semantics,
+        True: Expect errors and fail if there are none.
+        False: Expect no errors and fail if there are some.
+        None: Do nothing, no check.
+    Returns:
+      A wrapped method that accepts a single 'self' argument.
+    """
+    def decorator(fun):
+        """A decorator that parses the function's docstring as an argument.
+
+        Args:
+          fun: A callable method, that accepts the three return arguments that
+              load() returns.
+        Returns:
+          A decorated test function.
+        """
+        @functools.wraps(fun)
+        def wrapper(self):
+            entries, errors, options_map = load_string(fun.__doc__, dedent=True)
+
+            if expect_errors is not None:
+                if expect_errors is False and errors:
+                    oss = io.StringIO()
+                    printer.print_errors(errors, file=oss)
+                    self.fail("Unexpected errors found:\n{}".format(oss.getvalue()))
+                elif expect_errors is True and not errors:
+                    self.fail("Expected errors, none found:")
+
+            # Note: Even if we expected no errors, we call this function with an
+            # empty 'errors' list. This is so that the interface does not change
+            # based on the arguments to the decorator, which would be somewhat
+            # ugly and which would require explanation.
+            return fun(self, entries, errors, options_map)
+
+        wrapper.__input__ = wrapper.__doc__
+        wrapper.__doc__ = None
+        return wrapper
+
+    return decorator
+
+
+def initialize():
+    """Initialize the loader."""
+
+    # Unless an environment variable disables it, use the pickle load cache
+    # automatically.
+    # pylint: disable=invalid-name
+    global _load_file, _parse_file, PARSE_PROCESSES, PLUGIN_PROCESSES
+    global BOOKING_CACHE_FILENAME
+    if os.getenv('BEANCOUNT_DISABLE_LOAD_CACHE') is None:
+        _load_file = pickle_cache_function(
+            os.getenv('BEANCOUNT_LOAD_CACHE_FILENAME') or PICKLE_CACHE_FILENAME,
+            PICKLE_CACHE_THRESHOLD,
+            _uncached_load_file)
+
+    # Unless an environment variable disables it, cache the parser output of
+    # each of the input files as well. This is used when the load cache above
+    # misses, so that only the modified files have to be parsed again.
+    if os.getenv('BEANCOUNT_DISABLE_PARSE_CACHE') is None:
+        _parse_file = parse_cache_function(
+            os.getenv('BEANCOUNT_PARSE_CACHE_FILENAME') or PARSE_CACHE_FILENAME,
+            PARSE_CACHE_THRESHOLD,
+            _uncached_parse_file)
+
+    # Unless an environment variable disables it, checkpoint the balances during
+    # booking of large ledgers, in order to resume from there on the next load.
+    if os.getenv('BEANCOUNT_DISABLE_BOOKING_CACHE') is not None:
+        BOOKING_CACHE_FILENAME = None
+
+    # Parse the included files in parallel if an environment variable requests
+    # it, with the given number of worker processes.
+    if os.getenv('BEANCOUNT_PARSE_PROCESSES'):
+        PARSE_PROCESSES = int(os.getenv('BEANCOUNT_PARSE_PROCESSES'))
+
+    # Run the validation plugins in parallel if an environment variable requests
+    # it, with the given number of worker processes.
+    if os.getenv('BEANCOUNT_PLUGIN_PROCESSES'):
+        PLUGIN_PROCESSES = int(os.getenv('BEANCOUNT_PLUGIN_PROCESSES'))
+
+initialize()
@@ -0,0 +1,776 @@
+__copyright__ = "Copyright (C) 2014-2016  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import logging
+import unittest
+import tempfile
+import textwrap
+import os
+import sys
+import types
+from unittest import mock
+from os import path
+
+from beancount import loader
+from beancount.core import data
+from beancount.parser import parser
+from beancount.utils import test_utils
+from beancount.utils import encryption_test
+
+
+TEST_INPUT = """
+
+2014-01-01 open Assets:MyBank:Checking   USD
+2014-01-01 open Expenses:Restaurant   USD
+
+2014-02-22 * "Something happened."
+  Assets:MyBank:Checking       100.00 USD
+  Expenses:Restaurant         -100.00 USD
+
+2015-01-01 close Assets:MyBank:Checking
+2015-01-01 close Expenses:Restaurant
+
+"""
+
+
+class TestLoader(unittest.TestCase):
+
+    def test_run_transformations(self):
+        # Test success case.
+        entries, errors, options_map = parser.parse_string(TEST_INPUT)
+        trans_entries, trans_errors = loader.run_transformations(
+            entries, errors, options_map, None)
+        self.assertEqual(0, len(trans_errors))
+
+        # Test an invalid plugin name.
+        entries, errors, options_map = parser.parse_string(
+            'plugin "invalid.module.name"\n\n' + TEST_INPUT)
+        trans_entries, trans_errors = loader.run_transformations(
+            entries, errors, options_map, None)
+        self.assertEqual(1, len(trans_errors))
+
+    def test_run_transformations_plugins_order(self):
+        # A plugin which reverses the entries and appends a copy of the first.
+        def reverse_and_append(entries, unused_options_map):
+            return entries[::-1] + [entries[0]._replace(meta=dict(entries[0].meta))], []
+
+        entries, errors, options_map = parser.parse_string(
+            'plugin "beancount_test_plugin"\n\n' + TEST_INPUT)
+        expected_entries = data.sorted(entries + [entries[0]])
+        for plugins_order, sorted_ in [(None, True),
+                                       (loader.PLUGIN_ORDER_SORTED, False),
+                                       (loader.PLUGIN_ORDER_APPENDED, False)]:
+            module = types.ModuleType('beancount_test_plugin')
+            module.__plugins__ = (reverse_and_append,)
+            if plugins_order:
+                module.__plugins_order__ = plugins_order
+            options_map['plugin_processing_mode'] = 'raw'
+            with mock.patch.dict(sys.modules, {'beancount_test_plugin': module}):
+                trans_entries, trans_errors = loader.run_transformations(
+                    list(entries), errors, options_map, None)
+            self.assertFalse(trans_errors)
+            # The loader trusts the plugins which declare that their entries are
+            # sorted, and the prefix of the entries appended to is left reversed.
+            self.assertEqual(sorted_, trans_entries == expected_entries)
+
+        # Appended entries are merged.
+        def append(entries, unused_options_map):
+            return entries + [entry._replace(meta=dict(entry.meta))
+                              for entry in entries[::-1]], []
+        module = types.ModuleType('beancount_test_plugin')
+        module.__plugins__ = (append,)
+        module.__plugins_order__ = loader.PLUGIN_ORDER_APPENDED
+        with mock.patch.dict(sys.modules, {'beancount_test_plugin': module}):
+            trans_entries, trans_errors = loader.run_transformations(
+                list(entries), errors, options_map, None)
+        self.assertEqual(data.sorted(entries + entries[::-1]), trans_entries)
+
+    def test_run_transformations_validation_plugins(self):
+        input_string = textwrap.dedent("""
+          plugin "beancount.plugins.leafonly"
+          plugin "beancount.plugins.nounused"
+          plugin "beancount.plugins.does_not_exist"
+          plugin "beancount.plugins.onecommodity"
+          plugin "beancount.plugins.auto_accounts"
+          plugin "beancount.plugins.noduplicates"
+          plugin "beancount.plugins.coherent_cost"
+
+          2014-01-01 open Assets:Cash
+          2014-01-01 open Assets:Unused
+          2014-01-01 open Expenses:Food
+          2014-01-01 open Expenses:Food:Restaurant
+
+          2014-02-01 * "Leaf only"
+            Expenses:Food    10 USD
+            Assets:Cash
+
+          2014-02-02 * "Duplicate"
+            Expenses:Food:Restaurant    20 CAD
+            Assets:Cash
+
+          2014-02-02 * "Duplicate"
+            Expenses:Food:Restaurant    20 CAD
+            Assets:Cash
+
+          2014-02-03 * "Incoherent cost"
+            Assets:Stock     1 HOOL {10 USD}
+            Assets:Cash
+            Assets:Other     1 HOOL
+        """)
+        entries, errors, _ = loader.load_string(input_string)
+        self.assertEqual(6, len(errors))
+
+        with mock.patch.object(loader, 'PLUGIN_PROCESSES', 3), \
+             mock.patch.object(loader, 'run_validation_plugins',
+                               wraps=loader.run_validation_plugins) as run_validation:
+            p_entries, p_errors, _ = loader.load_string(input_string)
+        self.assertEqual(3, run_validation.call_count)
+        self.assertEqual(entries, p_entries)
+        self.assertEqual([(type(error).__name__, error.message) for error in errors],
+                         [(type(error).__name__, error.message) for error in p_errors])
+
+    def test_merge_appended_entries(self):
+        entries, _, __ = parser.parse_string(TEST_INPUT)
+        self.assertIs(entries, loader.merge_appended_entries(entries, len(entries)))
+        for num_sorted in range(len(entries) + 1):
+            all_entries = entries[:num_sorted] + [entry._replace(meta=dict(entry.meta))
+                                                  for entry in entries[::-1]]
+            merged_entries = loader.merge_appended_entries(all_entries, num_sorted)
+            self.assertEqual(len(all_entries), len(merged_entries))
+            self.assertEqual(data.sorted(all_entries), merged_entries)
+            # The order of entries with equal keys is that of a stable sort.
+            self.assertEqual([id(entry) for entry in data.sorted(all_entries)],
+                             [id(entry) for entry in merged_entries])
+
+    def test_load(self):
+        with test_utils.capture():
+            with tempfile.NamedTemporaryFile('w') as tmpfile:
+                tmpfile.write(TEST_INPUT)
+                tmpfile.flush()
+                entries, errors, options_map = loader.load_file(tmpfile.name)
+                self.assertTrue(isinstance(entries, list))
+                self.assertTrue(isinstance(errors, list))
+                self.assertTrue(isinstance(options_map, dict))
+
+                entries, errors, options_map = loader.load_file(tmpfile.name,
+                                                                log_timings=logging.info)
+                self.assertTrue(isinstance(entries, list))
+                self.assertTrue(isinstance(errors, list))
+                self.assertTrue(isinstance(options_map, dict))
+
+    def test_load_string(self):
+        with test_utils.capture():
+            entries, errors, options_map = loader.load_string(TEST_INPUT)
+            self.assertTrue(isinstance(entries, list))
+            self.assertTrue(isinstance(errors, list))
+            self.assertTrue(isinstance(options_map, dict))
+
+            entries, errors, options_map = loader.load_string(TEST_INPUT,
+                                                              log_timings=logging.info)
+            self.assertTrue(isinstance(entries, list))
+            self.assertTrue(isinstance(errors, list))
+            self.assertTrue(isinstance(options_map, dict))
+
+    def test_load_nonexist(self):
+        entries, errors, options_map = loader.load_file('/some/bullshit/filename.beancount')
+        self.assertEqual([], entries)
+        self.assertTrue(errors)
+        self.assertRegex(errors[0].message, 'does not exist')
+
+    @mock.patch.dict(loader.RENAMED_MODULES,
+                     {"beancount.ops.auto_accounts": "beancount.plugins.auto_accounts"},
+                     clear=True)
+    @mock.patch('warnings.warn')
+    def test_renamed_plugin_warnings(self, warn):
+        with test_utils.capture('stderr'):
+            entries, errors, options_map = loader.load_string("""
+              plugin "beancount.ops.auto_accounts"
+            """, dedent=True)
+        self.assertTrue(warn.called)
+        self.assertFalse(errors)
+
+
+class TestLoadDoc(unittest.TestCase):
+
+    def test_load_doc(self):
+        def test_function(self_, entries, errors, options_map):
+            self.assertTrue(isinstance(entries, list))
+            self.assertTrue(isinstance(errors, list))
+            self.assertTrue(isinstance(options_map, dict))
+
+        test_function.__doc__ = TEST_INPUT
+        test_function = loader.load_doc(test_function)
+        test_function(self)
+
+    # pylint: disable=empty-docstring
+    @loader.load_doc()
+    def test_load_doc_empty(self, entries, errors, options_map):
+        """
+        """
+        self.assertTrue(isinstance(entries, list))
+        self.assertTrue(isinstance(errors, list))
+        self.assertFalse(errors)
+        self.assertTrue(isinstance(options_map, dict))
+
+    @loader.load_doc(expect_errors=True)
+    def test_load_doc_plugin(self, entries, errors, options_map):
+        """
+        plugin "beancount.does.not.exist"
+        """
+        self.assertTrue(isinstance(entries, list))
+        self.assertTrue(isinstance(options_map, dict))
+        self.assertTrue([loader.LoadError], list(map(type, errors)))
+
+    def test_load_doc_plugin_auto_pythonpath(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ledger_fn = path.join(tmpdir, 'my.beancount')
+            with open(ledger_fn, 'w') as ledger_file:
+                ledger_file.write('option "insert_pythonpath" "TRUE"\n')
+                ledger_file.write('plugin "localplugin"\n')
+
+            plugin_fn = path.join(tmpdir, 'localplugin.py')
+            with open(plugin_fn, 'w') as plugin_file:
+                plugin_file.write(textwrap.dedent("""\
+                  __plugins__ = ()
+                """))
+            entries, errors, options_map = loader.load_file(ledger_fn)
+            self.assertTrue(isinstance(entries, list))
+            self.assertTrue(isinstance(errors, list))
+            self.assertTrue(isinstance(options_map, dict))
+            self.assertFalse(errors)
+
+
+class TestLoadIncludes(unittest.TestCase):
+
+    def test_load_file_no_includes(self):
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  2014-01-01 open Assets:Apples
+                """})
+            entries, errors, options_map = loader.load_file(
+                path.join(tmp, 'apples.beancount'))
+            self.assertEqual(0, len(errors))
+            self.assertEqual(['apples.beancount'],
+                             list(map(path.basename, options_map['include'])))
+
+    def test_load_file_nonexist(self):
+        entries, errors, options_map = loader.load_file('/bull/bla/root.beancount')
+        self.assertEqual(1, len(errors))
+        self.assertRegex(errors[0].message, 'does not exist')
+        self.assertEqual([], list(map(path.basename, options_map['include'])))
+
+    def test_load_file_with_nonexist_include(self):
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'root.beancount': """
+                  include "/some/file/that/does/not/exist.beancount"
+                """})
+            entries, errors, options_map = loader.load_file(
+                path.join(tmp, 'root.beancount'))
+            self.assertEqual(1, len(errors))
+            self.assertRegex(errors[0].message, 'does not (match any|exist)')
+        self.assertEqual(['root.beancount'],
+                         list(map(path.basename, options_map['include'])))
+
+    def test_load_file_with_absolute_include(self):
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  include "{root}/fruits/oranges.beancount"
+                  2014-01-01 open Assets:Apples
+                """,
+                'fruits/oranges.beancount': """
+                  2014-01-02 open Assets:Oranges
+                """})
+            entries, errors, options_map = loader.load_file(
+                path.join(tmp, 'apples.beancount'))
+        self.assertFalse(errors)
+        self.assertEqual(2, len(entries))
+        self.assertEqual(['apples.beancount', 'oranges.beancount'],
+                         list(map(path.basename, options_map['include'])))
+
+    def test_load_file_with_relative_include(self):
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  include "fruits/oranges.beancount"
+                  2014-01-01 open Assets:Apples
+                """,
+                'fruits/oranges.beancount': """
+                  2014-01-02 open Assets:Oranges
+                """})
+            entries, errors, options_map = loader.load_file(
+                path.join(tmp, 'apples.beancount'))
+        self.assertFalse(errors)
+        self.assertEqual(2, len(entries))
+        self.assertEqual(['apples.beancount', 'oranges.beancount'],
+                         list(map(path.basename, options_map['include'])))
+
+    def test_load_file_with_multiple_includes(self):
+        # Including recursive includes and mixed and absolute.
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  include "fruits/oranges.beancount"
+                  include "{root}/legumes/patates.beancount"
+                  2014-01-01 open Assets:Apples
+                """,
+                'fruits/oranges.beancount': """
+                  include "../legumes/tomates.beancount"
+                  2014-01-02 open Assets:Oranges
+                """,
+                'legumes/tomates.beancount': """
+                  2014-01-03 open Assets:Tomates
+                """,
+                'legumes/patates.beancount': """
+                  2014-01-04 open Assets:Patates
+                """})
+            entries, errors, options_map = loader.load_file(
+                path.join(tmp, 'apples.beancount'))
+        self.assertFalse(errors)
+        self.assertEqual(4, len(entries))
+        self.assertEqual(['apples.beancount', 'oranges.beancount',
+                          'patates.beancount', 'tomates.beancount'],
+                         list(map(path.basename, options_map['include'])))
+
+    def test_load_file_with_duplicate_includes(self):
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  include "fruits/oranges.beancount"
+                  include "{root}/legumes/tomates.beancount"
+                  2014-01-01 open Assets:Apples
+                """,
+                'fruits/oranges.beancount': """
+                  include "../legumes/tomates.beancount"
+                  2014-01-02 open Assets:Oranges
+                """,
+                'legumes/tomates.beancount': """
+                  2014-01-03 open Assets:Tomates
+                """,
+                'legumes/patates.beancount': """
+                  2014-01-04 open Assets:Patates
+                """})
+            entries, errors, options_map = loader.load_file(
+                path.join(tmp, 'apples.beancount'))
+        self.assertTrue(errors)
+        self.assertEqual(3, len(entries))
+        self.assertEqual(['apples.beancount', 'oranges.beancount', 'tomates.beancount'],
+                         list(map(path.basename, options_map['include'])))
+
+    def test_load_string_with_relative_include(self):
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  include "fruits/oranges.beancount"
+                  2014-01-01 open Assets:Apples
+                """,
+                'fruits/oranges.beancount': """
+                  2014-01-02 open Assets:Oranges
+                """})
+            try:
+                cwd = os.getcwd()
+                os.chdir(tmp)
+                entries, errors, options_map = loader.load_file(
+                    path.join(tmp, 'apples.beancount'))
+            finally:
+                os.chdir(cwd)
+        self.assertFalse(errors)
+        self.assertEqual(2, len(entries))
+        self.assertEqual(['apples.beancount', 'oranges.beancount'],
+                         list(map(path.basename, options_map['include'])))
+
+    def test_load_file_return_include_filenames(self):
+        # Also check that they are normalized paths.
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  include "oranges.beancount"
+                  2014-01-01 open Assets:Apples
+                """,
+                'oranges.beancount': """
+                  include "bananas.beancount"
+                  2014-01-02 open Assets:Oranges
+                """,
+                'bananas.beancount': """
+                  2014-01-02 open Assets:Bananas
+                """})
+            entries, errors, options_map = loader.load_file(
+                path.join(tmp, 'apples.beancount'))
+        self.assertFalse(errors)
+        self.assertEqual(3, len(entries))
+        self.assertTrue(all(path.isabs(filename)
+                            for filename in options_map['include']))
+        self.assertEqual(['apples.beancount', 'bananas.beancount', 'oranges.beancount'],
+                         list(map(path.basename, options_map['include'])))
+
+
+class TestLoadIncludesParallel(unittest.TestCase):
+
+    def _create_ledger(self, tmp):
+        test_utils.create_temporary_files(tmp, {
+            'apples.beancount': """
+              option "operating_currency" "USD"
+              include "fruits/*.beancount"
+              include "fruits/oranges.beancount"
+              2014-01-01 open Assets:Apples
+            """,
+            'fruits/oranges.beancount': """
+              option "operating_currency" "CAD"
+              include "../bananas.beancount"
+              2014-01-02 open Assets:Oranges
+            """,
+            'fruits/lemons.beancount': """
+              option "operating_currency" "EUR"
+              2014-01-03 open Assets:Lemons
+            """,
+            'bananas.beancount': """
+              option "operating_currency" "JPY"
+              2014-01-04 open Assets:Bananas
+            """})
+        return path.join(tmp, 'apples.beancount')
+
+    def test_load_file_parallel(self):
+        with test_utils.tempdir() as tmp:
+            top_filename = self._create_ledger(tmp)
+            with mock.patch('beancount.loader._load_file', loader._uncached_load_file):
+                entries, errors, options_map = loader.load_file(top_filename)
+                with mock.patch('beancount.loader.PARSE_PROCESSES', 3):
+                    p_entries, p_errors, p_options_map = loader.load_file(top_filename)
+
+        self.assertEqual(4, len(p_entries))
+        self.assertEqual(entries, p_entries)
+        self.assertEqual(1, len(p_errors))
+        self.assertRegex(p_errors[0].message, 'Duplicate filename')
+        self.assertEqual([error.message for error in errors],
+                         [error.message for error in p_errors])
+        self.assertEqual({'USD', 'EUR', 'CAD', 'JPY'},
+                         set(p_options_map['operating_currency']))
+        self.assertEqual(options_map['operating_currency'],
+                         p_options_map['operating_currency'])
+        self.assertEqual(options_map['include'], p_options_map['include'])
+
+
+class TestLoadIncludesEncrypted(encryption_test.TestEncryptedBase):
+
+    def test_include_encrypted(self):
+        with test_utils.tempdir() as tmpdir:
+            test_utils.create_temporary_files(tmpdir, {
+                'apples.beancount': """
+                  include "oranges.beancount.asc"
+                  2014-01-01 open Assets:Apples
+                """,
+                'oranges.beancount': """
+                  2014-01-02 open Assets:Oranges
+                """})
+
+            # Encrypt the oranges file and remove the unencrypted file.
+            with open(path.join(tmpdir, 'oranges.beancount')) as infile:
+                self.encrypt_as_file(infile.read(),
+                                     path.join(tmpdir, 'oranges.beancount.asc'))
+            os.remove(path.join(tmpdir, 'oranges.beancount'))
+
+            # Load the top-level file which includes the encrypted file.
+            with test_utils.environ('GNUPGHOME', self.ringdir):
+                entries, errors, options_map = loader.load_file(
+                    path.join(tmpdir, 'apples.beancount'))
+
+        self.assertFalse(errors)
+        self.assertEqual(2, len(entries))
+        self.assertRegex(entries[0].meta['filename'], 'apples.beancount')
+        self.assertRegex(entries[1].meta['filename'], 'oranges.+count.asc')
+
+
+class TestLoadCache(unittest.TestCase):
+
+    def setUp(self):
+        self.num_calls = 0
+        mock.patch('beancount.loader._load_file',
+                   loader.pickle_cache_function(loader.PICKLE_CACHE_FILENAME,
+                                                0,  # No time threshold.
+                                                self._load_file)).start()
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def _load_file(self, filename, *args, **kw):
+        self.num_calls += 1
+        return loader._load([(filename, True)], *args, **kw)
+
+    def test_load_cache(self):
+        # Create an initial set of files and load file, thus creating a cache.
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  include "oranges.beancount"
+                  2014-01-01 open Assets:Apples
+                """,
+                'oranges.beancount': """
+                  include "bananas.beancount"
+                  2014-01-02 open Assets:Oranges
+                """,
+                'bananas.beancount': """
+                  2014-01-02 open Assets:Bananas
+                """})
+            top_filename = path.join(tmp, 'apples.beancount')
+            entries, errors, options_map = loader.load_file(top_filename)
+            self.assertFalse(errors)
+            self.assertEqual(3, len(entries))
+            self.assertEqual(1, self.num_calls)
+
+            # Make sure the cache was created.
+            self.assertTrue(path.exists(path.join(tmp, '.apples.beancount.picklecache')))
+
+            # Load the root file again, make sure the cache is being hit.
+            entries, errors, options_map = loader.load_file(top_filename)
+            self.assertEqual(1, self.num_calls)
+
+            # Touch the top-level file and ensure it's a cache miss.
+            with open(top_filename, 'a') as file:
+                file.write('\n')
+            entries, errors, options_map = loader.load_file(top_filename)
+            self.assertEqual(2, self.num_calls)
+
+            # Load the root file again, make sure the cache is being hit.
+            entries, errors, options_map = loader.load_file(top_filename)
+            self.assertEqual(2, self.num_calls)
+
+            # Touch the top-level file and ensure it's a cache miss.
+            with open(top_filename, 'a') as file:
+                file.write('\n')
+            entries, errors, options_map = loader.load_file(top_filename)
+            self.assertEqual(3, self.num_calls)
+
+    def test_load_cache_moved_file(self):
+        # Create an initial set of files and load file, thus creating a cache.
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  include "oranges.beancount"
+                  2014-01-01 open Assets:Apples
+                """,
+                'oranges.beancount': """
+                  2014-01-02 open Assets:Oranges
+                """})
+            top_filename = path.join(tmp, 'apples.beancount')
+            entries, errors, options_map = loader.load_file(top_filename)
+            self.assertFalse(errors)
+            self.assertEqual(2, len(entries))
+            self.assertEqual(1, self.num_calls)
+
+            # Make sure the cache was created.
+            self.assertTrue(path.exists(path.join(tmp, '.apples.beancount.picklecache')))
+
+            # Check that it doesn't need refresh
+            self.assertFalse(loader.needs_refresh(options_map))
+
+            # Move the input file.
+            new_top_filename = path.join(tmp, 'bigapples.beancount')
+            os.rename(top_filename, new_top_filename)
+
+            # Check that it needs refresh.
+            self.assertTrue(loader.needs_refresh(options_map))
+
+            # Load the root file again, make sure the cache is being hit.
+            entries, errors, options_map = loader.load_file(top_filename)
+            self.assertEqual(2, self.num_calls)
+
+    @mock.patch('os.remove', side_effect=OSError)
+    @mock.patch('logging.warning')
+    def test_load_cache_read_only_fs(self, remove_mock, warn_mock):
+        # Create an initial set of files and load file, thus creating a cache.
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  2014-01-01 open Assets:Apples
+                """})
+            filename = path.join(tmp, 'apples.beancount')
+            entries, errors, options_map = loader.load_file(filename)
+            with open(filename, 'w'): pass
+            entries, errors, options_map = loader.load_file(filename)
+            self.assertEqual(1, len(warn_mock.mock_calls))
+
+    @mock.patch('beancount.loader.PICKLE_CACHE_THRESHOLD', 0.0)
+    def test_load_cache_override_filename_pattern(self):
+        orig_load_file = loader._load_file
+        prev_env = os.getenv('BEANCOUNT_LOAD_CACHE_FILENAME')
+        os.environ['BEANCOUNT_LOAD_CACHE_FILENAME'] = '__{filename}__'
+        loader.initialize()
+        try:
+            with test_utils.tempdir() as tmp:
+                test_utils.create_temporary_files(tmp, {
+                    'apples.beancount': """
+                      2014-01-01 open Assets:Apples
+                    """})
+                filename = path.join(tmp, 'apples.beancount')
+                entries, errors, options_map = loader.load_file(filename)
+                self.assertEqual({'__apples.beancount__', 'apples.beancount'},
+                                 set(os.listdir(tmp)))
+        finally:
+            # Restore pre-test values.
+            loader._load_file = orig_load_file
+            if prev_env is None:
+                del os.environ['BEANCOUNT_LOAD_CACHE_FILENAME']
+            else:
+                os.environ['BEANCOUNT_LOAD_CACHE_FILENAME'] = prev_env
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.parsed_filenames = []
+        mock.patch('beancount.loader._parse_file',
+                   loader.parse_cache_function(loader.PARSE_CACHE_FILENAME,
+                                               0,  # No time threshold.
+                                               self._parse_file)).start()
+        # Disable the top-level cache in order to exercise the parser.
+        mock.patch('beancount.loader._load_file', loader._uncached_load_file).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def _parse_file(self, filename, *args, **kw):
+        self.parsed_filenames.append(path.basename(filename))
+        return parser.parse_file(filename, *args, **kw)
+
+    def test_parse_cache(self):
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  include "oranges.beancount"
+                  include "bananas.beancount"
+                  2014-01-01 open Assets:Apples
+                """,
+                'oranges.beancount': """
+                  2014-01-02 open Assets:Oranges
+                """,
+                'bananas.beancount': """
+                  2014-01-02 open Assets:Bananas
+                """})
+            top_filename = path.join(tmp, 'apples.beancount')
+            entries, errors, options_map = loader.load_file(top_filename)
+            self.assertFalse(errors)
+            self.assertEqual(3, len(entries))
+            self.assertEqual(['apples.beancount', 'oranges.beancount',
+                              'bananas.beancount'], self.parsed_filenames)
+
+            # Make sure the caches were created.
+            for filename in 'apples', 'oranges', 'bananas':
+                self.assertTrue(path.exists(
+                    path.join(tmp, '.{}.beancount.parsecache'.format(filename))))
+
+            # Load again, make sure the caches are being hit.
+            entries2, errors, options_map = loader.load_file(top_filename)
+            self.assertEqual(3, len(self.parsed_filenames))
+            self.assertEqual(entries, entries2)
+
+            # Modify a single included file and ensure only that one gets parsed.
+            with open(path.join(tmp, 'oranges.beancount'), 'a') as file:
+                file.write('2014-01-03 open Assets:Lemons\n')
+            entries, errors, options_map = loader.load_file(top_filename)
+            self.assertFalse(errors)
+            self.assertEqual(4, len(entries))
+            self.assertEqual(4, len(self.parsed_filenames))
+            self.assertEqual('oranges.beancount', self.parsed_filenames[-1])
+
+    def test_parse_cache_corrupted(self):
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  2014-01-01 open Assets:Apples
+                """})
+            filename = path.join(tmp, 'apples.beancount')
+            with open(path.join(tmp, '.apples.beancount.parsecache'), 'w') as file:
+                file.write('garbage')
+            with self.assertLogs(level='ERROR'):
+                entries, errors, options_map = loader.load_file(filename)
+            self.assertFalse(errors)
+            self.assertEqual(1, len(entries))
+            self.assertEqual(1, len(self.parsed_filenames))
+
+            # The cache file has been rewritten.
+            entries, errors, options_map = loader.load_file(filename)
+            self.assertEqual(1, len(self.parsed_filenames))
+
+
+class TestBookingCache(unittest.TestCase):
+
+    @mock.patch('beancount.loader.BOOKING_CACHE_MIN_ENTRIES', 0)
+    @mock.patch('beancount.loader._load_file', loader._uncached_load_file)
+    def test_booking_cache(self):
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': TEST_INPUT})
+            filename = path.join(tmp, 'apples.beancount')
+            entries, errors, options_map = loader.load_file(filename)
+            self.assertFalse(errors)
+            self.assertTrue(path.exists(path.join(tmp, '.apples.beancount.bookingcache')))
+
+            entries2, errors, options_map = loader.load_file(filename)
+            self.assertFalse(errors)
+            self.assertEqual(entries, entries2)
+
+    @mock.patch('beancount.loader.BOOKING_CACHE_MIN_ENTRIES', 0)
+    def test_booking_cache_string(self):
+        self.assertIsNone(loader.get_booking_cache_filename(
+            [(TEST_INPUT, False)], [], {'include': []}))
+
+
+class TestEncoding(unittest.TestCase):
+
+    def test_string_unicode(self):
+        utf8_bytes = textwrap.dedent("""
+          2015-01-01 open Assets:Something
+          2015-05-23 note Assets:Something "¡¢£¤¥¦§¨©ª«¬®¯°±²³´µ¶·¸¹º»¼ "
+        """).encode('utf-8')
+        entries, errors, options_map = loader.load_string(utf8_bytes, encoding='utf8')
+        self.assertFalse(errors)
+
+    def test_string_latin1(self):
+        utf8_bytes = textwrap.dedent("""
+          2015-01-01 open Assets:Something
+          2015-05-23 note Assets:Something "¡¢£¤¥¦§¨©ª«¬®¯°±²³´µ¶·¸¹º»¼ "
+        """).encode('latin1')
+        entries, errors, options_map = loader.load_string(utf8_bytes, encoding='latin1')
+        self.assertFalse(errors)
+
+
+class TestOptionsAggregation(unittest.TestCase):
+
+    def test_aggregate_operating_currencies(self):
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  include "oranges.beancount"
+                  include "bananas.beancount"
+                  option "operating_currency" "USD"
+                """,
+                'oranges.beancount': """
+                  option "operating_currency" "CAD"
+                """,
+                'bananas.beancount': """
+                  option "operating_currency" "EUR"
+                """})
+            top_filename = path.join(tmp, 'apples.beancount')
+            entries, errors, options_map = loader.load_file(top_filename)
+
+            self.assertEqual({'USD', 'EUR', 'CAD'}, set(options_map['operating_currency']))
+
+    def test_aggregate_commodities(self):
+        with test_utils.tempdir() as tmp:
+            test_utils.create_temporary_files(tmp, {
+                'apples.beancount': """
+                  include "oranges.beancount"
+                  include "bananas.beancount"
+                  option "operating_currency" "USD"
+                """,
+                'oranges.beancount': """
+                  2015-12-12 open Assets:CA:Checking  CAD
+                """,
+                'bananas.beancount': """
+                  2015-12-13 open Assets:FR:Checking  EUR
+                """})
+            top_filename = path.join(tmp, 'apples.beancount')
+            entries, errors, options_map = loader.load_file(top_filename)
+
+            self.assertEqual({'EUR', 'CAD'}, options_map['commodities'])
@@ -0,0 +1,680 @@
+"""Validation checks.
+
+These checks are intended to be run after all the plugins have transformed the
+list of entries, just before serving them or generating reports from them. The
+idea is to ensure a reasonable set of invariants and generate errors if those
+invariants are violated. They are not sanity checks--user data is subject to
+constraints which are hopefully detected here and which will result in errors
+trickled up to the user.
+"""
+__copyright__ = "Copyright (C) 2013-2016  Martin Blais"
+__license__ = "GNU GPLv2"
+
+from os import path
+import collections
+
+from beancount.core.data import Open
+from beancount.core.data import Close
+from beancount.core.data import Transaction
+from beancount.core.data import Document
+from beancount.core.data import Note
+from beancount.core.number import Decimal
+from beancount.core.number import ZERO
+from beancount.core import convert
+from beancount.core import data
+from beancount.core import getters
+from beancount.core import interpolate
+from beancount.utils import misc_utils
+from beancount.utils import profiler
+
+
+# An error from one of the checks.
+ValidationError = collections.namedtuple('ValidationError', 'source message entry')
+
+
+# Directive types that should be allowed after the account is closed.
+ALLOW_AFTER_CLOSE = (Document, Note)
+
+
+def validate_open_close(entries, unused_options_map):
+    """Check constraints on open and close directives themselves.
+
+    This method checks two kinds of constraints:
+
+    1. An open or a close directive may only show up once for each account. If a
+       duplicate is detected, an error is generated.
+
+    2. Close directives may only appears if an open directive has been seen
+       previous (chronologically).
+
+    3. The date of close directives must be strictly greater than their
+      corresponding open directive.
+
+    Args:
+      entries: A list of directives.
+      unused_options_map: An options map.
+    Returns:
+      A list of new errors, if any were found.
+    """
+    errors = []
+    open_map = {}
+    close_map = {}
+    for entry in entries:
+
+        if isinstance(entry, Open):
+            if entry.account in open_map:
+                errors.append(
+                    ValidationError(
+                        entry.meta,
+                        "Duplicate open directive for {}".format(entry.account),
+                        entry))
+            else:
+                open_map[entry.account] = entry
+
+        elif isinstance(entry, Close):
+            if entry.account in close_map:
+                errors.append(
+                    ValidationError(
+                        entry.meta,
+                        "Duplicate close directive for {}".format(entry.account),
+                        entry))
+            else:
+                try:
+                    open_entry = open_map[entry.account]
+                    if entry.date <= open_entry.date:
+                        errors.append(
+                            ValidationError(
+                                entry.meta,
+                                "Internal error: closing date for {} "
+                                "appears before opening date".format(entry.account),
+                                entry))
+                except KeyError:
+                    errors.append(
+                        ValidationError(
+                            entry.meta,
+                            "Unopened account {} is being closed".format(entry.account),
+                            entry))
+
+                close_map[entry.account] = entry
+
+    return errors
+
+
+def validate_duplicate_balances(entries, unused_options_map):
+    """Check that balance entries occur only once per day.
+
+    Because we do not support time, and the declaration order of entries is
+    meant to be kept irrelevant, two balance entries with different amounts
+    should not occur in the file. We do allow two identical balance assertions,
+    however, because this may occur during import.
+
+    Args:
+      entries: A list of directives.
+      unused_options_map: An options map.
+    Returns:
+      A list of new errors, if any were found.
+    """
+    errors = []
+
+    # Mapping of (account, currency, date) to Balance entry.
+    balance_entries = {}
+    for entry in entries:
+        if not isinstance(entry, data.Balance):
+            continue
+
+        key = (entry.account, entry.amount.currency, entry.date)
+        try:
+            previous_entry = balance_entries[key]
+            if entry.amount != previous_entry.amount:
+                errors.append(
+                    ValidationError(
+                        entry.meta,
+                        "Duplicate balance assertion with different amounts",
+                        entry))
+        except KeyError:
+            balance_entries[key] = entry
+
+    return errors
+
+
+def validate_duplicate_commodities(entries, unused_options_map):
+    """Check that commodty entries are unique for each commodity.
+
+    Args:
+      entries: A list of directives.
+      unused_options_map: An options map.
+    Returns:
+      A list of new errors, if any were found.
+    """
+    errors = []
+
+    # Mapping of (account, currency, date) to Balance entry.
+    commodity_entries = {}
+    for entry in entries:
+        if not isinstance(entry, data.Commodity):
+            continue
+
+        key = entry.currency
+        try:
+            previous_entry = commodity_entries[key]
+            if previous_entry:
+                errors.append(
+                    ValidationError(
+                        entry.meta,
+                        "Duplicate commodity directives for '{}'".format(key),
+                        entry))
+        except KeyError:
+            commodity_entries[key] = entry
+
+    return errors
+
+
+def validate_active_accounts(entries, unused_options_map):
+    """Check that all references to accounts occurs on active accounts.
+
+    We basically check that references to accounts from all directives other
+    than Open and Close occur at dates the open-close interval of that account.
+    This should be good for all of the directive types where we can extract an
+    account name.
+
+    Note that this is more strict a check than comparing the dates: we actually
+    check that no references to account are made on the same day before the open
+    directive appears for that account. This is a nice property to have, and is
+    supported by our custom sorting routine that will sort open entries before
+    transaction entries, given the same date.
+
+    Args:
+      entries: A list of directives.
+      unused_options_map: An options map.
+    Returns:
+      A list of new errors, if any were found.
+    """
+    error_pairs = []
+    active_set = set()
+    opened_accounts = set()
+    for entry in entries:
+        if isinstance(entry, data.Open):
+            active_set.add(entry.account)
+            opened_accounts.add(entry.account)
+
+        elif isinstance(entry, data.Close):
+            active_set.discard(entry.account)
+
+        else:
+            for account in getters.get_entry_accounts(entry):
+                if account not in active_set:
+                    # Allow document and note directives that occur after an
+                    # account is closed.
+                    if (isinstance(entry, ALLOW_AFTER_CLOSE) and
+                        account in opened_accounts):
+                        continue
+
+                    # Register an error to be logged later, with an appropriate
+                    # message.
+                    error_pairs.append((account, entry))
+
+    # Refine the error message to disambiguate between the case of an account
+    # that has never been seen and one that was simply not active at the time.
+    errors = []
+    for account, entry in error_pairs:
+        if account in opened_accounts:
+            message = "Invalid reference to inactive account '{}'".format(account)
+        else:
+            message = "Invalid reference to unknown account '{}'".format(account)
+        errors.append(ValidationError(entry.meta, message, entry))
+
+    return errors
+
+
+def validate_currency_constraints(entries, options_map):
+    """Check the currency constraints from account open declarations.
+
+    Open directives admit an optional list of currencies that specify the only
+    types of commodities that the running inventory for this account may
+    contain. This function checks that all postings are only made in those
+    commodities.
+
+    Args:
+      entries: A list of directives.
+      unused_options_map: An options map.
+    Returns:
+      A list of new errors, if any were found.
+    """
+
+    # Get all the open entries with currency constraints.
+    open_map = {entry.account: entry
+                for entry in entries
+                if isinstance(entry, Open) and entry.currencies}
+
+    errors = []
+    for entry in entries:
+        if not isinstance(entry, Transaction):
+            continue
+
+        for posting in entry.postings:
+            # Look up the corresponding account's valid currencies; skip the
+            # check if there are none specified.
+            try:
+                open_entry = open_map[posting.account]
+                valid_currencies = open_entry.currencies
+                if not valid_currencies:
+                    continue
+            except KeyError:
+                continue
+
+            # Perform the check.
+            if posting.units.currency not in valid_currencies:
+                errors.append(
+                    ValidationError(
+                        entry.meta,
+                        "Invalid currency {} for account '{}'".format(
+                            posting.units.currency, posting.account),
+                        entry))
+
+    return errors
+
+
+def validate_documents_paths(entries, options_map):
+    """Check that all filenames in resolved Document entries are absolute filenames.
+
+    The processing of document entries is assumed to result in absolute paths.
+    Relative paths are resolved at the parsing stage and at point we want to
+    make sure we don't have to do any further processing on them.
+
+    Args:
+      entries: A list of directives.
+      unused_options_map: An options map.
+    Returns:
+      A list of new errors, if any were found.
+    """
+    return [ValidationError(entry.meta, "Invalid relative path for entry", entry)
+            for entry in entries
+            if (isinstance(entry, Document) and
+                not path.isabs(entry.filename))]
+
+
+def validate_data_types(entries, options_map):
+    """Check that all the data types of the attributes of entries are as expected.
+
+    Users are provided with a means to filter the list of entries. They're able to
+    write code that manipulates those tuple objects without any type constraints.
+    With discipline, this mostly works, but I know better: check, just to make sure.
+    This routine checks all the data types and assumptions on entries.
+
+    Args:
+      entries: A list of directives.
+      unused_options_map: An options map.
+    Returns:
+      A list of new errors, if any were found.
+    """
+    errors = []
+    for entry in entries:
+        try:
+            data.sanity_check_types(
+                entry, options_map["allow_deprecated_none_for_tags_and_links"])
+        except AssertionError as exc:
+            errors.append(
+                ValidationError(entry.meta,
+                                "Invalid data types: {}".format(exc),
+                                entry))
+    return errors
+
+
+def validate_check_transaction_balances(entries, options_map):
+    """Check again that all transaction postings balance, as users may have
+    transformed transactions.
+
+    Args:
+      entries: A list of directives.
+      unused_options_map: An options map.
+    Returns:
+      A list of new errors, if any were found.
+    """
+    # Note: this is a bit slow; we could limit our checks to the original
+    # transactions by using the hash function in the loader.
+    errors = []
+    for entry in entries:
+        if isinstance(entry, Transaction):
+            # IMPORTANT: This validation is _crucial_ and cannot be skipped.
+            # This is where we actually detect and warn on unbalancing
+            # transactions. This _must_ come after the user routines, because
+            # unbalancing input is legal, as those types of transactions may be
+            # "fixed up" by a user-plugin. In other words, we want to allow
+            # users to input unbalancing transactions as long as the final
+            # transactions objects that appear on the stream (after processing
+            # the plugins) are balanced. See {9e6c14b51a59}.
+            #
+            # Detect complete sets of postings that have residual balance;
+            residual = interpolate.compute_residual(entry.postings)
+            tolerances = interpolate.infer_tolerances(entry.postings, options_map)
+            if not residual.is_small(tolerances):
+                errors.append(
+                    ValidationError(entry.meta,
+                                    "Transaction does not balance: {}".format(residual),
+                                    entry))
+
+    return errors
+
+
+def _transaction_is_balanced(entry, tolerances):
+    """Check that the residual of a transaction is small.
+
+    This is equivalent to calling is_small() on the result of
+    interpolate.compute_residual() but sums the weights of the postings in a
+    dict instead of an inventory, which is much faster.
+
+    Args:
+      entry: An instance of Transaction.
+      tolerances: A dict of currency to tolerance, as from
+        interpolate.infer_tolerances().
+    Returns:
+      A boolean, true if the transaction balances.
+    """
+    residual = {}
+    for posting in entry.postings:
+        # Skip auto-postings inserted to absorb the residual (rounding error).
+        if posting.meta and posting.meta.get(interpolate.AUTOMATIC_RESIDUAL, False):
+            continue
+        weight = convert.get_weight(posting)
+        number = weight.number
+        if not isinstance(number, Decimal):
+            # Let the inventory deal with incomplete postings.
+            return interpolate.compute_residual(entry.postings).is_small(tolerances)
+        try:
+            residual[weight.currency] += number
+        except KeyError:
+            residual[weight.currency] = number
+    for currency, number in residual.items():
+        if number and abs(number) > tolerances.get(currency, ZERO):
+            return False
+    return True
+
+
+def validate_single_pass(entries, options_map, validation_functions):
+    """Run some of the validation functions of this module in a single pass.
+
+    This walks the list of entries once, dispatching each directive to the
+    checks of the given functions which apply to its type, and produces the
+    same errors as calling each of the functions in turn. Only the functions in
+    SINGLE_PASS_VALIDATIONS are supported.
+
+    Args:
+      entries: A list of directives.
+      options_map: An options map.
+      validation_functions: A collection of validation functions from
+        SINGLE_PASS_VALIDATIONS.
+    Returns:
+      A dict of each of the validation functions to its list of errors.
+    """
+    assert SINGLE_PASS_VALIDATIONS.issuperset(validation_functions), (
+        "Unsupported validation functions for a single pass")
+    check_open_close = validate_open_close in validation_functions
+    check_active_accounts = validate_active_accounts in validation_functions
+    check_currencies = validate_currency_constraints in validation_functions
+    check_balances = validate_duplicate_balances in validation_functions
+    check_commodities = validate_duplicate_commodities in validation_functions
+    check_documents = validate_documents_paths in validation_functions
+    check_data_types = validate_data_types in validation_functions
+    check_transactions = validate_check_transaction_balances in validation_functions
+    allow_none_for_tags_and_links = options_map["allow_deprecated_none_for_tags_and_links"]
+
+    open_close_errors = []
+    open_map = {}
+    close_map = {}
+
+    active_error_pairs = []
+    active_set = set()
+    opened_accounts = set()
+
+    # Note: The currency constraints are those of the last Open directive of
+    # each account, which may come after the transactions posting to it, so the
+    # transactions are checked after the pass.
+    currencies_open_map = {}
+    transactions = []
+
+    balance_errors = []
+    balance_entries = {}
+
+    commodity_errors = []
+    commodity_entries = {}
+
+    document_errors = []
+    data_type_errors = []
+    transaction_errors = []
+
+    for entry in entries:
+        entry_type = type(entry)
+
+        if check_data_types:
+            try:
+                data.sanity_check_types(entry, allow_none_for_tags_and_links)
+            except AssertionError as exc:
+                data_type_errors.append(
+                    ValidationError(entry.meta,
+                                    "Invalid data types: {}".format(exc),
+                                    entry))
+
+        if entry_type is Transaction:
+            if check_active_accounts:
+                for account in {posting.account for posting in entry.postings}:
+                    if account not in active_set:
+                        active_error_pairs.append((account, entry))
+
+            if check_currencies:
+                transactions.append(entry)
+
+            if check_transactions:
+                # IMPORTANT: This check cannot be skipped. See
+                # validate_check_transaction_balances().
+                tolerances = interpolate.infer_tolerances(entry.postings, options_map)
+                if not _transaction_is_balanced(entry, tolerances):
+                    residual = interpolate.compute_residual(entry.postings)
+                    transaction_errors.append(
+                        ValidationError(entry.meta,
+                                        "Transaction does not balance: {}".format(
+                                            residual),
+                                        entry))
+            continue
+
+        if entry_type is Open:
+            if check_open_close:
+                if entry.account in open_map:
+                    open_close_errors.append(
+                        ValidationError(
+                            entry.meta,
+                            "Duplicate open directive for {}".format(entry.account),
+                            entry))
+                else:
+                    open_map[entry.account] = entry
+
+            if check_active_accounts:
+                active_set.add(entry.account)
+                opened_accounts.add(entry.account)
+
+            if check_currencies and entry.currencies:
+                currencies_open_map[entry.account] = entry
+
+        elif entry_type is Close:
+            if check_open_close:
+                if entry.account in close_map:
+                    open_close_errors.append(
+                        ValidationError(
+                            entry.meta,
+                            "Duplicate close directive for {}".format(entry.account),
+                            entry))
+                else:
+                    try:
+                        open_entry = open_map[entry.account]
+                        if entry.date <= open_entry.date:
+                            open_close_errors.append(
+                                ValidationError(
+                                    entry.meta,
+                                    "Internal error: closing date for {} "
+                                    "appears before opening date".format(entry.account),
+                                    entry))
+                    except KeyError:
+                        open_close_errors.append(
+                            ValidationError(
+                                entry.meta,
+                                "Unopened account {} is being closed".format(
+                                    entry.account),
+                                entry))
+
+                    close_map[entry.account] = entry
+
+            if check_active_accounts:
+                active_set.discard(entry.account)
+
+        else:
+            if check_active_accounts:
+                for account in getters.get_entry_accounts(entry):
+                    if account not in active_set:
+                        if (isinstance(entry, ALLOW_AFTER_CLOSE) and
+                            account in opened_accounts):
+                            continue
+                        active_error_pairs.append((account, entry))
+
+            if entry_type is data.Balance:
+                if check_balances:
+                    key = (entry.account, entry.amount.currency, entry.date)
+                    try:
+                        previous_entry = balance_entries[key]
+                        if entry.amount != previous_entry.amount:
+                            balance_errors.append(
+                                ValidationError(
+                                    entry.meta,
+                                    "Duplicate balance assertion with different amounts",
+                                    entry))
+                    except KeyError:
+                        balance_entries[key] = entry
+
+            elif entry_type is data.Commodity:
+                if check_commodities:
+                    key = entry.currency
+                    try:
+                        previous_entry = commodity_entries[key]
+                        if previous_entry:
+                            commodity_errors.append(
+                                ValidationError(
+                                    entry.meta,
+                                    "Duplicate commodity directives for '{}'".format(key),
+                                    entry))
+                    except KeyError:
+                        commodity_entries[key] = entry
+
+            elif entry_type is Document:
+                if check_documents and not path.isabs(entry.filename):
+                    document_errors.append(
+                        ValidationError(entry.meta, "Invalid relative path for entry",
+                                        entry))
+
+    active_errors = []
+    for account, entry in active_error_pairs:
+        if account in opened_accounts:
+            message = "Invalid reference to inactive account '{}'".format(account)
+        else:
+            message = "Invalid reference to unknown account '{}'".format(account)
+        active_errors.append(ValidationError(entry.meta, message, entry))
+
+    currency_errors = []
+    if currencies_open_map:
+        for entry in transactions:
+            for posting in entry.postings:
+                try:
+                    valid_currencies = currencies_open_map[posting.account].currencies
+                except KeyError:
+                    continue
+                if posting.units.currency not in valid_currencies:
+                    currency_errors.append(
+                        ValidationError(
+                            entry.meta,
+                            "Invalid currency {} for account '{}'".format(
+                                posting.units.currency, posting.account),
+                            entry))
+
+    all_errors = {
+        validate_open_close: open_close_errors,
+        validate_active_accounts: active_errors,
+        validate_currency_constraints: currency_errors,
+        validate_duplicate_balances: balance_errors,
+        validate_duplicate_commodities: commodity_errors,
+        validate_documents_paths: document_errors,
+        validate_data_types: data_type_errors,
+        validate_check_transaction_balances: transaction_errors,
+    }
+    return {function: all_errors[function] for function in validation_functions}
+
+
+# A list of reasonably fast validations to always run by default.
+BASIC_VALIDATIONS = [validate_open_close,
+                     validate_active_accounts,
+                     validate_currency_constraints,
+                     validate_duplicate_balances,
+                     validate_duplicate_commodities,
+                     validate_documents_paths,
+                     validate_check_transaction_balances]
+
+# These used to be slow, and thus only turned on in the check() routine. Run in
+# a single pass with the basic validations, they are cheap and are now run by
+# default too.
+HARDCORE_VALIDATIONS = [validate_data_types]
+
+# The list of validations to run.
+VALIDATIONS = BASIC_VALIDATIONS + HARDCORE_VALIDATIONS
+
+# The validations which validate_single_pass() can run.
+SINGLE_PASS_VALIDATIONS = frozenset(BASIC_VALIDATIONS + HARDCORE_VALIDATIONS)
+
+
+def validate(entries, options_map, log_timings=None, extra_validations=None):
+    """Perform all the standard checks on parsed contents.
+
+    The validations which support it are run together in a single pass over the
+    entries; see validate_single_pass(). The errors are the same, and in the
+    same order, as if each validation function had been run in turn.
+
+    Args:
+      entries: A list of directives.
+      unused_options_map: An options map.
+      log_timings: An optional function to use for logging the time of individual
+        operations.
+      extra_validations: A list of extra validation functions to run after loading
+        this list of entries. Those which are already run by default are
+        ignored.
+    Returns:
+      A list of new errors, if any were found.
+    """
+    validation_tests = list(VALIDATIONS)
+    if extra_validations:
+        validation_tests.extend(validation_function
+                                for validation_function in extra_validations
+                                if validation_function not in validation_tests)
+
+    # Run the validations defined above in a single pass.
+    single_pass_tests = [validation_function
+                         for validation_function in validation_tests
+                         if validation_function in SINGLE_PASS_VALIDATIONS]
+    single_pass_errors = {}
+    if single_pass_tests:
+        with misc_utils.log_time('function: validate_single_pass', log_timings,
+                                 indent=2), \
+             profiler.stage('{}.validate_single_pass'.format(__name__),
+                            'validation', entries):
+            single_pass_errors = validate_single_pass(entries, options_map,
+                                                      single_pass_tests)
+
+    # Run the other validation routines.
+    errors = []
+    for validation_function in validation_tests:
+        if validation_function in single_pass_errors:
+            new_errors = single_pass_errors[validation_function]
+        else:
+            with misc_utils.log_time('function: {}'.format(validation_function.__name__),
+                                     log_timings, indent=2), \
+                 profiler.stage('{}.{}'.format(validation_function.__module__,
+                                               validation_function.__name__),
+                                'validation', entries):
+                new_errors = validation_function(entries, options_map)
+        errors.extend(new_errors)
+
+    return errors
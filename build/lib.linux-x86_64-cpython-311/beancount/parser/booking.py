@@ -0,0 +1,292 @@
+"""Algorithms for 'booking' inventory, that is, the process of finding a
+matching lot when reducing the content of an inventory.
+"""
+__copyright__ = "Copyright (C) 2015-2016  Martin Blais"
+__license__ = "GNU GPLv2"
+
+from os import path
+import collections
+import hashlib
+import io
+import logging
+import pickle
+
+from beancount.core.number import MISSING
+from beancount.parser import booking_full
+from beancount.core import data
+from beancount.core import inventory
+from beancount import __version__
+
+
+BookingError = collections.namedtuple('BookingError', 'source message entry')
+
+
+# The number of entries booked between two consecutive checkpoints.
+CHECKPOINT_INTERVAL = 5000
+
+
+def book(incomplete_entries, options_map, checkpoint_filename=None):
+    """Book inventory lots and complete all positions with incomplete numbers.
+
+    Args:
+      incomplete_entries: A list of directives, with some postings possibly left
+        with incomplete amounts as produced by the parser.
+      options_map: An options dict as produced by the parser.
+      checkpoint_filename: An optional string, the name of a file in which to
+        store checkpoints of the booked balances. If provided, booking resumes
+        from the latest checkpoint whose preceding entries are unchanged. See
+        book_with_checkpoints().
+    Returns:
+      A pair of
+        entries: A list of completed entries with all their postings completed.
+        errors: New errors produced during interpolation.
+    """
+    # Get the list of booking methods for each account.
+    booking_methods = collections.defaultdict(lambda: options_map["booking_method"])
+    for entry in incomplete_entries:
+        if isinstance(entry, data.Open) and entry.booking:
+            booking_methods[entry.account] = entry.booking
+
+    # Do the booking here!
+    if checkpoint_filename is None:
+        entries, booking_errors = booking_full.book(incomplete_entries, options_map,
+                                                    booking_methods)
+    else:
+        entries, booking_errors = book_with_checkpoints(incomplete_entries, options_map,
+                                                        booking_methods,
+                                                        checkpoint_filename)
+
+    # Check for MISSING elements remaining.
+    missing_errors = validate_missing_eliminated(entries, options_map)
+
+    return entries, (booking_errors + missing_errors)
+
+
+def book_with_checkpoints(incomplete_entries, options_map, methods, checkpoint_filename):
+    """Book the entries, resuming from checkpointed balances where possible.
+
+    The sorted list of entries is booked in chunks of CHECKPOINT_INTERVAL
+    entries. After each chunk, a record is appended to the checkpoint file with
+    a digest of all the incomplete entries booked so far, the booked entries and
+    errors from that chunk, and a copy of the running balances. On the next
+    call, the records whose digest still matches the new incomplete entries are
+    reused as they are, and booking resumes from the balances of the last of
+    them. Appending entries at the end of a ledger thus only books the final
+    chunk and the new entries. The output is identical to that of
+    booking_full.book().
+
+    The file consists of a sequence of pickles: the key from
+    compute_checkpoint_key(), followed by, for each chunk, a header tuple of
+    (number of entries, digest, size of chunk data, size of balances data), and
+    the raw pickled bytes of the (entries, errors) chunk and of the balances.
+
+    Args:
+      incomplete_entries: A list of sorted directives as produced by the parser.
+      options_map: An options dict as produced by the parser.
+      methods: A mapping of account name to their corresponding booking
+        method.
+      checkpoint_filename: A string, the name of the checkpoint file.
+    Returns:
+      A pair of entries and errors, as per booking_full.book().
+    """
+    key = compute_checkpoint_key(options_map, methods)
+    entries, errors = [], []
+    balances = collections.defaultdict(inventory.Inventory)
+    md5 = hashlib.md5()
+    num_entries = 0
+
+    # Read the matching records from a previous run, if there is one, and the
+    # offset at which the records become stale.
+    truncate_offset = None
+    if path.exists(checkpoint_filename):
+        try:
+            with open(checkpoint_filename, 'rb') as file:
+                if pickle.load(file) == key:
+                    truncate_offset = file.tell()
+                    balances_offset = None
+                    while True:
+                        try:
+                            header = pickle.load(file)
+                        except EOFError:
+                            break
+                        (chunk_num_entries, chunk_digest,
+                         chunk_size, balances_size) = header
+                        if chunk_num_entries > len(incomplete_entries):
+                            break
+                        chunk_md5 = md5.copy()
+                        update_digest(chunk_md5,
+                                      incomplete_entries[num_entries:chunk_num_entries])
+                        if chunk_md5.hexdigest() != chunk_digest:
+                            break
+
+                        # The entries prior to this checkpoint are unchanged.
+                        chunk_entries, chunk_errors = pickle.loads(file.read(chunk_size))
+                        entries.extend(chunk_entries)
+                        errors.extend(chunk_errors)
+                        balances_offset = file.tell()
+                        file.seek(balances_size, io.SEEK_CUR)
+                        truncate_offset = file.tell()
+                        md5 = chunk_md5
+                        num_entries = chunk_num_entries
+
+                    if balances_offset is not None:
+                        file.seek(balances_offset)
+                        balances = pickle.load(file)
+        except Exception as exc:
+            # Note: Unpickling of an old or corrupted file manifests as a
+            # variety of different exception types; recompute from scratch.
+            logging.error("Booking checkpoint file is corrupted: %s; recomputing.", exc)
+            entries, errors = [], []
+            balances = collections.defaultdict(inventory.Inventory)
+            md5 = hashlib.md5()
+            num_entries = 0
+            truncate_offset = None
+
+    # Book the remaining entries, appending a record after each chunk.
+    try:
+        if truncate_offset is None:
+            file = open(checkpoint_filename, 'wb')
+            pickle.dump(key, file)
+        else:
+            file = open(checkpoint_filename, 'r+b')
+            file.truncate(truncate_offset)
+            file.seek(truncate_offset)
+    except OSError as exc:
+        logging.warning("Could not write to booking checkpoint file %s: %s",
+                        checkpoint_filename, exc)
+        file = None
+    try:
+        while num_entries < len(incomplete_entries):
+            # Note: Compute the digest before booking, which may modify the
+            # metadata of the incomplete postings in-place.
+            chunk = incomplete_entries[num_entries:num_entries + CHECKPOINT_INTERVAL]
+            update_digest(md5, chunk)
+            chunk_entries, chunk_errors, balances = booking_full._book(
+                chunk, options_map, methods, balances)
+            entries.extend(chunk_entries)
+            errors.extend(chunk_errors)
+            num_entries += len(chunk)
+
+            if file is not None:
+                chunk_data = pickle.dumps((chunk_entries, chunk_errors))
+                balances_data = pickle.dumps(balances)
+                pickle.dump((num_entries, md5.hexdigest(),
+                             len(chunk_data), len(balances_data)), file)
+                file.write(chunk_data)
+                file.write(balances_data)
+    finally:
+        if file is not None:
+            file.close()
+
+    return entries, errors
+
+
+def compute_checkpoint_key(options_map, methods):
+    """Compute a key for the inputs of booking other than the entries themselves.
+
+    Args:
+      options_map: An options dict as produced by the parser.
+      methods: A mapping of account name to their corresponding booking
+        method.
+    Returns:
+      A string, the hexadecimal digest of the key.
+    """
+    md5 = hashlib.md5()
+    md5.update(__version__.encode('utf8'))
+    for option in ('booking_method',
+                   'inferred_tolerance_default',
+                   'inferred_tolerance_multiplier',
+                   'infer_tolerance_from_cost'):
+        md5.update(repr(options_map[option]).encode('utf8'))
+    md5.update(repr(sorted(methods.items())).encode('utf8'))
+    return md5.hexdigest()
+
+
+def update_digest(md5, entries):
+    """Update a running digest with the contents of the given entries.
+
+    Args:
+      md5: A hashlib object, updated in-place.
+      entries: A list of directives.
+    """
+    for entry in entries:
+        # Sets are not rendered in a stable order across processes; sort them.
+        if (isinstance(entry, data.Transaction) and
+                (len(entry.tags) > 1 or len(entry.links) > 1)):
+            entry = entry._replace(tags=sorted(entry.tags), links=sorted(entry.links))
+        md5.update(repr(entry).encode('utf8'))
+
+
+def validate_missing_eliminated(entries, unused_options_map):
+    """Validate that all the missing bits of postings have been eliminated.
+
+    Args:
+      entries: A list of directives.
+      unused_options_map: An options map.
+    Returns:
+      A list of errors.
+    """
+    errors = []
+    for entry in entries:
+        if isinstance(entry, data.Transaction):
+            for posting in entry.postings:
+                units = posting.units
+                cost = posting.cost
+                if (MISSING in (units.number, units.currency) or
+                    cost is not None and MISSING in (cost.number, cost.currency,
+                                                     cost.date, cost.label)):
+                    errors.append(
+                        BookingError(entry.meta,
+                                     "Transaction has incomplete elements",
+                                     entry))
+                    break
+    return errors
+
+
+# FIXME: This goes away. Maybe moves to a pedantic plugin.
+def validate_inventory_booking(entries, unused_options_map, booking_methods):
+    """Validate that no position at cost is allowed to go negative.
+
+    This routine checks that when a posting reduces a position, existing or not,
+    that the subsequent inventory does not result in a position with a negative
+    number of units. A negative number of units would only be required for short
+    trades of trading spreads on futures, and right now this is not supported.
+    It would not be difficult to support this, however, but we want to be strict
+    about it, because being pedantic about this is otherwise a great way to
+    detect user data entry mistakes.
+
+    Args:
+      entries: A list of directives.
+      unused_options_map: An options map.
+      booking_methods: A mapping of account name to booking method, accumulated
+        in the main loop.
+    Returns:
+      A list of errors.
+
+    """
+    errors = []
+    balances = collections.defaultdict(inventory.Inventory)
+    for entry in entries:
+        if isinstance(entry, data.Transaction):
+            for posting in entry.postings:
+                # Update the balance of each posting on its respective account
+                # without allowing booking to a negative position, and if an error
+                # is encountered, catch it and return it.
+                running_balance = balances[posting.account]
+                position_, _ = running_balance.add_position(posting)
+
+                # Skip this check if the booking method is set to ignore it.
+                if booking_methods.get(posting.account, None) == data.Booking.NONE:
+                    continue
+
+                # Check if the resulting inventory is mixed, which is not
+                # allowed under the STRICT method.
+                if running_balance.is_mixed():
+                    errors.append(
+                        BookingError(
+                            entry.meta,
+                            ("Reducing position results in inventory with positive "
+                             "and negative lots: {}").format(position_),
+                            entry))
+
+    return errors
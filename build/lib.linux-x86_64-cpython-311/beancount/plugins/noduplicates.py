@@ -0,0 +1,22 @@
+"""This plugin validates that there are no duplicate transactions.
+"""
+__copyright__ = "Copyright (C) 2014, 2016-2017  Martin Blais"
+__license__ = "GNU GPLv2"
+
+from beancount.core import compare
+
+__plugins__ = ('validate_no_duplicates',)
+__plugins_order__ = 'sorted'
+__plugins_validation__ = True
+
+
+def validate_no_duplicates(entries, unused_options_map):
+    """Check that the entries are unique, by computing hashes.
+
+    Args:
+      entries: A list of directives.
+      unused_options_map: An options map.
+    Returns:
+      A list of new errors, if any were found.
+    """
+    return entries, compare.find_duplicate_entries(entries)
@@ -0,0 +1,221 @@
+"""A persistent cache of the prices fetched from the price sources.
+
+The prices are stored in an SQLite database, in a table keyed by source module,
+symbol and date, with the time each price was fetched and the time it expires
+at. The database is opened in write-ahead logging mode, so that concurrent
+invocations of bean-price can read it while another one writes to it.
+"""
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+
+from dateutil import tz
+
+from beancount.core.number import D
+from beancount.prices.source import SourcePrice
+
+
+# The number of seconds to wait for a lock held by another process.
+BUSY_TIMEOUT = 30.0
+
+# The date stored for the latest prices.
+LATEST = ''
+
+
+SCHEMA = """
+  CREATE TABLE IF NOT EXISTS prices (
+    source TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    price TEXT,
+    time REAL,
+    quote_currency TEXT,
+    fetched INTEGER NOT NULL,
+    expires INTEGER,
+    PRIMARY KEY (source, symbol, date)
+  );
+  CREATE INDEX IF NOT EXISTS prices_expires ON prices (expires);
+"""
+
+
+class PriceCache:
+    """A cache of SourcePrice instances, stored in an SQLite database.
+
+    A price is stored with None as its value when the source could not provide
+    it. The methods of this object may be called from multiple threads.
+
+    Attributes:
+      filename: A string, the name of the database file.
+      expiration: A datetime.timedelta instance, the duration after which the
+        latest prices and the prices of the current day expire. Historical prices
+        do not expire.
+    """
+
+    def __init__(self, filename, expiration):
+        self.filename = filename
+        self.expiration = expiration
+        self.lock = threading.Lock()
+        try:
+            self.connection = self._connect()
+        except sqlite3.DatabaseError as exc:
+            # This is likely a cache in an older format; start over.
+            logging.warning("Replacing invalid price cache %s: %s", filename, exc)
+            os.remove(filename)
+            self.connection = self._connect()
+
+    def _connect(self):
+        """Open the database and create its table.
+
+        Returns:
+          An sqlite3.Connection instance.
+        """
+        connection = sqlite3.connect(self.filename, timeout=BUSY_TIMEOUT,
+                                     check_same_thread=False)
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            with connection:
+                connection.executescript(SCHEMA)
+        except sqlite3.DatabaseError:
+            connection.close()
+            raise
+        return connection
+
+    def close(self):
+        """Close the database."""
+        with self.lock:
+            self.connection.close()
+
+    def __len__(self):
+        with self.lock:
+            (count,), = self.connection.execute('SELECT COUNT(*) FROM prices')
+        return count
+
+    def get(self, source_name, symbol, date, timestamp_now):
+        """Fetch a price from the cache.
+
+        Args:
+          source_name: A string, the name of the source module.
+          symbol: A string, the ticker.
+          date: A datetime.date instance, or None for the latest price.
+          timestamp_now: An integer, the current time as a UNIX timestamp.
+        Returns:
+          A SourcePrice instance, or None if the source could not provide it.
+        Raises:
+          KeyError: If the price is absent from the cache, or expired.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT price, time, quote_currency FROM prices '
+                'WHERE source = ? AND symbol = ? AND date = ? '
+                '  AND (expires IS NULL OR expires >= ?)',
+                (source_name, symbol, _date_key(date), timestamp_now)).fetchone()
+        if row is None:
+            raise KeyError((source_name, symbol, date))
+        return _row_to_price(*row)
+
+    def get_range(self, source_name, symbol, date_begin, date_end, timestamp_now):
+        """Fetch the prices of a symbol within a range of dates.
+
+        Args:
+          source_name: A string, the name of the source module.
+          symbol: A string, the ticker.
+          date_begin: A datetime.date instance, the first date, inclusive.
+          date_end: A datetime.date instance, the last date, inclusive.
+          timestamp_now: An integer, the current time as a UNIX timestamp.
+        Returns:
+          A dict of datetime.date to SourcePrice instance or None, for the dates
+          present in the cache and not expired.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT date, price, time, quote_currency FROM prices '
+                'WHERE source = ? AND symbol = ? AND date BETWEEN ? AND ? '
+                '  AND date != ? AND (expires IS NULL OR expires >= ?)',
+                (source_name, symbol, _date_key(date_begin), _date_key(date_end),
+                 LATEST, timestamp_now)).fetchall()
+        return {datetime.datetime.strptime(date, '%Y-%m-%d').date():
+                _row_to_price(price, time, quote_currency)
+                for date, price, time, quote_currency in rows}
+
+    def put(self, source_name, symbol, date, srcprice, timestamp_now):
+        """Store a price in the cache.
+
+        Args:
+          source_name: A string, the name of the source module.
+          symbol: A string, the ticker.
+          date: A datetime.date instance, or None for the latest price.
+          srcprice: A SourcePrice instance, or None.
+          timestamp_now: An integer, the current time as a UNIX timestamp.
+        """
+        self.put_many(source_name, symbol, [(date, srcprice)], timestamp_now)
+
+    def put_many(self, source_name, symbol, prices, timestamp_now):
+        """Store multiple prices of a symbol in the cache, in a single transaction.
+
+        Args:
+          source_name: A string, the name of the source module.
+          symbol: A string, the ticker.
+          prices: A list of (date, srcprice) pairs, as for put().
+          timestamp_now: An integer, the current time as a UNIX timestamp.
+        """
+        today = datetime.datetime.fromtimestamp(timestamp_now, tz.tzlocal()).date()
+        expires_soon = timestamp_now + int(self.expiration.total_seconds())
+        rows = []
+        for date, srcprice in prices:
+            # Prices for past days are final; others may still change, or may
+            # become available later.
+            expires = (None
+                       if date is not None and date < today and srcprice is not None
+                       else expires_soon)
+            if srcprice is None:
+                price = time = quote_currency = None
+            else:
+                price = str(srcprice.price)
+                time = (srcprice.time.timestamp()
+                        if srcprice.time is not None
+                        else None)
+                quote_currency = srcprice.quote_currency
+            rows.append((source_name, symbol, _date_key(date),
+                         price, time, quote_currency, timestamp_now, expires))
+        with self.lock:
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    rows)
+
+    def compact(self, timestamp_now):
+        """Remove the expired prices and reclaim the unused space.
+
+        Args:
+          timestamp_now: An integer, the current time as a UNIX timestamp.
+        Returns:
+          The number of prices removed.
+        """
+        with self.lock:
+            with self.connection:
+                cursor = self.connection.execute(
+                    'DELETE FROM prices WHERE expires < ?', (timestamp_now,))
+            self.connection.execute('VACUUM')
+        return cursor.rowcount
+
+
+def _date_key(date):
+    """Convert a date to its representation in the database."""
+    return date.isoformat() if date is not None else LATEST
+
+
+def _row_to_price(price, time, quote_currency):
+    """Convert the columns of a price from the database to a SourcePrice."""
+    if price is None:
+        return None
+    return SourcePrice(D(price),
+                       (datetime.datetime.fromtimestamp(time, tz.tzutc())
+                        if time is not None
+                        else None),
+                       quote_currency)
+
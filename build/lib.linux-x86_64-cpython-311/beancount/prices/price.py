@@ -0,0 +1,661 @@
+"""Driver code for the price script.
+"""
+__copyright__ = "Copyright (C) 2015-2017  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import argparse
+import bisect
+import datetime
+import functools
+import itertools
+from os import path
+import tempfile
+import os
+import sys
+import logging
+import threading
+import time
+from concurrent import futures
+
+from dateutil import tz
+
+from beancount.core.number import ONE
+import beancount.prices
+from beancount import loader
+from beancount.core import data
+from beancount.core import amount
+from beancount.parser import printer
+from beancount.prices import cache
+from beancount.prices import find_prices
+from beancount.utils import date_utils
+from beancount.utils import version
+
+
+# Stand-in currency name for unknown currencies.
+UNKNOWN_CURRENCY = '?'
+
+
+# A cache for the prices, an instance of cache.PriceCache.
+_CACHE = None
+
+# Expiration for latest prices in the cache.
+DEFAULT_EXPIRATION = datetime.timedelta(seconds=30*60)  # 30 mins.
+
+# The default number of threads fetching prices.
+DEFAULT_WORKERS = 3
+
+# The default maximum number of concurrent calls to a single price source.
+DEFAULT_SOURCE_CONCURRENCY = 3
+
+
+def now():
+    "Indirection in order to be able to mock it out in the tests."
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class FetchScheduler:
+    """A limiter of the concurrency and rate of the calls made to price sources.
+
+    Limits are configured by source module name, either the full name, e.g.
+    'beancount.prices.sources.yahoo', or its last component, e.g. 'yahoo'. This
+    object is shared between the threads fetching prices.
+    """
+
+    def __init__(self, concurrency=None, rates=None,
+                 default_concurrency=DEFAULT_SOURCE_CONCURRENCY, default_rate=None):
+        """Create a scheduler.
+
+        Args:
+          concurrency: A dict of source module name to the maximum number of
+            concurrent calls made to it.
+          rates: A dict of source module name to the maximum number of calls
+            made to it per second, as a float.
+          default_concurrency: An integer, the maximum number of concurrent calls
+            to a source which is not present in 'concurrency'.
+          default_rate: A float, the maximum number of calls per second to a
+            source which is not present in 'rates', or None, for no limit.
+        """
+        self.concurrency = concurrency or {}
+        self.rates = rates or {}
+        self.default_concurrency = default_concurrency
+        self.default_rate = default_rate
+        self.lock = threading.Lock()
+        self.semaphores = {}
+        self.next_times = {}
+
+    def _get_limit(self, limits, module_name, default):
+        """Look up the limit for a source module, by full name or last component."""
+        for name in module_name, module_name.split('.')[-1]:
+            if name in limits:
+                return limits[name]
+        return default
+
+    def call(self, source, function, *args):
+        """Call a method of a price source, within the limits of its module.
+
+        Args:
+          source: A Source instance.
+          function: A callable, a method of 'source'.
+          *args: The arguments to call it with.
+        Returns:
+          The return value of the function.
+        """
+        module_name = type(source).__module__
+        with self.lock:
+            try:
+                semaphore = self.semaphores[module_name]
+            except KeyError:
+                semaphore = self.semaphores[module_name] = threading.BoundedSemaphore(
+                    self._get_limit(self.concurrency, module_name,
+                                    self.default_concurrency))
+        with semaphore:
+            rate = self._get_limit(self.rates, module_name, self.default_rate)
+            if rate:
+                # Reserve the next slot for this source and wait for it.
+                with self.lock:
+                    time_now = time.monotonic()
+                    time_call = max(time_now, self.next_times.get(module_name, time_now))
+                    self.next_times[module_name] = time_call + 1.0 / rate
+                if time_call > time_now:
+                    time.sleep(time_call - time_now)
+            return function(*args)
+
+
+def _call_source(scheduler, source, function, *args):
+    """Call a method of a price source, through the scheduler if there is one."""
+    if scheduler is None:
+        return function(*args)
+    return scheduler.call(source, function, *args)
+
+
+def _query_time(date):
+    """Compute the timestamp at which to query the price for a date.
+
+    Args:
+      date: A datetime.date instance.
+    Returns:
+      An aware datetime.datetime instance, in UTC.
+    """
+    # We query as for 4pm for the given date of the current timezone, if
+    # specified.
+    query_time = datetime.time(16, 0, 0)
+    time_local = datetime.datetime.combine(date, query_time, tzinfo=tz.tzlocal())
+    return time_local.astimezone(tz.tzutc())
+
+
+def _cache_get(source, symbol, date):
+    """Fetch a price from the cache.
+
+    Args:
+      source: A Source instance.
+      symbol: A string, the ticker.
+      date: A datetime.date instance, or None for the latest price.
+    Returns:
+      A SourcePrice instance, or None.
+    Raises:
+      KeyError: If the price is absent from the cache, or expired.
+    """
+    return _CACHE.get(type(source).__module__, symbol, date, int(now().timestamp()))
+
+
+def _cache_put(source, symbol, date, result):
+    """Store a price in the cache. See _cache_get()."""
+    _CACHE.put(type(source).__module__, symbol, date, result, int(now().timestamp()))
+
+
+def fetch_cached_price(source, symbol, date, scheduler=None):
+    """Call Source to fetch a price, but look and/or update the cache first.
+
+    This function entirely deals with caching and correct expiration. It keeps
+    old prices if they were fetched in the past, and it quickly expires
+    intra-day prices if they are fetched on the same day.
+
+    Args:
+      source: A Python module object.
+      symbol: A string, the ticker to fetch.
+      date: A datetime.date instance, None if we're to fetch the latest date.
+      scheduler: An optional FetchScheduler instance to make the call through.
+    Returns:
+      A SourcePrice instance.
+    """
+    # Compute a suitable timestamp from the date, if specified.
+    query_time = _query_time(date) if date is not None else None
+
+    if _CACHE is not None:
+        # The cache is enabled and we have to compute the current/latest price.
+        # Try to fetch from the cache but miss if the price is too old.
+        try:
+            return _cache_get(source, symbol, date)
+        except KeyError:
+            logging.info("Fetching: %s (time: %s)", symbol, query_time)
+
+    result = (_call_source(scheduler, source, source.get_latest_price, symbol)
+              if query_time is None else
+              _call_source(scheduler, source, source.get_historical_price,
+                           symbol, query_time))
+
+    if _CACHE is not None:
+        _cache_put(source, symbol, date, result)
+    return result
+
+
+def fetch_cached_prices(source, symbol, dates, scheduler=None):
+    """Fetch the prices of a symbol at multiple dates, through the cache.
+
+    The prices missing from the cache are fetched with a single call to the
+    source's get_historical_prices(), if it supports it, and each requested date
+    gets the latest price at or before it. The remaining ones are fetched one
+    at a time.
+
+    Args:
+      source: A Source instance.
+      symbol: A string, the ticker to fetch.
+      dates: A sorted list of datetime.date instances.
+      scheduler: An optional FetchScheduler instance to make the calls through.
+    Returns:
+      A dict of date to SourcePrice instance, or None if it could not be
+      fetched.
+    """
+    if _CACHE is not None:
+        results = _CACHE.get_range(type(source).__module__, symbol, dates[0], dates[-1],
+                                   int(now().timestamp()))
+        results = {date: results[date] for date in dates if date in results}
+    else:
+        results = {}
+    missing = [date for date in dates if date not in results]
+
+    if len(missing) > 1:
+        time_begin, time_end = _query_time(missing[0]), _query_time(missing[-1])
+        logging.info("Fetching: %s (times: %s to %s)", symbol, time_begin, time_end)
+        series = _call_source(scheduler, source, source.get_historical_prices,
+                              symbol, time_begin, time_end)
+        if series is not None:
+            series = sorted(filter(None, series), key=lambda srcprice: srcprice.time)
+            series_dates = [srcprice.time.astimezone(tz.tzlocal()).date()
+                            for srcprice in series]
+            remaining = []
+            fetched = []
+            for date in missing:
+                index = bisect.bisect_right(series_dates, date)
+                if index == 0:
+                    # The price before the range has to be fetched on its own.
+                    remaining.append(date)
+                    continue
+                results[date] = series[index - 1]
+                fetched.append((date, results[date]))
+            if _CACHE is not None:
+                _CACHE.put_many(type(source).__module__, symbol, fetched,
+                                int(now().timestamp()))
+            missing = remaining
+
+    for date in missing:
+        results[date] = fetch_cached_price(source, symbol, date, scheduler)
+    return results
+
+
+def setup_cache(cache_filename, clear_cache, compact_cache=False):
+    """Setup the results cache.
+
+    Args:
+      cache_filename: A string or None, the filename for the cache.
+      clear_cache: A boolean, if true, delete the cache before beginning.
+      compact_cache: A boolean, if true, remove the expired prices from the
+        cache and reclaim their space before beginning.
+    """
+    if clear_cache and cache_filename:
+        for filename in cache_filename, cache_filename + '-wal', cache_filename + '-shm':
+            if path.exists(filename):
+                logging.info("Clearing cache %s", filename)
+                os.remove(filename)
+
+    if cache_filename:
+        logging.info('Using price cache at "%s" (with indefinite expiration)',
+                     cache_filename)
+
+        global _CACHE
+        _CACHE = cache.PriceCache(cache_filename, DEFAULT_EXPIRATION)
+
+        if compact_cache:
+            num_removed = _CACHE.compact(int(now().timestamp()))
+            logging.info("Removed %d expired prices from the cache", num_removed)
+
+
+def reset_cache():
+    """Reset the cache to its uninitialized state."""
+    global _CACHE
+    if _CACHE is not None:
+        _CACHE.close()
+    _CACHE = None
+
+
+def fetch_price(dprice, swap_inverted=False, scheduler=None):
+    """Fetch a price for the DatePrice job.
+
+    Args:
+      dprice: A DatedPrice instances.
+      swap_inverted: A boolean, true if we should invert currencies instead of
+        rate for an inverted price source.
+      scheduler: An optional FetchScheduler instance to make the calls through.
+    Returns:
+      A Price entry corresponding to the output of the jobs processed.
+
+    """
+    for psource in dprice.sources:
+        try:
+            source = psource.module.Source()
+        except AttributeError:
+            continue
+        srcprice = fetch_cached_price(source, psource.symbol, dprice.date, scheduler)
+        if srcprice is not None:
+            break
+    else:
+        if dprice.sources:
+            logging.error("Could not fetch for job: %s", dprice)
+        return None
+
+    return make_price_entry(dprice.base, dprice.quote, psource, srcprice, swap_inverted)
+
+
+def fetch_price_range(drange, swap_inverted=False, scheduler=None):
+    """Fetch the prices for a group of DatedPrice jobs at multiple dates.
+
+    The dates which a source fails to provide are fetched from the following
+    sources.
+
+    Args:
+      drange: A DatedPriceRange instance.
+      swap_inverted: A boolean, true if we should invert currencies instead of
+        rate for an inverted price source.
+      scheduler: An optional FetchScheduler instance to make the calls through.
+    Returns:
+      A list of Price entries, without duplicates. Multiple dates may yield the
+      same price, e.g. if the market was closed on some of them.
+    """
+    if len(drange.dates) == 1:
+        entry = fetch_price(find_prices.DatedPrice(drange.base, drange.quote,
+                                                   drange.dates[0], drange.sources),
+                            swap_inverted, scheduler)
+        return [entry] if entry is not None else []
+
+    remaining = drange.dates
+    srcprices = {}
+    for psource in drange.sources:
+        try:
+            source = psource.module.Source()
+        except AttributeError:
+            continue
+        fetched = fetch_cached_prices(source, psource.symbol, remaining, scheduler)
+        for date, srcprice in fetched.items():
+            if srcprice is not None:
+                srcprices[date] = (psource, srcprice)
+        remaining = [date for date in remaining if date not in srcprices]
+        if not remaining:
+            break
+    if drange.sources:
+        for date in remaining:
+            logging.error("Could not fetch for job: %s",
+                          find_prices.DatedPrice(drange.base, drange.quote,
+                                                 date, drange.sources))
+
+    price_entries = []
+    seen = set()
+    for date in drange.dates:
+        if date not in srcprices:
+            continue
+        entry = make_price_entry(drange.base, drange.quote, *srcprices[date],
+                                 swap_inverted=swap_inverted)
+        key = (entry.date, entry.currency, entry.amount)
+        if key not in seen:
+            seen.add(key)
+            price_entries.append(entry)
+    return price_entries
+
+
+def make_price_entry(base, quote, psource, srcprice, swap_inverted=False):
+    """Create a Price entry from the price fetched from a source.
+
+    Args:
+      base: A commodity string, the base of the job.
+      quote: A commodity string, the quote currency of the job, or None.
+      psource: The PriceSource instance the price was fetched from.
+      srcprice: The SourcePrice instance returned by the source.
+      swap_inverted: A boolean, true if we should invert currencies instead of
+        rate for an inverted price source.
+    Returns:
+      A Price entry.
+    """
+    quote = quote or srcprice.quote_currency
+    price = srcprice.price
+
+    # Invert the rate if requested.
+    if psource.invert:
+        if swap_inverted:
+            base, quote = quote, base
+        else:
+            price = ONE/price
+
+    assert base is not None
+    fileloc = data.new_metadata('<{}>'.format(type(psource.module).__name__), 0)
+
+    # The datetime instance is required to be aware. We always convert to the
+    # user's timezone before extracting the date. This means that if the market
+    # returns a timestamp for a particular date, once we convert to the user's
+    # timezone the returned date may be different by a day. The intent is that
+    # whatever we print is assumed coherent with the user's timezone. See
+    # discussion at
+    # https://groups.google.com/d/msg/beancount/9j1E_HLEMBQ/fYRuCQK_BwAJ
+    srctime = srcprice.time
+    if srctime.tzinfo is None:
+        raise ValueError("Time returned by the price source is not timezone aware.")
+    date = srctime.astimezone(tz.tzlocal()).date()
+
+    return data.Price(fileloc, date, base,
+                      amount.Amount(price, quote or UNKNOWN_CURRENCY))
+
+
+def filter_redundant_prices(price_entries, existing_entries, diffs=False):
+    """Filter out new entries that are redundant from an existing set.
+
+    If the price differs, we override it with the new entry only on demand. This
+    is because this would create conflict with existing price entries when
+    parsing, if the new entries are simply inserted into the input.
+
+    Args:
+      price_entries: A list of newly created, proposed to be added Price directives.
+      existing_entries: A list of existing entries we are proposing to add to.
+      diffs: A boolean, true if we should output differing price entries
+        at the same date.
+    Returns:
+      A filtered list of remaining entries, and a list of ignored entries.
+    """
+    # Note: We have to be careful with the dates, because requesting the latest
+    # price for a date may yield the price at a previous date. Clobber needs to
+    # take this into account. See {1cfa25e37fc1}.
+    existing_prices = {(entry.date, entry.currency): entry
+                       for entry in existing_entries
+                       if isinstance(entry, data.Price)}
+    filtered_prices = []
+    ignored_prices = []
+    for entry in price_entries:
+        key = (entry.date, entry.currency)
+        if key in existing_prices:
+            if diffs:
+                existing_entry = existing_prices[key]
+                if existing_entry.amount == entry.amount:
+                    output = ignored_prices
+            else:
+                output = ignored_prices
+        else:
+            output = filtered_prices
+        output.append(entry)
+    return filtered_prices, ignored_prices
+
+
+def parse_source_limit(string, type_):
+    """Parse a per-source limit from the command-line.
+
+    Args:
+      string: A string of the form 'MODULE=VALUE'.
+      type_: A callable to convert the value with.
+    Returns:
+      A pair of the module name string and the converted value.
+    Raises:
+      argparse.ArgumentTypeError: If the string is invalid.
+    """
+    module_name, sep, value = string.partition('=')
+    try:
+        if not (module_name and sep):
+            raise ValueError
+        value = type_(value)
+        if value <= 0:
+            raise ValueError
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'Invalid source limit "{}"; expected MODULE=VALUE'.format(string))
+    return module_name, value
+
+
+def process_args():
+    """Process the arguments. This also initializes the logging module.
+
+    Returns:
+      A tuple of:
+        args: The argparse receiver of command-line arguments.
+        jobs: A list of DatedPrice job objects.
+        entries: A list of all the parsed entries.
+    """
+    parser = version.ArgumentParser(description=beancount.prices.__doc__.splitlines()[0])
+
+    # Input sources or filenames.
+    parser.add_argument('sources', nargs='+', help=(
+        'A list of filenames (or source "module/symbol", if -e is '
+        'specified) from which to create a list of jobs.'))
+
+    parser.add_argument('-e', '--expressions', '--expression', action='store_true', help=(
+        'Interpret the arguments as "module/symbol" source strings.'))
+
+    # Regular options.
+    parser.add_argument('-v', '--verbose', action='count', help=(
+        "Print out progress log. Specify twice for debugging info."))
+
+    parser.add_argument('-d', '--date', action='store',
+                        type=date_utils.parse_date_liberally, help=(
+        "Specify the date for which to fetch the prices."))
+
+    parser.add_argument('-i', '--inactive', action='store_true', help=(
+        "Select all commodities from input files, not just the ones active on the date"))
+
+    parser.add_argument('-u', '--undeclared', action='store', help=(
+        "Include commodities viewed in the file even without a "
+        "corresponding Commodity directive, from this default source. "
+        "The currency name itself is used as the lookup symbol in this default source."))
+
+    parser.add_argument('-c', '--clobber', action='store_true', help=(
+        "Do not skip prices which are already present in input files; fetch them anyway."))
+
+    parser.add_argument('-a', '--all', action='store_true', help=(
+        "A shorthand for --inactive, --undeclared, --clobber."))
+
+    parser.add_argument('-s', '--swap-inverted', action='store_true', help=(
+        "For inverted sources, swap currencies instead of inverting the rate. "
+        "For example, if fetching the rate for CAD from 'USD:google/^CURRENCY:USDCAD' "
+        "results in 1.25, by default we would output \"price CAD  0.8000 USD\". "
+        "Using this option we would instead output \" price USD   1.2500 CAD\"."))
+
+    parser.add_argument('-b', '--backfill', action='store_true', help=(
+        "Fetch the weekly prices missing over the time each commodity held at cost "
+        "was held, instead of the prices at a single date. The --date option sets "
+        "the last date for the commodities still held."))
+
+    parser.add_argument('-n', '--dry-run', action='store_true', help=(
+        "Don't actually fetch the prices, just print the list of the ones to be fetched."))
+
+    # Scheduling options.
+    sched_group = parser.add_argument_group('scheduling')
+    sched_group.add_argument('-w', '--workers', action='store', type=int,
+                             default=DEFAULT_WORKERS, help=(
+        "The number of threads fetching prices concurrently."))
+
+    sched_group.add_argument('--source-concurrency', action='append', metavar='MODULE=N',
+                             type=functools.partial(parse_source_limit, type_=int),
+                             default=[], help=(
+        "The maximum number of concurrent calls to a source module, e.g. 'yahoo=2'. "
+        "The default is {}. May be repeated.".format(DEFAULT_SOURCE_CONCURRENCY)))
+
+    sched_group.add_argument('--source-rate', action='append', metavar='MODULE=RATE',
+                             type=functools.partial(parse_source_limit, type_=float),
+                             default=[], help=(
+        "The maximum number of calls per second to a source module, e.g. "
+        "'yahoo=0.5'. There is no limit by default. May be repeated."))
+
+    # Caching options.
+    cache_group = parser.add_argument_group('cache')
+    cache_filename = path.join(tempfile.gettempdir(),
+                               "{}.cache".format(path.basename(sys.argv[0])))
+    cache_group.add_argument('--cache', dest='cache_filename',
+                             action='store', default=cache_filename,
+                             help="Enable the cache and with the given cache name.")
+    cache_group.add_argument('--no-cache', dest='cache_filename',
+                             action='store_const', const=None,
+                             help="Disable the price cache.")
+
+    cache_group.add_argument('--clear-cache', action='store_true',
+                             help="Clear the cache prior to startup")
+
+    cache_group.add_argument('--compact-cache', action='store_true',
+                             help=("Remove the expired prices from the cache and "
+                                   "reclaim their space prior to startup"))
+
+    args = parser.parse_args()
+
+    verbose_levels = {None: logging.WARN,
+                      0: logging.WARN,
+                      1: logging.INFO,
+                      2: logging.DEBUG}
+    logging.basicConfig(level=verbose_levels[args.verbose],
+                        format='%(levelname)-8s: %(message)s')
+
+    if args.all:
+        args.inactive = args.undeclared = args.clobber = True
+
+    if args.backfill and args.expressions:
+        parser.error("Backfilling requires input files, not source expressions.")
+
+    # Setup for processing.
+    setup_cache(args.cache_filename, args.clear_cache, args.compact_cache)
+
+    # Get the list of DatedPrice jobs to get from the arguments.
+    logging.info("Processing at date: %s", args.date or datetime.date.today())
+    jobs = []
+    all_entries = []
+    dcontext = None
+    if args.expressions:
+        # Interpret the arguments as price sources.
+        for source_str in args.sources:
+            psources = []
+            try:
+                psource_map = find_prices.parse_source_map(source_str)
+            except ValueError:
+                extra = "; did you provide a filename?" if path.exists(source_str) else ''
+                msg = ('Invalid source "{{}}"{}. '.format(extra) +
+                       'Supported format is "CCY:module/SYMBOL"')
+                parser.error(msg.format(source_str))
+            else:
+                for currency, psources in psource_map.items():
+                    jobs.append(find_prices.DatedPrice(
+                        psources[0].symbol, currency, args.date, psources))
+    else:
+        # Interpret the arguments as Beancount input filenames.
+        for filename in args.sources:
+            if not path.exists(filename) or not path.isfile(filename):
+                parser.error('File does not exist: "{}"; '
+                             'did you mean to use -e?'.format(filename))
+                continue
+            logging.info('Loading "%s"', filename)
+            entries, errors, options_map = loader.load_file(filename, log_errors=sys.stderr)
+            if dcontext is None:
+                dcontext = options_map['dcontext']
+            if args.backfill:
+                jobs.extend(
+                    find_prices.get_price_jobs_backfill(
+                        entries, args.date, args.undeclared))
+            else:
+                jobs.extend(
+                    find_prices.get_price_jobs_at_date(
+                        entries, args.date, args.inactive, args.undeclared))
+            all_entries.extend(entries)
+
+    return args, jobs, data.sorted(all_entries), dcontext
+
+
+def main():
+    args, jobs, entries, dcontext = process_args()
+
+    # If we're just being asked to list the jobs, do this here.
+    if args.dry_run:
+        for dprice in jobs:
+            print(find_prices.format_dated_price_str(dprice))
+        return
+
+    # Fetch all the required prices, processing all the jobs. Jobs for the same
+    # commodity at multiple dates are fetched together.
+    scheduler = FetchScheduler(dict(args.source_concurrency), dict(args.source_rate))
+    executor = futures.ThreadPoolExecutor(max_workers=args.workers)
+    price_entries = itertools.chain.from_iterable(executor.map(
+        functools.partial(fetch_price_range,
+                          swap_inverted=args.swap_inverted,
+                          scheduler=scheduler),
+        find_prices.group_price_jobs(jobs)))
+
+    # Sort them by currency, regardless of date (the dates should be close
+    # anyhow, and we tend to put them in chunks in the input files anyhow).
+    price_entries = sorted(price_entries, key=lambda e: e.currency)
+
+    # Avoid clobber, remove redundant entries.
+    if not args.clobber:
+        price_entries, ignored_entries = filter_redundant_prices(price_entries, entries)
+        for entry in ignored_entries:
+            logging.info("Ignored to avoid clobber: %s %s", entry.date, entry.currency)
+
+    # Print out the entries.
+    printer.print_entries(price_entries, dcontext=dcontext)
@@ -0,0 +1,475 @@
+"""Tests for main driver for price fetching.
+"""
+__copyright__ = "Copyright (C) 2015-2017  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import argparse
+import datetime
+import threading
+import time
+import types
+import unittest
+import shutil
+import tempfile
+import os
+from os import path
+from unittest import mock
+
+from dateutil import tz
+
+from beancount.prices.source import SourcePrice
+from beancount.prices import source
+from beancount.prices import price
+from beancount.prices import find_prices
+from beancount.prices.sources import yahoo
+from beancount.core.number import D
+from beancount.utils import test_utils
+from beancount.parser import cmptest
+from beancount import loader
+
+
+class TestSetupCache(unittest.TestCase):
+
+    def test_clear_cache_unset(self):
+        with mock.patch('os.remove') as mock_remove:
+            with tempfile.TemporaryDirectory():
+                price.setup_cache(None, True)
+        self.assertEqual(0, mock_remove.call_count)
+
+    def test_clear_cache_not_present(self):
+        with mock.patch('os.remove') as mock_remove:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                filename = path.join(tmpdir, 'cache.db')
+                price.setup_cache(filename, True)
+                self.assertEqual(0, mock_remove.call_count)
+                self.assertTrue(any(dirfile.startswith('cache.db')
+                                    for dirfile in os.listdir(tmpdir)))
+                price.reset_cache()
+
+    def test_clear_cache_present(self):
+        mock_remove = mock.MagicMock()
+        real_remove = os.remove
+        def remove(*args):
+            mock_remove(*args)
+            real_remove(*args)
+        with mock.patch('os.remove', remove):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                filename = path.join(tmpdir, 'cache.db')
+                with open(filename, 'w'): pass
+                price.setup_cache(filename, True)
+                self.assertEqual(1, mock_remove.call_count)
+                self.assertTrue(any(dirfile.startswith('cache.db')
+                                    for dirfile in os.listdir(tmpdir)))
+                price.reset_cache()
+
+    def test_leave_cache(self):
+        with mock.patch('os.remove') as mock_remove:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                filename = path.join(tmpdir, 'cache.db')
+                with open(filename, 'w'): pass
+                price.setup_cache(None, False)
+                self.assertEqual(0, mock_remove.call_count)
+                self.assertTrue(path.exists(filename))
+
+
+class TestCache(unittest.TestCase):
+
+    def test_fetch_cached_price__disabled(self):
+        # Latest.
+        with mock.patch('beancount.prices.price._CACHE', None):
+            self.assertIsNone(price._CACHE)
+            source = mock.MagicMock()
+            price.fetch_cached_price(source, 'HOOL', None)
+            self.assertTrue(source.get_latest_price.called)
+
+        # Historical.
+        with mock.patch('beancount.prices.price._CACHE', None):
+            self.assertIsNone(price._CACHE)
+            source = mock.MagicMock()
+            price.fetch_cached_price(source, 'HOOL', datetime.date.today())
+            self.assertTrue(source.get_historical_price.called)
+
+    def test_fetch_cached_price__latest(self):
+        tmpdir = tempfile.mkdtemp()
+        tmpfile = path.join(tmpdir, 'prices.cache')
+        try:
+            price.setup_cache(tmpfile, False)
+
+            srcprice = SourcePrice(D('1.723'), datetime.datetime.now(tz.tzutc()), 'USD')
+            source = mock.MagicMock()
+            source.get_latest_price.return_value = srcprice
+            source.__file__ = '<module>'
+
+            # Cache miss.
+            result = price.fetch_cached_price(source, 'HOOL', None)
+            self.assertTrue(source.get_latest_price.called)
+            self.assertEqual(1, len(price._CACHE))
+            self.assertEqual(srcprice, result)
+
+            source.get_latest_price.reset_mock()
+
+            # Cache hit.
+            result = price.fetch_cached_price(source, 'HOOL', None)
+            self.assertFalse(source.get_latest_price.called)
+            self.assertEqual(1, len(price._CACHE))
+            self.assertEqual(srcprice, result)
+
+            srcprice2 = SourcePrice(
+                D('1.894'), datetime.datetime.now(tz.tzutc()), 'USD')
+            source.get_latest_price.reset_mock()
+            source.get_latest_price.return_value = srcprice2
+
+            # Cache expired.
+            time_beyond = datetime.datetime.now() + price._CACHE.expiration * 2
+            with mock.patch('beancount.prices.price.now', return_value=time_beyond):
+                result = price.fetch_cached_price(source, 'HOOL', None)
+                self.assertTrue(source.get_latest_price.called)
+                self.assertEqual(1, len(price._CACHE))
+                self.assertEqual(srcprice2, result)
+        finally:
+            price.reset_cache()
+            if path.exists(tmpdir):
+                shutil.rmtree(tmpdir)
+
+    def test_fetch_cached_price__historical(self):
+        tmpdir = tempfile.mkdtemp()
+        tmpfile = path.join(tmpdir, 'prices.cache')
+        try:
+            price.setup_cache(tmpfile, False)
+
+            srcprice = SourcePrice(
+                D('1.723'), datetime.datetime.now(tz.tzutc()), 'USD')
+            source = mock.MagicMock()
+            source.get_historical_price.return_value = srcprice
+            source.__file__ = '<module>'
+
+            # Cache miss.
+            day = datetime.date(2006, 1, 2)
+            result = price.fetch_cached_price(source, 'HOOL', day)
+            self.assertTrue(source.get_historical_price.called)
+            self.assertEqual(1, len(price._CACHE))
+            self.assertEqual(srcprice, result)
+
+            source.get_historical_price.reset_mock()
+
+            # Cache hit.
+            result = price.fetch_cached_price(source, 'HOOL', day)
+            self.assertFalse(source.get_historical_price.called)
+            self.assertEqual(1, len(price._CACHE))
+            self.assertEqual(srcprice, result)
+        finally:
+            price.reset_cache()
+            if path.exists(tmpdir):
+                shutil.rmtree(tmpdir)
+
+
+class TestProcessArguments(unittest.TestCase):
+
+    def test_filename_not_exists(self):
+        with test_utils.capture('stderr'):
+            with self.assertRaises(SystemExit):
+                test_utils.run_with_args(
+                    price.process_args, ['--no-cache', '/some/file.beancount'])
+
+    @test_utils.docfile
+    def test_explicit_file__badcontents(self, filename):
+        """
+        2015-01-01 open Assets:Invest
+        2015-01-01 open USD ;; Error
+        """
+        with test_utils.capture('stderr'):
+            args, jobs, _, __ = test_utils.run_with_args(
+                price.process_args, ['--no-cache', filename])
+            self.assertEqual([], jobs)
+
+    def test_filename_exists(self):
+        with tempfile.NamedTemporaryFile('w') as tmpfile:
+            with test_utils.capture('stderr'):
+                args, jobs, _, __ = test_utils.run_with_args(
+                    price.process_args, ['--no-cache', tmpfile.name])
+                self.assertEqual([], jobs)  # Empty file.
+
+    def test_expressions(self):
+        with test_utils.capture('stderr'):
+            args, jobs, _, __ = test_utils.run_with_args(
+                price.process_args, ['--no-cache', '-e', 'USD:yahoo/AAPL'])
+            self.assertEqual(
+                [find_prices.DatedPrice(
+                    'AAPL', 'USD', None,
+                    [find_prices.PriceSource(yahoo, 'AAPL', False)])], jobs)
+
+    def test_backfill_expressions(self):
+        with test_utils.capture('stderr'):
+            with self.assertRaises(SystemExit):
+                test_utils.run_with_args(
+                    price.process_args, ['--no-cache', '--backfill', '-e',
+                                         'USD:yahoo/AAPL'])
+
+    @test_utils.docfile
+    def test_backfill(self, filename):
+        """
+        2000-01-10 open Assets:US:Invest:QQQ
+        2000-01-10 open Assets:US:Invest:Margin
+
+        2014-01-01 commodity QQQ
+          price: "USD:yahoo/NASDAQ:QQQ"
+
+        2014-02-06 *
+          Assets:US:Invest:QQQ             100 QQQ {86.23 USD}
+          Assets:US:Invest:Margin
+
+        2014-02-20 *
+          Assets:US:Invest:QQQ            -100 QQQ {86.23 USD} @ 91.23 USD
+          Assets:US:Invest:Margin
+        """
+        with test_utils.capture('stderr'):
+            args, jobs, _, __ = test_utils.run_with_args(
+                price.process_args, ['--no-cache', '--backfill', filename])
+        self.assertEqual([datetime.date(2014, 2, 7), datetime.date(2014, 2, 14)],
+                         [job.date for job in jobs])
+
+
+class TestClobber(cmptest.TestCase):
+
+    @loader.load_doc()
+    def setUp(self, entries, _, __):
+        """
+          ;; Existing file.
+          2015-01-05 price HDV                                 75.56 USD
+          2015-01-23 price HDV                                 77.34 USD
+          2015-02-06 price HDV                                 77.16 USD
+          2015-02-12 price HDV                                 78.17 USD
+          2015-05-01 price HDV                                 77.48 USD
+          2015-06-02 price HDV                                 76.33 USD
+          2015-06-29 price HDV                                 73.74 USD
+          2015-07-06 price HDV                                 73.79 USD
+          2015-08-11 price HDV                                 74.19 USD
+          2015-09-04 price HDV                                 68.98 USD
+        """
+        self.entries = entries
+
+        # New entries.
+        self.price_entries, _, __ = loader.load_string("""
+          2015-01-27 price HDV                                 76.83 USD
+          2015-02-06 price HDV                                 77.16 USD
+          2015-02-19 price HDV                                  77.5 USD
+          2015-06-02 price HDV                                 76.33 USD
+          2015-06-19 price HDV                                    76 USD
+          2015-07-06 price HDV                                 73.79 USD
+          2015-07-31 price HDV                                 74.64 USD
+          2015-08-11 price HDV                                 74.20 USD ;; Different
+        """, dedent=True)
+
+    def test_clobber_nodiffs(self):
+        new_price_entries, _ = price.filter_redundant_prices(self.price_entries,
+                                                             self.entries,
+                                                             diffs=False)
+        self.assertEqualEntries("""
+          2015-01-27 price HDV                                 76.83 USD
+          2015-02-19 price HDV                                  77.5 USD
+          2015-06-19 price HDV                                    76 USD
+          2015-07-31 price HDV                                 74.64 USD
+        """, new_price_entries)
+
+    def test_clobber_diffs(self):
+        new_price_entries, _ = price.filter_redundant_prices(self.price_entries,
+                                                             self.entries,
+                                                             diffs=True)
+        self.assertEqualEntries("""
+          2015-01-27 price HDV                                 76.83 USD
+          2015-02-19 price HDV                                  77.5 USD
+          2015-06-19 price HDV                                    76 USD
+          2015-07-31 price HDV                                 74.64 USD
+          2015-08-11 price HDV                                 74.20 USD ;; Different
+        """, new_price_entries)
+
+
+class TestTimezone(unittest.TestCase):
+
+    @mock.patch.object(price, 'fetch_cached_price')
+    def test_fetch_price__naive_time_no_timeozne(self, fetch_cached):
+        fetch_cached.return_value = SourcePrice(
+            D('125.00'), datetime.datetime(2015, 11, 22, 16, 0, 0), 'JPY')
+        dprice = find_prices.DatedPrice('JPY', 'USD', datetime.date(2015, 11, 22), None)
+        with self.assertRaises(ValueError):
+            price.fetch_price(dprice._replace(sources=[
+                find_prices.PriceSource(yahoo, 'USDJPY', False)]), False)
+
+
+class TestInverted(unittest.TestCase):
+
+    def setUp(self):
+        fetch_cached = mock.patch('beancount.prices.price.fetch_cached_price').start()
+        fetch_cached.return_value = SourcePrice(
+            D('125.00'), datetime.datetime(2015, 11, 22, 16, 0, 0, tzinfo=tz.tzlocal()),
+            'JPY')
+        self.dprice = find_prices.DatedPrice('JPY', 'USD', datetime.date(2015, 11, 22),
+                                             None)
+        self.addCleanup(mock.patch.stopall)
+
+    def test_fetch_price__normal(self):
+        entry = price.fetch_price(self.dprice._replace(sources=[
+            find_prices.PriceSource(yahoo, 'USDJPY', False)]), False)
+        self.assertEqual(('JPY', 'USD'), (entry.currency, entry.amount.currency))
+        self.assertEqual(D('125.00'), entry.amount.number)
+
+    def test_fetch_price__inverted(self):
+        entry = price.fetch_price(self.dprice._replace(sources=[
+            find_prices.PriceSource(yahoo, 'USDJPY', True)]), False)
+        self.assertEqual(('JPY', 'USD'), (entry.currency, entry.amount.currency))
+        self.assertEqual(D('0.008'), entry.amount.number)
+
+    def test_fetch_price__swapped(self):
+        entry = price.fetch_price(self.dprice._replace(sources=[
+            find_prices.PriceSource(yahoo, 'USDJPY', True)]), True)
+        self.assertEqual(('USD', 'JPY'), (entry.currency, entry.amount.currency))
+        self.assertEqual(D('125.00'), entry.amount.number)
+
+
+class FakeSource(source.Source):
+    """A local source with prices on weekdays, which records its calls."""
+
+    def __init__(self):
+        self.calls = FAKE_CALLS
+
+    def _price(self, date):
+        time_ = datetime.datetime.combine(date, datetime.time(16, 0, 0),
+                                          tzinfo=tz.tzlocal())
+        return SourcePrice(D(date.day), time_, 'USD')
+
+    def get_latest_price(self, ticker):
+        self.calls.append(('latest', ticker))
+        return self._price(datetime.date.today())
+
+    def get_historical_price(self, ticker, time_):
+        date = time_.astimezone(tz.tzlocal()).date()
+        self.calls.append(('historical', ticker, date))
+        while date.weekday() >= 5:
+            date -= datetime.timedelta(days=1)
+        return self._price(date)
+
+    def get_historical_prices(self, ticker, time_begin, time_end):
+        date_begin = time_begin.astimezone(tz.tzlocal()).date()
+        date_end = time_end.astimezone(tz.tzlocal()).date()
+        self.calls.append(('range', ticker, date_begin, date_end))
+        return [self._price(date_begin + datetime.timedelta(days=days))
+                for days in range((date_end - date_begin).days + 1)
+                if (date_begin + datetime.timedelta(days=days)).weekday() < 5]
+
+
+class FakeSingleSource(FakeSource):
+    """A local source which does not support fetching ranges."""
+
+    def get_historical_prices(self, ticker, time_begin, time_end):
+        return None
+
+
+# The calls made to the fake sources.
+FAKE_CALLS = []
+
+# Modules for the fake sources.
+fake_module = types.ModuleType('fake_source')
+fake_module.Source = FakeSource
+fake_single_module = types.ModuleType('fake_single_source')
+fake_single_module.Source = FakeSingleSource
+
+
+class TestFetchPriceRange(unittest.TestCase):
+
+    def setUp(self):
+        del FAKE_CALLS[:]
+        # Friday to Tuesday.
+        self.dates = [datetime.date(2018, 3, day) for day in range(2, 7)]
+
+    def get_range(self, module, dates=None):
+        return find_prices.DatedPriceRange(
+            'HOOL', 'USD', dates or self.dates,
+            [find_prices.PriceSource(module, 'HOOL', False)])
+
+    def test_batched(self):
+        entries = price.fetch_price_range(self.get_range(fake_module))
+        self.assertEqual([('range', 'HOOL', self.dates[0], self.dates[-1])], FAKE_CALLS)
+        # The weekend yields Friday's price, only once.
+        self.assertEqual([(datetime.date(2018, 3, day), D(day)) for day in (2, 5, 6)],
+                         [(entry.date, entry.amount.number) for entry in entries])
+
+    def test_single(self):
+        entries = price.fetch_price_range(self.get_range(fake_single_module))
+        self.assertEqual(len(self.dates), len(FAKE_CALLS))
+        self.assertEqual(['historical'] * len(self.dates),
+                         [call[0] for call in FAKE_CALLS])
+        self.assertEqual([(datetime.date(2018, 3, day), D(day)) for day in (2, 5, 6)],
+                         [(entry.date, entry.amount.number) for entry in entries])
+
+    def test_before_range(self):
+        # Sunday and Monday: the price for Sunday comes before the range.
+        dates = [datetime.date(2018, 3, 4), datetime.date(2018, 3, 5)]
+        entries = price.fetch_price_range(self.get_range(fake_module, dates))
+        self.assertEqual([('range', 'HOOL', dates[0], dates[1]),
+                          ('historical', 'HOOL', dates[0])], FAKE_CALLS)
+        self.assertEqual([datetime.date(2018, 3, 2), datetime.date(2018, 3, 5)],
+                         [entry.date for entry in entries])
+
+    def test_cached(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            price.setup_cache(path.join(tmpdir, 'prices.cache'), False)
+            try:
+                entries = price.fetch_price_range(self.get_range(fake_module))
+                self.assertEqual(1, len(FAKE_CALLS))
+
+                # All the dates are now served from the cache.
+                self.assertEqual(entries, price.fetch_price_range(
+                    self.get_range(fake_module)))
+                self.assertEqual(1, len(FAKE_CALLS))
+
+                # Only the missing dates are requested.
+                dates = self.dates + [datetime.date(2018, 3, 7),
+                                      datetime.date(2018, 3, 8)]
+                price.fetch_price_range(self.get_range(fake_module, dates))
+                self.assertEqual(('range', 'HOOL', dates[-2], dates[-1]),
+                                 FAKE_CALLS[-1])
+            finally:
+                price.reset_cache()
+
+    def test_single_date(self):
+        entries = price.fetch_price_range(self.get_range(fake_module, [None]))
+        self.assertEqual([('latest', 'HOOL')], FAKE_CALLS)
+        self.assertEqual(1, len(entries))
+
+
+class TestFetchScheduler(unittest.TestCase):
+
+    def test_concurrency(self):
+        scheduler = price.FetchScheduler({'price_test': 2}, default_concurrency=10)
+        lock = threading.Lock()
+        active = [0]
+        maximum = [0]
+        def function():
+            with lock:
+                active[0] += 1
+                maximum[0] = max(maximum[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+        threads = [threading.Thread(target=scheduler.call,
+                                    args=(FakeSource(), function))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(2, maximum[0])
+
+    def test_rate(self):
+        scheduler = price.FetchScheduler(rates={
+            'beancount.prices.price_test': 50.0})
+        times = []
+        for _ in range(4):
+            scheduler.call(FakeSource(), lambda: times.append(time.monotonic()))
+        self.assertGreaterEqual(times[-1] - times[0], 3 / 50.0 * 0.9)
+
+    def test_parse_source_limit(self):
+        self.assertEqual(('yahoo', 2), price.parse_source_limit('yahoo=2', int))
+        for string in 'yahoo', '=2', 'yahoo=0', 'yahoo=abc':
+            with self.assertRaises(argparse.ArgumentTypeError):
+                price.parse_source_limit(string, int)
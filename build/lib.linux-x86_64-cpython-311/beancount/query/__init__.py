@@ -0,0 +1,4 @@
+"""Transaction and postings filtering syntax parser.
+"""
+__copyright__ = "Copyright (C) 2014-2017  Martin Blais"
+__license__ = "GNU GPLv2"
@@ -0,0 +1,526 @@
+"""A columnar evaluator for aggregate queries over postings.
+
+The row-based interpreter in query_execute evaluates every compiled expression
+once per posting, which is slow on large ledgers. This module flattens the
+postings into a table once, and dictionary-encodes the attributes that only take
+a small number of distinct values: dates, accounts, currencies and the
+attributes of the parent transactions. An expression that only depends on one of
+these attributes is then evaluated a single time per distinct value (using the
+row interpreter itself on a representative row), and the aggregations are
+computed in tight loops over the selected rows.
+
+Only a subset of the expressions and aggregators is supported by this evaluator.
+On anything else, Unsupported is raised, and the caller is expected to fall back
+to the row interpreter. The results are identical.
+"""
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import collections
+
+from beancount.core.number import ZERO
+from beancount.core.amount import Amount
+from beancount.core.position import Position
+from beancount.core import data
+from beancount.core import inventory
+from beancount.query import query_compile
+from beancount.query import query_env
+from beancount.utils import misc_utils
+
+
+class Unsupported(Exception):
+    """An expression cannot be evaluated by the columnar evaluator."""
+
+
+# A mapping of column accessor types to the name of the dictionary-encoded
+# attribute which fully determines their value.
+ENCODED_COLUMNS = {
+    query_env.DateColumn: 'date',
+    query_env.YearColumn: 'date',
+    query_env.MonthColumn: 'date',
+    query_env.DayColumn: 'date',
+    query_env.AccountColumn: 'account',
+    query_env.CurrencyColumn: 'currency',
+    query_env.CostCurrencyColumn: 'cost_currency',
+    query_env.PostingFlagColumn: 'posting_flag',
+    query_env.IdColumn: 'entry',
+    query_env.TypeColumn: 'entry',
+    query_env.FlagColumn: 'entry',
+    query_env.PayeeColumn: 'entry',
+    query_env.NarrationColumn: 'entry',
+    query_env.DescriptionColumn: 'entry',
+    query_env.TagsColumn: 'entry',
+    query_env.LinksColumn: 'entry',
+    }
+
+# A mapping of column accessor types to functions extracting their value from a
+# posting, for columns which take a distinct value on each row.
+ROW_COLUMNS = {
+    query_env.NumberColumn: lambda posting: posting.units.number,
+    }
+
+# Expression nodes which evaluate to the same value given the same values of
+# their operands, regardless of the row being evaluated.
+PURE_NODES = {
+    query_compile.EvalConstant,
+    query_compile.EvalNot,
+    query_compile.EvalEqual,
+    query_compile.EvalAnd,
+    query_compile.EvalOr,
+    query_compile.EvalGreater,
+    query_compile.EvalGreaterEq,
+    query_compile.EvalLess,
+    query_compile.EvalLessEq,
+    query_compile.EvalMatch,
+    query_compile.EvalContains,
+    query_compile.EvalMul,
+    query_compile.EvalDiv,
+    query_compile.EvalAdd,
+    query_compile.EvalSub,
+    query_env.NegDecimal,
+    query_env.AbsDecimal,
+    query_env.SafeDiv,
+    query_env.SafeDivInt,
+    query_env.Length,
+    query_env.Str,
+    query_env.MaxWidth,
+    query_env.Year,
+    query_env.Month,
+    query_env.YearMonth,
+    query_env.Quarter,
+    query_env.Day,
+    query_env.Weekday,
+    query_env.Today,
+    query_env.Root,
+    query_env.Parent,
+    query_env.Leaf,
+    query_env.Grep,
+    query_env.GrepN,
+    query_env.Subst,
+    query_env.OpenDate,
+    query_env.CloseDate,
+    query_env.OpenMeta,
+    query_env.AccountSortKey,
+    query_env.CurrencyMeta,
+    query_env.Coalesce,
+    query_env.Date,
+    query_env.ParseDate,
+    query_env.DateDiff,
+    query_env.DateAdd,
+    }
+
+# Pure nodes which may combine operands depending on distinct attributes. The
+# values are a function of the operand values.
+COMBINATOR_NODES = {
+    query_compile.EvalNot,
+    query_compile.EvalEqual,
+    query_compile.EvalAnd,
+    query_compile.EvalOr,
+    query_compile.EvalGreater,
+    query_compile.EvalGreaterEq,
+    query_compile.EvalLess,
+    query_compile.EvalLessEq,
+    query_compile.EvalMatch,
+    query_compile.EvalMul,
+    query_compile.EvalDiv,
+    query_compile.EvalAdd,
+    query_compile.EvalSub,
+    }
+
+# A special attribute name for values which vary on every row.
+ROW = 'row'
+
+
+class PostingsTable:
+    """A flattened table of the postings of a list of entries.
+
+    Attributes:
+      entries: A list of the parent Transaction instance of each row.
+      postings: A list of the Posting instance of each row.
+    """
+
+    def __init__(self, entries):
+        """Flatten the postings of the given entries.
+
+        Args:
+          entries: A list of directives.
+        """
+        self.entries = []
+        self.postings = []
+        for entry in misc_utils.filter_type(entries, data.Transaction):
+            self.entries.extend([entry] * len(entry.postings))
+            self.postings.extend(entry.postings)
+        self._encodings = {}
+
+    def __len__(self):
+        return len(self.postings)
+
+    def get_encoding(self, name):
+        """Get the dictionary-encoding of an attribute, computing it the first time.
+
+        Args:
+          name: A string, one of the values of ENCODED_COLUMNS.
+        Returns:
+          A pair of
+            codes: A list of integers, the code of the attribute's value on each row.
+            rows: A list of integers, the index of a representative row for each
+              code.
+        """
+        try:
+            return self._encodings[name]
+        except KeyError:
+            pass
+
+        codes, rows = [], []
+        if name == 'entry':
+            # Rows from the same entry are contiguous.
+            previous = None
+            for row, entry in enumerate(self.entries):
+                if entry is not previous:
+                    rows.append(row)
+                    previous = entry
+                codes.append(len(rows) - 1)
+        else:
+            if name == 'date':
+                values = [entry.date for entry in self.entries]
+            elif name == 'account':
+                values = [posting.account for posting in self.postings]
+            elif name == 'currency':
+                values = [posting.units.currency for posting in self.postings]
+            elif name == 'cost_currency':
+                values = [posting.cost.currency if posting.cost else None
+                          for posting in self.postings]
+            elif name == 'posting_flag':
+                values = [posting.flag for posting in self.postings]
+            else:
+                raise ValueError("Invalid attribute name: '{}'".format(name))
+            code_map = {}
+            for row, value in enumerate(values):
+                code = code_map.get(value, None)
+                if code is None:
+                    code = code_map[value] = len(rows)
+                    rows.append(row)
+                codes.append(code)
+
+        self._encodings[name] = codes, rows
+        return codes, rows
+
+
+class _LazyValues(dict):
+    """A mapping of attribute code to the value of an expression, computed on demand.
+
+    The value is computed by evaluating the expression with the row interpreter on
+    the representative row of the code.
+    """
+
+    def __init__(self, c_expr, rows, table, context):
+        super().__init__()
+        self.c_expr = c_expr
+        self.rows = rows
+        self.table = table
+        self.context = context
+
+    def __missing__(self, code):
+        row = self.rows[code]
+        self.context.entry = self.table.entries[row]
+        self.context.posting = self.table.postings[row]
+        value = self[code] = self.c_expr(self.context)
+        return value
+
+
+# Evaluated vectors of values: a single value for all rows, a dictionary-encoded
+# attribute and the value of the expression for each of its codes, or a list of
+# values for each row (or a dict of the selected rows to their value).
+Scalar = collections.namedtuple('Scalar', 'value')
+Encoded = collections.namedtuple('Encoded', 'name values')
+Plain = collections.namedtuple('Plain', 'values')
+
+
+def get_dependencies(c_expr):
+    """Compute the set of attributes an expression depends on.
+
+    Args:
+      c_expr: A compiled expression (an EvalNode instance).
+    Returns:
+      A set of attribute names, from the values of ENCODED_COLUMNS or ROW.
+    Raises:
+      Unsupported: If the expression cannot be evaluated by this module.
+    """
+    node_type = type(c_expr)
+    name = ENCODED_COLUMNS.get(node_type, None)
+    if name is not None:
+        return {name}
+    if node_type in ROW_COLUMNS:
+        return {ROW}
+    if node_type not in PURE_NODES:
+        raise Unsupported(node_type.__name__)
+    dependencies = set()
+    for c_child in c_expr.childnodes():
+        dependencies.update(get_dependencies(c_child))
+    return dependencies
+
+
+def evaluate(c_expr, table, context, selection=None):
+    """Evaluate an expression over the rows of a table.
+
+    The values which depend on each row are only computed on the selected rows,
+    as the row interpreter would only evaluate the rows matching the WHERE
+    clause. This matters for the expressions which raise an error on the other
+    rows, e.g., a division by a number which is zero there.
+
+    Args:
+      c_expr: A compiled expression (an EvalNode instance).
+      table: A PostingsTable instance.
+      context: A RowContext instance, used to evaluate expressions on
+        representative rows.
+      selection: An optional list of row indexes to evaluate the expression on.
+        If provided, the values of a Plain vector are a dict of those row
+        indexes to their value.
+    Returns:
+      A Scalar, Encoded or Plain instance.
+    Raises:
+      Unsupported: If the expression cannot be evaluated by this module.
+    """
+    dependencies = get_dependencies(c_expr)
+    if not dependencies:
+        return Scalar(c_expr(context))
+
+    if len(dependencies) == 1 and ROW not in dependencies:
+        name = dependencies.pop()
+        _, rows = table.get_encoding(name)
+        return Encoded(name, _LazyValues(c_expr, rows, table, context))
+
+    node_type = type(c_expr)
+    if node_type in ROW_COLUMNS:
+        extract = ROW_COLUMNS[node_type]
+        if selection is None:
+            values = [extract(posting) for posting in table.postings]
+        else:
+            postings = table.postings
+            values = [extract(postings[row]) for row in selection]
+    elif node_type in COMBINATOR_NODES:
+        operands = [materialize(evaluate(c_child, table, context, selection),
+                                table, selection)
+                    for c_child in c_expr.childnodes()]
+        values = list(map(c_expr.operator, *operands))
+    elif node_type is query_compile.EvalContains:
+        # Note: The operands are reversed.
+        left = materialize(evaluate(c_expr.left, table, context, selection),
+                           table, selection)
+        right = materialize(evaluate(c_expr.right, table, context, selection),
+                            table, selection)
+        values = list(map(c_expr.operator, right, left))
+    else:
+        raise Unsupported(node_type.__name__)
+
+    return Plain(values if selection is None else dict(zip(selection, values)))
+
+
+def materialize(vector, table, selection=None):
+    """Convert an evaluated vector to a list of values for each row.
+
+    Args:
+      vector: A Scalar, Encoded or Plain instance.
+      table: The PostingsTable instance the vector was evaluated on.
+      selection: An optional list of row indexes to restrict the output to. If
+        the vector was evaluated on a selection, this must be a subset of it.
+    Returns:
+      A list of values.
+    """
+    num_rows = len(table) if selection is None else len(selection)
+    if isinstance(vector, Scalar):
+        return [vector.value] * num_rows
+    elif isinstance(vector, Encoded):
+        codes, _ = table.get_encoding(vector.name)
+        values = vector.values
+        if selection is None:
+            return [values[code] for code in codes]
+        else:
+            return [values[codes[row]] for row in selection]
+    else:
+        if selection is None:
+            return vector.values
+        else:
+            values = vector.values
+            return [values[row] for row in selection]
+
+
+def select(c_where, table, context):
+    """Compute the indexes of the rows matching a WHERE clause.
+
+    Args:
+      c_where: A compiled expression, or None.
+      table: A PostingsTable instance.
+      context: A RowContext instance.
+    Returns:
+      A list of row indexes, in increasing order.
+    Raises:
+      Unsupported: If the expression cannot be evaluated by this module.
+    """
+    if c_where is None:
+        return list(range(len(table)))
+    vector = evaluate(c_where, table, context)
+    if isinstance(vector, Scalar):
+        return list(range(len(table))) if vector.value else []
+    elif isinstance(vector, Encoded):
+        codes, rows = table.get_encoding(vector.name)
+        values = vector.values
+        matches = [bool(values[code]) for code in range(len(rows))]
+        return [row for row, code in enumerate(codes) if matches[code]]
+    else:
+        return [row for row, value in enumerate(vector.values) if value]
+
+
+def aggregate(c_where, c_nonaggregate_exprs, c_aggregate_exprs, allocator,
+              table, context):
+    """Compute the aggregation stores of an aggregate query.
+
+    This produces the same output as the aggregation loop of
+    query_execute.execute_query().
+
+    Args:
+      c_where: A compiled WHERE expression, or None.
+      c_nonaggregate_exprs: A list of the compiled group-by expressions.
+      c_aggregate_exprs: A list of the compiled aggregator nodes, whose storage
+        has already been allocated.
+      allocator: The Allocator instance used to allocate the storage.
+      table: A PostingsTable instance.
+      context: A RowContext instance.
+    Returns:
+      A dict of group key tuples to aggregation store.
+    Raises:
+      Unsupported: If some of the expressions cannot be evaluated by this module.
+    """
+    # Check all the expressions before doing any work.
+    for c_expr in c_aggregate_exprs:
+        if type(c_expr) not in AGGREGATORS:
+            raise Unsupported(type(c_expr).__name__)
+        if isinstance(c_expr, query_env.SumPosition):
+            if not isinstance(c_expr.operands[0], query_env.PositionColumn):
+                raise Unsupported(type(c_expr.operands[0]).__name__)
+        elif not isinstance(c_expr, query_env.Count):
+            get_dependencies(c_expr.operands[0])
+    for c_expr in c_nonaggregate_exprs:
+        get_dependencies(c_expr)
+    if c_where is not None:
+        get_dependencies(c_where)
+
+    # Select the rows and group them by key, in order of first appearance.
+    # Note: The other expressions are only evaluated on the selected rows.
+    selection = select(c_where, table, context)
+    if not selection:
+        return {}
+    key_columns = [materialize(evaluate(c_expr, table, context, selection),
+                               table, selection)
+                   for c_expr in c_nonaggregate_exprs]
+    keys = zip(*key_columns) if key_columns else [()] * len(selection)
+    groups = {}
+    for row, key in zip(selection, keys):
+        group_rows = groups.get(key, None)
+        if group_rows is None:
+            groups[key] = [row]
+        else:
+            group_rows.append(row)
+
+    # Compute the aggregates for each group.
+    agg_store = {key: allocator.create_store() for key in groups}
+    for c_expr in c_aggregate_exprs:
+        function = AGGREGATORS[type(c_expr)]
+        if isinstance(c_expr, (query_env.Count, query_env.SumPosition)):
+            for key, group_rows in groups.items():
+                agg_store[key][c_expr.handle] = function(c_expr, group_rows, table)
+        else:
+            vector = evaluate(c_expr.operands[0], table, context, selection)
+            for key, group_rows in groups.items():
+                values = materialize(vector, table, group_rows)
+                agg_store[key][c_expr.handle] = function(c_expr, values, table)
+
+    return agg_store
+
+
+def aggregate_count(unused_c_expr, rows, unused_table):
+    """Count the rows. See Count."""
+    return len(rows)
+
+
+def aggregate_sum(c_expr, values, unused_table):
+    """Sum the non-null values. See Sum."""
+    total = c_expr.dtype()
+    for value in values:
+        if value is not None:
+            total += value
+    return total
+
+
+def aggregate_sum_position(unused_c_expr, rows, table):
+    """Sum the positions of the rows into an inventory. See SumPosition.
+
+    This replicates Inventory.add_amount() on numbers, and only creates the
+    positions at the end.
+    """
+    postings = table.postings
+    numbers = {}
+    for row in rows:
+        posting = postings[row]
+        units = posting.units
+        key = (units.currency, posting.cost)
+        number = numbers.get(key, None)
+        if number is None:
+            if units.number != ZERO:
+                numbers[key] = units.number
+        else:
+            number += units.number
+            if number == ZERO:
+                del numbers[key]
+            else:
+                numbers[key] = number
+    inv = inventory.Inventory()
+    for key, number in numbers.items():
+        currency, cost = key
+        inv[key] = Position(Amount(number, currency), cost)
+    return inv
+
+
+def aggregate_first(unused_c_expr, values, unused_table):
+    """Get the first non-null value. See First."""
+    for value in values:
+        if value is not None:
+            return value
+    return None
+
+
+def aggregate_last(unused_c_expr, values, unused_table):
+    """Get the last value. See Last."""
+    return values[-1] if values else None
+
+
+def aggregate_min(c_expr, values, unused_table):
+    """Get the minimum value. See Min."""
+    result = c_expr.dtype()
+    for value in values:
+        if value < result:
+            result = value
+    return result
+
+
+def aggregate_max(c_expr, values, unused_table):
+    """Get the maximum value. See Max."""
+    result = c_expr.dtype()
+    for value in values:
+        if value > result:
+            result = value
+    return result
+
+
+# A mapping of supported aggregator types to functions computing their value from
+# the rows of a group (for Count and SumPosition), or from the values of their
+# operand on those rows (for the others).
+AGGREGATORS = {
+    query_env.Count: aggregate_count,
+    query_env.Sum: aggregate_sum,
+    query_env.SumPosition: aggregate_sum_position,
+    query_env.First: aggregate_first,
+    query_env.Last: aggregate_last,
+    query_env.Min: aggregate_min,
+    query_env.Max: aggregate_max,
+    }
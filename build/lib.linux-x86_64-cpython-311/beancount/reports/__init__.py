@@ -0,0 +1,4 @@
+"""Routines to produce various reports, either to HTML or to text.
+"""
+__copyright__ = "Copyright (C) 2014, 2016  Martin Blais"
+__license__ = "GNU GPLv2"
@@ -0,0 +1,77 @@
+"""Parse, check and realize a beancount input file.
+
+This also measures the time it takes to run all these steps. With --profile, a
+detailed profile of each stage of the load is written as JSON.
+"""
+__copyright__ = "Copyright (C) 2014, 2016-2017  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import contextlib
+import logging
+import sys
+
+from beancount import loader
+from beancount.ops import validation
+from beancount.utils import misc_utils
+from beancount.utils import profiler
+from beancount.utils import version
+
+
+def main():
+    parser = version.ArgumentParser(description=__doc__)
+
+    parser.add_argument('filename',
+                        help='Beancount input filename.')
+
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='Print timings.')
+
+    parser.add_argument('--profile', action='store', metavar='JSON_FILENAME',
+                        help=("Write the wall and CPU time and the number of entries "
+                              "of each stage of the load (input files, booking, "
+                              "plugins and validations) to a JSON file. The load "
+                              "cache is not used."))
+
+    parser.add_argument('--profile-memory', action='store_true',
+                        help=("Also trace the memory allocated by each stage. "
+                              "This makes the load significantly slower."))
+
+    parser.add_argument('--profile-cprofile', action='store', metavar='DIRECTORY',
+                        help="Also save a cProfile dump of each stage to a directory.")
+
+    opts = parser.parse_args()
+    if (opts.profile_memory or opts.profile_cprofile) and not opts.profile:
+        parser.error("--profile-memory and --profile-cprofile require --profile")
+
+    if opts.verbose:
+        logging.basicConfig(level=logging.INFO,
+                            format='%(levelname)-8s: %(message)s')
+
+    if opts.profile:
+        load_profiler = profiler.Profiler(opts.profile_memory, opts.profile_cprofile)
+        profiling = profiler.activate(load_profiler)
+    else:
+        load_profiler = None
+        profiling = contextlib.ExitStack()
+
+    with misc_utils.log_time('beancount.loader (total)', logging.info), profiling:
+        # Load up the file, print errors, checking and validation are invoked
+        # automatically.
+        entries, errors, _ = loader.load_file(
+            opts.filename,
+            log_timings=logging.info,
+            log_errors=sys.stderr,
+            # Force slow and hardcore validations, just for check.
+            extra_validations=validation.HARDCORE_VALIDATIONS)
+
+    if load_profiler is not None:
+        with open(opts.profile, 'w') as outfile:
+            load_profiler.write(outfile)
+
+    # Exit with an error code if there were any errors, so this can be used in a
+    # shell conditional.
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""Profiling of the stages of loading a ledger.
+
+The loader wraps each of its stages -- the parsing of every input file, booking,
+each plugin and each validation function -- in a call to stage(). This does
+nothing unless a Profiler has been activated, in which case the wall and CPU
+time of the stage, the number of entries it received and produced and,
+optionally, the memory it allocated are recorded, and a cProfile dump of the
+stage may be saved. This is used by bean-check --profile.
+"""
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import collections
+import contextlib
+import cProfile
+import json
+import os
+import re
+import time
+import tracemalloc
+from os import path
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Not available on Windows.
+
+
+# The record of a profiled stage.
+#
+# Attributes:
+#   name: A string, the name of the stage, e.g. the name of a plugin module.
+#   kind: A string, the kind of stage: 'phase', 'file', 'plugin' or 'validation'.
+#   filename: A string, the name of the input file the stage processed, or None.
+#   depth: An integer, the number of stages this one is nested in.
+#   wall_time: A float, the elapsed time in seconds.
+#   cpu_time: A float, the CPU time of the process in seconds.
+#   entries_in: An integer, the number of entries the stage was given, or None.
+#   entries_out: An integer, the number of entries the stage produced, or None.
+#   allocated_bytes: An integer, the net size of the memory allocated during the
+#     stage, or None if memory is not traced.
+#   peak_bytes: An integer, the peak size of the memory allocated during the
+#     stage, above what was allocated at its start, or None if memory is not
+#     traced.
+#   max_rss: An integer, the maximum resident set size of the process at the
+#     end of the stage, in kilobytes, or None if unavailable.
+#   cprofile_filename: A string, the name of the cProfile dump of the stage, or
+#     None.
+Stage = collections.namedtuple('Stage', ('name kind filename depth '
+                                         'wall_time cpu_time '
+                                         'entries_in entries_out '
+                                         'allocated_bytes peak_bytes max_rss '
+                                         'cprofile_filename'))
+
+
+class StageCounts:
+    """The counts of a running stage, to be filled in by the profiled code.
+
+    Attributes:
+      entries_out: An integer, the number of entries produced by the stage.
+    """
+    __slots__ = ('entries_out',)
+
+    def __init__(self):
+        self.entries_out = None
+
+
+class Profiler:
+    """A recorder of the profiles of the stages of a load.
+
+    Attributes:
+      trace_memory: A boolean, true if the memory allocated by each stage should be
+        traced. This slows down the load significantly.
+      cprofile_dir: A string, the name of a directory to save a cProfile dump of
+        each stage to, or None.
+      stages: A list of Stage instances, in the order the stages were started.
+    """
+
+    def __init__(self, trace_memory=False, cprofile_dir=None):
+        self.trace_memory = trace_memory
+        self.cprofile_dir = cprofile_dir
+        self.stages = []
+        self.depth = 0
+        self.cprofile = None
+
+    @contextlib.contextmanager
+    def stage(self, name, kind, entries=None, filename=None, cprofile=True):
+        """Profile a stage. See the module-level stage() function."""
+        index = len(self.stages)
+        self.stages.append(None)
+        counts = StageCounts()
+
+        # Only one cProfile profiler may run at a time; nested stages are
+        # included in the dump of their parent.
+        profile = None
+        if cprofile and self.cprofile_dir and self.cprofile is None:
+            profile = self.cprofile = cProfile.Profile()
+
+        if self.trace_memory:
+            memory_before, _ = tracemalloc.get_traced_memory()
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+        self.depth += 1
+        wall_before = time.perf_counter()
+        cpu_before = time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield counts
+        finally:
+            if profile is not None:
+                profile.disable()
+                self.cprofile = None
+            cpu_time = time.process_time() - cpu_before
+            wall_time = time.perf_counter() - wall_before
+            self.depth -= 1
+
+            allocated_bytes = peak_bytes = None
+            if self.trace_memory:
+                memory_after, memory_peak = tracemalloc.get_traced_memory()
+                allocated_bytes = memory_after - memory_before
+                peak_bytes = max(memory_peak - memory_before, 0)
+
+            cprofile_filename = None
+            if profile is not None:
+                cprofile_filename = path.join(
+                    self.cprofile_dir, '{:03d}-{}.prof'.format(
+                        index, re.sub(r'[^A-Za-z0-9_.-]+', '_',
+                                      path.basename(filename) if filename else name)))
+                profile.dump_stats(cprofile_filename)
+
+            self.stages[index] = Stage(
+                name, kind, filename, self.depth,
+                wall_time, cpu_time,
+                len(entries) if entries is not None else None,
+                counts.entries_out,
+                allocated_bytes, peak_bytes, get_max_rss(),
+                cprofile_filename)
+
+    def totals(self):
+        """Sum up the time of the stages per kind and name.
+
+        Returns:
+          A list of (kind, name, count, wall_time, cpu_time) tuples, sorted by
+          decreasing wall time.
+        """
+        totals = collections.defaultdict(lambda: [0, 0., 0.])
+        for stage in self.stages:
+            if stage is None:
+                continue
+            total = totals[(stage.kind, stage.name)]
+            total[0] += 1
+            total[1] += stage.wall_time
+            total[2] += stage.cpu_time
+        return sorted(((kind, name, count, wall_time, cpu_time)
+                       for (kind, name), (count, wall_time, cpu_time) in totals.items()),
+                      key=lambda total: -total[3])
+
+    def to_json(self):
+        """Convert the profile to a JSON-serializable object.
+
+        Returns:
+          A dict with the list of 'stages' and the 'totals' per kind and name.
+        """
+        return {
+            'stages': [stage._asdict() for stage in self.stages if stage is not None],
+            'totals': [dict(zip(('kind', 'name', 'count', 'wall_time', 'cpu_time'),
+                                total))
+                       for total in self.totals()],
+        }
+
+    def write(self, file):
+        """Write the profile as JSON.
+
+        Args:
+          file: A file object to write to.
+        """
+        json.dump(self.to_json(), file, indent=2)
+        file.write('\n')
+
+
+def get_max_rss():
+    """Get the maximum resident set size of the process.
+
+    Returns:
+      An integer, in kilobytes, or None if unavailable on this platform.
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+# The profiler recording the stages, or None.
+_ACTIVE = None
+
+
+def is_active():
+    """Return true if a profiler is recording the stages."""
+    return _ACTIVE is not None
+
+
+@contextlib.contextmanager
+def activate(profiler):
+    """Record the stages run within this context to a profiler.
+
+    If the profiler traces memory, tracing is started and stopped here.
+
+    Args:
+      profiler: An instance of Profiler.
+    Yields:
+      The profiler.
+    """
+    global _ACTIVE  # pylint: disable=global-statement
+    previous = _ACTIVE
+    _ACTIVE = profiler
+    start_tracing = profiler.trace_memory and not tracemalloc.is_tracing()
+    if start_tracing:
+        tracemalloc.start()
+    if profiler.cprofile_dir:
+        os.makedirs(profiler.cprofile_dir, exist_ok=True)
+    try:
+        yield profiler
+    finally:
+        if start_tracing:
+            tracemalloc.stop()
+        _ACTIVE = previous
+
+
+@contextlib.contextmanager
+def stage(name, kind, entries=None, filename=None, cprofile=True):
+    """Profile a stage with the active profiler, if there is one.
+
+    Args:
+      name: A string, the name of the stage.
+      kind: A string, the kind of stage, e.g. 'plugin'.
+      entries: The list of entries given to the stage, or None.
+      filename: The name of the input file processed by the stage, or None.
+      cprofile: A boolean, false if the stage should not get a cProfile dump of
+        its own, usually because it contains stages which should.
+    Yields:
+      A StageCounts instance, whose 'entries_out' attribute may be set to the
+      number of entries produced by the stage.
+    """
+    if _ACTIVE is None:
+        yield StageCounts()
+    else:
+        with _ACTIVE.stage(name, kind, entries, filename, cprofile) as counts:
+            yield counts
@@ -0,0 +1,87 @@
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from beancount.utils import profiler
+from beancount import loader
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_inactive(self):
+        self.assertFalse(profiler.is_active())
+        with profiler.stage('name', 'phase', []) as counts:
+            counts.entries_out = 1
+
+    def test_stages(self):
+        prof = profiler.Profiler()
+        with profiler.activate(prof):
+            self.assertTrue(profiler.is_active())
+            with profiler.stage('outer', 'phase', [1, 2, 3]) as counts:
+                with profiler.stage('inner', 'plugin', [1, 2, 3]) as inner_counts:
+                    inner_counts.entries_out = 4
+                with profiler.stage('inner', 'plugin', [1, 2, 3, 4]):
+                    pass
+                counts.entries_out = 4
+        self.assertFalse(profiler.is_active())
+
+        self.assertEqual([('outer', 'phase', 0, 3, 4),
+                          ('inner', 'plugin', 1, 3, 4),
+                          ('inner', 'plugin', 1, 4, None)],
+                         [(stage.name, stage.kind, stage.depth,
+                           stage.entries_in, stage.entries_out)
+                          for stage in prof.stages])
+        self.assertTrue(all(stage.wall_time >= 0 and stage.allocated_bytes is None
+                            for stage in prof.stages))
+        self.assertEqual({('phase', 'outer', 1), ('plugin', 'inner', 2)},
+                         {(kind, name, count)
+                          for kind, name, count, _, __ in prof.totals()})
+
+        oss = io.StringIO()
+        prof.write(oss)
+        self.assertEqual(3, len(json.loads(oss.getvalue())['stages']))
+
+    def test_memory_and_cprofile(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            prof = profiler.Profiler(trace_memory=True, cprofile_dir=tmpdir)
+            with profiler.activate(prof):
+                with profiler.stage('outer', 'phase', cprofile=False):
+                    with profiler.stage('inner', 'plugin'):
+                        data = [object() for _ in range(1000)]
+            outer, inner = prof.stages
+            self.assertGreater(inner.allocated_bytes, 0)
+            self.assertGreaterEqual(inner.peak_bytes, inner.allocated_bytes)
+            self.assertIsNone(outer.cprofile_filename)
+            self.assertEqual([os.path.basename(inner.cprofile_filename)],
+                             os.listdir(tmpdir))
+            del data
+
+    def test_load(self):
+        prof = profiler.Profiler()
+        with profiler.activate(prof):
+            loader.load_string("""
+              plugin "beancount.plugins.auto_accounts"
+
+              2014-03-02 * "Something"
+                Expenses:Restaurant   50.02 USD
+                Assets:Cash
+            """, dedent=True)
+        kinds = {(stage.kind, stage.name) for stage in prof.stages}
+        for kind_name in [('phase', 'parse'),
+                          ('phase', 'booking'),
+                          ('file', 'beancount.parser.parser.parse_string'),
+                          ('plugin', 'beancount.plugins.auto_accounts'),
+                          ('validation', 'beancount.ops.validation.validate_single_pass')]:
+            self.assertIn(kind_name, kinds)
+        plugin = next(stage for stage in prof.stages
+                      if stage.name == 'beancount.plugins.auto_accounts')
+        self.assertEqual((1, 3), (plugin.entries_in, plugin.entries_out))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,5 @@
+"""
+Web server reporting front-end.
+"""
+__copyright__ = "Copyright (C) 2013-2014, 2016  Martin Blais"
+__license__ = "GNU GPLv2"
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Benchmark the engines computing the stable hashes of entries.
+
+This loads a ledger -- or, if none is given, generates one with
+scripts/example.py -- and times the hashing of all its entries with the
+original engine, which updates an md5 digest with the string of each field one
+at a time, and with the current hash_entry(), which formats amounts directly,
+memoizes the strings of costs and dates and hashes them in a single call, and
+checks that both produce the same digests. Finally, it times the search for duplicates of the
+noduplicates plugin, before and after only hashing the entries that could be
+duplicates.
+"""
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import argparse
+import datetime
+import hashlib
+import io
+import logging
+import time
+
+from beancount.core import compare
+from beancount.scripts import example
+from beancount import loader
+
+
+def original_hash_namedtuple(objtuple, ignore=frozenset()):
+    """The original implementation of compare.stable_hash_namedtuple().
+
+    Args:
+      objtuple: A tuple object or other.
+      ignore: A set of strings, attribute names to be skipped.
+    Returns:
+      A hexadecimal digest string.
+    """
+    hashobj = hashlib.md5()
+    for attr_name, attr_value in zip(objtuple._fields, objtuple):
+        if attr_name in ignore:
+            continue
+        if isinstance(attr_value, (list, set, frozenset)):
+            subhashes = set()
+            for element in attr_value:
+                if isinstance(element, tuple):
+                    subhashes.add(original_hash_namedtuple(element, ignore))
+                else:
+                    md5 = hashlib.md5()
+                    md5.update(str(element).encode())
+                    subhashes.add(md5.hexdigest())
+            for subhash in sorted(subhashes):
+                hashobj.update(subhash.encode())
+        else:
+            hashobj.update(str(attr_value).encode())
+    return hashobj.hexdigest()
+
+
+def hash_original(entries):
+    return [original_hash_namedtuple(entry, compare.IGNORED_FIELD_NAMES)
+            for entry in entries]
+
+
+def hash_current(entries):
+    memo = {}
+    return [compare.hash_entry(entry, memo) for entry in entries]
+
+
+def timed(name, function, *args):
+    """Call a function and log the time it took."""
+    time_before = time.time()
+    result = function(*args)
+    logging.info("%-32s %8.3f secs", name, time.time() - time_before)
+    return result
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(levelname)-8s: %(message)s')
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('filename', nargs='?', action='store',
+                        help="Beancount input file; an example is generated if absent")
+    parser.add_argument('--years', action='store', type=int, default=10,
+                        help="Number of years to generate the example file over")
+    args = parser.parse_args()
+
+    if args.filename:
+        entries, errors, _ = timed('load', loader.load_file, args.filename)
+    else:
+        date_end = datetime.date(2020, 1, 1)
+        date_begin = date_end.replace(year=date_end.year - args.years)
+        oss = io.StringIO()
+        example.write_example_file(datetime.date(1980, 5, 12), date_begin, date_end,
+                                   True, oss)
+        entries, errors, _ = timed('load', loader.load_string, oss.getvalue())
+    logging.info("Loaded %d entries, %d errors.", len(entries), len(errors))
+
+    original = timed('original (md5 per field)', hash_original, entries)
+    current = timed('hash_entry', hash_current, entries)
+    assert original == current
+
+    _, errors = timed('hash_entries', compare.hash_entries, entries)
+    assert errors == timed('find_duplicate_entries', compare.find_duplicate_entries,
+                           entries)
+
+
+if __name__ == '__main__':
+    main()
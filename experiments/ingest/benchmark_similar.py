@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Benchmark duplicate detection of imported entries against a large ledger.
+
+This generates a ledger with scripts/example.py and replicates its transactions
+over the same dates, with scaled amounts, until it contains the requested number
+of entries. A sample of its most recent transactions with slightly altered dates and
+amounts, and as many with very different amounts, are then checked for
+duplicates with the pairwise comparison over a window of dates and with the
+SimilarityIndex. Both methods must find the same duplicates.
+"""
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import argparse
+import datetime
+import io
+import logging
+import random
+import time
+
+from beancount.core.number import D
+from beancount.core import data
+from beancount.ingest import similar
+from beancount.scripts import example
+from beancount import loader
+
+
+def scale_entry(entry, factor, days=0):
+    """Scale the units of a transaction and optionally shift its date.
+
+    Args:
+      entry: A Transaction instance.
+      factor: A Decimal, the factor to multiply the units by.
+      days: An integer, the number of days to shift the date by.
+    Returns:
+      A new Transaction instance.
+    """
+    postings = [posting._replace(units=posting.units._replace(
+        number=(posting.units.number * factor).quantize(posting.units.number)))
+                for posting in entry.postings]
+    return entry._replace(date=entry.date + datetime.timedelta(days=days),
+                          postings=postings)
+
+
+def generate_ledger(num_entries, date_begin, date_end, rnd):
+    """Generate a sorted list of transactions.
+
+    Args:
+      num_entries: An integer, the number of transactions to produce.
+      date_begin: A datetime.date instance, the first date of the example file.
+      date_end: A datetime.date instance, the last date of the example file.
+      rnd: An instance of random.Random.
+    Returns:
+      A list of Transaction instances, sorted by date.
+    """
+    oss = io.StringIO()
+    example.write_example_file(datetime.date(1980, 5, 12), date_begin, date_end,
+                               True, oss)
+    entries, _, __ = loader.load_string(oss.getvalue())
+    txns = list(data.filter_txns(entries))
+    logging.info("Generated %d transactions.", len(txns))
+
+    # Replicate the transactions over the same dates, to make the ledger dense.
+    ledger = list(txns)
+    while len(ledger) < num_entries:
+        factor = D(rnd.uniform(1.2, 50)).quantize(D('0.01'))
+        ledger.extend(scale_entry(entry, factor) for entry in txns)
+    del ledger[num_entries:]
+    ledger.sort(key=data.entry_sortkey)
+    return ledger
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(levelname)-8s: %(message)s')
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('-n', '--num-entries', action='store', type=int,
+                        default=1000000,
+                        help="Number of transactions in the existing ledger")
+    parser.add_argument('-i', '--num-imported', action='store', type=int,
+                        default=500,
+                        help="Number of imported transactions to check")
+    parser.add_argument('--import-days', action='store', type=int, default=31,
+                        help=("Number of days at the end of the ledger to sample "
+                              "the imported transactions from"))
+    parser.add_argument('--years', action='store', type=int, default=3,
+                        help="Number of years to generate the example file over")
+    parser.add_argument('-s', '--seed', action='store', type=int, default=0,
+                        help="Seed for the random number generator")
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    date_end = datetime.date(2020, 1, 1)
+    date_begin = date_end.replace(year=date_end.year - args.years)
+    ledger = generate_ledger(args.num_entries, date_begin, date_end, rnd)
+    logging.info("Existing ledger: %d transactions.", len(ledger))
+
+    # Like a monthly import, sample the transactions of the last days. Half of
+    # the imported transactions are near-copies of existing ones.
+    import_begin = ledger[-1].date - datetime.timedelta(days=args.import_days)
+    recent = list(data.iter_entry_dates(ledger, import_begin, date_end))
+    num_copies = args.num_imported // 2
+    imported = [scale_entry(entry, D('1.01'), rnd.randint(-1, 1))
+                for entry in rnd.sample(recent, num_copies)]
+    imported.extend(scale_entry(entry, D('1.5'), rnd.randint(-1, 1))
+                    for entry in rnd.sample(recent, args.num_imported - num_copies))
+    imported.sort(key=data.entry_sortkey)
+
+    time_before = time.time()
+    pairwise = similar.find_similar_entries(imported, ledger,
+                                            similar.SimilarityComparator())
+    time_pairwise = time.time() - time_before
+    logging.info("Pairwise: %d duplicates in %.3f secs.", len(pairwise), time_pairwise)
+
+    time_before = time.time()
+    indexed = similar.find_similar_entries(imported, ledger)
+    time_indexed = time.time() - time_before
+    logging.info("Indexed: %d duplicates in %.3f secs.", len(indexed), time_indexed)
+
+    assert ([(id(entry), id(source)) for entry, source in pairwise] ==
+            [(id(entry), id(source)) for entry, source in indexed])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Benchmark the loading and realization of a large ledger.
+
+This generates a ledger with scripts/example.py and replicates its contents
+over the same dates until it is the requested multiple of the example's size,
+renaming the accounts of each copy so that the copies remain independent. It
+then times the loading of that ledger, the realization of its entries, and the
+computation of the balances per account, once with the per-posting
+Inventory.add_position() and once with the batched Inventory.add_positions(),
+and checks that both produce the same balances.
+"""
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import argparse
+import collections
+import datetime
+import io
+import logging
+import re
+import time
+
+from beancount.core import data
+from beancount.core import inventory
+from beancount.core import realization
+from beancount.ops import summarize
+from beancount.scripts import example
+from beancount import loader
+
+
+def generate_ledger(scale, date_begin, date_end):
+    """Generate the text of a ledger, a multiple of the example file.
+
+    Args:
+      scale: An integer, the number of copies of the example file.
+      date_begin: A datetime.date instance, the first date of the example file.
+      date_end: A datetime.date instance, the last date of the example file.
+    Returns:
+      A string, the contents of the ledger.
+    """
+    oss = io.StringIO()
+    example.write_example_file(datetime.date(1980, 5, 12), date_begin, date_end,
+                               True, oss)
+    text = oss.getvalue()
+
+    # Keep the options and the commodities, with their metadata, only once.
+    header, body = [], []
+    lines = body
+    for line in text.splitlines():
+        if re.match(r'(option|plugin|\d{4}-\d\d-\d\d commodity)', line):
+            lines = header
+        elif not re.match(r'\s', line):
+            lines = body
+        lines.append(line)
+    body = '\n'.join(body)
+
+    copies = [re.sub(r'\b(Assets|Liabilities|Equity|Income|Expenses):',
+                     r'\1:C{}:'.format(index), body)
+              for index in range(scale)]
+    return '\n'.join(header + copies)
+
+
+def balances_by_posting(entries):
+    """Compute the balances per account, one posting at a time.
+
+    Args:
+      entries: A list of directives.
+    Returns:
+      A dict of account name to Inventory.
+    """
+    balances = collections.defaultdict(inventory.Inventory)
+    for entry in data.filter_txns(entries):
+        for posting in entry.postings:
+            balances[posting.account].add_position(posting)
+    return balances
+
+
+def timed(name, function, *args):
+    """Call a function and log the time it took."""
+    time_before = time.time()
+    result = function(*args)
+    logging.info("%-32s %8.3f secs", name, time.time() - time_before)
+    return result
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(levelname)-8s: %(message)s')
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('-s', '--scale', action='store', type=int, default=100,
+                        help="Number of copies of the example file")
+    parser.add_argument('--years', action='store', type=int, default=3,
+                        help="Number of years to generate the example file over")
+    args = parser.parse_args()
+
+    date_end = datetime.date(2020, 1, 1)
+    date_begin = date_end.replace(year=date_end.year - args.years)
+    text = generate_ledger(args.scale, date_begin, date_end)
+
+    entries, errors, _ = timed('load', loader.load_string, text)
+    logging.info("Loaded %d entries, %d errors.", len(entries), len(errors))
+
+    timed('realize', realization.realize, entries)
+    by_posting = timed('balances (add_position)', balances_by_posting, entries)
+    batched, _ = timed('balances (add_positions)', summarize.balance_by_account,
+                       entries)
+    assert by_posting == batched
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Benchmark running the validation plugins in parallel.
+
+This loads a ledger -- or, if none is given, generates one with
+scripts/example.py -- adds a list of validation plugins to it, and times running
+the transformations of the loader on its booked entries, serially and with the
+validation plugins run in parallel in a pool of processes, and checks that both
+produce the same entries and errors. The gain depends on the number of cores.
+"""
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import argparse
+import datetime
+import io
+import logging
+import time
+from unittest import mock
+
+from beancount.parser import booking
+from beancount.parser import parser
+from beancount.scripts import example
+from beancount import loader
+
+
+# The validation plugins to run.
+PLUGINS = [
+    'beancount.plugins.check_commodity',
+    'beancount.plugins.leafonly',
+    'beancount.plugins.nounused',
+    'beancount.plugins.onecommodity',
+    'beancount.plugins.coherent_cost',
+    'beancount.plugins.noduplicates',
+    'beancount.plugins.sellgains',
+    'beancount.plugins.check_average_cost',
+]
+
+
+def run_transformations(entries, errors, options_map, processes):
+    with mock.patch.object(loader, 'PLUGIN_PROCESSES', processes):
+        return loader.run_transformations(list(entries), errors, options_map, None)
+
+
+def timed(name, function, *args):
+    """Call a function and log the time it took."""
+    time_before = time.time()
+    result = function(*args)
+    logging.info("%-32s %8.3f secs", name, time.time() - time_before)
+    return result
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(levelname)-8s: %(message)s')
+    parser_ = argparse.ArgumentParser(description=__doc__.strip())
+    parser_.add_argument('filename', nargs='?', action='store',
+                         help="Beancount input file; an example is generated if absent")
+    parser_.add_argument('--years', action='store', type=int, default=10,
+                         help="Number of years to generate the example file over")
+    parser_.add_argument('--processes', action='store', type=int, default=4,
+                         help="Number of worker processes")
+    args = parser_.parse_args()
+
+    if args.filename:
+        with open(args.filename) as infile:
+            contents = infile.read()
+    else:
+        date_end = datetime.date(2020, 1, 1)
+        date_begin = date_end.replace(year=date_end.year - args.years)
+        oss = io.StringIO()
+        example.write_example_file(datetime.date(1980, 5, 12), date_begin, date_end,
+                                   True, oss)
+        contents = oss.getvalue()
+    contents = ''.join('plugin "{}"\n'.format(plugin) for plugin in PLUGINS) + contents
+
+    entries, errors, options_map = timed('parse', parser.parse_string, contents)
+    entries, errors = timed('book', booking.book, entries, options_map)
+    logging.info("Booked %d entries, %d errors.", len(entries), len(errors))
+
+    serial = timed('serial', run_transformations, entries, errors, options_map, 0)
+    parallel = timed('parallel ({} processes)'.format(args.processes),
+                     run_transformations, entries, errors, options_map, args.processes)
+    assert serial[0] == parallel[0]
+    assert ([error.message for error in serial[1]] ==
+            [error.message for error in parallel[1]])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Benchmark the sorting of entries with cached sort keys.
+
+This loads a ledger -- or, if none is given, generates one with
+scripts/example.py -- and times checking and sorting its entries a number of
+times, as the loader does after each plugin, computing the keys with
+entry_sortkey() every time, and with a SortKeyCache, which computes them only
+once, and checks that both produce the same order.
+"""
+__copyright__ = "Copyright (C) 2026  Martin Blais"
+__license__ = "GNU GPLv2"
+
+import argparse
+import datetime
+import io
+import logging
+import random
+import time
+
+from beancount.core import data
+from beancount.scripts import example
+from beancount.utils import misc_utils
+from beancount import loader
+
+
+def sort_original(entries_list):
+    for entries in entries_list:
+        if not misc_utils.is_sorted(entries, key=data.entry_sortkey):
+            entries.sort(key=data.entry_sortkey)
+
+
+def sort_cached(entries_list):
+    sort_keys = data.SortKeyCache()
+    for entries in entries_list:
+        sort_keys.sort(entries)
+
+
+def timed(name, function, *args):
+    """Call a function and log the time it took."""
+    time_before = time.time()
+    result = function(*args)
+    logging.info("%-32s %8.3f secs", name, time.time() - time_before)
+    return result
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(levelname)-8s: %(message)s')
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('filename', nargs='?', action='store',
+                        help="Beancount input file; an example is generated if absent")
+    parser.add_argument('--years', action='store', type=int, default=10,
+                        help="Number of years to generate the example file over")
+    parser.add_argument('--repeat', action='store', type=int, default=10,
+                        help="Number of times to sort the entries")
+    args = parser.parse_args()
+
+    if args.filename:
+        entries, errors, _ = timed('load', loader.load_file, args.filename)
+    else:
+        date_end = datetime.date(2020, 1, 1)
+        date_begin = date_end.replace(year=date_end.year - args.years)
+        oss = io.StringIO()
+        example.write_example_file(datetime.date(1980, 5, 12), date_begin, date_end,
+                                   True, oss)
+        entries, errors, _ = timed('load', loader.load_string, oss.getvalue())
+    logging.info("Loaded %d entries, %d errors.", len(entries), len(errors))
+
+    # Alternate between sorted lists and lists with a few entries out of place.
+    shuffled = list(entries)
+    for index in random.Random(0).sample(range(len(shuffled)), 100):
+        shuffled.append(shuffled.pop(index))
+    inputs = [entries if index % 2 == 0 else shuffled
+              for index in range(args.repeat)]
+
+    original_inputs = [list(entries) for entries in inputs]
+    cached_inputs = [list(entries) for entries in inputs]
+    timed('entry_sortkey', sort_original, original_inputs)
+    timed('SortKeyCache', sort_cached, cached_inputs)
+    assert all(list(map(id, original)) == list(map(id, cached))
+               for original, cached in zip(original_inputs, cached_inputs))
+
+
+if __name__ == '__main__':
+    main()